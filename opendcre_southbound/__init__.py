@@ -44,8 +44,11 @@ from itertools import count
 
 import constants as const
 from errors import OpenDCREException
+from registration import RegistrationJob
 
-from utils import ThreadPool, cache_registration_dependencies
+from snapshot import SnapshotRevalidator, StartupSnapshot
+from telemetry import TelemetryPoller, TelemetryStore
+from utils import DeviceRouter, ScanCache, ThreadPool, cache_registration_dependencies
 
 from opendcre_southbound.devicebus.devices.plc import *
 from opendcre_southbound.devicebus.devices.ipmi import *
@@ -53,6 +56,9 @@ from opendcre_southbound.devicebus.devices.redfish.redfish_device import *
 
 from opendcre_southbound.blueprints import core
 from opendcre_southbound.devicebus.command_factory import CommandFactory
+from opendcre_southbound.devicebus.devices.lan_device import LANDevice
+from opendcre_southbound.devicebus.response_cache import ResponseCache
+from opendcre_southbound.devicebus.sequence import SequenceAllocator
 
 from vapor_common.util import setup_json_errors
 from vapor_common.vapor_config import ConfigManager
@@ -77,6 +83,24 @@ SCAN_CACHE_FILE = cfg.scan_cache_file       # file which the scan cache will be
 CACHE_TIMEOUT = cfg.cache_timeout           # the time it takes for the cache to expire
 # noinspection PyUnresolvedReferences
 CACHE_THRESHOLD = cfg.cache_threshold       # the max number of items the cache can store
+# noinspection PyUnresolvedReferences
+SCAN_GZIP = getattr(cfg, 'scan_gzip', False)  # serve gzip compressed scan results to clients accepting them
+# noinspection PyUnresolvedReferences
+SCAN_THREADS = getattr(cfg, 'scan_threads', 16)  # the max number of devicebus interfaces to scan concurrently
+# noinspection PyUnresolvedReferences
+SCAN_TIMEOUT = getattr(cfg, 'scan_timeout', None)  # the time each devicebus interface is given to scan
+# noinspection PyUnresolvedReferences
+CACHE_TTLS = getattr(cfg, 'cache_ttls', None) or {}  # per-command overrides of the time responses are cached
+# noinspection PyUnresolvedReferences
+TELEMETRY_POLL_INTERVALS = getattr(cfg, 'telemetry_poll_intervals', None) or {}  # poll interval per devicebus type
+# noinspection PyUnresolvedReferences
+STARTUP_SNAPSHOT_FILE = getattr(cfg, 'startup_snapshot_file', None)  # file which LAN device state is snapshot to
+# noinspection PyUnresolvedReferences
+ASYNC_REGISTRATION = getattr(cfg, 'async_registration', False)  # register LAN devices in the background
+# noinspection PyUnresolvedReferences
+REGISTRATION_RETRY_BACKOFF = getattr(cfg, 'registration_retry_backoff', 5)  # first wait before a failed retry
+# noinspection PyUnresolvedReferences
+REGISTRATION_RETRY_MAX_BACKOFF = getattr(cfg, 'registration_retry_max_backoff', 300)  # max wait between retries
 
 app = Flask(__name__)
 setup_json_errors(app)
@@ -98,21 +122,17 @@ device_registrars = {
 
 
 def _count(start=0x00, step=0x01):
-    """ Generator whose next() method returns consecutive values until it reaches
-    0xff, then wraps back to 0x00.
+    """ Create the sequence number allocator for the app, whose next() method
+    returns consecutive values until it reaches 0xff, then wraps back to 0x00.
 
     Args:
         start (int): the value at which to start the count
         step (int): the amount to increment the count
 
     Returns:
-        int: the next count value.
+        SequenceAllocator: the thread-safe sequence number allocator.
     """
-    n = start
-    while True:
-        yield n
-        n += step
-        n %= 0xff
+    return SequenceAllocator(start=start, step=step)
 
 
 ################################################################################
@@ -161,6 +181,14 @@ def register_app_devices(app):
 
     _failed_registration = False
 
+    # when registering asynchronously, LAN-based devices (IPMI, Redfish) are registered
+    # by a background job, and are published to the app as each comes up
+    _job = None
+    if ASYNC_REGISTRATION:
+        _job = RegistrationJob(
+            app.config, backoff=REGISTRATION_RETRY_BACKOFF, max_backoff=REGISTRATION_RETRY_MAX_BACKOFF
+        )
+
     for device_interface, device_config in DEVICES.iteritems():
         device_interface = device_interface.lower()
 
@@ -172,7 +200,12 @@ def register_app_devices(app):
             )
 
         try:
-            _registrar.register(device_config, app.config, app_cache)
+            if _job is not None and issubclass(_registrar, LANDevice):
+                for name, factory in _registrar.get_registrations(device_config, app.config):
+                    _job.add(device_interface, name, factory)
+                _job.max_workers = max(_job.max_workers, device_config.get('device_initializer_threads', 1))
+            else:
+                _registrar.register(device_config, app.config, app_cache)
         except Exception as e:
             logger.error('Failed to register {} device: {}'.format(device_interface, device_config))
             logger.exception(e)
@@ -187,6 +220,19 @@ def register_app_devices(app):
     app.config['SINGLE_BOARD_DEVICES'] = _single_board_devices
     app.config['RANGE_DEVICES'] = _range_devices
 
+    # build the routing table used to look up the devicebus interface for a board
+    app.config['DEVICE_ROUTER'] = DeviceRouter.from_app_config(app.config)
+
+    # share the response cache between all of the registered devicebus interfaces
+    for device in _devices.values():
+        device.response_cache = app.config.get('RESPONSE_CACHE')
+
+    # with the app's device cache and routing table in place, start registering the
+    # LAN-based devices in the background
+    app.config['REGISTRATION_JOB'] = _job
+    if _job is not None:
+        _job.start()
+
 
 def main(serial_port=None, hardware=None):
     """ Main method to run the flask server.
@@ -221,6 +267,16 @@ def main(serial_port=None, hardware=None):
         app.config['COUNTER'] = _count(start=0x01, step=0x01)
         app.config['ENDPOINT_PREFIX'] = PREFIX
         app.config['SCAN_CACHE'] = SCAN_CACHE_FILE
+        app.config['SCAN_CACHE_STORE'] = ScanCache(SCAN_CACHE_FILE)
+        app.config['SCAN_GZIP'] = SCAN_GZIP
+        app.config['SCAN_THREADS'] = SCAN_THREADS
+        app.config['SCAN_TIMEOUT'] = SCAN_TIMEOUT
+        app.config['TELEMETRY_STORE'] = TelemetryStore()
+        app.config['RESPONSE_CACHE'] = ResponseCache(CACHE_TIMEOUT, CACHE_THRESHOLD, CACHE_TTLS)
+
+        # the optional startup snapshot, which IPMI and Redfish devices are restored from
+        # (without talking to the devices) on startup, if they are in it
+        app.config['STARTUP_SNAPSHOT'] = StartupSnapshot(STARTUP_SNAPSHOT_FILE) if STARTUP_SNAPSHOT_FILE else None
 
         # define board offsets -- e.g. the offset within the board_id space to add to the
         # board_id. this should increase monotonically for each board for each device interface
@@ -249,6 +305,23 @@ def main(serial_port=None, hardware=None):
         for v in app.config['DEVICES'].values():
             logger.info('... {}'.format(v))
 
+        # start the optional background poller, which keeps the latest reading for
+        # each device in the telemetry store
+        app.config['TELEMETRY_POLLER'] = TelemetryPoller(
+            app, app.config['TELEMETRY_STORE'], TELEMETRY_POLL_INTERVALS,
+            max_workers=SCAN_THREADS, timeout=SCAN_TIMEOUT
+        )
+        app.config['TELEMETRY_POLLER'].start()
+
+        # with the app up, revalidate the devices restored from the startup snapshot in
+        # the background, then save the snapshot for the next startup
+        if app.config['STARTUP_SNAPSHOT'] is not None:
+            app.config['SNAPSHOT_REVALIDATOR'] = SnapshotRevalidator(
+                app, app.config['STARTUP_SNAPSHOT'], max_workers=SCAN_THREADS, timeout=SCAN_TIMEOUT,
+                wait_for=app.config['REGISTRATION_JOB'].attempted if app.config['REGISTRATION_JOB'] else None
+            )
+            app.config['SNAPSHOT_REVALIDATOR'].start()
+
         logger.info('Endpoint Setup and Registration Complete')
         logger.info('----------------------------------------')
 
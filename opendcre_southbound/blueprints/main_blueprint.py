@@ -27,21 +27,28 @@ You should have received a copy of the GNU General Public License
 along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
 import copy
-import json
-from uuid import UUID
+import time
 
-from flask import current_app, Blueprint, jsonify
+from flask import current_app, Blueprint, jsonify, request
 
 import opendcre_southbound.constants as const
 from opendcre_southbound import definitions
 from opendcre_southbound.devicebus.devices import *
 from opendcre_southbound.errors import *
 from opendcre_southbound.location import *
+from opendcre_southbound.telemetry import TelemetryStore
 from opendcre_southbound.utils import (
     check_valid_board,
     check_valid_board_and_device,
+    diff_scan_results,
+    fan_out,
+    get_device_router,
     get_device_type_code,
     get_scan_cache,
+    get_scan_cache_generation,
+    get_scan_payload,
+    is_scan_cache_stale,
+    ScanResults,
     write_scan_cache,
     get_device_instance
 )
@@ -65,7 +72,7 @@ def _lookup_by_id_range(board_id):
 
     Returns:
         dict: a dictionary of all the devices which map to the given
-            board id range.
+            board id range. this is shared, so it must not be modified.
     """
     device = get_device_instance(board_id)
 
@@ -73,7 +80,7 @@ def _lookup_by_id_range(board_id):
     if not isinstance(device, (PLCDevice, IPMIDevice, RedfishDevice)):
         return None
 
-    return {uid: dev for uid, dev in current_app.config['DEVICES'].iteritems() if isinstance(dev, device.__class__)}
+    return get_device_router().get_interfaces(device)
 
 
 def get_device_interfaces(board_id):
@@ -91,37 +98,14 @@ def get_device_interfaces(board_id):
         list[DevicebusInterface]: the found devicebus interfaces, if any. If no
             interfaces are found, None is returned.
     """
-    _cache = get_scan_cache()
-    cache_modified = False
-    if _cache:
-        devices = None
-        for rack in _cache['racks']:
-            for board in rack['boards']:
-                if 'device_interface' in board:
-                    interface_ids = map(UUID, board['device_interface'])
-                    devices = [current_app.config['DEVICES'].get(iid) for iid in interface_ids]
-                else:
-                    _devices = _lookup_by_id_range(board_id)
-
-                    devices = _devices.values()
-                    device_ids = _devices.keys()
-
-                    board['device_interface'] = device_ids
-                    cache_modified = True
-                break
-
-        if cache_modified:
-            write_scan_cache(_cache)
-
-    else:
-        devices = _lookup_by_id_range(board_id).values()
+    devices = _lookup_by_id_range(board_id)
 
     if not devices:
         # None is returned here in cases where no devices are found. the upstream caller
         # should handle this case appropriately, likely by raising an exception.
         return None
     else:
-        return devices
+        return devices.values()
 
 
 def add_device_mapping(scan_result):
@@ -133,11 +117,12 @@ def add_device_mapping(scan_result):
     Returns:
         dict: the scan results augmented with device interface ids
     """
+    router = get_device_router()
     res = copy.deepcopy(scan_result)
     for rack in res['racks']:
         for board in rack['boards']:
-            interfaces = _lookup_by_id_range(int(board['board_id'], 16)).keys()
-            board['device_interface'] = map(str, interfaces)
+            device = get_device_instance(int(board['board_id'], 16))
+            board['device_interface'] = router.get_interface_ids(device)
     return res
 
 
@@ -148,17 +133,23 @@ def filter_cache_meta(cache):
     It prevents internal cache annotations from being surfaced, making the scan
     results cleaner and less confusing to the endpoint consumer.
 
+    The given cache is not modified -- a filtered copy of it is returned.
+
     Args:
         cache (dict): the cache as a dictionary
 
     Returns:
-        dict: the cache stripped of metainfo.
+        dict: a copy of the cache stripped of metainfo.
     """
+    filtered = dict(cache)
+    filtered['racks'] = []
     for rack in cache['racks']:
-        for board in rack['boards']:
-            if 'device_interface' in board:
-                del board['device_interface']
-    return cache
+        rack = dict(rack)
+        rack['boards'] = [
+            {k: v for k, v in board.iteritems() if k != 'device_interface'} for board in rack['boards']
+        ]
+        filtered['racks'].append(rack)
+    return filtered
 
 
 @core.route(url('/version/<rack_id>/<board_num>'), methods=['GET'])
@@ -188,63 +179,126 @@ def get_board_version(rack_id, board_num):
     return jsonify(response.data)
 
 
-def _merge_list(accumulator, l, key_name):
-    """ Merge list l[key_name] into the accumulator[key_name] list.
+def _scan_all_devices(force=False, incremental=False):
+    """ Scan all racks, boards, and devices on all of the configured devicebus
+    interfaces.
+
+    The devicebus interfaces are scanned concurrently, in a bounded pool of
+    worker threads, and each interface is given a timeout to complete its scan.
+    The results are merged as each scan completes. If some, but not all, of
+    the scans fail, the results of the successful scans are returned along
+    with an error for each failed scan.
 
     Args:
-        accumulator (dict): a dict containing the current accumulation in
-            accumulator[keyname]. also the merge result.
-        l (dict): a dict containing the list to merge in at l[keyname]
-        key_name: the name of the key common to both dicts, each of which
-            is a list
+        force (bool): whether the devicebus interfaces should ignore any scan
+            results they have cached and re-scan.
+        incremental (bool): whether the devicebus interfaces should only re-scan
+            the boards which they determine to have changed.
 
     Returns:
-        dict: the accumulator
+        tuple(dict, list[dict]): the merged scan results, and the errors for the
+            devicebus interfaces which failed to scan.
+
+    Raises:
+        the exception for the failed scan, if all of the scans fail.
     """
-    # If there is no l or no key at l[key_name] there is nothing to merge.
-    if not l or key_name not in l:
-        return
+    devices = current_app.config['DEVICES'].values()
+
+    # the commands are made here, rather than in the worker threads, since the
+    # worker threads run outside of the app context, so current_app (and the
+    # command factory held in its config) is not available to them
+    commands = {}
+    for device in devices:
+        commands[device.device_uuid] = current_app.config['CMD_FACTORY'].get_scan_all_command({
+            'force': force,
+            'incremental': incremental
+        })
 
-    # If l[keyname] is None or length zero there is nothing to merge.
-    if (l[key_name] is None) or (len(l[key_name]) == 0):
-        return
+    def _scan(_device):
+        return _device.handle(commands[_device.device_uuid]).data
 
-    # Check for already accumulated list items to de-dup.
-    if key_name not in accumulator[key_name]:
-        # We have something to merge. If there is no list in the accumulator
-        # at accumulator[key_name], make one.
-        if key_name not in accumulator:
-            accumulator[key_name] = list()
-        accumulator[key_name].extend(l[key_name])
+    scan_results = ScanResults()
+    errors = []
+    failure = None
 
+    for device, data, exc_info in fan_out(
+            _scan,
+            devices,
+            max_workers=current_app.config.get('SCAN_THREADS', 16),
+            timeout=current_app.config.get('SCAN_TIMEOUT')):
+        if exc_info is None:
+            scan_results.merge(data, source=device.device_uuid)
+        else:
+            logger.error('Failed to scan {}: {}'.format(device, exc_info[1]))
+            errors.append({
+                'device_interface': str(device.device_uuid),
+                'device': str(device),
+                'error': str(exc_info[1])
+            })
+            failure = failure or exc_info
 
-def _merge_scan_results(d, u):
-    """ Merge two sets of scan results together
+    if devices and len(errors) == len(devices):
+        raise failure[0], failure[1], failure[2]
 
-    Args:
-        d (dict): accumulator for merged results
-        u (dict): results to merge into u
+    return scan_results.to_dict(), errors
+
+
+def _get_scan_results():
+    """ Get the scan results for all racks, boards, and devices. If there are
+    cached scan results, those are used. Otherwise, or if the cached results are
+    stale (e.g. a devicebus interface has been registered in the background since
+    they were cached), all devices are scanned and the results are cached.
+
+    Results are only cached if all devices were scanned successfully. If not,
+    the partial results are returned, with the scan 'errors' added to them.
+
+    Returns:
+        dict: the scan results. if from the cache, this is shared, so it must
+            not be modified.
+    """
+    _cache = get_scan_cache()
+    if not _cache or is_scan_cache_stale():
+        generation = get_scan_cache_generation()
+        scan_response, errors = _scan_all_devices()
+        if errors:
+            # partial results are not cached, so the failed devices are scanned
+            # again on the next request
+            scan_response['errors'] = errors
+            return scan_response
+
+        write_scan_cache(add_device_mapping(scan_response), generation)
+        _cache = get_scan_cache()
+    return _cache
+
+
+def _scan_cache_response():
+    """ Build the response for the cached scan results.
+
+    The response body is pre-rendered and tagged with a strong ETag, so the
+    cache is only re-serialized when it changes. Requests with a matching
+    If-None-Match header are answered with 304 Not Modified, and a gzip
+    compressed body is sent to clients which accept it (if enabled).
+
+    Returns:
+        Response: the scan results response.
     """
-    # For every rack in u.
-    if u is not None:
-        if 'racks' in u:
-            for u_rack in u['racks']:
-                has_rack = False
-                # Find rack in d.
-                for d_rack in d['racks']:
-                    if d_rack['rack_id'] == u_rack['rack_id']:
-                        # Found the rack. Merge each of the following fields.
-                        has_rack = True
-                        _merge_list(d_rack, u_rack, 'boards')
-                        _merge_list(d_rack, u_rack, 'hostnames')
-                        _merge_list(d_rack, u_rack, 'ip_addresses')
-
-                # First rack in the accumulator. Add it.
-                if not has_rack:
-                    if 'racks' not in d:
-                        d['racks'] = list()
-                    d['racks'].append(u_rack)
-    return d
+    payload = get_scan_payload(render=filter_cache_meta)
+    if payload is None:
+        return jsonify({'racks': []})
+
+    use_gzip = current_app.config.get('SCAN_GZIP', False)
+    if use_gzip and 'gzip' in request.accept_encodings:
+        response = current_app.response_class(payload.gzip_body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(payload.gzip_etag)
+    else:
+        response = current_app.response_class(payload.body, mimetype='application/json')
+        response.set_etag(payload.etag)
+
+    if use_gzip:
+        response.vary.add('Accept-Encoding')
+
+    return response.make_conditional(request)
 
 
 @core.route(url('/scan'), methods=['GET'])
@@ -257,21 +311,10 @@ def scan_all():
     Raises:
         Returns a 500 error if the scan command fails.
     """
-    scan_response = {'racks': []}
-
-    _cache = get_scan_cache()
-    if _cache:
-        return jsonify(filter_cache_meta(_cache))
-
-    for _id, device in current_app.config['DEVICES'].iteritems():
-        cmd = current_app.config['CMD_FACTORY'].get_scan_all_command({
-            'force': False
-        })
-        response = device.handle(cmd)
-        scan_response = _merge_scan_results(scan_response, response.data)
-
-    write_scan_cache(add_device_mapping(scan_response))
-    return jsonify(scan_response)
+    scan_results = _get_scan_results()
+    if 'errors' in scan_results:
+        return jsonify(scan_results)
+    return _scan_cache_response()
 
 
 @core.route(url('/scan/force'))
@@ -286,16 +329,45 @@ def force_scan():
     Raises:
         Returns a 500 error if the scan command fails.
     """
-    scan_response = {'racks': []}
+    generation = get_scan_cache_generation()
+    scan_response, errors = _scan_all_devices(force=True)
+    if errors:
+        # partial results do not replace the cached results
+        scan_response['errors'] = errors
+        return jsonify(scan_response)
 
-    for _id, device in current_app.config['DEVICES'].iteritems():
-        cmd = current_app.config['CMD_FACTORY'].get_scan_all_command({
-            'force': True,
-        })
-        response = device.handle(cmd)
-        scan_response = _merge_scan_results(scan_response, response.data)
+    write_scan_cache(add_device_mapping(scan_response), generation)
+    return _scan_cache_response()
+
+
+@core.route(url('/scan/incremental'))
+def incremental_scan():
+    """ Re-scan all racks, boards, and devices, only re-probing the boards which
+    have changed. Each devicebus interface uses a cheap check (e.g. the SDR
+    repository timestamps for IPMI, or resource ETags for Redfish) to determine
+    whether its boards have changed. If the scan is successful, it will update
+    the cache.
+
+    Returns:
+        Active devices, numbers and types from the given board(s), and the
+        changes to the boards and devices since the previous scan.
 
-    write_scan_cache(add_device_mapping(scan_response))
+    Raises:
+        Returns a 500 error if the scan command fails.
+    """
+    previous = get_scan_cache()
+    generation = get_scan_cache_generation()
+    scan_response, errors = _scan_all_devices(incremental=True)
+    if errors:
+        # partial results do not replace the cached results
+        scan_response['errors'] = errors
+        return jsonify(scan_response)
+
+    changes = diff_scan_results(previous, scan_response)
+    if not previous or any(changes.values()) or is_scan_cache_stale():
+        write_scan_cache(add_device_mapping(scan_response), generation)
+
+    scan_response['changes'] = changes
     return jsonify(scan_response)
 
 
@@ -320,8 +392,7 @@ def get_board_devices(rack_id, board_num=None):
     # FIXME: since scan by the rack is not supported yet, (v 1.3) we will
     # determine the rack results by filtering on the 'scanall' results.
     if board_num is None:
-        scanall = scan_all()
-        data = json.loads(scanall.data)
+        data = filter_cache_meta(_get_scan_results())
         for rack in data['racks']:
             if rack['rack_id'] == rack_id:
                 return jsonify({'racks': [rack]})
@@ -373,11 +444,34 @@ def read_device(rack_id, device_type, board_num, device_num):
     Returns:
         Interpreted and raw device reading, based on the specified device type.
 
+        If the `max_age` query parameter is given (in seconds) and the latest stored
+        reading for the device (e.g. from the telemetry poller) is no older than that,
+        the stored reading is returned without reading the device. Its age is given
+        in the Age header.
+
     Raises:
         Returns a 500 error if the read command fails.
     """
     board_num, device_num = check_valid_board_and_device(board_num, device_num)
 
+    max_age = request.args.get('max_age')
+    if max_age is not None:
+        try:
+            max_age = float(max_age)
+        except ValueError:
+            raise OpenDCREException('Invalid max_age specified: {}'.format(max_age))
+
+    store = current_app.config.get('TELEMETRY_STORE')
+    key = TelemetryStore.key(board_num, device_num, device_type)
+
+    if store is not None and max_age is not None:
+        entry = store.get(key, max_age)
+        if entry is not None:
+            reading, timestamp = entry
+            response = jsonify(reading)
+            response.headers['Age'] = str(int(max(0, time.time() - timestamp)))
+            return response
+
     cmd = current_app.config['CMD_FACTORY'].get_read_command({
         'board_id': board_num,
         'device_id': device_num,
@@ -386,11 +480,230 @@ def read_device(rack_id, device_type, board_num, device_num):
     })
 
     device = get_device_instance(board_num)
+    timestamp = time.time()
     response = device.handle(cmd)
 
+    if store is not None:
+        store.put(key, response.data, timestamp)
+
     return jsonify(response.data)
 
 
+def _read_devices(items):
+    """ Read a collection of devices, which may be spread across any number of
+    devicebus interfaces.
+
+    The reads are grouped by the devicebus interface which handles them, and each
+    group is handed to its interface as a batch. The groups for different interfaces
+    are read concurrently. A failure to read one device does not fail the others -
+    instead, the error is reported for that device.
+
+    Args:
+        items (list[dict]): the devices to read. each item should specify the
+            'rack_id', 'board_id', 'device_id' and 'device_type' of the device.
+
+    Returns:
+        list[dict]: the result for each item, in the same order as the given items.
+            each result contains the identifying fields of the item, along with either
+            the 'reading' for the device or an 'error' message.
+    """
+    results = []
+    groups = {}
+
+    for index, item in enumerate(items):
+        result = {
+            'rack_id': item.get('rack_id'),
+            'board_id': item.get('board_id'),
+            'device_id': item.get('device_id'),
+            'device_type': item.get('device_type')
+        }
+        results.append(result)
+
+        try:
+            board_num, device_num = check_valid_board_and_device(item['board_id'], item['device_id'])
+            device_type = item['device_type'].lower()
+
+            cmd = current_app.config['CMD_FACTORY'].get_read_command({
+                'board_id': board_num,
+                'device_id': device_num,
+                'device_type': get_device_type_code(device_type),
+                'device_type_string': device_type
+            })
+            device = get_device_instance(board_num)
+        except Exception as e:
+            result['error'] = str(e)
+            continue
+
+        groups.setdefault(device.device_uuid, (device, []))[1].append((index, cmd))
+
+    def _read_group(group):
+        device, reads = group
+        return device.handle_batch([cmd for _, cmd in reads])
+
+    # the devicebus interfaces are independent of one another, so they are read
+    # concurrently, in a bounded pool of worker threads.
+    for (device, group), responses, exc_info in fan_out(
+            _read_group,
+            groups.values(),
+            max_workers=current_app.config.get('SCAN_THREADS', 16),
+            timeout=current_app.config.get('SCAN_TIMEOUT')):
+        if exc_info is not None:
+            logger.error('Failed to read devices from {}: {}'.format(device, exc_info[1]))
+            responses = [exc_info[1]] * len(group)
+
+        for (index, _), response in zip(group, responses):
+            if isinstance(response, Exception):
+                results[index]['error'] = str(response)
+            else:
+                results[index]['reading'] = response.data
+
+    return results
+
+
+def _board_read_items(rack_id, board_num=None):
+    """ Get the readable devices for a rack, or a board within a rack, from the
+    scan results.
+
+    Args:
+        rack_id (str): the id of the rack to get the devices for.
+        board_num (str): the id of the board to get the devices for. if not
+            specified, the devices for all boards in the rack are returned.
+
+    Returns:
+        list[dict]: the devices, as items which can be passed to _read_devices.
+    """
+    scan_results = _get_scan_results()
+
+    items = []
+    for rack in scan_results['racks']:
+        if rack['rack_id'] != rack_id:
+            continue
+        for board in rack['boards']:
+            if board_num is not None and int(board['board_id'], 16) != check_valid_board(board_num):
+                continue
+            for device in board['devices']:
+                if device['device_type'] in const.READABLE_DEVICE_TYPES:
+                    items.append({
+                        'rack_id': rack_id,
+                        'board_id': board['board_id'],
+                        'device_id': device['device_id'],
+                        'device_type': device['device_type']
+                    })
+        return items
+
+    raise OpenDCREException('No rack found with id: {}'.format(rack_id))
+
+
+@core.route(url('/read'), methods=['POST'])
+def read_devices():
+    """ Get device readings for a collection of devices in a single request.
+
+    The request body is a JSON object which specifies either the devices to read,
+    e.g.
+
+        {"devices": [["thermistor", "rack_1", "00000001", "01FF"], ...]}
+
+    where each device is given as a [device_type, rack_id, board_id, device_id]
+    list, a [device_type, board_id, device_id] list, or an object with those
+    fields; or a rack (and optionally a board within the rack) to read all
+    devices on, e.g.
+
+        {"rack_id": "rack_1", "board_id": "00000001"}
+
+    Returns:
+        Interpreted device readings for each device. If reading a device fails,
+        an error is given for that device in place of its reading.
+
+    Raises:
+        Returns a 500 error if the request body is invalid.
+    """
+    body = request.get_json(force=True, silent=True)
+    if not isinstance(body, dict):
+        raise OpenDCREException('Invalid body for batch read: expected a JSON object.')
+
+    if 'devices' in body:
+        items = []
+        for device in body['devices']:
+            if isinstance(device, dict):
+                items.append(device)
+            elif isinstance(device, list) and len(device) in (3, 4):
+                items.append(dict(zip(
+                    ['device_type', 'rack_id', 'board_id', 'device_id'] if len(device) == 4 else
+                    ['device_type', 'board_id', 'device_id'],
+                    device
+                )))
+            else:
+                raise OpenDCREException('Invalid device specified for batch read: {}'.format(device))
+
+    elif 'rack_id' in body:
+        items = _board_read_items(body['rack_id'], body.get('board_id'))
+
+    else:
+        raise OpenDCREException('Batch read must specify "devices" or "rack_id".')
+
+    return jsonify({'readings': _read_devices(items)})
+
+
+@core.route(url('/read/<rack_id>'), methods=['GET'])
+@core.route(url('/read/<rack_id>/<board_num>'), methods=['GET'])
+def read_board_devices(rack_id, board_num=None):
+    """ Get device readings for all readable devices on a board, or on all boards
+    in a rack.
+
+    Args:
+        rack_id (str): The id of the rack to read devices in.
+        board_num (str): The board to read devices on. If not specified, all boards
+            in the rack are read.
+
+    Returns:
+        Interpreted device readings for each device. If reading a device fails,
+        an error is given for that device in place of its reading.
+
+    Raises:
+        Returns a 500 error if the rack is not found.
+    """
+    return jsonify({'readings': _read_devices(_board_read_items(rack_id, board_num))})
+
+
+@core.route(url('/read_all/<rack_id>/<board_num>'), methods=['GET'])
+def read_all(rack_id, board_num):
+    """ Get device readings for all sensor devices on a board in a single pass.
+
+    Where the devicebus interface for the board supports reading all of its
+    devices at once (e.g. IPMI, which reads every sensor over one session to
+    the BMC), the board is read with a single command. Otherwise, the board's
+    devices are read as a batch read.
+
+    Args:
+        rack_id (str): The id of the rack containing the board.
+        board_num (str): The board to read devices on.
+
+    Returns:
+        Interpreted device readings for each device. If reading a device fails,
+        an error is given for that device in place of its reading.
+
+    Raises:
+        Returns a 500 error if the board is not found.
+    """
+    board_id = check_valid_board(board_num)
+
+    cmd = current_app.config['CMD_FACTORY'].get_read_all_command({
+        'board_id': board_id
+    })
+
+    device = get_device_instance(board_id)
+    try:
+        response = device.handle(cmd)
+    except CommandNotSupported:
+        return jsonify({'readings': _read_devices(_board_read_items(rack_id, board_num))})
+
+    readings = response.data['readings']
+    for reading in readings:
+        reading['rack_id'] = rack_id
+
+    return jsonify({'readings': readings})
+
+
 @core.route(url('/power/<rack_id>/<board_num>/<device_num>/<power_action>'), methods=['GET'])
 @core.route(url('/power/<device_type>/<rack_id>/<board_num>/<device_num>/<power_action>'), methods=['GET'])
 @core.route(url('/power/<rack_id>/<board_num>/<device_num>'), methods=['GET'])
@@ -689,3 +1002,70 @@ def host_info(rack_id, board_num, device_num):
     response = device.handle(cmd)
 
     return jsonify(response.data)
+
+
+@core.route(url('/registration'), methods=['GET'])
+def registration_status():
+    """ Get the progress of devicebus interface registration, and the registration
+    status of each LAN-based device (IPMI, Redfish). With asynchronous registration,
+    devices are registered in the background after startup, so they may not all be
+    available yet.
+
+    Returns:
+        The overall registration status ('running' or 'complete'), the number of
+        devices in each registration state, and the status of each device.
+    """
+    job = current_app.config.get('REGISTRATION_JOB')
+    if job is not None:
+        return jsonify(job.status())
+
+    # without asynchronous registration, every device was registered on startup
+    devices = [
+        {
+            'device': str(device),
+            'devicebus': device.__class__._instance_name,
+            'status': 'registered',
+            'attempts': 1,
+            'board_id': format(device.board_id, '08x')
+        }
+        for device in current_app.config['DEVICES'].values() if isinstance(device, (IPMIDevice, RedfishDevice))
+    ]
+
+    return jsonify({
+        'status': 'complete',
+        'elapsed': 0,
+        'total': len(devices),
+        'counts': {'pending': 0, 'registering': 0, 'registered': len(devices), 'retrying': 0},
+        'devices': devices
+    })
+
+
+@core.route(url('/health'), methods=['GET'])
+def health_status():
+    """ Get the health of each LAN-based device (IPMI, Redfish) - the state of its
+    circuit, its failures, and the latency percentiles of its recent exchanges.
+
+    Returns:
+        The number of devices in each circuit state, and the health of each device.
+    """
+    devices = []
+    for device in current_app.config['DEVICES'].values():
+        if device.health is None:
+            continue
+        record = {
+            'device': str(device),
+            'devicebus': device.__class__._instance_name,
+            'board_id': format(device.board_id, '08x')
+        }
+        record.update(device.health.status())
+        devices.append(record)
+
+    counts = {'closed': 0, 'open': 0, 'half_open': 0}
+    for record in devices:
+        counts[record['state']] += 1
+
+    return jsonify({
+        'total': len(devices),
+        'counts': counts,
+        'devices': sorted(devices, key=lambda d: d['board_id'])
+    })
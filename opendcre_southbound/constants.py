@@ -103,6 +103,18 @@ DEVICE_POWER_SUPPLY = 'power_supply'
 DEVICE_AIRFLOW = 'airflow'
 DEVICE_VOLTAGE = 'voltage'
 
+# device types which are read when reading all devices on a board or rack
+READABLE_DEVICE_TYPES = [
+    DEVICE_TEMPERATURE,
+    DEVICE_THERMISTOR,
+    DEVICE_HUMIDITY,
+    DEVICE_PRESSURE,
+    DEVICE_FAN_SPEED,
+    DEVICE_VAPOR_FAN,
+    DEVICE_VOLTAGE,
+    DEVICE_POWER_SUPPLY
+]
+
 
 # ---------------------------------------------------------
 # Mappings between device type names and bus codes
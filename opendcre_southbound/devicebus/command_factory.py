@@ -28,8 +28,6 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
-from threading import Lock
-
 from command import Command
 from constants import CommandId
 
@@ -45,8 +43,8 @@ class CommandFactory(object):
         # each request thread has access to the same `count` instance for proper
         # incrementation. an instance of `CommandFactory` can be shared in Flask's
         # app config, allowing access to the same count in all threads. since this
-        # will be accessed within threads, it should be used in a thread-safe manner.
-        self._seq_lock = Lock()
+        # will be accessed within threads, the counter must be thread-safe (e.g. a
+        # SequenceAllocator), as it is also used directly by the devicebus interfaces.
         self._sequencer = counter
 
     def _get_next_sequence(self):
@@ -55,9 +53,7 @@ class CommandFactory(object):
         Returns:
             int: the next sequence number for a Command.
         """
-        with self._seq_lock:
-            seq = next(self._sequencer)
-        return seq
+        return next(self._sequencer)
 
     def get_version_command(self, data):
         """ Generate a Version Command.
@@ -212,3 +208,14 @@ class CommandFactory(object):
             Command: the generated command for Retry
         """
         return Command(CommandId.RETRY, data, self._get_next_sequence())
+
+    def get_read_all_command(self, data):
+        """ Generate a Read All Command.
+
+        Args:
+            data (dict): any key-value data that makes up the command context.
+
+        Returns:
+            Command: the generated command for Read All
+        """
+        return Command(CommandId.READ_ALL, data, self._get_next_sequence())
@@ -25,11 +25,13 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
+import functools
 import logging
 import json
 from uuid import uuid4 as uuid
 from opendcre_southbound.errors import CommandNotSupported
 from opendcre_southbound.devicebus.constants import CommandId
+from opendcre_southbound.devicebus.single_flight import SingleFlight
 from opendcre_southbound.errors import OpenDCREException
 
 
@@ -52,6 +54,32 @@ class DevicebusInterface(object):
     """
     _instance_name = None
 
+    # the ResponseCache shared by the registered devicebus interfaces, if any. this
+    # is set on each interface once registered.
+    response_cache = None
+
+    # the DeviceHealth of the device behind the devicebus interface, if its health
+    # is tracked. commands are not issued to a device whose circuit is open.
+    health = None
+
+    # commands which are handled even when the device's circuit is open, as they
+    # are answered from the board record rather than by the device.
+    _unguarded_commands = (
+        CommandId.SCAN,
+        CommandId.SCAN_ALL
+    )
+
+    # commands which, other than their status queries, change the state of a board.
+    # handling one invalidates the cached responses for the devicebus interface.
+    _state_changing_commands = (
+        CommandId.WRITE,
+        CommandId.POWER,
+        CommandId.BOOT_TARGET,
+        CommandId.CHAMBER_LED,
+        CommandId.LED,
+        CommandId.FAN
+    )
+
     def __init__(self):
         # map command ids to the devicebus methods which will be used to operate
         # on those methods. each subclass should define its own _command_map. if
@@ -61,6 +89,10 @@ class DevicebusInterface(object):
         self._command_map = {}
         self.device_uuid = uuid()
 
+        # concurrent duplicates of idempotent commands share a single call to
+        # the command handler (see _get_single_flight_key)
+        self._single_flight = SingleFlight()
+
     @classmethod
     def register(cls, devicebus_config, app_config, app_cache):
         """ Register a new instance of the Devicebus class.
@@ -89,10 +121,120 @@ class DevicebusInterface(object):
                 self.__class__.__name__
             ))
 
-        response = cmd_fn(command)
-
+        if self.health is not None and command.cmd_id not in self._unguarded_commands:
+            cmd_fn = functools.partial(self._guarded, self.health, cmd_fn)
+
+        cache = self.response_cache
+        key = self._get_single_flight_key(command)
+
+        if key is None:
+            try:
+                return cmd_fn(command)
+            finally:
+                # a command which may have changed state invalidates any cached
+                # responses for this devicebus interface, whether it succeeded
+                # or not
+                if cache is not None and command.cmd_id in self._state_changing_commands:
+                    cache.invalidate(self.device_uuid)
+
+        ttl = cache.get_ttl(command.cmd_id) if cache is not None else 0
+        if not ttl:
+            return self._single_flight.do(key, cmd_fn, command)
+
+        response = cache.get(self.device_uuid, key)
+        if response is None:
+            generation = cache.generation(self.device_uuid)
+            response = self._single_flight.do(key, cmd_fn, command)
+            cache.set(self.device_uuid, key, response, ttl, generation)
         return response
 
+    @staticmethod
+    def _guarded(health, cmd_fn, command):
+        """ Call a command handler, unless the device's circuit is open.
+
+        Args:
+            health (DeviceHealth): the health of the device.
+            cmd_fn (callable): the command handler.
+            command (Command): the command to handle.
+
+        Returns:
+            Response: the response from the command handler.
+
+        Raises:
+            DeviceUnavailable: the device's circuit is open.
+        """
+        probe = health.acquire()
+        try:
+            return cmd_fn(command)
+        finally:
+            health.release(probe)
+
+    @staticmethod
+    def _get_single_flight_key(command):
+        """ Get the key under which concurrent duplicates of a command are
+        coalesced into a single call to its handler.
+
+        Only idempotent commands (reads, and status queries for power, LED and
+        boot target, version, asset and host info) are coalesced. Two commands
+        are duplicates if they have the same command id and data. The key is
+        also used to cache the responses to these commands.
+
+        Args:
+            command (Command): the command to get the key for.
+
+        Returns:
+            tuple: the key for the command, or None if the command should not
+                be coalesced.
+        """
+        data = command.data or {}
+
+        if command.cmd_id in (CommandId.READ, CommandId.VERSION, CommandId.ASSET, CommandId.HOST_INFO):
+            pass
+        elif command.cmd_id == CommandId.POWER:
+            if data.get('power_action') != 'status':
+                return None
+        elif command.cmd_id == CommandId.BOOT_TARGET:
+            if data.get('boot_target') not in (None, 'status'):
+                return None
+        elif command.cmd_id == CommandId.LED:
+            if any(data.get(k) is not None for k in ('led_state', 'led_color', 'blink_state')):
+                return None
+        else:
+            return None
+
+        key = (command.cmd_id, tuple(sorted(data.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def handle_batch(self, commands):
+        """ Handle a batch of incoming OpenDCRE commands.
+
+        The commands are handled in order, and a failure in handling one command
+        does not prevent the rest from being handled. Subclasses may override this
+        where a batch of commands can be handled more efficiently together than
+        one at a time.
+
+        Args:
+            commands (list[Command]): The incoming command objects to dispatch to the
+                appropriate command handlers for the Devicebus object.
+
+        Returns:
+            list: the result for each command, in the same order as the commands. each
+                result is either the Response for the command, or the exception raised
+                in handling it.
+        """
+        results = []
+        for command in commands:
+            try:
+                results.append(self.handle(command))
+            except Exception as e:
+                logger.debug('Failed to handle command in batch ({}): {}'.format(command.data, e))
+                results.append(e)
+        return results
+
     def _get_device_by_id(self, device_id, device_type_string):
         """ Get a device that can be used for device-relative commands.
 
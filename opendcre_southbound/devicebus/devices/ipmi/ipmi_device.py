@@ -25,6 +25,8 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
+import copy
+import functools
 import logging
 import json
 import threading
@@ -33,7 +35,9 @@ from pyghmi.exceptions import *
 import os
 
 from opendcre_southbound.devicebus.constants import CommandId as cid
+from opendcre_southbound.devicebus.health import DeviceHealth
 from opendcre_southbound.devicebus.devices.ipmi import vapor_ipmi
+from opendcre_southbound.devicebus.devices.ipmi.vapor_ipmi_common import IpmiSdrCache, IpmiSessionPool
 from opendcre_southbound import constants as const
 from opendcre_southbound.devicebus.response import Response
 from opendcre_southbound.errors import OpenDCREException
@@ -50,6 +54,14 @@ class IPMIDevice(LANDevice):
     """
     _instance_name = 'ipmi'
 
+    # the device types in the board record which are backed by IPMI sensors
+    _sensor_device_types = [
+        const.DEVICE_TEMPERATURE,
+        const.DEVICE_FAN_SPEED,
+        const.DEVICE_VOLTAGE,
+        const.DEVICE_POWER_SUPPLY
+    ]
+
     def __init__(self, app_cfg, counter, **kwargs):
         super(IPMIDevice, self).__init__()
 
@@ -70,12 +82,59 @@ class IPMIDevice(LANDevice):
         self.ip_addresses = kwargs.get('ip_addresses', [self.bmc_ip])
         self.scan_on_init = kwargs.get('scan_on_init', True)
 
+        # the outcome and latency of each exchange with the BMC is tracked, so that
+        # a BMC which stops responding is not waited on for every command.
+        self.health = DeviceHealth(
+            name='IPMI BMC {}:{}'.format(self.bmc_ip, self.bmc_port),
+            failure_threshold=kwargs.get('failure_threshold', 5),
+            reset_timeout=kwargs.get('circuit_reset_timeout', 30),
+            max_reset_timeout=kwargs.get('circuit_max_reset_timeout', 300),
+            adaptive_timeout=kwargs.get('adaptive_timeout', True),
+            min_timeout=kwargs.get('min_timeout', 0.25)
+        )
+
+        # sessions to the BMC are pooled and kept open between commands, rather
+        # than logging in and out for every command issued to the BMC. if a shared
+        # transport is given, commands to the BMC are instead multiplexed with those
+        # to all other BMCs over the transport.
+        transport = kwargs.get('ipmi_transport')
+        if transport is not None:
+            from opendcre_southbound.devicebus.devices.ipmi.vapor_ipmi_transport import IpmiTransportPool
+            self.session_pool = IpmiTransportPool(
+                transport,
+                username=self.username,
+                password=self.password,
+                ip_address=self.bmc_ip,
+                port=self.bmc_port,
+                max_in_flight=kwargs.get('max_in_flight'),
+                health=self.health
+            )
+        else:
+            self.session_pool = IpmiSessionPool(
+                username=self.username,
+                password=self.password,
+                ip_address=self.bmc_ip,
+                port=self.bmc_port,
+                max_sessions=kwargs.get('max_sessions', 1),
+                idle_timeout=kwargs.get('session_idle_timeout', 45),
+                keepalive_interval=kwargs.get('session_keepalive_interval', 15),
+                health=self.health
+            )
+
+        # the BMC's SDR is parsed once and cached, so that sensors can be read by
+        # sensor number without walking the SDR for every reading.
+        self.sdr_cache = IpmiSdrCache(
+            ip_address=self.bmc_ip,
+            check_interval=kwargs.get('sdr_check_interval', 60)
+        )
+
         # bundle up the common IPMI args for easier command initialization
         self._ipmi_kwargs = {
             'username': self.username,
             'password': self.password,
             'ip_address': self.bmc_ip,
-            'port': self.bmc_port
+            'port': self.bmc_port,
+            'session_pool': self.session_pool
         }
 
         # override the command map to defines which commands are supported by IPMI.
@@ -84,6 +143,7 @@ class IPMIDevice(LANDevice):
             cid.SCAN: self._scan,
             cid.SCAN_ALL: self._scan_all,
             cid.READ: self._read,
+            cid.READ_ALL: self._read_all,
             cid.POWER: self._power,
             cid.ASSET: self._asset,
             cid.BOOT_TARGET: self._boot_target,
@@ -94,21 +154,28 @@ class IPMIDevice(LANDevice):
 
         self.board_record = None
         self.board_id = None
+        self.fru_info = None
+        self.dcmi_supported = False
 
-        # if a scan cache file exists in the container, we will want to try and use that before
-        # we assign a board id.
+        # if the device is in the startup snapshot, it is restored from the snapshot without
+        # talking to the BMC. it is then revalidated in the background once the app is up.
+        snapshot = self._app_cfg.get('STARTUP_SNAPSHOT')
+        if snapshot is not None:
+            self._restore_snapshot(snapshot.get(self.snapshot_key))
+
+        # otherwise, if a scan cache exists in the container, we will want to try and use that
+        # before we assign a board id.
         # TODO: since board ids are sequential, we will want to move the 'next' sequence number to
         #   that of 1 + max(scan_board_ids)?
+        if not self.restored:
+            scan_cache = self._get_scan_cache()
+            if scan_cache:
+                logger.debug('Scan cache exists -- attempting to initialize device off cache.')
 
-        if os.path.exists(self._app_cfg['SCAN_CACHE']):
-            logger.debug('Scan cache exists -- attempting to initialize device off cache.')
-            with open(self._app_cfg['SCAN_CACHE'], 'r') as f:
-                scan_cache = json.load(f)
-
-            # attempt to complete initialization using the cache. if this succeeds, the board id and the
-            # board record will be updated (will no longer be None). if neither were updated, we will
-            # initialize the board through 'normal' means next.
-            self._load_from_cache(scan_cache)
+                # attempt to complete initialization using the cache. if this succeeds, the board id and the
+                # board record will be updated (will no longer be None). if neither were updated, we will
+                # initialize the board through 'normal' means next.
+                self._load_from_cache(scan_cache)
 
         # assign board_id based on incoming data - ipmi devices are single-board devices, so we expose a single
         # board_id property; the alternate approach, as in PLC, is a 'dumb' device, where a board_id range is exposed
@@ -118,7 +185,7 @@ class IPMIDevice(LANDevice):
         if self.scan_on_init and self.board_record is None:
             self.board_record = self._get_board_record()
 
-        if self.board_record is not None:
+        if self.board_record is not None and not self.restored:
             # get FRU information for use in determining OEM support
             self.fru_info = self._get_fru_info()
             self.dcmi_supported = self._get_dcmi_power_capabilities()
@@ -129,6 +196,88 @@ class IPMIDevice(LANDevice):
     def __repr__(self):
         return self.__str__()
 
+    @property
+    def snapshot_key(self):
+        """ The key for the device's state in the startup snapshot.
+        """
+        return 'ipmi:{}:{}:{}'.format(self.bmc_rack, self.bmc_ip, self.bmc_port)
+
+    def get_snapshot(self):
+        """ Get the state of the device to keep in the startup snapshot.
+
+        Returns:
+            dict: the board id, board record, FRU information and DCMI power
+                capability of the device, or None if it has not been scanned.
+        """
+        if self.board_record is None:
+            return None
+
+        return {
+            'board_id': format(self.board_id, '08x'),
+            'board_record': self.board_record,
+            'fru_info': self.fru_info,
+            'dcmi_supported': self.dcmi_supported
+        }
+
+    def _restore_snapshot(self, state):
+        """ Restore the IPMIDevice state from its startup snapshot. The state is not
+        used if the hostnames or IP addresses of the board have been re-configured
+        since the snapshot was taken.
+
+        Note that this should only be called from the `__init__` method as it is
+        an alternative way to complete device initialization.
+
+        Args:
+            state (dict): the state of the device from the startup snapshot, or
+                None if the device is not in the snapshot.
+        """
+        if state is None:
+            return
+
+        board_record = state.get('board_record')
+        if board_record is None or \
+                board_record.get('hostnames') != self.hostnames or \
+                board_record.get('ip_addresses') != self.ip_addresses:
+            logger.debug('Startup snapshot for {} does not match configuration - ignoring.'.format(self.bmc_ip))
+            return
+
+        self.board_id = int(state['board_id'], 16)
+        self.board_record = board_record
+        self.fru_info = state.get('fru_info')
+        self.dcmi_supported = state.get('dcmi_supported', False)
+        self.restored = True
+        logger.debug('Successfully restored device state from startup snapshot.')
+
+    def revalidate(self):
+        """ Revalidate the device state restored from the startup snapshot, by
+        re-scanning the BMC and re-reading its FRU information and DCMI power
+        capability.
+        """
+        board_record = self._get_board_record()
+        if board_record is not None:
+            self.board_record = board_record
+            self.fru_info = self._get_fru_info()
+            self.dcmi_supported = self._get_dcmi_power_capabilities()
+        super(IPMIDevice, self).revalidate()
+
+    def _get_scan_cache(self):
+        """ Get the scan cache. The process-resident scan cache is used if the app
+        has one, so that the scan cache file is not re-read and re-parsed for
+        every BMC.
+
+        Returns:
+            dict: the scan cache, or None if there is no scan cache. this may be
+                shared, so must not be modified.
+        """
+        store = self._app_cfg.get('SCAN_CACHE_STORE')
+        if store is not None:
+            return store.get()
+
+        if os.path.exists(self._app_cfg['SCAN_CACHE']):
+            with open(self._app_cfg['SCAN_CACHE'], 'r') as f:
+                return json.load(f)
+        return None
+
     def _load_from_cache(self, scan_cache):
         """ Attempt to load in IPMIDevice state from the scan cache.
 
@@ -151,7 +300,9 @@ class IPMIDevice(LANDevice):
                     # board belongs to this device based on that information.
                     for board in rack.get('boards', []):
                         if self.ip_addresses == board['ip_addresses']:
-                            # this is our board!
+                            # this is our board! the scan cache may be shared, so the board is
+                            # copied before it is modified.
+                            board = copy.deepcopy(board)
                             self.board_id = int(board['board_id'], 16)
 
                             # if 'device_interface' is listed in the scan cache, we want to ignore that.
@@ -243,7 +394,9 @@ class IPMIDevice(LANDevice):
         sensors = dict()
 
         try:
-            sensors = vapor_ipmi.sensors(**self._ipmi_kwargs)
+            # revalidate the cached SDR, so that the board record reflects any changes
+            # made to the sensors since it was cached
+            sensors = vapor_ipmi.sensors(sdr_cache=self.sdr_cache, revalidate=True, **self._ipmi_kwargs)
         except (OpenDCREException, IpmiException, NotImplementedError) as e:
             logger.error('Unable to retrieve sensors for BMC: {} ({})'.format(self.bmc_ip, e.message))
             board_record = None
@@ -312,6 +465,7 @@ class IPMIDevice(LANDevice):
         # get config associated with all IPMI devices
         thread_count = devicebus_config.get('device_initializer_threads', 1)
         scan_on_init = devicebus_config.get('scan_on_init', True)
+        transport = cls.get_transport(devicebus_config, app_config)
 
         # create a thread pool which will be used for the lifetime of device registration
         thread_pool = ThreadPool(thread_count)
@@ -321,8 +475,10 @@ class IPMIDevice(LANDevice):
             for rack in device_config['racks']:
                 rack_id = rack['rack_id']
                 for bmc in rack['bmcs']:
-                    # pass through scan on init value for all ipmi devices
+                    # pass through scan on init value and transport for all ipmi devices
                     bmc['scan_on_init'] = scan_on_init
+                    if transport is not None:
+                        bmc['ipmi_transport'] = transport
 
                     # check to see if there are any duplicate BMCs already defined.
                     # this may be the case with the periodic registering of remote
@@ -350,6 +506,82 @@ class IPMIDevice(LANDevice):
             logger.error('Failed to initialize IPMI devices: {}'.format(device_init_failure))
             raise OpenDCREException('Failed to initialize IPMI devices.')
 
+    @classmethod
+    def get_registrations(cls, devicebus_config, app_config):
+        """ Get the registration for each configured IPMI device, for registering the
+        devices in the background (see opendcre_southbound.registration).
+
+        Args:
+            devicebus_config (dict): a dictionary containing the devicebus configurations
+                for IPMI. within this dict is a list or reference to the actual configs
+                for the IPMI devices themselves.
+            app_config (dict): Flask application config, where application-wide
+                configurations and constants are stored.
+
+        Returns:
+            list[tuple]: a (name, factory) tuple for each configured BMC. the factory
+                initializes and returns the IPMIDevice for the BMC.
+        """
+        device_config = cls.get_device_config(devicebus_config)
+        if not device_config:
+            raise ValueError('Unable to get configuration for device - unable to register.')
+
+        scan_on_init = devicebus_config.get('scan_on_init', True)
+        board_range = device_config.get('board_id_range', const.IPMI_BOARD_RANGE)
+        transport = cls.get_transport(devicebus_config, app_config)
+
+        registrations = []
+        for rack in device_config.get('racks', []):
+            for bmc in rack['bmcs']:
+                bmc = dict(bmc, scan_on_init=scan_on_init, bmc_rack=rack['rack_id'], board_id_range=board_range)
+                if transport is not None:
+                    bmc['ipmi_transport'] = transport
+
+                # the board offset is taken up front, so that the board id does not change
+                # if initializing the device is retried
+                bmc['board_offset'] = app_config['IPMI_BOARD_OFFSET'].next()
+
+                name = 'ipmi:{}:{}:{}'.format(rack['rack_id'], bmc['bmc_ip'], bmc.get('bmc_port', BMC_PORT))
+                factory = functools.partial(cls, app_cfg=app_config, counter=app_config['COUNTER'], **bmc)
+                registrations.append((name, factory))
+
+        return registrations
+
+    @staticmethod
+    def get_transport(devicebus_config, app_config):
+        """ Get the transport which commands to the IPMI devices are multiplexed
+        over, if the devicebus is configured to use the 'multiplexed' transport. The
+        transport is created once and shared by all IPMI devices of the app.
+
+        Args:
+            devicebus_config (dict): a dictionary containing the devicebus configurations
+                for IPMI.
+            app_config (dict): Flask application config, where the shared transport
+                is kept (as 'IPMI_TRANSPORT').
+
+        Returns:
+            IpmiTransport: the shared transport, or None if commands are issued with
+                pyghmi (the 'pyghmi' transport, which is the default).
+        """
+        transport_type = devicebus_config.get('transport', 'pyghmi')
+        if transport_type == 'pyghmi':
+            return None
+        if transport_type != 'multiplexed':
+            raise ValueError('Unsupported IPMI transport: {}'.format(transport_type))
+
+        transport = app_config.get('IPMI_TRANSPORT')
+        if transport is None:
+            # the multiplexed transport is imported only when it is used, since it
+            # depends on pycrypto, which is not needed for the pyghmi transport
+            from opendcre_southbound.devicebus.devices.ipmi.vapor_ipmi_transport import IpmiTransport
+            transport = IpmiTransport(
+                timeout=devicebus_config.get('transport_timeout', 1.0),
+                retries=devicebus_config.get('transport_retries', 3),
+                max_in_flight=devicebus_config.get('max_in_flight', 1)
+            )
+            app_config['IPMI_TRANSPORT'] = transport
+        return transport
+
     @staticmethod
     def _process_bmc(bmc, app_config, rack_id, board_range, device_init_failure, mutate_lock, devices, single_board_devices):
         """ A private method to handle the construction of the ipmi device from
@@ -453,6 +685,25 @@ class IPMIDevice(LANDevice):
             }
         )
 
+    def _sdr_changed(self):
+        """ Check whether the BMC's SDR repository has changed since the board record
+        was generated, using the repository's timestamps.
+
+        Returns:
+            bool: True if the SDR has changed (or if this could not be determined),
+                False if it is unchanged.
+        """
+        if self.sdr_cache.timestamp is None:
+            return True
+
+        try:
+            timestamp = vapor_ipmi.get_sdr_timestamp(**self._ipmi_kwargs)
+        except Exception as e:
+            logger.warning('Unable to get SDR timestamps for BMC ({}): {}'.format(self.bmc_ip, e))
+            return True
+
+        return timestamp is None or timestamp != self.sdr_cache.timestamp
+
     def _scan_all(self, command):
         """ Get the scan information from a 'broadcast' (e.g. scan all) command.
 
@@ -467,6 +718,10 @@ class IPMIDevice(LANDevice):
         # get the command data out from the incoming command
         force = command.data.get('force', False)
 
+        # an incremental scan only re-probes the BMC if its sensors have changed
+        if command.data.get('incremental', False) and self.board_record is not None:
+            force = self._sdr_changed()
+
         if force:
             self.board_record = self._get_board_record()
 
@@ -506,22 +761,12 @@ class IPMIDevice(LANDevice):
         try:
             device = self._get_device_by_id(device_id, device_type_string)
 
-            reading = vapor_ipmi.read_sensor(sensor_name=device['device_info'], **self._ipmi_kwargs)
-            response = dict()
-
-            # TODO (etd) - this could be consolidated a bit if we had a helper fn which did device type -> reading
-            #   measure lookup, e.g. lookup('temperature') --> 'temperature_c' ; could also be useful in other places
-            if device['device_type'] == const.DEVICE_TEMPERATURE:
-                response['temperature_c'] = reading['sensor_reading']
-
-            elif device['device_type'] == const.DEVICE_FAN_SPEED:
-                response['speed_rpm'] = reading['sensor_reading']
-
-            elif device['device_type'] == const.DEVICE_VOLTAGE:
-                response['voltage'] = reading['sensor_reading']
-
-            response['health'] = reading['health']
-            response['states'] = reading['states']
+            reading = vapor_ipmi.read_sensor_by_number(
+                sensor_number=int(device['device_id'], 16),
+                sdr_cache=self.sdr_cache,
+                **self._ipmi_kwargs
+            )
+            response = self._convert_reading(device, reading)
 
             if response is not None:
                 return Response(
@@ -536,6 +781,84 @@ class IPMIDevice(LANDevice):
         except Exception:
             raise OpenDCREException('Error reading IPMI sensor (device id: {})'.format(hex(device_id))), None, sys.exc_info()[2]
 
+    def _read_all(self, command):
+        """ Read the data off of all of the sensor devices on the board.
+
+        The sensors are read in a single pass using one session to the BMC. A
+        failure to read one sensor does not fail the others - instead, the error
+        is reported for that device.
+
+        Args:
+            command (Command): the command issued by the OpenDCRE endpoint
+                containing the data and sequence for the request.
+
+        Returns:
+            Response: a Response object corresponding to the incoming Command
+                object, containing the reading (or error) for each sensor device.
+        """
+        if self.board_record is None:
+            raise OpenDCREException('No board record available for IPMI BMC {}'.format(self.bmc_ip))
+
+        devices = [d for d in self.board_record['devices'] if d['device_type'] in self._sensor_device_types]
+
+        try:
+            readings = vapor_ipmi.read_sensors(
+                sensor_numbers=[int(d['device_id'], 16) for d in devices],
+                sdr_cache=self.sdr_cache,
+                **self._ipmi_kwargs
+            )
+        except Exception:
+            raise OpenDCREException('Error reading IPMI sensors (board id: {})'.format(
+                format(self.board_id, '08x'))), None, sys.exc_info()[2]
+
+        results = []
+        for device in devices:
+            result = {
+                'board_id': format(self.board_id, '08x'),
+                'device_id': device['device_id'],
+                'device_type': device['device_type']
+            }
+            reading = readings[int(device['device_id'], 16)]
+            if isinstance(reading, Exception):
+                result['error'] = str(reading)
+            else:
+                result['reading'] = self._convert_reading(device, reading)
+            results.append(result)
+
+        return Response(
+            command=command,
+            response_data={'readings': results}
+        )
+
+    @staticmethod
+    def _convert_reading(device, reading):
+        """ Convert a sensor reading from vapor_ipmi into the response data for a
+        read of the given device.
+
+        Args:
+            device (dict): the device entry from the board record.
+            reading (dict): the sensor reading for the device.
+
+        Returns:
+            dict: the response data for the read.
+        """
+        response = dict()
+
+        # TODO (etd) - this could be consolidated a bit if we had a helper fn which did device type -> reading
+        #   measure lookup, e.g. lookup('temperature') --> 'temperature_c' ; could also be useful in other places
+        if device['device_type'] == const.DEVICE_TEMPERATURE:
+            response['temperature_c'] = reading['sensor_reading']
+
+        elif device['device_type'] == const.DEVICE_FAN_SPEED:
+            response['speed_rpm'] = reading['sensor_reading']
+
+        elif device['device_type'] == const.DEVICE_VOLTAGE:
+            response['voltage'] = reading['sensor_reading']
+
+        response['health'] = reading['health']
+        response['states'] = reading['states']
+        return response
+
     def _power(self, command):
         """ Power control command for a given board and device.
 
@@ -725,7 +1048,6 @@ class IPMIDevice(LANDevice):
         """
         # get the command data out from the incoming command
         device_id = command.data['device_id']
-        device_name = command.data['device_name']
         fan_speed = command.data['fan_speed']
 
         try:
@@ -733,7 +1055,11 @@ class IPMIDevice(LANDevice):
                 raise OpenDCREException('Setting of fan speed is not permitted for this device.')
             else:
                 device = self._get_device_by_id(device_id, 'fan_speed')
-                reading = vapor_ipmi.read_sensor(sensor_name=device_name, **self._ipmi_kwargs)
+                reading = vapor_ipmi.read_sensor_by_number(
+                    sensor_number=int(device['device_id'], 16),
+                    sdr_cache=self.sdr_cache,
+                    **self._ipmi_kwargs
+                )
                 response = dict()
                 if device['device_type'] == 'fan_speed':
                     response['speed_rpm'] = reading['sensor_reading']
@@ -29,16 +29,18 @@ along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
 import logging
 from pyghmi import constants
+from pyghmi.exceptions import IpmiException
 
 from opendcre_southbound.errors import OpenDCREException
 from opendcre_southbound.definitions import BMC_PORT
-from vapor_ipmi_oem_flex import get_flex_victoria_power_reading
-from vapor_ipmi_common import IpmiCommand
+from vapor_ipmi_oem_flex import read_flex_victoria_power_reading
+from vapor_ipmi_common import IpmiCommand, IpmiSdrCache
 
 logger = logging.getLogger(__name__)
 
 
-def power(username=None, password=None, ip_address=None, port=BMC_PORT, cmd=None, reading_method=None):
+def power(username=None, password=None, ip_address=None, port=BMC_PORT, cmd=None, reading_method=None,
+          session_pool=None):
     """ Get/set power status for remote host.
 
     Args:
@@ -51,6 +53,7 @@ def power(username=None, password=None, ip_address=None, port=BMC_PORT, cmd=None
             If 'flex-victoria', then the Flex OEM reading method is used.
             If 'None', then no power reading is used.
             If 'dcmi', then DCMI power reading is used.
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: power status after command execution, or raises IpmiException or
@@ -58,7 +61,8 @@ def power(username=None, password=None, ip_address=None, port=BMC_PORT, cmd=None
     """
     # power cycle is hard reset in ipmi/pyghmi
     response = dict()
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
         if cmd == 'status':
             result = ipmicmd.get_power()
             response['power_status'] = result['powerstate']
@@ -76,7 +80,7 @@ def power(username=None, password=None, ip_address=None, port=BMC_PORT, cmd=None
             raise OpenDCREException('Error executing IPMI power command on {} : {}'.format(ip_address, result['error']))
         try:
             # first get additional information about the power health
-            chassis_status = _get_chassis_status(username, password, ip_address)
+            chassis_status = _read_chassis_status(ipmicmd, ip_address)
             response['over_current'] = chassis_status.get('power_overload', 'unknown')
             # FIXME (etd): for the below, if there is no 'power_fault', we are evaluating "not 'unknown'" which
             # will be False -- is this expected/desired?
@@ -91,10 +95,9 @@ def power(username=None, password=None, ip_address=None, port=BMC_PORT, cmd=None
             response['input_power'] = 'unknown'
             if reading_method is not None:
                 if reading_method == 'flex-victoria':
-                    response['input_power'] = get_flex_victoria_power_reading(
-                        username, password, ip_address)['input_power']
+                    response['input_power'] = read_flex_victoria_power_reading(ipmicmd, ip_address)['input_power']
                 elif reading_method == 'dcmi':
-                    response['input_power'] = _get_power_reading(username, password, ip_address)['input_power']
+                    response['input_power'] = _read_power_reading(ipmicmd, ip_address)['input_power']
         except Exception as e:
             response['input_power'] = 'unknown'
             logger.error('Error getting power reading on power command for {} : {}'.format(ip_address, e.message))
@@ -102,7 +105,8 @@ def power(username=None, password=None, ip_address=None, port=BMC_PORT, cmd=None
         return response
 
 
-def sensors(username=None, password=None, ip_address=None, port=BMC_PORT):
+def sensors(username=None, password=None, ip_address=None, port=BMC_PORT, session_pool=None, sdr_cache=None,
+            revalidate=False):
     """ Get list of sensors from remote system.
 
     Args:
@@ -110,12 +114,20 @@ def sensors(username=None, password=None, ip_address=None, port=BMC_PORT):
         password (str): The password to use to connect to the remote BMC.
         ip_address (str): The IP Address of the BMC.
         port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
+        sdr_cache (IpmiSdrCache): cache of the BMC's SDR to use, if any.
+        revalidate (bool): check the cached SDR (if any) against the BMC, even if
+            it was recently checked.
 
     Returns:
         list: Sensor number, id string, and type for each sensor available.
     """
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
-        sdr = ipmicmd.init_sdr()
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
+        if sdr_cache is not None:
+            sdr = sdr_cache.get_sdr(ipmicmd, revalidate=revalidate)
+        else:
+            sdr = ipmicmd.init_sdr()
         if sdr is None:
             raise OpenDCREException('Error initializing SDR from IPMI BMC {}'.format(ip_address))
         response = [
@@ -127,6 +139,28 @@ def sensors(username=None, password=None, ip_address=None, port=BMC_PORT):
         return response
 
 
+def get_sdr_timestamp(username=None, password=None, ip_address=None, port=BMC_PORT, session_pool=None):
+    """ Get the most recent addition and erase timestamps of the remote system's
+    SDR repository. These change whenever sensors are added to or removed from the
+    repository, so can be used to check whether the sensors have changed without
+    walking the repository.
+
+    Args:
+        username (str): The username to use to connect to the remote BMC.
+        password (str): The password to use to connect to the remote BMC.
+        ip_address (str): The IP Address of the BMC.
+        port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
+
+    Returns:
+        str: the packed addition and erase timestamps, or None if they could not
+            be read.
+    """
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
+        return IpmiSdrCache.read_timestamp(ipmicmd)
+
+
 def _convert_health_to_string(health):
     """ Convert a numeric health value to string.
 
@@ -152,7 +186,7 @@ def _convert_health_to_string(health):
         return str(health)
 
 
-def read_sensor(sensor_name, username=None, password=None, ip_address=None, port=BMC_PORT):
+def read_sensor(sensor_name, username=None, password=None, ip_address=None, port=BMC_PORT, session_pool=None):
     """ Get a converted sensor reading back from the remote system for a given sensor_name.
 
     Args:
@@ -162,6 +196,7 @@ def read_sensor(sensor_name, username=None, password=None, ip_address=None, port
         port (int): BMC port
         sensor_name (str): the id_string of the sensor to read.
             (NB ABC: this is a vestige of pyghmi, it would be better to read by sensor number)
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: the converted sensor reading for the given sensor_name. Will raise an IpmiException
@@ -169,7 +204,8 @@ def read_sensor(sensor_name, username=None, password=None, ip_address=None, port
     """
     if sensor_name is not None:
         result = dict()
-        with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
+        with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
             reading = ipmicmd.get_sensor_reading(sensor_name)
             result['sensor_reading'] = reading.value
             result['health'] = _convert_health_to_string(reading.health)
@@ -179,7 +215,100 @@ def read_sensor(sensor_name, username=None, password=None, ip_address=None, port
     raise ValueError('Must specify a sensor name when retrieving sensor reading via IPMI.')
 
 
-def get_boot(username=None, password=None, ip_address=None, port=BMC_PORT):
+def read_sensor_by_number(sensor_number, username=None, password=None, ip_address=None, port=BMC_PORT,
+                          session_pool=None, sdr_cache=None):
+    """ Get a converted sensor reading back from the remote system for a given sensor_number.
+
+    The reading is taken with a single Get Sensor Reading request, and decoded
+    using the sensor's SDR entry. If an SDR cache is given, the entry is looked up
+    from the cache, otherwise the SDR is read from the BMC.
+
+    Args:
+        sensor_number (int): the number of the sensor to read.
+        username (str): Username to connect to BMC with.
+        password (str): Password to connect to BMC with.
+        ip_address (str): BMC IP Address.
+        port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
+        sdr_cache (IpmiSdrCache): cache of the BMC's SDR to use, if any.
+
+    Returns:
+        dict: the converted sensor reading for the given sensor_number. Will raise an IpmiException
+            if the the sensor is not available (e.g. the power is off).
+    """
+    if sensor_number is None:
+        raise ValueError('Must specify a sensor number when retrieving sensor reading via IPMI.')
+
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
+        return _read_sensor_number(ipmicmd, sensor_number, ip_address, sdr_cache)
+
+
+def read_sensors(sensor_numbers, username=None, password=None, ip_address=None, port=BMC_PORT,
+                 session_pool=None, sdr_cache=None):
+    """ Get converted sensor readings back from the remote system for a number of sensors,
+    using a single session.
+
+    A failure to read one sensor does not prevent the other sensors from being read.
+
+    Args:
+        sensor_numbers (list[int]): the numbers of the sensors to read.
+        username (str): Username to connect to BMC with.
+        password (str): Password to connect to BMC with.
+        ip_address (str): BMC IP Address.
+        port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
+        sdr_cache (IpmiSdrCache): cache of the BMC's SDR to use, if any.
+
+    Returns:
+        dict: the converted sensor reading for each sensor number, or the exception
+            raised when reading the sensor.
+    """
+    results = dict()
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
+        for sensor_number in sensor_numbers:
+            try:
+                results[sensor_number] = _read_sensor_number(ipmicmd, sensor_number, ip_address, sdr_cache)
+            except Exception as e:
+                logger.debug('Error reading sensor {} on IPMI BMC {} : {}'.format(sensor_number, ip_address, e))
+                results[sensor_number] = e
+    return results
+
+
+def _read_sensor_number(ipmicmd, sensor_number, ip_address, sdr_cache=None):
+    """ Get a converted sensor reading for a given sensor_number using an existing command.
+
+    Args:
+        ipmicmd (command.Command): the command to issue the request with.
+        sensor_number (int): the number of the sensor to read.
+        ip_address (str): BMC IP Address.
+        sdr_cache (IpmiSdrCache): cache of the BMC's SDR to use, if any.
+
+    Returns:
+        dict: the converted sensor reading for the given sensor_number.
+    """
+    if sdr_cache is not None:
+        sensor = sdr_cache.get_sensor(ipmicmd, sensor_number)
+    else:
+        sensor = ipmicmd.init_sdr().sensors.get(sensor_number)
+        if sensor is None:
+            raise OpenDCREException('Sensor number {} not found in SDR for IPMI BMC {}'.format(
+                sensor_number, ip_address))
+
+    rsp = ipmicmd.raw_command(netfn=4, command=0x2d, data=(sensor_number,))
+    if 'error' in rsp:
+        raise IpmiException(rsp['error'], rsp['code'])
+
+    reading = sensor.decode_sensor_reading(rsp['data'])
+    result = dict()
+    result['sensor_reading'] = reading.value
+    result['health'] = _convert_health_to_string(reading.health)
+    result['states'] = reading.states
+    return result
+
+
+def get_boot(username=None, password=None, ip_address=None, port=BMC_PORT, session_pool=None):
     """ Get boot target from remote host.
 
     Args:
@@ -187,12 +316,14 @@ def get_boot(username=None, password=None, ip_address=None, port=BMC_PORT):
         password (str): Password to connect to BMC with.
         ip_address (str): BMC IP Address.
         port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: boot target as observed, or IpmiException from pyghmi.
     """
     response = dict()
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
         result = ipmicmd.get_bootdev()
         if 'error' in result:
             raise OpenDCREException(
@@ -208,7 +339,7 @@ def get_boot(username=None, password=None, ip_address=None, port=BMC_PORT):
         return response
 
 
-def set_boot(username=None, password=None, ip_address=None, port=BMC_PORT, target=None):
+def set_boot(username=None, password=None, ip_address=None, port=BMC_PORT, target=None, session_pool=None):
     """ Set the boot target on remote host.
 
     Args:
@@ -217,13 +348,15 @@ def set_boot(username=None, password=None, ip_address=None, port=BMC_PORT, targe
         ip_address (str): BMC IP Address.
         port (int): BMC port
         target (str): The boot target to set the remote host to.
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: boot target as observed, or IpmiException from pyghmi.
 
     """
     response = dict()
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
         target = dict(pxe='network', hdd='hd', no_override='default').get(target)
         result = ipmicmd.set_bootdev(bootdev=target)
         if 'error' in result:
@@ -240,7 +373,7 @@ def set_boot(username=None, password=None, ip_address=None, port=BMC_PORT, targe
         return response
 
 
-def get_inventory(username=None, password=None, ip_address=None, port=BMC_PORT):
+def get_inventory(username=None, password=None, ip_address=None, port=BMC_PORT, session_pool=None):
     """ Get inventory information from the FRU of the remote system.
 
     Args:
@@ -248,12 +381,14 @@ def get_inventory(username=None, password=None, ip_address=None, port=BMC_PORT):
         password (str): The password to connect to BMC with.
         ip_address (str): The IP Address of the BMC.
         port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: inventory information from the remote system.
     """
     response = dict()
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
         result = ipmicmd.get_inventory_of_component('System')
         if 'error' in result:
             raise OpenDCREException(
@@ -279,7 +414,8 @@ def get_inventory(username=None, password=None, ip_address=None, port=BMC_PORT):
         return response
 
 
-def _get_temperature_readings(username=None, password=None, ip_address=None, port=BMC_PORT, entity=None):
+def _get_temperature_readings(username=None, password=None, ip_address=None, port=BMC_PORT, entity=None,
+                              session_pool=None):
     """ Internal wrapper for Get Temperature Reading DCMI command.
 
     Args:
@@ -289,13 +425,15 @@ def _get_temperature_readings(username=None, password=None, ip_address=None, por
         port (int): BMC port
         entity (str): Which entity to get temperature readings for:
             'inlet', 'cpu', and 'system_board'.
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: A dictionary of 'readings' containing a list of readings retrieved for
             the given entity type. These readings include entity and instance IDs for
             use elsewhere, in addition to a temperature_c reading.
     """
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
         cmd_data = [0xdc, 0x01]
         if entity == 'inlet':
             cmd_data.append(0x40)       # entity ID (air inlet)
@@ -337,7 +475,7 @@ def _get_temperature_readings(username=None, password=None, ip_address=None, por
         return readings
 
 
-def _get_power_reading(username=None, password=None, ip_address=None, port=BMC_PORT):
+def _get_power_reading(username=None, password=None, ip_address=None, port=BMC_PORT, session_pool=None):
     """ Internal wrapper for the Get Power Reading DCMI command.
 
     Args:
@@ -345,6 +483,7 @@ def _get_power_reading(username=None, password=None, ip_address=None, port=BMC_P
         password (str): The password to connect to BMC with.
         ip_address (str): The IP Address of the BMC.
         port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: Power reading information from the remote system.
@@ -352,21 +491,38 @@ def _get_power_reading(username=None, password=None, ip_address=None, port=BMC_P
     Raises:
         OpenDCREException in cases where power reading is not active.
     """
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
-        result = ipmicmd.raw_command(netfn=0x2c, command=0x02, data=(0xdc, 0x01, 0x00, 0x00))
-        if 'error' in result:
-            raise OpenDCREException(
-                'Error executing DCMI power reading command on {} : {}'.format(ip_address, result['error'])
-            )
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
+        return _read_power_reading(ipmicmd, ip_address)
+
+
+def _read_power_reading(ipmicmd, ip_address):
+    """ Issue the Get Power Reading DCMI command on an open BMC session.
+
+    Args:
+        ipmicmd (command.Command): the command to issue the request with.
+        ip_address (str): The IP Address of the BMC.
+
+    Returns:
+        dict: Power reading information from the remote system.
 
-        # if power measurement is inactive, we may be giving back back data.
-        if (result['data'][17] >> 6) & 0x01 == 0x00:
-            raise OpenDCREException('Error reading DCMI power - power measurement is not active.')
+    Raises:
+        OpenDCREException in cases where power reading is not active.
+    """
+    result = ipmicmd.raw_command(netfn=0x2c, command=0x02, data=(0xdc, 0x01, 0x00, 0x00))
+    if 'error' in result:
+        raise OpenDCREException(
+            'Error executing DCMI power reading command on {} : {}'.format(ip_address, result['error'])
+        )
 
-        return {'input_power': float(result['data'][1] | (result['data'][2] << 8))}
+    # if power measurement is inactive, we may be giving back back data.
+    if (result['data'][17] >> 6) & 0x01 == 0x00:
+        raise OpenDCREException('Error reading DCMI power - power measurement is not active.')
 
+    return {'input_power': float(result['data'][1] | (result['data'][2] << 8))}
 
-def _get_chassis_status(username=None, password=None, ip_address=None, port=BMC_PORT):
+
+def _get_chassis_status(username=None, password=None, ip_address=None, port=BMC_PORT, session_pool=None):
     """ Internal wrapper for the Get Chassis Status IPMI command.
 
     Args:
@@ -374,86 +530,101 @@ def _get_chassis_status(username=None, password=None, ip_address=None, port=BMC_
         password (str): The password to connect to BMC with.
         ip_address (str): The IP Address of the BMC.
         port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: Chassis status information from the remote system.
     """
-    response = dict()
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
-        result = ipmicmd.raw_command(netfn=0, command=1, data=[])
-        if 'error' in result:
-            raise OpenDCREException(
-                'Error executing chassis status command on {} : {}'.format(ip_address, result['error'])
-            )
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
+        return _read_chassis_status(ipmicmd, ip_address)
 
-        if result['command'] != 1 or result['netfn'] != 1 or result['code'] != 0:
-            raise OpenDCREException(
-                'Error receiving chassis status response on {} : rc {}'.format(ip_address, hex(result['code]']))
-            )
 
-        # process result and stick into fields of response
-        # first: power restore policy
-        response['power_restore_policy'] = 'unknown'
-        if (result['data'][0] >> 6) & 0b11 == 0b00:
-            response['power_restore_policy'] = 'power_off'
-        elif (result['data'][0] >> 6) & 0b11 == 0b01:
-            response['power_restore_policy'] = 'previous_state'
-        elif (result['data'][0] >> 6) & 0b11 == 0b10:
-            response['power_restore_policy'] = 'power_on'
-
-        # next, power control fault
-        response['power_control_fault'] = False if (result['data'][0] >> 4 & 0b1) == 0b00 else True
-
-        # then power fault
-        response['power_fault'] = False if (result['data'][0] >> 3 & 0b1) == 0b00 else True
-
-        # then interlock
-        response['interlock_active'] = False if (result['data'][0] >> 2 & 0b1) == 0b00 else True
-
-        # overload
-        response['power_overload'] = False if (result['data'][0] >> 1 & 0b1) == 0b00 else True
-
-        # power on?
-        response['power_status'] = 'off' if result['data'][0] & 0b1 == 0b00 else 'on'
-
-        # last power event
-        response['last_power_event'] = 'unknown'
-        if (result['data'][1] >> 4) & 0b01 == 0b01:
-            response['last_power_event'] = 'power_on_by_ipmi'
-        elif (result['data'][1] >> 3) & 0b01 == 0b01:
-            response['last_power_event'] = 'power_down_by_power_fault'
-        elif (result['data'][1] >> 2) & 0b01 == 0b01:
-            response['last_power_event'] = 'power_down_by_interlock'
-        elif (result['data'][1] >> 1) & 0b01 == 0b01:
-            response['last_power_event'] = 'power_down_by_overload'
-        elif result['data'][1] & 0b01 == 0b01:
-            response['last_power_event'] = 'ac_failed'
-
-        # led command supported
-        response['chassis_identify_supported'] = True if (result['data'][2] >> 6 & 0b1) == 0b01 else 'unspecified'
-
-        # led state
-        if (result['data'][2] >> 5) & 0x01 or (result['data'][2] >> 4) & 0x01:
-            response['led_state'] = 'on'
-        else:
-            response['led_state'] = 'off'
+def _read_chassis_status(ipmicmd, ip_address):
+    """ Issue the Get Chassis Status IPMI command on an open BMC session.
+
+    Args:
+        ipmicmd (command.Command): the command to issue the request with.
+        ip_address (str): The IP Address of the BMC.
+
+    Returns:
+        dict: Chassis status information from the remote system.
+    """
+    response = dict()
+    result = ipmicmd.raw_command(netfn=0, command=1, data=[])
+    if 'error' in result:
+        raise OpenDCREException(
+            'Error executing chassis status command on {} : {}'.format(ip_address, result['error'])
+        )
+
+    if result['command'] != 1 or result['netfn'] != 1 or result['code'] != 0:
+        raise OpenDCREException(
+            'Error receiving chassis status response on {} : rc {}'.format(ip_address, hex(result['code']))
+        )
+
+    # process result and stick into fields of response
+    # first: power restore policy
+    response['power_restore_policy'] = 'unknown'
+    if (result['data'][0] >> 6) & 0b11 == 0b00:
+        response['power_restore_policy'] = 'power_off'
+    elif (result['data'][0] >> 6) & 0b11 == 0b01:
+        response['power_restore_policy'] = 'previous_state'
+    elif (result['data'][0] >> 6) & 0b11 == 0b10:
+        response['power_restore_policy'] = 'power_on'
+
+    # next, power control fault
+    response['power_control_fault'] = False if (result['data'][0] >> 4 & 0b1) == 0b00 else True
+
+    # then power fault
+    response['power_fault'] = False if (result['data'][0] >> 3 & 0b1) == 0b00 else True
+
+    # then interlock
+    response['interlock_active'] = False if (result['data'][0] >> 2 & 0b1) == 0b00 else True
+
+    # overload
+    response['power_overload'] = False if (result['data'][0] >> 1 & 0b1) == 0b00 else True
+
+    # power on?
+    response['power_status'] = 'off' if result['data'][0] & 0b1 == 0b00 else 'on'
+
+    # last power event
+    response['last_power_event'] = 'unknown'
+    if (result['data'][1] >> 4) & 0b01 == 0b01:
+        response['last_power_event'] = 'power_on_by_ipmi'
+    elif (result['data'][1] >> 3) & 0b01 == 0b01:
+        response['last_power_event'] = 'power_down_by_power_fault'
+    elif (result['data'][1] >> 2) & 0b01 == 0b01:
+        response['last_power_event'] = 'power_down_by_interlock'
+    elif (result['data'][1] >> 1) & 0b01 == 0b01:
+        response['last_power_event'] = 'power_down_by_overload'
+    elif result['data'][1] & 0b01 == 0b01:
+        response['last_power_event'] = 'ac_failed'
+
+    # led command supported
+    response['chassis_identify_supported'] = True if (result['data'][2] >> 6 & 0b1) == 0b01 else 'unspecified'
+
+    # led state
+    if (result['data'][2] >> 5) & 0x01 or (result['data'][2] >> 4) & 0x01:
+        response['led_state'] = 'on'
+    else:
+        response['led_state'] = 'off'
 
-        # fan fault
-        response['fan_fault'] = (result['data'][2] >> 3 & 0b1) == 0b01
+    # fan fault
+    response['fan_fault'] = (result['data'][2] >> 3 & 0b1) == 0b01
 
-        # drive fault
-        response['drive_fault'] = (result['data'][2] >> 2 & 0b1) == 0b01
+    # drive fault
+    response['drive_fault'] = (result['data'][2] >> 2 & 0b1) == 0b01
 
-        # lockout active
-        response['lockout_active'] = (result['data'][2] >> 1 & 0b1) == 0b01
+    # lockout active
+    response['lockout_active'] = (result['data'][2] >> 1 & 0b1) == 0b01
 
-        # chassis intrusion active
-        response['chassis_intrusion'] = (result['data'][2] & 0b1) == 0b01
+    # chassis intrusion active
+    response['chassis_intrusion'] = (result['data'][2] & 0b1) == 0b01
 
     return response
 
 
-def get_identify(username=None, password=None, ip_address=None, port=BMC_PORT):
+def get_identify(username=None, password=None, ip_address=None, port=BMC_PORT, session_pool=None):
     """ Retrieve remote system LED status.
 
     Args:
@@ -461,14 +632,16 @@ def get_identify(username=None, password=None, ip_address=None, port=BMC_PORT):
         password (str): Password to connect to BMC.
         ip_address (str): BMC IP Address.
         port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: LED Status as reported by remote system.
     """
-    return {'led_state': _get_chassis_status(username, password, ip_address, port=port).get('led_state', 'unknown')}
+    chassis_status = _get_chassis_status(username, password, ip_address, port=port, session_pool=session_pool)
+    return {'led_state': chassis_status.get('led_state', 'unknown')}
 
 
-def set_identify(username=None, password=None, ip_address=None, port=BMC_PORT, led_state=None):
+def set_identify(username=None, password=None, ip_address=None, port=BMC_PORT, led_state=None, session_pool=None):
     """ Turn the remote system LED on or off.
 
     Args:
@@ -477,18 +650,21 @@ def set_identify(username=None, password=None, ip_address=None, port=BMC_PORT, l
         ip_address (str): BMC IP Address.
         port (int): BMC port
         led_state (int): 1 == Force on, 0 == Force off.
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         int: LED State as set.
     """
     # Force on if True, Force off if False (indefinite duration)
     state = led_state == 1
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
         ipmicmd.set_identify(on=state)
         return {'led_state': led_state}
 
 
-def get_dcmi_capabilities(username=None, password=None, ip_address=None, port=BMC_PORT, parameter_selector=None):
+def get_dcmi_capabilities(username=None, password=None, ip_address=None, port=BMC_PORT, parameter_selector=None,
+                          session_pool=None):
     """ Get DCMI capabilities from the remote BMC.
 
     Args:
@@ -497,6 +673,7 @@ def get_dcmi_capabilities(username=None, password=None, ip_address=None, port=BM
         ip_address (str): BMC IP Address.
         port (int): BMC port
         parameter_selector (int): The ID of the parameter to retrieve.
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: The formatted DCMI capabilities.  Raises an OpenDCREException if error.
@@ -504,7 +681,8 @@ def get_dcmi_capabilities(username=None, password=None, ip_address=None, port=BM
     if parameter_selector is None or (parameter_selector < 1 or parameter_selector > 5):
         raise ValueError('Invalid parameter selector provided to get_dcmi_capabilities.')
 
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
         result = ipmicmd.raw_command(netfn=0x2c, command=0x01, data=(0xdc, parameter_selector))
         if 'error' in result:
             raise OpenDCREException(
@@ -575,7 +753,8 @@ def get_dcmi_capabilities(username=None, password=None, ip_address=None, port=BM
         return response
 
 
-def get_dcmi_management_controller_id(username=None, password=None, ip_address=None, port=BMC_PORT):
+def get_dcmi_management_controller_id(username=None, password=None, ip_address=None, port=BMC_PORT,
+                                      session_pool=None):
     """ Get DCMI management controller ID from remote BMC.
 
     Args:
@@ -583,6 +762,7 @@ def get_dcmi_management_controller_id(username=None, password=None, ip_address=N
         password (str): Password to connect to BMC with.
         ip_address (str): BMC IP Address.
         port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         str: The management controller ID.  Raises an Exception if error.
@@ -590,7 +770,8 @@ def get_dcmi_management_controller_id(username=None, password=None, ip_address=N
     id_string = ''
 
     # read the mgmt controller ID out in blocks of 16 bytes, up to the limit of 64 bytes
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
         for x in range(0, 4):
             result = ipmicmd.raw_command(netfn=0x2c, command=0x01, data=(0xdc, x * 0x10))
             if 'error' in result:
@@ -25,20 +25,421 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
+import copy
+import logging
+import threading
+import time
+import weakref
+
 from opendcre_southbound.definitions import BMC_PORT
-from pyghmi.ipmi import command
+from opendcre_southbound.errors import OpenDCREException
+from pyghmi.ipmi import command, sdr
+
+logger = logging.getLogger(__name__)
+
+
+class IpmiSessionPool(object):
+    """ Pool of logged-in pyghmi Commands for a single BMC.
+
+    Borrowing a command from the pool reuses an open RMCP+ session where one is
+    available, so issuing an IPMI command costs a single request/response rather
+    than a session handshake, the request, and a logout.
+
+    Sessions which have been idle for longer than the keepalive interval are
+    pinged (Get Device ID) before being handed out, and sessions which have
+    been idle for longer than the idle timeout are logged out and dropped. A
+    session found to be broken, either by the keepalive or after a command has
+    been issued on it, is discarded and a new session is opened on the next
+    borrow. The failed command itself is not retried, as not all IPMI commands
+    are safe to repeat (e.g. power cycle).
+
+    A pyghmi session may only be used by one thread at a time, so the pool never
+    hands out two commands on the same session at once. Note that pyghmi shares
+    a single session between Commands for the same BMC and credentials within a
+    process, so commands to a BMC are effectively serialized on one session
+    whatever the value of max_sessions.
+
+    If the BMC's health is tracked, each exchange with the BMC on a pooled session
+    is recorded to it as a success, with the time the BMC took to respond as its
+    latency. A borrow is recorded as a failure if a session could not be opened or
+    was broken while borrowed.
+    """
+    def __init__(self, username=None, password=None, ip_address=None, port=BMC_PORT,
+                 max_sessions=1, idle_timeout=45, keepalive_interval=15, health=None):
+        """ Create a new IpmiSessionPool.
+
+        Args:
+            username (str): Username to connect to BMC with.
+            password (str): Password to connect to BMC with.
+            ip_address (str): BMC IP Address.
+            port (int): BMC port.
+            max_sessions (int): the maximum number of sessions the pool opens
+                to the BMC.
+            idle_timeout (float): the number of seconds a session may be idle in
+                the pool before it is logged out.
+            keepalive_interval (float): the number of seconds a session may be
+                idle in the pool before it is pinged prior to reuse.
+            health (DeviceHealth): the health of the BMC, if it is tracked.
+        """
+        self.username = username
+        self.password = password
+        self.ip_address = ip_address
+        self.port = port
+
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_timeout = float(idle_timeout)
+        self.keepalive_interval = float(keepalive_interval)
+        self.health = health
+
+        # the number of sessions opened by the pool - used to track session reuse
+        self.connect_count = 0
+
+        self._idle = []         # (command, last used) tuples, most recently used last
+        self._borrowed = {}     # borrowed command -> time borrowed
+        self._tracked = weakref.WeakKeyDictionary()     # sessions whose exchanges are timed
+        self._slots = 0         # commands borrowed, or being connected for a borrow
+        self._cv = threading.Condition(threading.Lock())
+        self._connect_lock = threading.Lock()
+
+    def acquire(self):
+        """ Borrow a logged-in command from the pool, opening a new session if
+        there is no idle session to reuse. This blocks while all of the pool's
+        sessions are in use.
+
+        Returns:
+            command.Command: the logged-in command. this must be given back to
+                the pool with `release`.
+        """
+        with self._cv:
+            while True:
+                self._evict_idle()
+                idle = self._take_idle()
+                if idle is not None or (self._slots < self.max_sessions and not self._idle):
+                    break
+                self._cv.wait()
+            self._slots += 1
+
+        try:
+            ipmicmd = None
+            if idle is not None:
+                ipmicmd, last_used = idle
+                if time.time() - last_used > self.keepalive_interval and not self._keepalive(ipmicmd):
+                    ipmicmd = None
+
+            if ipmicmd is None:
+                ipmicmd = self._connect()
+
+        except Exception as e:
+            with self._cv:
+                self._slots -= 1
+                self._cv.notify_all()
+            if self.health is not None:
+                self.health.record_failure(e)
+            raise
+
+        with self._cv:
+            # a new command may have been given a session already in use by
+            # another borrowed command (see class docstring), so wait for it
+            while self._session_borrowed(ipmicmd.ipmi_session):
+                self._cv.wait()
+            self._borrowed[ipmicmd] = time.time()
+        return ipmicmd
+
+    def release(self, ipmicmd):
+        """ Give a borrowed command back to the pool. If the command's session has
+        been broken, it is dropped from the pool.
+
+        Args:
+            ipmicmd (command.Command): the command to return to the pool.
+        """
+        with self._cv:
+            self._borrowed.pop(ipmicmd, None)
+            self._slots -= 1
+            ok = self._session_ok(ipmicmd)
+            if ok:
+                self._idle.append((ipmicmd, time.time()))
+            else:
+                logger.info('Dropping broken IPMI session for BMC {}.'.format(self.ip_address))
+            self._cv.notify_all()
+
+        if self.health is not None and not ok:
+            self.health.record_failure('IPMI session to BMC {} broken'.format(self.ip_address))
+
+    def close(self):
+        """ Log out of all idle sessions in the pool.
+        """
+        with self._cv:
+            idle = [ipmicmd for ipmicmd, _ in self._idle]
+            self._idle = []
+            for ipmicmd in idle:
+                self._logout(ipmicmd)
+
+    def _take_idle(self):
+        """ Take the most recently used idle command whose session is not in use
+        by a borrowed command. This is expected to be called with the pool lock held.
+
+        Returns:
+            tuple: the (command, last used) tuple, or None if there is no idle
+                command available.
+        """
+        for index in reversed(range(len(self._idle))):
+            if not self._session_borrowed(self._idle[index][0].ipmi_session):
+                return self._idle.pop(index)
+        return None
+
+    def _session_borrowed(self, session):
+        """ Check whether a session is in use by a borrowed command. This is expected
+        to be called with the pool lock held.
+
+        Args:
+            session (Session): the pyghmi session to check.
+
+        Returns:
+            bool: True if the session is in use; False otherwise.
+        """
+        return any(ipmicmd.ipmi_session is session for ipmicmd in self._borrowed)
+
+    def _connect(self):
+        """ Open a new session to the BMC.
+
+        Returns:
+            command.Command: the logged-in command.
+        """
+        # logins are serialized, as pyghmi does not cope well with several threads
+        # logging in to the same BMC at once (see class docstring).
+        with self._connect_lock:
+            ipmicmd = command.Command(userid=self.username, password=self.password, bmc=self.ip_address, port=self.port)
+        with self._cv:
+            self.connect_count += 1
+            if self.health is not None and ipmicmd.ipmi_session not in self._tracked:
+                self._track_exchanges(ipmicmd.ipmi_session)
+        return ipmicmd
+
+    def _track_exchanges(self, session):
+        """ Record the latency of each exchange with the BMC on the given session to
+        the BMC's health. Every request pyghmi makes (whether through the command's
+        raw_command or xraw_command, or from the SDR and OEM handlers) is issued with
+        the session's raw_command, so that is timed. This is expected to be called
+        with the pool lock held.
+
+        Args:
+            session (Session): the pyghmi session to track.
+        """
+        raw_command = session.raw_command
+        health = self.health
+
+        def timed_raw_command(*args, **kwargs):
+            start = time.time()
+            result = raw_command(*args, **kwargs)
+            # pyghmi reports a request which timed out as a response with the 0xffff
+            # code. other error codes are responses from the BMC, so are timed.
+            if result is not None and result.get('code') != 0xffff:
+                health.record_success(time.time() - start)
+            return result
+
+        session.raw_command = timed_raw_command
+        self._tracked[session] = True
+
+    def _keepalive(self, ipmicmd):
+        """ Ping the BMC on the given command's session to check that the session
+        is still alive, refreshing the BMC's session timeout.
+
+        Args:
+            ipmicmd (command.Command): the command to ping with.
+
+        Returns:
+            bool: True if the session is alive; False otherwise.
+        """
+        try:
+            result = ipmicmd.raw_command(netfn=0x06, command=0x01)
+            if 'error' in result:
+                raise ValueError(result['error'])
+        except Exception as e:
+            logger.info('IPMI session keepalive failed for BMC {} : {}'.format(self.ip_address, e))
+            return False
+        return self._session_ok(ipmicmd)
+
+    def _evict_idle(self):
+        """ Log out of sessions which have been idle in the pool for longer than the
+        idle timeout. This is expected to be called with the pool lock held.
+        """
+        now = time.time()
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            ipmicmd, _ = self._idle.pop(0)
+            self._logout(ipmicmd)
+
+    def _logout(self, ipmicmd):
+        """ Log out of the given command's session, unless the session is shared
+        with another command still held by the pool. This is expected to be called
+        with the pool lock held.
+
+        Args:
+            ipmicmd (command.Command): the command to log out.
+        """
+        session = ipmicmd.ipmi_session
+        if self._session_borrowed(session) or any(c.ipmi_session is session for c, _ in self._idle):
+            return
+
+        try:
+            session.logout()
+        except Exception as e:
+            logger.debug('Error logging out of IPMI session for BMC {} : {}'.format(self.ip_address, e))
+
+    @staticmethod
+    def _session_ok(ipmicmd):
+        """ Check whether the given command's session is still usable.
+
+        Args:
+            ipmicmd (command.Command): the command to check.
+
+        Returns:
+            bool: True if the session is logged in and not broken; False otherwise.
+        """
+        session = ipmicmd.ipmi_session
+        return bool(session.logged) and not getattr(session, 'broken', False)
+
+
+class IpmiSdrCache(object):
+    """ Cache of the parsed SDR repository for a single BMC.
+
+    Walking the SDR repository takes at least one request per record, so the
+    parsed repository is kept between commands and its sensor entries are looked
+    up by sensor number. The cache is revalidated against the repository's most
+    recent addition and erase timestamps (Get SDR Repository Info) at most once
+    per check interval, and whenever a sensor number is looked up which is not in
+    the cached repository. The repository is only walked again if the timestamps
+    have changed.
+    """
+    def __init__(self, ip_address=None, check_interval=60):
+        """ Create a new IpmiSdrCache.
+
+        Args:
+            ip_address (str): BMC IP Address.
+            check_interval (float): the number of seconds the cached SDR is used
+                for before its timestamps are checked against the BMC.
+        """
+        self.ip_address = ip_address
+        self.check_interval = float(check_interval)
+
+        # the number of times the SDR has been walked - used to track cache reuse
+        self.load_count = 0
+
+        self._sdr = None
+        self._timestamp = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    def get_sdr(self, ipmicmd, revalidate=False):
+        """ Get the parsed SDR for the BMC, walking the SDR repository if it has
+        not yet been cached, or if it has changed since it was cached.
+
+        Args:
+            ipmicmd (command.Command): the command to issue requests to the BMC with.
+            revalidate (bool): check the cached SDR against the BMC, even if it was
+                checked within the check interval.
+
+        Returns:
+            sdr.SDR: the parsed SDR repository.
+        """
+        with self._lock:
+            now = time.time()
+            if self._sdr is not None and not revalidate and now - self._checked < self.check_interval:
+                return self._sdr
+
+            timestamp = self.read_timestamp(ipmicmd)
+            if self._sdr is None or timestamp is None or timestamp != self._timestamp:
+                logger.debug('Loading SDR from IPMI BMC {}'.format(self.ip_address))
+                self._sdr = sdr.SDR(ipmicmd)
+                self._timestamp = timestamp
+                self.load_count += 1
+
+            self._checked = now
+            return self._sdr
+
+    def get_sensor(self, ipmicmd, sensor_number):
+        """ Get the SDR entry for the given sensor number.
+
+        Args:
+            ipmicmd (command.Command): the command to issue requests to the BMC with.
+            sensor_number (int): the number of the sensor to get the entry for.
+
+        Returns:
+            sdr.SDREntry: the SDR entry for the sensor. this is a copy of the cached
+                entry, bound to the given command, so it may be used to decode a
+                reading without affecting concurrent reads of the same sensor.
+
+        Raises:
+            OpenDCREException: the sensor number is not in the BMC's SDR.
+        """
+        sensors = self.get_sdr(ipmicmd).sensors
+        if sensor_number not in sensors:
+            # the sensor may have been added since the SDR was cached
+            sensors = self.get_sdr(ipmicmd, revalidate=True).sensors
+            if sensor_number not in sensors:
+                raise OpenDCREException('Sensor number {} not found in SDR for IPMI BMC {}'.format(
+                    sensor_number, self.ip_address))
+
+        # the entry keeps a reference to the command it was read with, which is used
+        # (and the entry's formula updated) when decoding readings for some sensors.
+        # the cached entry is shared by all commands to the BMC, so a copy of it is
+        # pointed at the command in use, rather than the cached entry itself.
+        sensor = copy.copy(sensors[sensor_number])
+        sensor.ipmicmd = weakref.proxy(ipmicmd)
+        return sensor
+
+    def invalidate(self):
+        """ Drop the cached SDR, so that it is walked again on next use.
+        """
+        with self._lock:
+            self._sdr = None
+            self._timestamp = None
+
+    @property
+    def timestamp(self):
+        """ The SDR repository timestamps the cached SDR was loaded at, or None if
+        no SDR is cached (or its timestamps could not be read).
+        """
+        return self._timestamp
+
+    @staticmethod
+    def read_timestamp(ipmicmd):
+        """ Get the most recent addition and erase timestamps of the BMC's SDR
+        repository.
+
+        Args:
+            ipmicmd (command.Command): the command to issue the request with.
+
+        Returns:
+            str: the packed addition and erase timestamps, or None if they could
+                not be read (in which case the SDR is walked again each time it
+                is checked).
+        """
+        rsp = ipmicmd.raw_command(netfn=0x0a, command=0x20)
+        if 'error' in rsp:
+            return None
+        return str(bytearray(rsp['data'])[5:13])
 
 
 class IpmiCommand(object):
     """ Wrapper for IPMICommand that cleans up after itself.
+
+    If a session pool is given, the command is borrowed from the pool and given
+    back to it on exit, rather than opening a new session and logging out.
     """
 
-    def __init__(self, username=None, password=None, ip_address=None, port=BMC_PORT):
-        self.o = command.Command(userid=username, password=password, bmc=ip_address, port=port)
+    def __init__(self, username=None, password=None, ip_address=None, port=BMC_PORT, session_pool=None):
+        self.session_pool = session_pool
+        if session_pool is None:
+            self.o = command.Command(userid=username, password=password, bmc=ip_address, port=port)
+        else:
+            self.o = session_pool.acquire()
 
     def __enter__(self):
         return self.o
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if hasattr(self, 'o') and self.o:
-            self.o.ipmi_session.logout()
+            if self.session_pool is not None:
+                self.session_pool.release(self.o)
+            else:
+                self.o.ipmi_session.logout()
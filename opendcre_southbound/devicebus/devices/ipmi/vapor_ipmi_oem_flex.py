@@ -30,7 +30,8 @@ from opendcre_southbound.definitions import BMC_PORT
 from vapor_ipmi_common import IpmiCommand
 
 
-def get_flex_victoria_power_reading(username=None, password=None, ip_address=None, port=BMC_PORT):
+def get_flex_victoria_power_reading(username=None, password=None, ip_address=None, port=BMC_PORT,
+                                    session_pool=None):
     """ Flex Ciii Victoria 2508 power reading retrieval.
 
     Uses master r/w command to retrieve the power status from the two PSUs; the readings are then summed together
@@ -43,6 +44,7 @@ def get_flex_victoria_power_reading(username=None, password=None, ip_address=Non
         password (str): The password to connect to BMC with.
         ip_address (str): The IP Address of the BMC.
         port (int): BMC port
+        session_pool (IpmiSessionPool): pool to borrow the BMC session from, if any.
 
     Returns:
         dict: Power reading information from the remote system.
@@ -50,33 +52,49 @@ def get_flex_victoria_power_reading(username=None, password=None, ip_address=Non
     Raises:
         OpenDCRException: in cases where BMC is unreachable or an error is encountered processing the command.
     """
+    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port,
+                     session_pool=session_pool) as ipmicmd:
+        return read_flex_victoria_power_reading(ipmicmd, ip_address)
+
+
+def read_flex_victoria_power_reading(ipmicmd, ip_address):
+    """ Flex Ciii Victoria 2508 power reading retrieval on an open BMC session.
+
+    See get_flex_victoria_power_reading.
+
+    Args:
+        ipmicmd (command.Command): the command to issue the requests with.
+        ip_address (str): The IP Address of the BMC.
+
+    Returns:
+        dict: Power reading information from the remote system.
+    """
     psu0_power = 0
     psu1_power = 0
 
-    with IpmiCommand(ip_address=ip_address, username=username, password=password, port=port) as ipmicmd:
-        # get PSU0 consumption
-        try:
-            result = ipmicmd.raw_command(netfn=0x06, command=0x52, data=(0xa0, 0xb0, 0x02, 0x96))
-            if 'error' in result:
-                raise OpenDCREException(
-                    'Error executing master r/w command on {} : {}'.format(ip_address, result['error'])
-                )
-            psu0_power = _convert_linear_11((result['data'][1] << 8) | result['data'][0])
-        except Exception:
-            # PSU 0 or 1 may be missing, which is fine, so no action needed
-            pass
-
-        # get PSU1 consumption
-        try:
-            result = ipmicmd.raw_command(netfn=0x06, command=0x52, data=(0xa0, 0xb2, 0x02, 0x96))
-            if 'error' in result:
-                raise OpenDCREException(
-                    'Error executing master r/w command on {} : {}'.format(ip_address, result['error'])
-                )
-            psu1_power = _convert_linear_11((result['data'][1] << 8) | result['data'][0])
-        except Exception:
-            # PSU 0 or 1 may be missing, which is fine, so no action needed
-            pass
+    # get PSU0 consumption
+    try:
+        result = ipmicmd.raw_command(netfn=0x06, command=0x52, data=(0xa0, 0xb0, 0x02, 0x96))
+        if 'error' in result:
+            raise OpenDCREException(
+                'Error executing master r/w command on {} : {}'.format(ip_address, result['error'])
+            )
+        psu0_power = _convert_linear_11((result['data'][1] << 8) | result['data'][0])
+    except Exception:
+        # PSU 0 or 1 may be missing, which is fine, so no action needed
+        pass
+
+    # get PSU1 consumption
+    try:
+        result = ipmicmd.raw_command(netfn=0x06, command=0x52, data=(0xa0, 0xb2, 0x02, 0x96))
+        if 'error' in result:
+            raise OpenDCREException(
+                'Error executing master r/w command on {} : {}'.format(ip_address, result['error'])
+            )
+        psu1_power = _convert_linear_11((result['data'][1] << 8) | result['data'][0])
+    except Exception:
+        # PSU 0 or 1 may be missing, which is fine, so no action needed
+        pass
 
     return {'input_power': float(psu0_power + psu1_power)}
 
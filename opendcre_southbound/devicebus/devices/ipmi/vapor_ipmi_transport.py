@@ -0,0 +1,996 @@
+#!/usr/bin/env python
+""" OpenDCRE IPMI Multiplexed Transport.
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import collections
+import errno
+import hashlib
+import heapq
+import hmac
+import logging
+import os
+import random
+import select
+import socket
+import struct
+import threading
+import time
+
+from Crypto.Cipher import AES
+from pyghmi.exceptions import IpmiException
+from pyghmi.ipmi import command
+from pyghmi.ipmi.private.util import get_ipmi_error
+
+from opendcre_southbound.definitions import BMC_PORT
+
+logger = logging.getLogger(__name__)
+
+# the RMCP header for IPMI messages (version, reserved, sequence - no ack, class - IPMI)
+RMCP_HEADER = bytearray([0x06, 0x00, 0xff, 0x07])
+
+# RMCP+ authentication type/format
+AUTH_RMCPPLUS = 0x06
+
+# RMCP+ payload types
+PAYLOAD_IPMI = 0x00
+PAYLOAD_OPEN_SESSION_REQUEST = 0x10
+PAYLOAD_OPEN_SESSION_RESPONSE = 0x11
+PAYLOAD_RAKP_1 = 0x12
+PAYLOAD_RAKP_2 = 0x13
+PAYLOAD_RAKP_3 = 0x14
+PAYLOAD_RAKP_4 = 0x15
+
+# the response returned for a command which the BMC did not answer, as returned by pyghmi
+TIMEOUT_RESPONSE = {'error': 'timeout', 'code': 0xffff}
+
+# the states of a session
+CLOSED = 'closed'
+WAITING = 'waiting'
+OPENING = 'opening'
+RAKP_2 = 'rakp2'
+RAKP_4 = 'rakp4'
+PRIVILEGE = 'privilege'
+ACTIVE = 'active'
+
+
+def _to_bytes(value):
+    """ Get a credential as a byte string (config values are loaded as unicode).
+    """
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+def _checksum(data):
+    """ Get the two's complement checksum of a list of bytes (IPMI spec 13.8).
+    """
+    return (0x100 - (sum(data) & 0xff)) & 0xff
+
+
+class IpmiRequest(object):
+    """ A single IPMI command issued to a BMC over the IpmiTransport.
+
+    The request completes once the BMC responds, or once the transport gives up
+    on it. Its result is the response, in the form returned by pyghmi's
+    `raw_command` (a dict with the 'netfn', 'command', 'code' and 'data' of the
+    response, and an 'error' if the command failed).
+    """
+    def __init__(self, netfn, command, data=()):
+        self.netfn = netfn
+        self.command = command
+        self.data = list(data)
+
+        self.tries = 0
+        self.seqlun = None
+        self.sent = None
+        self.timeout = None
+
+        self._response = None
+        self._exception = None
+        self._callbacks = []
+        self._timer = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def done(self):
+        """ Check whether the request has completed.
+        """
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """ Wait for the response to the request.
+
+        Args:
+            timeout (float): the number of seconds to wait for the request to
+                complete. if None, wait until it completes.
+
+        Returns:
+            dict: the response to the request.
+
+        Raises:
+            IpmiException: the request could not be issued (e.g. the session to
+                the BMC could not be established), or it did not complete within
+                the timeout.
+        """
+        if not self._done.wait(timeout):
+            raise IpmiException('Timed out waiting for IPMI response')
+        if self._exception is not None:
+            raise self._exception
+        return self._response
+
+    def add_done_callback(self, fn):
+        """ Add a callback to call with the request once it completes. Callbacks
+        are called from the transport's I/O thread, so they must not block.
+
+        Args:
+            fn (callable): the callback, which is passed the request.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def _complete(self, response=None, exception=None):
+        """ Complete the request with the given response or exception.
+        """
+        with self._lock:
+            if self._done.is_set():
+                return
+            self._response = response
+            self._exception = exception
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                logger.exception(e)
+
+
+class _Timer(object):
+    """ A callback scheduled on the transport's I/O thread.
+    """
+    def __init__(self, deadline, fn, args):
+        self.deadline = deadline
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class IpmiTransport(object):
+    """ Multiplexed UDP transport for IPMI v2.0 (RMCP+) sessions to many BMCs.
+
+    Rather than blocking a thread on each BMC while it waits for a response, all
+    sessions share a single UDP socket (per address family), which is serviced by
+    a single I/O thread running a select() loop. The RMCP+ protocol for each BMC
+    (session setup, request retries, integrity and confidentiality) is run on that
+    thread, so any number of commands to any number of BMCs can be in flight at
+    once without a thread for each.
+
+    Commands are issued either asynchronously, by submitting an IpmiRequest to a
+    session and waiting on (or adding a callback to) the request, or synchronously
+    through an IpmiTransportCommand, which runs pyghmi's command layer (sensor
+    reads, chassis status and control, boot options, identify, FRU and DCMI) over
+    the transport.
+
+    Only a limited number of sessions are established at once, so that starting
+    commands to a great many BMCs at once does not flood the network (or a BMC
+    serving many sessions) with session setup messages, which would then time out
+    and be retried. Other sessions wait their turn to be established.
+
+    Sessions are established with cipher suite 3 (RAKP-HMAC-SHA1 authentication,
+    HMAC-SHA1-96 integrity and AES-CBC-128 confidentiality). BMCs which only
+    support IPMI v1.5 are not supported by the transport.
+    """
+    def __init__(self, timeout=1.0, retries=3, max_in_flight=1, idle_timeout=45, max_logins=32):
+        """ Create a new IpmiTransport, and start its I/O thread.
+
+        Args:
+            timeout (float): the number of seconds to wait for a response before
+                retrying a request. the wait doubles with each retry.
+            retries (int): the number of times a request is retried before it is
+                considered to have failed.
+            max_in_flight (int): the default maximum number of requests in flight
+                to a single BMC at once. further requests are queued until a
+                response is received.
+            idle_timeout (float): the number of seconds a session may be idle before
+                it is re-established on next use, rather than risk issuing a command
+                on a session which the BMC has timed out.
+            max_logins (int): the maximum number of sessions being established at
+                once.
+        """
+        self.timeout = float(timeout)
+        self.retries = max(0, int(retries))
+        self.max_in_flight = max(1, min(63, int(max_in_flight)))
+        self.idle_timeout = float(idle_timeout)
+        self.max_logins = max(1, int(max_logins))
+
+        # sessions keyed by their local (console) session id, which the BMC echoes
+        # back in each response, and the sockets keyed by address family
+        self._sessions = {}
+        self._sockets = {}
+        self._next_sid = random.randint(1, 0xfffffff)
+
+        # the sessions being established, and those waiting to be
+        self._logins = set()
+        self._login_queue = collections.deque()
+
+        self._timers = []
+        self._timer_count = 0
+
+        self._calls = collections.deque()
+        self._calls_lock = threading.Lock()
+        self._wake_pending = False
+        self._wake_r, self._wake_w = os.pipe()
+
+        self._closing = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='ipmi-transport')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def session(self, ip_address, username, password, port=BMC_PORT, max_in_flight=None, kg=None, health=None):
+        """ Create a session to a BMC. The session is established when the first
+        command is issued on it.
+
+        Args:
+            ip_address (str): BMC IP Address (or hostname).
+            username (str): Username to connect to BMC with.
+            password (str): Password to connect to BMC with.
+            port (int): BMC port.
+            max_in_flight (int): the maximum number of requests in flight to the BMC
+                at once. if None, the transport's default is used.
+            kg (str): the BMC key, if the BMC uses two-key login.
+            health (DeviceHealth): the health of the BMC, if it is tracked. the
+                session's requests are recorded to it, and use its adaptive timeout.
+
+        Returns:
+            IpmiTransportSession: the session to the BMC.
+        """
+        family, _, _, _, sockaddr = socket.getaddrinfo(ip_address, port, 0, socket.SOCK_DGRAM)[0]
+        return IpmiTransportSession(
+            self, ip_address, family, sockaddr, username, password, kg=kg,
+            max_in_flight=self.max_in_flight if max_in_flight is None else max(1, min(63, int(max_in_flight))),
+            health=health
+        )
+
+    def call_soon(self, fn, *args):
+        """ Call a function on the I/O thread. This may be called from any thread.
+        """
+        if self._closing:
+            raise IpmiException('IPMI transport closed')
+
+        with self._calls_lock:
+            self._calls.append((fn, args))
+            wake = not self._wake_pending
+            self._wake_pending = True
+        if wake:
+            os.write(self._wake_w, b'x')
+
+    def call_later(self, delay, fn, *args):
+        """ Schedule a function to be called on the I/O thread after `delay` seconds.
+        This should be called from the I/O thread.
+
+        Returns:
+            _Timer: the scheduled call, which may be cancelled.
+        """
+        timer = _Timer(time.time() + delay, fn, args)
+        self._timer_count += 1
+        heapq.heappush(self._timers, (timer.deadline, self._timer_count, timer))
+        return timer
+
+    def close(self, timeout=5):
+        """ Close all sessions, and stop the I/O thread.
+
+        Args:
+            timeout (float): the number of seconds to wait for the I/O thread to stop.
+        """
+        def _close():
+            for session in list(self._sessions.values()) + list(self._login_queue):
+                session._close(IpmiException('IPMI transport closed'))
+            self._stopped = True
+
+        self.call_soon(_close)
+        self._closing = True
+        self._thread.join(timeout)
+
+    def _sendto(self, session, packet):
+        """ Send a packet to the BMC of the given session.
+        """
+        sock = self._sockets.get(session.family)
+        if sock is None:
+            sock = socket.socket(session.family, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            try:
+                # many BMCs may respond at once, so give the socket a larger buffer
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+            except socket.error:
+                pass
+            self._sockets[session.family] = sock
+
+        try:
+            sock.sendto(bytes(packet), session.sockaddr)
+        except socket.error as e:
+            # a dropped packet is handled by the retry timer, as for one lost on the wire
+            logger.debug('Failed to send IPMI packet to {} : {}'.format(session.ip_address, e))
+
+    def _start_login(self, session):
+        """ Establish a session, once fewer than the maximum number of sessions are
+        being established.
+        """
+        if len(self._logins) < self.max_logins:
+            self._logins.add(session)
+            session._open_session()
+        else:
+            self._login_queue.append(session)
+
+    def _end_login(self, session):
+        """ Note that a session is no longer being established (it is either active,
+        or has failed or been closed), and start establishing the next waiting session.
+        """
+        self._logins.discard(session)
+        while self._login_queue and len(self._logins) < self.max_logins:
+            waiting = self._login_queue.popleft()
+            if waiting.state == WAITING:
+                self._logins.add(waiting)
+                waiting._open_session()
+
+    def _register(self, session):
+        """ Allocate a local session id for a session, and route responses to it.
+        """
+        while self._next_sid == 0 or self._next_sid in self._sessions:
+            self._next_sid = (self._next_sid + 1) & 0xffffffff
+        sid = self._next_sid
+        self._next_sid = (self._next_sid + 1) & 0xffffffff
+        self._sessions[sid] = session
+        return sid
+
+    def _unregister(self, sid):
+        """ Stop routing responses for the given local session id.
+        """
+        self._sessions.pop(sid, None)
+
+    def _run(self):
+        """ The I/O loop - receive and dispatch packets, and run calls and timers, until
+        the transport is closed.
+        """
+        while not self._stopped:
+            delay = None
+            if self._timers:
+                delay = max(0, self._timers[0][0] - time.time())
+
+            readers = [self._wake_r] + list(self._sockets.values())
+            try:
+                readable, _, _ = select.select(readers, [], [], delay)
+            except select.error as e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+
+            for fd in readable:
+                if fd == self._wake_r:
+                    os.read(self._wake_r, 4096)
+                else:
+                    self._receive(fd)
+
+            with self._calls_lock:
+                calls, self._calls = self._calls, collections.deque()
+                self._wake_pending = False
+            for fn, args in calls:
+                self._invoke(fn, args)
+
+            now = time.time()
+            while self._timers and self._timers[0][0] <= now:
+                _, _, timer = heapq.heappop(self._timers)
+                if not timer.cancelled:
+                    self._invoke(timer.fn, timer.args)
+
+        for sock in self._sockets.values():
+            sock.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    @staticmethod
+    def _invoke(fn, args):
+        """ Call a function on the I/O thread, logging (rather than raising) any error.
+        """
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error('Error in IPMI transport I/O thread.')
+            logger.exception(e)
+
+    def _receive(self, sock):
+        """ Receive all pending packets on a socket, and dispatch each to its session.
+        """
+        for _ in xrange(256):
+            try:
+                data, sockaddr = sock.recvfrom(4096)
+            except socket.error as e:
+                if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    logger.debug('Failed to receive IPMI packet: {}'.format(e))
+                return
+
+            data = bytearray(data)
+            if len(data) < 16 or data[:4] != RMCP_HEADER or data[4] != AUTH_RMCPPLUS:
+                continue
+
+            # IPMI payloads carry our session id in the session header. the session
+            # setup payloads are sent outside of a session, and carry it in the payload
+            payload_type = data[5] & 0b00111111
+            if payload_type == PAYLOAD_IPMI:
+                sid = struct.unpack('<I', bytes(data[6:10]))[0]
+            elif payload_type in (PAYLOAD_OPEN_SESSION_RESPONSE, PAYLOAD_RAKP_2, PAYLOAD_RAKP_4):
+                if len(data) < 24:
+                    continue
+                sid = struct.unpack('<I', bytes(data[20:24]))[0]
+            else:
+                continue
+
+            session = self._sessions.get(sid)
+            if session is None or session.sockaddr[:2] != sockaddr[:2]:
+                continue
+            self._invoke(session._on_packet, (payload_type, data))
+
+
+class IpmiTransportSession(object):
+    """ An RMCP+ session to a single BMC, over an IpmiTransport.
+
+    The session is established on first use, and re-established whenever it is
+    found to be broken (a command goes unanswered after all of its retries) or has
+    been idle for longer than the transport's idle timeout. Commands issued while
+    the session is being established, or while the maximum number of commands are
+    in flight to the BMC, are queued.
+
+    All of the session's state is only touched from the transport's I/O thread.
+    The session also provides the interface pyghmi's Command uses of its session
+    (`raw_command`, `logout`, `ipmiversion`), so that it can back a pyghmi Command
+    (see IpmiTransportCommand).
+    """
+    ipmiversion = 2.0
+
+    def __init__(self, transport, ip_address, family, sockaddr, username, password, kg=None, max_in_flight=1,
+                 health=None):
+        self.transport = transport
+        self.ip_address = ip_address
+        self.family = family
+        self.sockaddr = sockaddr
+        self.userid = _to_bytes(username)
+        self.password = _to_bytes(password)
+        self.kg = _to_bytes(kg) if kg is not None else self.password
+        self.max_in_flight = max_in_flight
+        self.health = health
+
+        # the number of times the session has been established - used to track reuse
+        self.login_count = 0
+
+        self.state = CLOSED
+        self.privlevel = 4
+
+        self._pending = collections.deque()
+        self._in_flight = {}
+        self._seq = random.randint(0, 0x3f)
+        self._last_used = 0
+
+        self._sid = None
+        self._bmc_sid = None
+        self._sequence = 0
+        self._tag = 0
+        self._login_tries = 0
+        self._login_timer = None
+        self._rm = None
+        self._rc = None
+        self._guid = None
+        self._sik = None
+        self._k1 = None
+        self._aes_key = None
+
+    # ----------------------------------------------------------------------
+    # public interface (any thread)
+    # ----------------------------------------------------------------------
+
+    @property
+    def logged(self):
+        return self.state == ACTIVE
+
+    @property
+    def broken(self):
+        return False
+
+    def submit(self, netfn, command, data=(), delay=None):
+        """ Issue a command to the BMC, without waiting for the response.
+
+        Args:
+            netfn (int): the network function of the command.
+            command (int): the command.
+            data (list | tuple): the command data.
+            delay (float): the number of seconds to wait before issuing the command.
+
+        Returns:
+            IpmiRequest: the request, which completes with the BMC's response.
+        """
+        request = IpmiRequest(netfn, command, data)
+        if delay:
+            self.transport.call_soon(self.transport.call_later, delay, self._enqueue, request)
+        else:
+            self.transport.call_soon(self._enqueue, request)
+        return request
+
+    def raw_command(self, netfn, command, bridge_request=None, data=(), retry=True, delay_xmit=None, timeout=None,
+                    waitall=False):
+        """ Issue a command to the BMC, and wait for the response. This matches the
+        `raw_command` of a pyghmi session.
+
+        Returns:
+            dict: the response to the command.
+
+        Raises:
+            IpmiException: the session to the BMC could not be established.
+        """
+        if bridge_request:
+            raise NotImplementedError('Bridged requests are not supported by the IPMI transport.')
+        return self.submit(netfn, command, data, delay=delay_xmit).result()
+
+    def logout(self):
+        """ Close the session to the BMC. It is re-established on next use.
+        """
+        self.transport.call_soon(self._close, IpmiException('Session no longer connected'))
+        return {'success': True}
+
+    # ----------------------------------------------------------------------
+    # session state machine (I/O thread)
+    # ----------------------------------------------------------------------
+
+    def _enqueue(self, request):
+        """ Queue a request, establishing the session first if needed.
+        """
+        if self.state == ACTIVE and time.time() - self._last_used > self.transport.idle_timeout:
+            # the BMC has likely timed out the session, so start a new one
+            self._close(None)
+
+        self._pending.append(request)
+        if self.state == CLOSED:
+            self._login()
+        else:
+            self._flush()
+
+    def _flush(self):
+        """ Send queued requests, up to the in-flight limit.
+        """
+        if self.state != ACTIVE:
+            return
+        while self._pending and len(self._in_flight) < self.max_in_flight:
+            self._send_request(self._pending.popleft())
+
+    def _send_request(self, request):
+        """ Send an IPMI request in the session, tracking it until it is answered.
+        """
+        if request.seqlun is None:
+            seq = self._seq
+            while (seq << 2) in self._in_flight:
+                seq = (seq + 1) & 0x3f
+            self._seq = (seq + 1) & 0x3f
+            request.seqlun = seq << 2
+            self._in_flight[request.seqlun] = request
+
+        header = [0x20, request.netfn << 2]
+        body = [0x81, request.seqlun, request.command] + request.data
+        message = header + [_checksum(header)] + body + [_checksum(body)]
+
+        request.tries += 1
+        self._last_used = time.time()
+        if request.sent is None:
+            request.sent = self._last_used
+            request.timeout = self.transport.timeout
+            if self.health is not None:
+                request.timeout = self.health.get_timeout(request.timeout)
+
+        self.transport._sendto(self, self._pack(PAYLOAD_IPMI, message))
+        request._timer = self.transport.call_later(
+            request.timeout * 2 ** (request.tries - 1), self._request_timeout, request
+        )
+
+    def _request_timeout(self, request):
+        """ Retry a request the BMC has not answered. Once out of retries, the
+        session is considered broken.
+        """
+        if self._in_flight.get(request.seqlun) is not request:
+            return
+        if request.tries <= self.transport.retries:
+            self._send_request(request)
+            return
+
+        logger.info('IPMI session to BMC {} timed out.'.format(self.ip_address))
+        if self.health is not None:
+            self.health.record_failure('IPMI request to BMC {} timed out'.format(self.ip_address))
+        del self._in_flight[request.seqlun]
+        request._complete(response=dict(TIMEOUT_RESPONSE))
+        self._close(None, reset_pending=False)
+
+        # queued requests are issued on a new session
+        if self._pending:
+            self._login()
+
+    def _login(self):
+        """ Establish the session, once the transport allows it.
+        """
+        self._login_tries = 0
+        self.state = WAITING
+        self.transport._start_login(self)
+
+    def _open_session(self):
+        """ Start establishing the session - send the RMCP+ Open Session Request.
+        """
+        if self._sid is not None:
+            self.transport._unregister(self._sid)
+        self._sid = self.transport._register(self)
+        self._login_tries += 1
+        self.state = OPENING
+
+        payload = [self._next_tag(), 0, 0, 0] + list(bytearray(struct.pack('<I', self._sid))) + [
+            0x00, 0, 0, 0x08, 0x01, 0, 0, 0,    # authentication - RAKP-HMAC-SHA1
+            0x01, 0, 0, 0x08, 0x01, 0, 0, 0,    # integrity - HMAC-SHA1-96
+            0x02, 0, 0, 0x08, 0x01, 0, 0, 0     # confidentiality - AES-CBC-128
+        ]
+        self._send_setup(PAYLOAD_OPEN_SESSION_REQUEST, payload)
+
+    def _send_setup(self, payload_type, payload):
+        """ Send a session setup message, restarting the setup if it goes unanswered.
+        """
+        if self._login_timer is not None:
+            self._login_timer.cancel()
+        self.transport._sendto(self, self._pack(payload_type, payload, secure=False))
+        self._login_timer = self.transport.call_later(
+            self.transport.timeout * 2 ** (self._login_tries - 1), self._setup_timeout
+        )
+
+    def _setup_timeout(self):
+        """ Restart session setup after a setup message goes unanswered. The whole
+        exchange is restarted, since BMCs do not take kindly to repeated RAKP messages.
+        """
+        self._login_timer = None
+        if self.state not in (OPENING, RAKP_2, RAKP_4):
+            return
+        if self._login_tries <= self.transport.retries:
+            self._open_session()
+        else:
+            self._login_failed('timeout')
+
+    def _login_failed(self, error):
+        """ Fail the requests waiting on the session, which could not be established.
+        """
+        logger.warning('Failed to establish IPMI session to BMC {} : {}'.format(self.ip_address, error))
+        if self.health is not None:
+            self.health.record_failure('Failed to establish IPMI session : {}'.format(error))
+        self._close(IpmiException('Failed to establish IPMI session to BMC {} : {}'.format(self.ip_address, error)))
+
+    def _on_packet(self, payload_type, data):
+        """ Handle a packet received for the session.
+        """
+        if payload_type == PAYLOAD_IPMI:
+            self._on_ipmi_payload(data)
+            return
+
+        payload = data[16:16 + (data[14] | data[15] << 8)]
+        if len(payload) < 8 or payload[0] != self._tag:
+            return
+
+        if payload_type == PAYLOAD_OPEN_SESSION_RESPONSE and self.state == OPENING:
+            self._on_open_session_response(payload)
+        elif payload_type == PAYLOAD_RAKP_2 and self.state == RAKP_2:
+            self._on_rakp_2(payload)
+        elif payload_type == PAYLOAD_RAKP_4 and self.state == RAKP_4:
+            self._on_rakp_4(payload)
+
+    def _on_open_session_response(self, payload):
+        """ Handle the RMCP+ Open Session Response, and send RAKP Message 1.
+        """
+        if payload[1] != 0:
+            self._login_failed('RMCP+ status code {} in open session response'.format(payload[1]))
+            return
+
+        self._bmc_sid = struct.unpack('<I', bytes(payload[8:12]))[0]
+        self._rm = os.urandom(16)
+        self.state = RAKP_2
+
+        username = bytearray(self.userid)
+        payload = [self._next_tag(), 0, 0, 0] + list(bytearray(struct.pack('<I', self._bmc_sid))) + \
+            list(bytearray(self._rm)) + [self._role, 0, 0, len(username)] + list(username)
+        self._send_setup(PAYLOAD_RAKP_1, payload)
+
+    def _on_rakp_2(self, payload):
+        """ Handle RAKP Message 2 - authenticate the BMC, derive the session keys, and
+        send RAKP Message 3.
+        """
+        if payload[1] != 0:
+            if payload[1] in (0x09, 0x0d) and self.privlevel == 4:
+                # the BMC may not allow the user administrator privilege - try operator
+                self.privlevel = 3
+                self._open_session()
+                return
+            self._login_failed('RMCP+ status code {} in RAKP 2'.format(payload[1]))
+            return
+
+        self._rc = bytes(payload[8:24])
+        self._guid = bytes(payload[24:40])
+        user = struct.pack('2B', self._role, len(self.userid)) + self.userid
+
+        expected = hmac.new(
+            self.password,
+            struct.pack('<II', self._sid, self._bmc_sid) + self._rm + self._rc + self._guid + user,
+            hashlib.sha1
+        ).digest()
+        if bytes(payload[40:60]) != expected:
+            self._login_failed('incorrect password provided')
+            return
+
+        self._sik = hmac.new(self.kg, self._rm + self._rc + user, hashlib.sha1).digest()
+        self._k1 = hmac.new(self._sik, b'\x01' * 20, hashlib.sha1).digest()
+        self._aes_key = hmac.new(self._sik, b'\x02' * 20, hashlib.sha1).digest()[:16]
+        self.state = RAKP_4
+
+        auth_code = hmac.new(self.password, self._rc + struct.pack('<I', self._sid) + user, hashlib.sha1).digest()
+        payload = [self._next_tag(), 0, 0, 0] + list(bytearray(struct.pack('<I', self._bmc_sid))) + \
+            list(bytearray(auth_code))
+        self._send_setup(PAYLOAD_RAKP_3, payload)
+
+    def _on_rakp_4(self, payload):
+        """ Handle RAKP Message 4 - check the session integrity value, and request the
+        session privilege level.
+        """
+        if payload[1] != 0:
+            self._login_failed('RMCP+ status code {} in RAKP 4'.format(payload[1]))
+            return
+
+        expected = hmac.new(self._sik, self._rm + struct.pack('<I', self._bmc_sid) + self._guid, hashlib.sha1)
+        if bytes(payload[8:20]) != expected.digest()[:12]:
+            self._login_failed('invalid RAKP 4 integrity check value')
+            return
+
+        if self._login_timer is not None:
+            self._login_timer.cancel()
+            self._login_timer = None
+
+        self._sequence = 1
+        self.state = PRIVILEGE
+        self._set_privilege()
+
+    def _set_privilege(self):
+        """ Request the session privilege level (Set Session Privilege Level). The
+        session is active once the BMC accepts it.
+        """
+        request = IpmiRequest(0x06, 0x3b, [self.privlevel])
+        request.add_done_callback(self._on_privilege)
+        self._send_request(request)
+
+    def _on_privilege(self, request):
+        """ Handle the response to the Set Session Privilege Level request.
+        """
+        if self.state != PRIVILEGE:
+            return
+
+        response = request.result()
+        if response.get('code') in (0x80, 0x81) and self.privlevel == 4:
+            # some BMCs refuse administrator here, but allow operator
+            self.privlevel = 3
+            self._set_privilege()
+            return
+        if 'error' in response:
+            self._login_failed(response['error'])
+            return
+
+        self.state = ACTIVE
+        self.login_count += 1
+        self.transport._end_login(self)
+        self._flush()
+
+    def _on_ipmi_payload(self, data):
+        """ Handle an IPMI payload - check its integrity, decrypt it, and complete
+        the request it answers.
+        """
+        if self._k1 is None or not data[5] & 0b01000000 or len(data) < 32:
+            return
+        auth_code = hmac.new(self._k1, bytes(data[4:-12]), hashlib.sha1).digest()[:12]
+        if bytes(data[-12:]) != auth_code:
+            return
+
+        payload = data[16:16 + (data[14] | data[15] << 8)]
+        if data[5] & 0b10000000:
+            decrypted = bytearray(AES.new(self._aes_key, AES.MODE_CBC, bytes(payload[:16])).decrypt(
+                bytes(payload[16:])))
+            payload = decrypted[:-(decrypted[-1] + 1)]
+
+        if len(payload) < 8:
+            return
+
+        request = self._in_flight.get(payload[4])
+        if request is None or payload[1] >> 2 != request.netfn + 1 or payload[5] != request.command:
+            return
+
+        del self._in_flight[payload[4]]
+        request._timer.cancel()
+        if self.health is not None:
+            self.health.record_success(time.time() - request.sent)
+
+        response = {
+            'netfn': payload[1] >> 2,
+            'command': payload[5],
+            'code': payload[6],
+            'data': list(payload[7:-1])
+        }
+        error = get_ipmi_error(response)
+        if error:
+            response['error'] = error
+        request._complete(response=response)
+        self._flush()
+
+    def _close(self, exception, reset_pending=True):
+        """ Close the session, failing the requests waiting on it with the given
+        exception. The session is re-established on next use.
+
+        Args:
+            exception (Exception): the exception to fail the waiting requests with.
+                if None, requests which have not yet been sent are kept, to be sent
+                on the next session.
+            reset_pending (bool): fail the requests in flight on the session.
+        """
+        if self.state == ACTIVE:
+            # best effort - the BMC times out the session if this is lost
+            close = [0x20, 0x06 << 2]
+            body = [0x81, (self._seq & 0x3f) << 2, 0x3c] + list(bytearray(struct.pack('<I', self._bmc_sid)))
+            packet = self._pack(PAYLOAD_IPMI, close + [_checksum(close)] + body + [_checksum(body)])
+            self.transport._sendto(self, packet)
+
+        if self._login_timer is not None:
+            self._login_timer.cancel()
+            self._login_timer = None
+        if self._sid is not None:
+            self.transport._unregister(self._sid)
+
+        self.state = CLOSED
+        self._sid = None
+        self._k1 = None
+        self.transport._end_login(self)
+
+        for request in self._in_flight.values():
+            request._timer.cancel()
+            if reset_pending:
+                request._complete(exception=exception or IpmiException('Session no longer connected'))
+            else:
+                request._complete(response=dict(TIMEOUT_RESPONSE))
+        self._in_flight = {}
+
+        if exception is not None:
+            while self._pending:
+                self._pending.popleft()._complete(exception=exception)
+
+    @property
+    def _role(self):
+        # name-only lookup, at the requested privilege level
+        return 0x10 | self.privlevel
+
+    def _next_tag(self):
+        self._tag = (self._tag + 1) & 0xff
+        return self._tag
+
+    def _pack(self, payload_type, payload, secure=True):
+        """ Pack a payload into an RMCP+ packet, encrypting it and adding the integrity
+        check value once the session is established (IPMI spec 13.6).
+        """
+        packet = bytearray(RMCP_HEADER)
+        if not secure:
+            packet += struct.pack('<BBIIH', AUTH_RMCPPLUS, payload_type, 0, 0, len(payload))
+            packet += bytearray(payload)
+            return packet
+
+        payload = bytearray(payload)
+        pad = (len(payload) + 1) % 16
+        pad = 16 - pad if pad else 0
+        payload += bytearray(range(1, pad + 1)) + bytearray([pad])
+
+        iv = os.urandom(16)
+        encrypted = iv + AES.new(self._aes_key, AES.MODE_CBC, iv).encrypt(bytes(payload))
+
+        sequence = self._sequence
+        self._sequence = (self._sequence + 1) & 0xffffffff or 1
+
+        packet += struct.pack(
+            '<BBIIH', AUTH_RMCPPLUS, payload_type | 0b11000000, self._bmc_sid, sequence, len(encrypted)
+        )
+        packet += bytearray(encrypted)
+
+        pad = (len(packet) - 2) % 4
+        pad = 4 - pad if pad else 0
+        packet += bytearray([0xff] * pad + [pad, 0x07])
+        packet += bytearray(hmac.new(self._k1, bytes(packet[4:]), hashlib.sha1).digest()[:12])
+        return packet
+
+
+class IpmiTransportCommand(command.Command):
+    """ A pyghmi Command which issues its commands over an IpmiTransportSession,
+    rather than over a pyghmi session, so that the pyghmi command layer is used
+    unchanged on top of the multiplexed transport.
+    """
+    def __init__(self, session):
+        # command.Command.__init__ is not called, since it opens a pyghmi session,
+        # so the attributes it sets are set here instead. this is the union of the
+        # attributes set by the supported pyghmi versions -- newer versions also
+        # cache the SDR to a directory, and whether the OEM handler is known.
+        self.onlogon = None
+        self.bmc = session.ip_address
+        self._sdrcachedir = None
+        self._sdr = None
+        self._oem = None
+        self._oemknown = False
+        self._netchannel = None
+        self._ipv6support = None
+        self.certverify = None
+        self.ipmi_session = session
+
+
+class IpmiTransportPool(object):
+    """ Drop-in replacement for the IpmiSessionPool of a BMC, which issues commands
+    over a shared IpmiTransport.
+
+    The transport session queues and limits the commands in flight to the BMC, so
+    a single command is handed out to all borrowers, and borrowing never blocks.
+    """
+    def __init__(self, transport, username=None, password=None, ip_address=None, port=BMC_PORT,
+                 max_in_flight=None, health=None):
+        """ Create a new IpmiTransportPool.
+
+        Args:
+            transport (IpmiTransport): the transport to issue commands over.
+            username (str): Username to connect to BMC with.
+            password (str): Password to connect to BMC with.
+            ip_address (str): BMC IP Address.
+            port (int): BMC port.
+            max_in_flight (int): the maximum number of commands in flight to the BMC
+                at once. if None, the transport's default is used.
+            health (DeviceHealth): the health of the BMC, if it is tracked.
+        """
+        self.ip_address = ip_address
+        self.session = transport.session(
+            ip_address, username, password, port=port, max_in_flight=max_in_flight, health=health
+        )
+        self._command = IpmiTransportCommand(self.session)
+
+    @property
+    def connect_count(self):
+        """ The number of times the session to the BMC has been established.
+        """
+        return self.session.login_count
+
+    def acquire(self):
+        return self._command
+
+    def release(self, ipmicmd):
+        pass
+
+    def close(self):
+        self.session.logout()
@@ -30,11 +30,59 @@ from base import DevicebusInterface
 
 class LANDevice(DevicebusInterface):
     """ The base class for all LAN-based devicebus interfaces.
+
+    LAN-based devices may be restored on startup from the state kept in the
+    startup snapshot (see opendcre_southbound.snapshot), rather than from the
+    device itself, and revalidated in the background once the app is up.
     """
 
     def __init__(self):
         super(LANDevice, self).__init__()
 
+        # whether the device state was restored from the startup snapshot, and has
+        # not yet been revalidated against the device
+        self.restored = False
+
+    @property
+    def snapshot_key(self):
+        """ The key for the device's state in the startup snapshot, or None if the
+        device's state is not kept in the snapshot.
+        """
+        return None
+
+    def get_snapshot(self):
+        """ Get the state of the device to keep in the startup snapshot.
+
+        Returns:
+            dict: the JSON-serializable state of the device, or None if there is
+                no state to keep (e.g. the device has not been scanned).
+        """
+        return None
+
+    def revalidate(self):
+        """ Revalidate the device state restored from the startup snapshot against
+        the device, updating it if it has changed.
+        """
+        self.restored = False
+
     @classmethod
     def register(cls, devicebus_config, app_config, app_cache):
         raise NotImplementedError
+
+    @classmethod
+    def get_registrations(cls, devicebus_config, app_config):
+        """ Get the registration for each device configured for the devicebus, for
+        registering the devices in the background (see opendcre_southbound.registration).
+
+        The devices are not initialized here - each registration holds a factory which
+        initializes its device when called, and which may be called again if that fails.
+
+        Args:
+            devicebus_config (dict): a dictionary containing the devicebus configurations.
+            app_config (dict): Flask application config, where application-wide
+                configurations and constants are stored.
+
+        Returns:
+            list[tuple]: a (name, factory) tuple for each configured device.
+        """
+        raise NotImplementedError
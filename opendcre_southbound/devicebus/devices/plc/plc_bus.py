@@ -28,6 +28,7 @@ along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
 import logging
 import serial
+import struct
 
 from opendcre_southbound.errors import *
 from opendcre_southbound.constants import *
@@ -68,6 +69,12 @@ PKT_VALID_HEADER = 0x01
 # valid trailer byte for the packet
 PKT_VALID_TRAILER = 0x04
 
+# precompiled packet layouts. a packet is made up of a fixed-size head (header,
+# length, sequence, device type, board id, device id), followed by the variable-
+# length data, followed by a fixed-size tail (checksum, trailer).
+PKT_HEAD = struct.Struct('>BBBBIH')
+PKT_TAIL = struct.Struct('>BB')
+
 # ============================================================================== #
 #                       Begin DeviceBus Definition                               #
 # ============================================================================== #
@@ -103,6 +110,11 @@ class DeviceBus(object):
 
         timeout is the time, in seconds, before a read or write operation times
         out on the serial device.
+
+        The serial connection is opened on init and is held open for the
+        lifetime of the DeviceBus, so a single instance may be reused across
+        many transactions. If the underlying serial device errors out on a
+        read or write, the connection is re-opened (see reopen()).
         """
         if device_name is None:
             logger.error('Attempt to initialize DeviceBus with no device_name.')
@@ -126,19 +138,71 @@ class DeviceBus(object):
             logger.error(msg)
             raise ValueError(msg)
 
+        # the number of times the serial connection has been opened, and the
+        # number of those opens which were re-opens following a serial error.
+        self.open_count = 0
+        self.reopen_count = 0
+
         # at this point, the serial connection is ready to go,
         # so set up the serial_device based on device_name
-        self.serial_device = serial.Serial(self.serial_device_name, self.speed_bps, timeout=self.timeout)
-        self.flush_all()
+        self.serial_device = None
+
+        # buffered packet reader for the bus - see read_packet()
+        self.reader = DeviceBusReader(self)
+
+        self.open()
         logger.debug('Initialized DeviceBus with hardware: %d device_name: %s speed: %d timeout: %d',
                      self.hardware_type, self.serial_device_name, self.speed_bps, self.timeout or 0)
 
+    def open(self):
+        """ Open the serial connection for the DeviceBus, if it is not already open.
+        """
+        if self.serial_device is None:
+            self.serial_device = serial.Serial(self.serial_device_name, self.speed_bps, timeout=self.timeout)
+            self.open_count += 1
+            self.flush_all()
+
+    @property
+    def is_open(self):
+        """ Whether the serial connection for the DeviceBus is open.
+        """
+        return self.serial_device is not None
+
+    def _check_open(self):
+        """ Raise a BusCommunicationError if the serial connection is not open.
+        """
+        if self.serial_device is None:
+            raise BusCommunicationError('Serial device {} is not open.'.format(self.serial_device_name))
+
+    def close(self):
+        """ Close the serial connection for the DeviceBus.
+        """
+        if self.serial_device is not None:
+            try:
+                self.serial_device.close()
+            except (serial.SerialException, OSError) as e:
+                logger.debug('Error closing serial device {}: {}'.format(self.serial_device_name, e))
+            finally:
+                self.serial_device = None
+
+    def reopen(self):
+        """ Close and re-open the serial connection for the DeviceBus.
+
+        This is used to recover from errors on the serial device (e.g. a USB-serial
+        adapter being reset) without having to create a new DeviceBus instance.
+        """
+        logger.warning('Re-opening serial device {}.'.format(self.serial_device_name))
+        self.close()
+        self.open()
+        self.reopen_count += 1
+
     def flush_all(self):
         """ Flush all input and output from the serial buffers.
 
         Generally used when starting a new command on the device bus,
         where there may be lingering noise/junk to clear out.
         """
+        self.reader.clear()
         if self.serial_device is not None:
             self.serial_device.flushInput()
             self.serial_device.flushOutput()
@@ -160,7 +224,12 @@ class DeviceBus(object):
 
         Returns:
             str: the byte data read. If the read times out, no bytes may be returned.
+
+        Raises:
+            BusCommunicationError: the serial connection is not open (e.g. it could
+                not be re-opened following a serial error).
         """
+        self._check_open()
         if self.serial_device is not None:
             # first, take any action to ensure the bus is readable - for
             # example, wake up all devices on the bus prior to doing read
@@ -175,7 +244,39 @@ class DeviceBus(object):
             else:
                 logger.error('Invalid hardware_type for reading device bus. (%d)', self.hardware_type)
                 raise ValueError('Invalid hardware_type for reading device bus.')
-            return self.serial_device.read(length)
+            try:
+                return self.serial_device.read(length)
+            except (serial.SerialException, OSError):
+                # whatever was in flight is lost at this point, so re-open the
+                # connection for subsequent transactions and surface the error
+                self.reopen()
+                raise
+
+    def in_waiting(self):
+        """ Get the number of bytes waiting to be read from the DeviceBus.
+
+        Returns:
+            int: the number of bytes in the serial input buffer.
+        """
+        if self.serial_device is not None:
+            try:
+                return self.serial_device.inWaiting()
+            except (serial.SerialException, OSError):
+                self.reopen()
+                raise
+        return 0
+
+    def read_packet(self):
+        """ Read the bytes of a single, complete packet from the DeviceBus.
+
+        Returns:
+            bytearray: the framed packet bytes (header through trailer).
+
+        Raises:
+            BusTimeoutException: if a complete packet could not be read before
+                the bus timed out.
+        """
+        return self.reader.read_packet()
 
     def write(self, data=None):
         """ Write to the DeviceBus the given bytes.
@@ -189,7 +290,12 @@ class DeviceBus(object):
         Returns:
             int: the number of bytes written. A write may time out, in which case
                 a SerialTimeoutException is raised.
+
+        Raises:
+            BusCommunicationError: the serial connection is not open (e.g. it could
+                not be re-opened following a serial error).
         """
+        self._check_open()
         if self.serial_device is not None:
             # first, take any action to ensure the bus is writeable - for
             # example, wake up all devices on the bus prior to doing write
@@ -202,7 +308,98 @@ class DeviceBus(object):
             else:
                 logger.error('Invalid hardware_type for writing device bus. (%d)', self.hardware_type)
                 raise ValueError('Invalid hardware_type for writing to device bus.')
-            return self.serial_device.write(data)
+            try:
+                return self.serial_device.write(data)
+            except serial.SerialTimeoutException:
+                raise
+            except (serial.SerialException, OSError):
+                # nothing has been sent yet, so re-open the connection and
+                # make a single attempt to write the data again.
+                self.reopen()
+                return self.serial_device.write(data)
+
+
+class DeviceBusReader(object):
+    """ DeviceBusReader provides buffered packet framing on top of a DeviceBus.
+
+    Rather than reading a packet off the bus a byte at a time, the reader pulls
+    in as many bytes as are available (or as many as are needed to complete the
+    packet being framed, whichever is greater) into a buffer, and splits complete
+    packets out of it. Any bytes beyond the end of a framed packet are kept in the
+    buffer for the next read, so a burst of responses (e.g. from a scan) can be
+    drained with a handful of reads.
+    """
+    _header = bytearray([PKT_VALID_HEADER])
+
+    def __init__(self, bus):
+        """ Create a new DeviceBusReader.
+
+        Args:
+            bus: the bus to read from. this is expected to provide read(length)
+                and in_waiting() (e.g. a DeviceBus).
+        """
+        self.bus = bus
+        self.buffer = bytearray()
+
+    def clear(self):
+        """ Discard any buffered bytes.
+        """
+        del self.buffer[:]
+
+    def _fill(self, length):
+        """ Read at least the given number of bytes from the bus into the buffer.
+
+        Args:
+            length (int): the minimum number of bytes to read.
+
+        Raises:
+            BusTimeoutException: if fewer than the given number of bytes could
+                be read before the bus timed out.
+        """
+        data = self.bus.read(max(length, self.bus.in_waiting()))
+        if data:
+            self.buffer.extend(data)
+        if len(data) < length:
+            raise BusTimeoutException('No response from bus.')
+
+    def read_packet(self):
+        """ Frame and return the next packet from the bus.
+
+        Any leading noise (bytes preceding a packet header) is dropped. Note that
+        the packet is framed using its length byte only - the returned bytes are
+        not otherwise validated.
+
+        Returns:
+            bytearray: the framed packet bytes (header through trailer).
+
+        Raises:
+            BusTimeoutException: if a complete packet could not be read before
+                the bus timed out.
+        """
+        buf = self.buffer
+        while True:
+            # ignore any leading noise that may be present
+            start = buf.find(self._header)
+            if start < 0:
+                del buf[:]
+                self._fill(2)
+                continue
+            elif start > 0:
+                del buf[:start]
+
+            # need the header and length bytes to know how much to frame
+            if len(buf) < 2:
+                self._fill(2 - len(buf))
+                continue
+
+            packet_length = buf[1] + PKT_META_BYTES
+            if len(buf) < packet_length:
+                self._fill(packet_length - len(buf))
+                continue
+
+            packet = buf[:packet_length]
+            del buf[:packet_length]
+            return packet
 
 # ============================================================================== #
 #                    Begin DeviceBusPacket Definition                            #
@@ -222,25 +419,14 @@ class DeviceBusPacket(object):
         to use serial_reader, which will read a generic packet from the serial stream.
         """
         if serial_reader is not None:
-            # this routine will read from serial into a buffer as follows:
-            # get header and length data_bytes
+            # the serial reader frames packets off the bus for us (see DeviceBusReader)
             serialbytes = []
             try:
                 is_valid_sequence = False
                 # drop any packets that do not match expected sequence number, unless expected_sequence is None.
                 # spurious packets may arrive due to bus devices sending responses on retry after we have given up
                 while not is_valid_sequence:
-                    # ignore any leading noise that may be present
-                    header = ord(serial_reader.read(1))
-                    while header != PKT_VALID_HEADER:
-                        header = ord(serial_reader.read(1))
-                    serialbytes.append(header)
-                    serialbytes.append(ord(serial_reader.read(1)))
-                    # read length data_bytes
-                    for x in serial_reader.read(serialbytes[1]):
-                        serialbytes.append(ord(x))
-                    # read one byte for trailer
-                    serialbytes.append(ord(serial_reader.read(1)))
+                    serialbytes = serial_reader.read_packet()
                     # now make the packet
                     self.deserialize(serialbytes)
                     is_valid_sequence = True if expected_sequence is None else expected_sequence == self.sequence
@@ -283,6 +469,23 @@ class DeviceBusPacket(object):
         serialization to be successful. If any of the fields are missing, serialization
         will fail with a BusDataException.
 
+        Returns:
+            list[int]: the bytes of the serialized packet.
+
+        Raises:
+            BusDataException: if any of the packet fields are missing.
+        """
+        return list(self.to_bytes())
+
+    def to_bytes(self):
+        """ Generate a serialized byte representation of the given packet, as a bytearray.
+
+        This is the same as serialize(), but the resulting bytearray can be written
+        directly to the bus without any further conversion.
+
+        Returns:
+            bytearray: the bytes of the serialized packet.
+
         Raises:
             BusDataException: if any of the packet fields are missing.
         """
@@ -292,29 +495,28 @@ class DeviceBusPacket(object):
 
         # find length of packet. Sequence, device type, and checksum are always 1 byte;
         # device_id is two bytes and board id is always 4 bytes - add those up to 9
-        length = 9 + len(self.data)
-        # generate the list of 4 bytes which make up the board_id
-        board_id_bytes = board_id_to_bytes(self.board_id)
-        # generate the list of 2 bytes which make up the device_id
-        device_id_bytes = device_id_to_bytes(self.device_id)
-        # generate checksum over packet contents
-        checksum = self.generate_checksum(self.sequence, self.device_type, board_id_bytes, device_id_bytes, self.data)
-        # construct and return packet
-        packet = [PKT_VALID_HEADER, length, self.sequence, self.device_type, board_id_bytes[0], board_id_bytes[1],
-                  board_id_bytes[2], board_id_bytes[3], device_id_bytes[0], device_id_bytes[1]]
-
-        # fn refs are re-evaluated each time in the loop, so define it outside the loop
-        append = packet.append
-        for x in self.data:
-            append(x)
-        append(checksum)
-        append(PKT_VALID_TRAILER)
+        data_length = len(self.data)
+        length = 9 + data_length
+
+        # board and device ids may be given as hex strings (e.g. by the emulator)
+        board_id = int(self.board_id, 16) if isinstance(self.board_id, basestring) else self.board_id
+        device_id = int(self.device_id, 16) if isinstance(self.device_id, basestring) else self.device_id
+
+        packet = bytearray(PKT_HEAD.size + data_length + PKT_TAIL.size)
+        PKT_HEAD.pack_into(packet, 0, PKT_VALID_HEADER, length, self.sequence, self.device_type, board_id, device_id)
+        packet[PKT_HEAD.size:PKT_HEAD.size + data_length] = self.data
+
+        # the checksum covers everything from the sequence to the data end, which is
+        # everything written so far except for the header and length bytes
+        checksum = -(sum(packet) - PKT_VALID_HEADER - length) & 0xFF
+        PKT_TAIL.pack_into(packet, PKT_HEAD.size + data_length, checksum, PKT_VALID_TRAILER)
         return packet
 
     def deserialize(self, packet_bytes):
         """ Populate the fields of a DeviceBusPacket instance.
 
-        :param packet_bytes: - They bytes to use to populate the packet instance.
+        :param packet_bytes: - They bytes to use to populate the packet instance. This
+            may be a list of ints, a bytearray, a memoryview or a str.
 
         Raises:
             BusDataException: if the packet is smaller than the minimum packet
@@ -324,40 +526,36 @@ class DeviceBusPacket(object):
             ChecksumException: if checksum validation fails on the packet being
                 deserialized.
         """
+        if not isinstance(packet_bytes, bytearray):
+            packet_bytes = bytearray(packet_bytes)
+        packet_length = len(packet_bytes)
+
         # check length to make sure we have at minimum the min packet length
-        if len(packet_bytes) < PKT_MIN_LENGTH:
-            raise BusDataException('Invalid packet byte stream length of ' + str(len(packet_bytes)))
+        if packet_length < PKT_MIN_LENGTH:
+            raise BusDataException('Invalid packet byte stream length of ' + str(packet_length))
 
         # check header byte - if invalid, toss
         if packet_bytes[0] != PKT_VALID_HEADER:
             raise BusDataException('No header byte found in incoming packet.')
 
         # check length - if packet_bytes len doesn't match, toss
-        if packet_bytes[1] != len(packet_bytes) - PKT_META_BYTES:
+        if packet_bytes[1] != packet_length - PKT_META_BYTES:
             raise BusDataException('Invalid length from incoming packet ({}).'.format(packet_bytes[1]))
 
-        # get sequence num
-        self.sequence = packet_bytes[2]
-
-        # get device type
-        self.device_type = packet_bytes[3]
-
-        # get board id
-        self.board_id = board_id_join_bytes(packet_bytes[4:8])
-
-        # get device id
-        self.device_id = device_id_join_bytes(packet_bytes[8:10])
+        # get sequence num, device type, board id and device id
+        _, _, self.sequence, self.device_type, self.board_id, self.device_id = PKT_HEAD.unpack_from(packet_bytes)
 
         # get data (up to 32 bytes) - todo multi-packet transmissions
-        self.data = [x for x in packet_bytes[10:len(packet_bytes) - 2]]
+        self.data = list(packet_bytes[PKT_HEAD.size:packet_length - PKT_TAIL.size])
 
         # get the checksum and verify it - toss if no good
-        check = self.generate_checksum(self.sequence, self.device_type, self.board_id, self.device_id, self.data)
-        if check != packet_bytes[len(packet_bytes) - 2]:
+        checksum, trailer = PKT_TAIL.unpack_from(packet_bytes, packet_length - PKT_TAIL.size)
+        check = -(sum(packet_bytes) - PKT_VALID_HEADER - packet_bytes[1] - checksum - trailer) & 0xFF
+        if check != checksum:
             raise ChecksumException('Invalid checksum in incoming packet.')
 
         # get the trailer byte - toss if no good
-        if packet_bytes[len(packet_bytes) - 1] != PKT_VALID_TRAILER:
+        if trailer != PKT_VALID_TRAILER:
             raise BusDataException('Invalid trailer byte found in incoming packet.')
         # if we make it here, the packet successfully was deserialized!
 
@@ -51,6 +51,7 @@ from opendcre_southbound.devicebus.response import Response
 from opendcre_southbound.devicebus.devices.serial_device import SerialDevice
 from opendcre_southbound.devicebus.constants import CommandId as cid
 from opendcre_southbound.devicebus.devices.plc.plc_bus import *
+from opendcre_southbound.devicebus.devices.plc.plc_scheduler import PLCReadScheduler
 from opendcre_southbound.vapor_common.constants import PLC_RACK_ID
 
 
@@ -82,14 +83,14 @@ class PLCDevice(SerialDevice):
         self.bus_baud = kwargs.get('bps', 115200)
         self.retry_limit = kwargs.get('retry_limit', 3)
         self.time_slice = kwargs.get('time_slice', 75)
+        self.max_read_batch = kwargs.get('max_read_batch', 8)
 
-        # hold the reference to the app's sequence number generator
+        # hold the reference to the app's sequence number allocator (a thread-safe
+        # SequenceAllocator, shared with the command factory)
         # FIXME - passing the reference around seems weird and could make things
         # uncomfortable later on. instead, one thing to investigate would be to
         # have the counter as part of the root class for devicebus interfaces, that
-        # way, all implementations of devicebus interfaces should have access to it
-        # and *should* be able to increment it safely, with all other interfaces
-        # respecting the incrementation...
+        # way, all implementations of devicebus interfaces should have access to it.
         #
         # another potential solution here would be to store the counter in the app
         # config and have the app context be passed to the devicebus interfaces on
@@ -98,6 +99,13 @@ class PLCDevice(SerialDevice):
 
         self._lock = lockfile.LockFile(self.serial_lock)
 
+        # the DeviceBus for this device - this is created on first use (see _get_bus)
+        # and held open for subsequent commands.
+        self._bus = None
+
+        # reads coming in concurrently are batched up and issued to the bus together
+        self._read_scheduler = PLCReadScheduler(self._dispatch_reads, max_batch=self.max_read_batch)
+
         self._command_map = {
             cid.VERSION: self._version,
             cid.SCAN: self._scan,
@@ -194,20 +202,47 @@ class PLCDevice(SerialDevice):
             logger.warning('Device configuration should specify "racks"!')
 
     def _get_bus(self):
-        """ Convenience method to get a new instance of the DeviceBus.
+        """ Convenience method to get the DeviceBus for this device.
+
+        The DeviceBus is created (and its serial connection opened) lazily on
+        first use, and is then reused for the lifetime of the PLCDevice. If its
+        serial connection is closed (e.g. it could not be re-opened following a
+        serial error), it is re-opened here. Since the bus is shared across
+        transactions, its buffers are flushed each time it is handed out so that
+        any lingering noise from a prior transaction does not bleed into the next
+        one.
+
+        This should only be called while holding the device lock.
 
         Returns:
-            DeviceBus: a new instance of the DeviceBus object for PLC commands.
+            DeviceBus: the DeviceBus object for PLC commands.
         """
-        # FIXME -- in the existing code paths, a new DeviceBus instance is created for
-        # every request. unclear if that is necessary or if the same instance can be
-        # reused. once this implementation matches the existing functionality, can play
-        # around with this to see if it can be simplified.
-        return DeviceBus(
-            device_name=self.device_name,
-            hardware_type=self.hardware_type,
-            timeout=self.bus_timeout
-        )
+        if self._bus is None:
+            self._bus = DeviceBus(
+                device_name=self.device_name,
+                hardware_type=self.hardware_type,
+                timeout=self.bus_timeout,
+                bps=self.bus_baud
+            )
+        elif not self._bus.is_open:
+            # a prior attempt to re-open the serial connection (following a serial
+            # error) failed, so try again rather than leaving the device unusable
+            self._bus.reopen()
+        else:
+            self._bus.flush_all()
+        return self._bus
+
+    @property
+    def bus_stats(self):
+        """ Get the connection counters for this device's DeviceBus.
+
+        Returns:
+            dict: the number of times the serial connection has been opened and
+                re-opened (following a serial error).
+        """
+        if self._bus is None:
+            return {'open_count': 0, 'reopen_count': 0}
+        return {'open_count': self._bus.open_count, 'reopen_count': self._bus.reopen_count}
 
     def _retry_command(self, bus, request, response_cls):
         """ Retry a PLC command.
@@ -238,14 +273,19 @@ class PLCDevice(SerialDevice):
         )
         kwargs = {k: v for k, v in kwargs.iteritems() if v is not None}
 
+        # the sequence numbers issued for this command. a late response to any of
+        # them may still arrive, so none of them are reused for a retry.
+        issued = {request.sequence}
+
         while retry_count < self.retry_limit and not valid_response:
             try:
                 # increment the sequence number for every retry attempt
-                kwargs['sequence'] = next(self._count)
+                kwargs['sequence'] = self._count.next(in_flight=issued)
+                issued.add(kwargs['sequence'])
 
                 logger.debug('Retrying command: {}'.format(kwargs))
                 _request = RetryCommand(**kwargs)
-                bus.write(_request.serialize())
+                bus.write(_request.to_bytes())
                 logger.debug('>>Retry: {}'.format([hex(x) for x in _request.serialize()]))
 
                 response = response_cls(
@@ -288,7 +328,7 @@ class PLCDevice(SerialDevice):
                 board_id=board_id,
                 sequence=command.sequence
             )
-            bus.write(request.serialize())
+            bus.write(request.to_bytes())
             logger.debug('>>Version: {}'.format([hex(x) for x in request.serialize()]))
 
             try:
@@ -386,41 +426,70 @@ class PLCDevice(SerialDevice):
             Response: a Response object corresponding to the incoming Command
                 object, containing the data from the read response.
         """
-        with self._lock:
-            bus = self._get_bus()
+        # the read is issued to the bus via the scheduler (see _dispatch_reads)
+        response = self._read_scheduler.read(self._make_read_request(command))
+        return self._convert_read_response(command, response)
 
-            # get the command data out from the incoming command
-            board_id = command.data['board_id']
-            device_id = command.data['device_id']
-            device_type = command.data['device_type']
-            device_type_string = command.data['device_type_string']
+    def handle_batch(self, commands):
+        """ Handle a batch of incoming OpenDCRE commands.
 
-            request = DeviceReadCommand(
-                board_id=board_id,
-                device_id=device_id,
-                device_type=device_type,
-                sequence=command.sequence
-            )
-            bus.write(request.serialize())
-            bus.flush()
+        A batch made up only of read commands is submitted to the bus as a whole,
+        so the reads can be issued together (see _dispatch_reads). Any other batch
+        is handled one command at a time.
 
-            logger.debug('>>Read: {}'.format([hex(x) for x in request.serialize()]))
-            response = None
+        Args:
+            commands (list[Command]): The incoming command objects to handle.
 
+        Returns:
+            list: the result for each command, in the same order as the commands. each
+                result is either the Response for the command, or the exception raised
+                in handling it.
+        """
+        if not all(command.cmd_id == cid.READ for command in commands):
+            return super(PLCDevice, self).handle_batch(commands)
+
+        results = []
+        reads = self._read_scheduler.read_batch([self._make_read_request(command) for command in commands])
+        for command, read in zip(commands, reads):
             try:
-                response = DeviceReadResponse(
-                    serial_reader=bus,
-                    expected_sequence=request.sequence
-                )
-                logger.debug('<<Read: {}'.format([hex(x) for x in response.serialize()]))
+                results.append(self._convert_read_response(command, read.result()))
+            except Exception as e:
+                logger.debug('Failed to handle command in batch ({}): {}'.format(command.data, e))
+                results.append(e)
+        return results
 
-            except BusTimeoutException:
-                raise OpenDCREException('No response from bus on sensor read.'), None, sys.exc_info()[2]
-            except (BusDataException, ChecksumException):
-                response = self._retry_command(bus, request, DeviceReadResponse)
+    @staticmethod
+    def _make_read_request(command):
+        """ Make the devicebus read request for a read command.
+
+        Args:
+            command (Command): the read command issued by the OpenDCRE endpoint.
+
+        Returns:
+            DeviceReadCommand: the devicebus packet for the read.
+        """
+        return DeviceReadCommand(
+            board_id=command.data['board_id'],
+            device_id=command.data['device_id'],
+            device_type=command.data['device_type'],
+            sequence=command.sequence
+        )
+
+    @staticmethod
+    def _convert_read_response(command, response):
+        """ Convert the devicebus response for a read command into the Response
+        for the command.
 
+        Args:
+            command (Command): the read command issued by the OpenDCRE endpoint.
+            response (DeviceReadResponse): the devicebus response to the read.
+
+        Returns:
+            Response: a Response object corresponding to the incoming Command
+                object, containing the converted reading.
+        """
         try:
-            device_type_string = device_type_string.lower()
+            device_type_string = command.data['device_type_string'].lower()
 
             # for now, temperature and pressure are just a string->float, all else require int conversion
             device_raw = float(''.join([chr(x) for x in response.data]))
@@ -470,6 +539,108 @@ class PLCDevice(SerialDevice):
             # if something bad happened - all we can do is abort
             raise OpenDCREException('Read: Error converting raw value.'), None, sys.exc_info()[2]
 
+    def _read_transaction(self, bus, request):
+        """ Issue a single read command over the bus and get its response.
+
+        This should only be called while holding the device lock.
+
+        Args:
+            bus (DeviceBus): the bus to issue the read over.
+            request (DeviceReadCommand): the read command to issue.
+
+        Returns:
+            DeviceReadResponse: the response to the read command.
+        """
+        bus.write(request.to_bytes())
+        bus.flush()
+
+        logger.debug('>>Read: {}'.format([hex(x) for x in request.serialize()]))
+
+        try:
+            response = DeviceReadResponse(
+                serial_reader=bus,
+                expected_sequence=request.sequence
+            )
+            logger.debug('<<Read: {}'.format([hex(x) for x in response.serialize()]))
+
+        except BusTimeoutException:
+            raise OpenDCREException('No response from bus on sensor read.'), None, sys.exc_info()[2]
+        except (BusDataException, ChecksumException):
+            response = self._retry_command(bus, request, DeviceReadResponse)
+
+        return response
+
+    def _dispatch_reads(self, batch):
+        """ Issue a batch of read commands over the bus.
+
+        This is the dispatch function for the device's PLCReadScheduler. A batch of
+        one is issued as a regular read transaction. Otherwise, each read in the
+        batch is given a distinct sequence number and the reads are written to the
+        bus back-to-back, with responses matched back to their reads by sequence.
+
+        If the bus times out before all reads have been answered, the unanswered
+        reads fail as they would have individually. If a corrupt response is read,
+        it can not be attributed to any read in particular, so the unanswered reads
+        are re-issued one at a time (with the usual retry handling).
+
+        Args:
+            batch (list[PendingRead]): the pending reads to issue. each is completed
+                with its response or the exception raised for it.
+        """
+        with self._lock:
+            bus = self._get_bus()
+
+            if len(batch) == 1:
+                try:
+                    batch[0].set_response(self._read_transaction(bus, batch[0].request))
+                except Exception:
+                    batch[0].set_exception(sys.exc_info())
+                return
+
+            outstanding = {}
+            packets = bytearray()
+            for pending in batch:
+                if pending.request.sequence in outstanding:
+                    pending.request.sequence = self._count.next(in_flight=outstanding)
+                outstanding[pending.request.sequence] = pending
+                packets.extend(pending.request.to_bytes())
+
+            bus.write(packets)
+            bus.flush()
+            logger.debug('>>Read: batch of {} (sequences: {})'.format(len(batch), sorted(outstanding)))
+
+            try:
+                while outstanding:
+                    response = DeviceReadResponse(serial_reader=bus)
+                    pending = outstanding.pop(response.sequence, None)
+                    if pending is None:
+                        logger.debug('Invalid sequence number for batched read - got %d.', response.sequence)
+                        continue
+                    logger.debug('<<Read: {}'.format([hex(x) for x in response.serialize()]))
+                    pending.set_response(response)
+
+            except BusTimeoutException:
+                for pending in outstanding.values():
+                    pending.set_exception((
+                        OpenDCREException, OpenDCREException('No response from bus on sensor read.'), None
+                    ))
+
+            except (BusDataException, ChecksumException):
+                logger.debug('Corrupt response in read batch - re-issuing {} read(s).'.format(len(outstanding)))
+                bus.flush_all()
+                # responses to the batch may still be in transit, so the re-issued
+                # reads are given sequence numbers not used in the batch
+                in_flight = set(p.request.sequence for p in batch)
+                for pending in batch:
+                    if pending.done:
+                        continue
+                    pending.request.sequence = self._count.next(in_flight=in_flight)
+                    in_flight.add(pending.request.sequence)
+                    try:
+                        pending.set_response(self._read_transaction(bus, pending.request))
+                    except Exception:
+                        pending.set_exception(sys.exc_info())
+
     def _power(self, command):
         """ Power control command for a given board and device.
 
@@ -497,7 +668,7 @@ class PLCDevice(SerialDevice):
                 power_action=power_action,
                 sequence=command.sequence
             )
-            bus.write(request.serialize())
+            bus.write(request.to_bytes())
             logger.debug('>>Power: {}'.format([hex(x) for x in request.serialize()]))
 
             try:
@@ -587,7 +758,7 @@ class PLCDevice(SerialDevice):
                 device_type=device_type,
                 sequence=command.sequence
             )
-            bus.write(request.serialize())
+            bus.write(request.to_bytes())
             logger.debug('>>Asset Info: {}'.format([hex(x) for x in request.serialize()]))
 
             try:
@@ -677,7 +848,7 @@ class PLCDevice(SerialDevice):
                 boot_target=boot_target,
                 sequence=command.sequence
             )
-            bus.write(request.serialize())
+            bus.write(request.to_bytes())
             logger.debug('>>Boot Target: {}'.format([hex(x) for x in request.serialize()]))
 
             try:
@@ -754,7 +925,7 @@ class PLCDevice(SerialDevice):
                 blink_state=blink_state,
                 sequence=command.sequence
             )
-            bus.write(request.serialize())
+            bus.write(request.to_bytes())
             bus.flush()
 
             logger.debug('>>Vapor_LED: {}'.format([hex(x) for x in request.serialize()]))
@@ -833,7 +1004,7 @@ class PLCDevice(SerialDevice):
                 raw_data=led_state,
                 sequence=command.sequence
             )
-            bus.write(request.serialize())
+            bus.write(request.to_bytes())
             bus.flush()
 
             logger.debug('>>LED: {}'.format([hex(x) for x in request.serialize()]))
@@ -899,7 +1070,7 @@ class PLCDevice(SerialDevice):
                 raw_data=fan_speed,
                 sequence=command.sequence
             )
-            bus.write(request.serialize())
+            bus.write(request.to_bytes())
             bus.flush()
 
             logger.debug('>>Fan_Speed: {}'.format([hex(x) for x in request.serialize()]))
@@ -963,7 +1134,7 @@ class PLCDevice(SerialDevice):
                 device_type=device_type,
                 sequence=command.sequence
             )
-            bus.write(request.serialize())
+            bus.write(request.to_bytes())
             bus.flush()
 
             logger.debug('>>Host_Info: {}'.format([hex(x) for x in request.serialize()]))
@@ -1031,7 +1202,7 @@ class PLCDevice(SerialDevice):
                 RETRY_LIMIT.
         """
         response_dict = {'boards': []}
-        bus.write(packet.serialize())
+        bus.write(packet.to_bytes())
 
         logger.debug('>>Scan: {}'.format([hex(x) for x in packet.serialize()]))
 
@@ -1141,7 +1312,7 @@ class PLCDevice(SerialDevice):
                 board_id=board_id,
                 sequence=next(self._count)
             )
-            bus.write(save_packet.serialize())
+            bus.write(save_packet.to_bytes())
             bus.flush_all()
             # TODO: verify that a brief delay is not needed here for hardware to commit
 
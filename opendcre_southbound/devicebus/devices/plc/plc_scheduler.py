@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound PLC Read Scheduler
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import logging
+import sys
+import threading
+
+from opendcre_southbound.errors import OpenDCREException
+
+logger = logging.getLogger(__name__)
+
+
+class PendingRead(object):
+    """ A read request which has been submitted to the PLCReadScheduler, and which
+    will hold the result of the read once the request has been dispatched.
+    """
+    def __init__(self, request):
+        """ Create a new PendingRead.
+
+        Args:
+            request (DeviceReadCommand): the read command to issue over the bus.
+        """
+        self.request = request
+        self.response = None
+        self.exc_info = None
+        self.done = False
+
+    def set_response(self, response):
+        """ Complete the pending read with the response packet for the request.
+
+        Args:
+            response (DeviceReadResponse): the response to the read request.
+        """
+        self.response = response
+        self.done = True
+
+    def set_exception(self, exc_info):
+        """ Complete the pending read with the exception raised for the request.
+
+        Args:
+            exc_info (tuple): the exception info (as returned by sys.exc_info()).
+        """
+        self.exc_info = exc_info
+        self.done = True
+
+    def result(self):
+        """ Get the result of the read.
+
+        Returns:
+            DeviceReadResponse: the response to the read request.
+
+        Raises:
+            the exception raised when the request was dispatched, if any.
+        """
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+        return self.response
+
+
+class PLCReadScheduler(object):
+    """ Scheduler which batches concurrent read requests for a PLC bus.
+
+    Reads which are submitted while the bus is busy are queued. When the bus
+    becomes free, the queued reads are handed to the dispatch function together
+    (up to max_batch at a time), which allows them to be issued to the bus back-
+    to-back and for their responses to be collected by sequence number, rather
+    than taking the bus for a full round trip per read.
+
+    There is no dispatcher thread - the first thread to find the bus free takes
+    on dispatching, and keeps dispatching batches until its own read has been
+    completed. It then hands off to any waiting thread with outstanding reads.
+    """
+    def __init__(self, dispatch, max_batch=8):
+        """ Create a new PLCReadScheduler.
+
+        Args:
+            dispatch (callable): the function used to issue a batch of reads to
+                the bus. it takes a list of PendingRead objects and is expected to
+                complete each of them (see PendingRead.set_response and
+                PendingRead.set_exception).
+            max_batch (int): the maximum number of reads to dispatch at once.
+        """
+        self._dispatch = dispatch
+        self.max_batch = max(1, int(max_batch))
+
+        self._queue = []
+        self._dispatching = False
+        self._cv = threading.Condition(threading.Lock())
+
+    def read(self, request):
+        """ Submit a read request, and block until it has been completed.
+
+        Args:
+            request (DeviceReadCommand): the read command to issue over the bus.
+
+        Returns:
+            DeviceReadResponse: the response to the read request.
+        """
+        return self.read_batch([request])[0].result()
+
+    def read_batch(self, requests):
+        """ Submit a number of read requests, and block until all of them have
+        been completed.
+
+        Args:
+            requests (list[DeviceReadCommand]): the read commands to issue over
+                the bus.
+
+        Returns:
+            list[PendingRead]: the completed reads, in the same order as the given
+                requests.
+        """
+        pending = [PendingRead(request) for request in requests]
+
+        def completed():
+            return all(p.done for p in pending)
+
+        with self._cv:
+            self._queue.extend(pending)
+            while not completed() and self._dispatching:
+                self._cv.wait()
+
+            if completed():
+                return pending
+            self._dispatching = True
+
+        try:
+            while not completed():
+                with self._cv:
+                    batch = self._queue[:self.max_batch]
+                    del self._queue[:self.max_batch]
+
+                try:
+                    self._dispatch(batch)
+                except Exception:
+                    exc_info = sys.exc_info()
+                else:
+                    exc_info = (OpenDCREException, OpenDCREException('Read request was not dispatched.'), None)
+
+                # anything not completed by the dispatch is failed here, otherwise
+                # the thread which submitted it would be left waiting on it
+                for p in batch:
+                    if not p.done:
+                        p.set_exception(exc_info)
+
+                with self._cv:
+                    self._cv.notify_all()
+        finally:
+            with self._cv:
+                self._dispatching = False
+                self._cv.notify_all()
+
+        return pending
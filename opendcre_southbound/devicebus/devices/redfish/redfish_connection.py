@@ -26,14 +26,334 @@ You should have received a copy of the GNU General Public License
 along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
 import logging
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from requests.packages.urllib3.util.retry import Retry
 from opendcre_southbound.errors import OpenDCREException
 
 logger = logging.getLogger(__name__)
 
 
-def _build_link(ip_address, port, path, timeout=None):
+def _no_auth(request):
+    """ Authentication for requests which are made without credentials. Passing
+    this, rather than no authentication, stops requests from looking for
+    credentials in a netrc file, which imports netrc on every request, and so
+    deadlocks when devices are registered in threads while the import lock is
+    held (see utils.cache_registration_dependencies).
+
+    Args:
+        request (requests.PreparedRequest): the request to authenticate.
+
+    Returns:
+        requests.PreparedRequest: the request, unchanged.
+    """
+    return request
+
+
+class RedfishClient(object):
+    """ HTTP client for a single Redfish server.
+
+    Requests are made over a pooled requests.Session, so connections to the
+    server are kept alive and reused between requests rather than a new TCP
+    connection being opened for every request. Requests which fail to connect,
+    or fail reading the response, are retried with an exponential backoff
+    (idempotent methods only - POST and PATCH are not retried on read errors).
+
+    The Redfish root path (from GET /redfish) is also cached per server, so that
+    it is not re-fetched every time a link to the root is built.
+
+    If the server's health is tracked, the outcome and latency of each request is
+    recorded to it, and GET requests use its adaptive timeout. POST and PATCH
+    requests (e.g. power control) always use the configured timeout, as the
+    server may take longer to act on them than it takes to answer a GET.
+    """
+    def __init__(self, username=None, password=None, timeout=5, connect_timeout=None, pool_size=4,
+                 max_retries=2, backoff_factor=0.1, health=None):
+        """ Create a new RedfishClient.
+
+        Args:
+            username (str): the username for basic authentication.
+            password (str): the password for basic authentication.
+            timeout (int | float): the number of seconds to wait for a response
+                from the server before timing out on the request.
+            connect_timeout (int | float): the number of seconds to wait for a
+                connection to the server before timing out on the request. if
+                not specified, the read timeout is used.
+            pool_size (int): the maximum number of connections to keep open to
+                the server.
+            max_retries (int): the number of times a failed request is retried.
+            backoff_factor (float): the backoff factor used to determine the delay
+                between retries ({backoff factor} * 2 ^ ({retry number} - 1)).
+            health (DeviceHealth): the health of the server, if it is tracked.
+        """
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout if connect_timeout is not None else timeout
+        self.health = health
+
+        self._auth = HTTPBasicAuth(username, password) if username is not None and password is not None else None
+
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(1, int(pool_size)),
+            max_retries=Retry(
+                total=int(max_retries),
+                connect=int(max_retries),
+                read=int(max_retries),
+                backoff_factor=backoff_factor
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._root_paths = {}
+        self._lock = threading.Lock()
+
+    def get(self, link, timeout=None, auth=True, headers=None):
+        """ Issue a GET request to the server.
+
+        Args:
+            link (str): the link to GET.
+            timeout (int | float): the read timeout for the request. if not
+                specified, the client's read timeout is used.
+            auth (bool): whether or not to use basic authentication for the request.
+            headers (dict): any additional headers to send with the request.
+
+        Returns:
+            requests.Response: the response to the request.
+        """
+        return self._request(
+            'GET', link, timeout, adaptive=True, auth=self._auth if auth else None, headers=headers
+        )
+
+    def patch(self, link, payload, timeout=None):
+        """ Issue a PATCH request to the server.
+
+        Args:
+            link (str): the link to PATCH.
+            payload (dict): the json payload of the request.
+            timeout (int | float): the read timeout for the request. if not
+                specified, the client's read timeout is used.
+
+        Returns:
+            requests.Response: the response to the request.
+        """
+        return self._request('PATCH', link, timeout, json=payload, auth=self._auth)
+
+    def post(self, link, payload, timeout=None):
+        """ Issue a POST request to the server.
+
+        Args:
+            link (str): the link to POST to.
+            payload (dict): the json payload of the request.
+            timeout (int | float): the read timeout for the request. if not
+                specified, the client's read timeout is used.
+
+        Returns:
+            requests.Response: the response to the request.
+        """
+        return self._request('POST', link, timeout, json=payload, auth=self._auth)
+
+    def get_root_path(self, link, timeout=None):
+        """ Get the Redfish root path for the server at the given link, from the
+        cache if it has already been retrieved.
+
+        Args:
+            link (str): the base link (scheme, host and port) of the server.
+            timeout (int | float): the read timeout for the request.
+
+        Returns:
+            str: the root path of the Redfish service, e.g. '/redfish/v1'.
+        """
+        with self._lock:
+            if link in self._root_paths:
+                return self._root_paths[link]
+
+        root_path = str(get_data(link=link + '/redfish', timeout=timeout, client=self).values()[0]).rstrip('/')
+
+        with self._lock:
+            self._root_paths[link] = root_path
+        return root_path
+
+    def reset(self):
+        """ Clear the cached root paths, so that they are retrieved again on next use.
+        """
+        with self._lock:
+            self._root_paths.clear()
+
+    def close(self):
+        """ Close all connections held by the client.
+        """
+        self.session.close()
+
+    def _request(self, method, link, timeout, adaptive=False, **kwargs):
+        """ Issue a request to the server, recording its outcome to the server's
+        health. A request which fails to get a response, or gets a server error
+        (5xx) response, is recorded as a failure.
+
+        Args:
+            method (str): the HTTP method of the request.
+            link (str): the link to request.
+            timeout (int | float): the read timeout for the request, if given.
+            adaptive (bool): whether to use the adaptive timeout of the server's
+                health rather than the configured timeout.
+            **kwargs: further arguments for the request.
+
+        Returns:
+            requests.Response: the response to the request.
+        """
+        connect_timeout, read_timeout = self._timeout(timeout)
+        if kwargs.get('auth') is None:
+            kwargs['auth'] = _no_auth
+
+        health = self.health
+        if health is None:
+            return self.session.request(method, link, timeout=(connect_timeout, read_timeout), **kwargs)
+
+        if adaptive:
+            connect_timeout, read_timeout = health.get_timeout(connect_timeout), health.get_timeout(read_timeout)
+
+        start = time.time()
+        try:
+            r = self.session.request(method, link, timeout=(connect_timeout, read_timeout), **kwargs)
+        except requests.RequestException as e:
+            health.record_failure(e)
+            raise
+
+        if r.status_code >= 500:
+            health.record_failure('{} {} returned status code {}'.format(method, link, r.status_code))
+        else:
+            health.record_success(time.time() - start)
+        return r
+
+    def _timeout(self, timeout):
+        """ Get the (connect, read) timeout to use for a request.
+
+        Args:
+            timeout (int | float): the read timeout for the request, if given.
+
+        Returns:
+            tuple: the connect and read timeouts.
+        """
+        return self.connect_timeout, timeout if timeout is not None else self.timeout
+
+
+class RedfishResourceCache(object):
+    """ Short-lived cache of Redfish resources (e.g. Thermal, Power) for a single
+    Redfish server.
+
+    Sensor readings are taken from the members of a resource (e.g. the 'Fans' of
+    the Thermal resource), so reading each sensor on a server would otherwise
+    fetch the same resource once per sensor. Instead, a fetched resource is kept
+    for the TTL, and the members of each of its collections are indexed by Name so
+    that a sensor can be found without scanning the collection. Reads within the
+    TTL share the one fetch.
+
+    Once the TTL has passed, the resource is fetched again. If the server gave an
+    ETag for the resource, the request is made conditional (If-None-Match) and a
+    304 Not Modified response renews the cached resource without it being sent
+    again.
+    """
+    def __init__(self, client, ttl=2):
+        """ Create a new RedfishResourceCache.
+
+        Args:
+            client (RedfishClient): the client to make requests with.
+            ttl (int | float): the number of seconds a fetched resource is used for
+                before it is fetched again.
+        """
+        self.client = client
+        self.ttl = float(ttl)
+
+        # the number of requests made for resources - used to track cache reuse
+        self.fetch_count = 0
+
+        self._resources = {}    # link -> (index, etag, fetched time)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, link, timeout=None):
+        """ Get the index of the resource at the given link, fetching the resource
+        if it has not been cached within the TTL.
+
+        Args:
+            link (str): the link to the resource.
+            timeout (int | float): the read timeout for the request.
+
+        Returns:
+            dict: the members of each of the resource's collections, keyed by their
+                Name, e.g. {'Fans': {'Fan 1': {...}}, 'Temperatures': {...}}. this
+                is shared with other readers, so should not be modified.
+        """
+        with self._lock:
+            lock = self._locks.setdefault(link, threading.Lock())
+
+        # only one request is made for a resource at a time - concurrent readers
+        # wait on it and share the result.
+        with lock:
+            cached = self._resources.get(link)
+            now = time.time()
+            if cached is not None and now - cached[2] < self.ttl:
+                return cached[0]
+
+            headers = None
+            if cached is not None and cached[1] is not None:
+                headers = {'If-None-Match': cached[1]}
+
+            try:
+                self.fetch_count += 1
+                r = self.client.get(link, timeout=timeout, headers=headers)
+            except requests.exceptions.ConnectionError as e:
+                raise OpenDCREException('Unable to GET link {} due to ConnectionError: {}'.format(link, e.message))
+
+            if r.status_code == 304 and cached is not None:
+                index, etag = cached[0], cached[1]
+            elif r.status_code == 200:
+                index, etag = index_by_name(r.json()), r.headers.get('ETag')
+            else:
+                logger.error('Unexpected status code for GET method: {}'.format(r.status_code))
+                raise ValueError('Unable to GET link {}. Status code: {}'.format(link, r.status_code))
+
+            self._resources[link] = (index, etag, time.time())
+            return index
+
+    def clear(self):
+        """ Drop all cached resources, so that they are fetched again on next use.
+        """
+        with self._lock:
+            self._resources.clear()
+
+
+def index_by_name(json_data):
+    """ Index the members of each collection in a Redfish resource by their Name.
+
+    Args:
+        json_data (dict): the resource data.
+
+    Returns:
+        dict: the members of each of the resource's collections (lists of objects
+            with a 'Name'), keyed by their Name. where names are repeated within a
+            collection, the first member with the name is indexed (as it would be
+            found by searching the collection in order).
+    """
+    index = dict()
+    for key, value in json_data.iteritems():
+        if isinstance(value, list):
+            members = index[key] = dict()
+            for member in value:
+                if isinstance(member, dict) and 'Name' in member:
+                    members.setdefault(member['Name'], member)
+    return index
+
+
+def _build_link(ip_address, port, path, timeout=None, client=None):
     """ Builds a new link based upon the arguments passed in to query the redfish server.
 
     Args:
@@ -44,15 +364,20 @@ def _build_link(ip_address, port, path, timeout=None):
         timeout (int | float): the number of seconds a GET will wait for a connection
             before timing out on the request. This parameter is not None only when
             attempting to find the root path.
+        client (RedfishClient): the client to make requests with, if any. the root
+            path is cached by the client.
 
     Returns:
         str: the URI of the link specified by the args.
     """
     _link = 'http://' + str(ip_address) + ':' + str(port)
     if path == 'root' and timeout is not None:
-        get_root_path = get_data(link=_link + '/redfish', timeout=timeout)
-        get_root_path = str(get_root_path.values()[0]).rstrip('/')
-        _link += get_root_path
+        if client is not None:
+            _link += client.get_root_path(_link, timeout=timeout)
+        else:
+            get_root_path = get_data(link=_link + '/redfish', timeout=timeout)
+            get_root_path = str(get_root_path.values()[0]).rstrip('/')
+            _link += get_root_path
     elif path != 'root' and path is not None:
         _link += path
 
@@ -63,7 +388,7 @@ def _build_link(ip_address, port, path, timeout=None):
         raise ValueError('Cannot build link for {} path. Bad link: {}.'.format(path, _link))
 
 
-def get_data(link, timeout, username=None, password=None):
+def get_data(link, timeout, username=None, password=None, client=None):
     """ Gets the json data from the Redfish server via the link specified.
 
     Args:
@@ -72,12 +397,16 @@ def get_data(link, timeout, username=None, password=None):
             before timing out on the request
         username (str): the username for basic authentication.
         password (str): the password for basic authentication.
+        client (RedfishClient): the client to make the request with, if any. the
+            client's credentials are used if a username and password are given.
 
     Returns:
         dict: a representation of the json data from the Redfish server.
     """
     try:
-        if username is not None and password is not None:
+        if client is not None:
+            r = client.get(link, timeout=timeout, auth=username is not None and password is not None)
+        elif username is not None and password is not None:
             r = requests.get(link, timeout=timeout, auth=HTTPBasicAuth(username, password))
         else:
             r = requests.get(link, timeout=timeout)
@@ -91,7 +420,65 @@ def get_data(link, timeout, username=None, password=None):
         return r.json()
 
 
-def patch_data(link, payload, timeout, username, password):
+def get_etag(link, timeout, username=None, password=None, client=None, etag=None):
+    """ Gets the ETag of a resource on the Redfish server via the link specified.
+
+    If the last known ETag of the resource is given, the request is made conditional
+    (If-None-Match), so that the resource is not sent again if it is unchanged.
+
+    Args:
+        link (str): the link to the resource.
+        timeout (int | float): the number of seconds a GET will wait for a connection
+            before timing out on the request
+        username (str): the username for basic authentication.
+        password (str): the password for basic authentication.
+        client (RedfishClient): the client to make the request with, if any.
+        etag (str): the last known ETag of the resource, if any.
+
+    Returns:
+        str: the current ETag of the resource, or None if the server does not tag
+            the resource.
+    """
+    headers = {'If-None-Match': etag} if etag else None
+    try:
+        if client is not None:
+            r = client.get(link, timeout=timeout, auth=username is not None and password is not None, headers=headers)
+        elif username is not None and password is not None:
+            r = requests.get(link, timeout=timeout, auth=HTTPBasicAuth(username, password), headers=headers)
+        else:
+            r = requests.get(link, timeout=timeout, headers=headers)
+    except requests.exceptions.ConnectionError as e:
+        raise OpenDCREException('Unable to GET link {} due to ConnectionError: {}'.format(link, e.message))
+
+    if r.status_code == 304:
+        return etag
+    elif r.status_code != 200:
+        logger.error('Unexpected status code for GET method: {}'.format(r.status_code))
+        raise ValueError('Unable to GET link {}. Status code: {}'.format(link, r.status_code))
+    else:
+        return r.headers.get('ETag')
+
+
+def get_root_etag(ip_address, port, timeout, client=None, etag=None):
+    """ Gets the ETag of the root resource of the Redfish server.
+
+    Args:
+        ip_address (str): the ip address of the redfish server
+        port (str | int): the port for the redfish server
+        timeout (int | float): the number of seconds a GET will wait for a connection
+            before timing out on the request
+        client (RedfishClient): the client to make requests with, if any.
+        etag (str): the last known ETag of the root resource, if any.
+
+    Returns:
+        str: the current ETag of the root resource, or None if the server does
+            not tag the resource.
+    """
+    root = _build_link(ip_address=ip_address, port=port, path='root', timeout=timeout, client=client)
+    return get_etag(root, timeout=timeout, client=client, etag=etag)
+
+
+def patch_data(link, payload, timeout, username, password, client=None):
     """ Patches json data from the Redfish server via the link specified.
 
     Args:
@@ -101,14 +488,18 @@ def patch_data(link, payload, timeout, username, password):
             connection before timing out on the request
         username (str): the username for basic authentication.
         password (str): the password for basic authentication.
+        client (RedfishClient): the client to make the request with, if any.
     """
-    r = requests.patch(link, json=payload, timeout=timeout, auth=HTTPBasicAuth(username, password))
+    if client is not None:
+        r = client.patch(link, payload, timeout=timeout)
+    else:
+        r = requests.patch(link, json=payload, timeout=timeout, auth=HTTPBasicAuth(username, password))
     if r.status_code != 200:
         logger.error('Unexpected status code for PATCH method: {}'.format(r.status_code))
         raise ValueError('Unable to PATCH link {}. Status code: {}'.format(link, r.status_code))
 
 
-def post_action(link, payload, timeout, username, password):
+def post_action(link, payload, timeout, username, password, client=None):
     """ Posts an action from to the Redfish server via the link specified.
 
     Args:
@@ -118,8 +509,12 @@ def post_action(link, payload, timeout, username, password):
             connection before timing out on the request
         username (str): the username for basic authentication.
         password (str): the password for basic authentication.
+        client (RedfishClient): the client to make the request with, if any.
     """
-    r = requests.post(link, json=payload, timeout=timeout, auth=HTTPBasicAuth(username, password))
+    if client is not None:
+        r = client.post(link, payload, timeout=timeout)
+    else:
+        r = requests.post(link, json=payload, timeout=timeout, auth=HTTPBasicAuth(username, password))
     if r.status_code != 200:
         logger.error('Unexpected status code for POST method: {}'.format(r.status_code))
         raise ValueError('Unable to POST link {}. Status code: {}'.format(link, r.status_code))
@@ -190,7 +585,7 @@ def _get_inner_link(col, search_word, ip_address, port):
     raise ValueError('Cannot find the {} in the data specified.'.format(search_word))
 
 
-def find_links(ip_address, port, timeout, username, password):
+def find_links(ip_address, port, timeout, username, password, client=None):
     """ Find links to schemas on the remote system for scans or initialization.
 
     Args:
@@ -200,7 +595,7 @@ def find_links(ip_address, port, timeout, username, password):
             before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
-
+        client (RedfishClient): the client to make requests with, if any.
 
     Returns:
         dict: key: label of remote schema, value: corresponding URIs to schemas on the remote system.
@@ -209,26 +604,29 @@ def find_links(ip_address, port, timeout, username, password):
     response = dict()
 
     try:
-        root = _build_link(ip_address=ip_address, port=port, path='root', timeout=timeout)
-        root_data = get_data(root, timeout=timeout)
+        root = _build_link(ip_address=ip_address, port=port, path='root', timeout=timeout, client=client)
+        root_data = get_data(root, timeout=timeout, client=client)
 
         collections['managers'] = get_data(
             link=_build_link(ip_address=ip_address, port=port, path=root_data['Managers']['@odata.id']),
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
         collections['systems'] = get_data(
             link=_build_link(ip_address=ip_address, port=port, path=root_data['Systems']['@odata.id']),
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
         collections['chassis'] = get_data(
             link=_build_link(ip_address=ip_address, port=port, path=root_data['Chassis']['@odata.id']),
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
     except ValueError as e:
         expected_keys = ['managers', 'chassis', 'systems']
@@ -259,7 +657,8 @@ def find_links(ip_address, port, timeout, username, password):
             port=port
         )[0]
 
-        chassis_data = get_data(link=response['chassis'], timeout=timeout, username=username, password=password)
+        chassis_data = get_data(link=response['chassis'], timeout=timeout, username=username, password=password,
+                                client=client)
         response['thermal'] = _get_inner_link(chassis_data, search_word='Thermal', ip_address=ip_address, port=port)
         response['power'] = _get_inner_link(chassis_data, search_word='Power', ip_address=ip_address, port=port)
         return response
@@ -26,12 +26,15 @@ You should have received a copy of the GNU General Public License
 along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
 import vapor_redfish
+import functools
 import logging
 import threading
 import json
 
-from redfish_connection import find_links
+from redfish_connection import find_links, get_etag, get_root_etag, RedfishClient, RedfishResourceCache
+from redfish_discovery import RedfishDiscoveryCache
 from opendcre_southbound.devicebus.constants import CommandId as cid
+from opendcre_southbound.devicebus.health import DeviceHealth
 from opendcre_southbound import constants as const
 from opendcre_southbound.devicebus.response import Response
 from opendcre_southbound.errors import OpenDCREException
@@ -47,6 +50,16 @@ class RedfishDevice(LANDevice):
     """
     _instance_name = 'redfish'
 
+    # the devices on every Redfish board, ahead of the sensors found on the server
+    _board_devices = [
+        {'device_id': '0100', 'device_type': 'power', 'device_info': 'power'},
+        {'device_id': '0200', 'device_type': 'system', 'device_info': 'system'},
+        {'device_id': '0300', 'device_type': 'led', 'device_info': 'led'}
+    ]
+
+    # the values a Redfish server's config must specify
+    _required_server_config = ('redfish_ip', 'redfish_port', 'username', 'password')
+
     def __init__(self, app_cfg, counter, **kwargs):
         super(RedfishDevice, self).__init__()
 
@@ -68,11 +81,40 @@ class RedfishDevice(LANDevice):
         self.scan_on_init = kwargs.get('scan_on_init', True)
         # self.session_token = kwargs.get('session_token')
 
+        # the outcome and latency of each request to the server is tracked, so that
+        # a server which stops responding is not waited on for every command.
+        self.health = DeviceHealth(
+            name='Redfish server {}:{}'.format(self.redfish_ip, self.redfish_port),
+            failure_threshold=kwargs.get('failure_threshold', 5),
+            reset_timeout=kwargs.get('circuit_reset_timeout', 30),
+            max_reset_timeout=kwargs.get('circuit_max_reset_timeout', 300),
+            adaptive_timeout=kwargs.get('adaptive_timeout', True),
+            min_timeout=kwargs.get('min_timeout', 1)
+        )
+
+        # requests to the Redfish server are made over a pooled HTTP session, so
+        # connections to the server are kept alive and reused between commands.
+        self.client = RedfishClient(
+            username=self.username,
+            password=self.password,
+            timeout=self.timeout_sec,
+            connect_timeout=kwargs.get('connect_timeout'),
+            pool_size=kwargs.get('pool_size', 4),
+            max_retries=kwargs.get('max_retries', 2),
+            backoff_factor=kwargs.get('retry_backoff', 0.1),
+            health=self.health
+        )
+
+        # the Thermal and Power resources hold the readings for all of the server's
+        # sensors, so they are cached briefly and shared between sensor reads.
+        self.resource_cache = RedfishResourceCache(self.client, ttl=kwargs.get('resource_cache_ttl', 2))
+
         # bundle up the Redfish auth args for easier command initialization
         self._redfish_request_kwargs = {
             'timeout': self.timeout_sec,
             'username': self.username,
-            'password': self.password
+            'password': self.password,
+            'client': self.client
         }
 
         # override the command map to defines which commands are supported
@@ -90,16 +132,169 @@ class RedfishDevice(LANDevice):
             cid.HOST_INFO: self._host_info
         }
 
-        # stores links for use within the command functions
-        self._redfish_links = find_links(self.redfish_ip, self.redfish_port, **self._redfish_request_kwargs)
-
         # assign board_id based on incoming data - redfish devices are single-board devices, so we expose a single
         # board_id property; the alternate approach, as in PLC, is a 'dumb' device, where a board_id range is exposed
         self.board_id = int(kwargs['board_offset']) + int(kwargs['board_id_range'][0])
 
+        # the ETags of the Thermal and Power resources when the sensors in the board
+        # record were last checked by an incremental scan
+        self._sensor_etags = None
+
+        # the links and sensors discovered on the server are cached (across restarts),
+        # and re-used for as long as the server's root resource is unchanged
+        self.discovery_cache = kwargs.get('discovery_cache')
+
+        # if the device is in the startup snapshot, it is restored from the snapshot without
+        # talking to the server. it is then revalidated in the background once the app is up.
+        snapshot = self._app_cfg.get('STARTUP_SNAPSHOT')
+        if snapshot is not None:
+            self._restore_snapshot(snapshot.get(self.snapshot_key))
+            if self.restored:
+                return
+
+        discovery, root_etag = self._get_cached_discovery()
+
+        # stores links for use within the command functions
+        if discovery is not None:
+            self._redfish_links = discovery['links']
+        else:
+            self._redfish_links = find_links(self.redfish_ip, self.redfish_port, **self._redfish_request_kwargs)
+
         self.board_record = None
         if self.scan_on_init:
-            self.board_record = self._get_board_record()
+            if self.discovery_cache is None:
+                self.board_record = self._get_board_record()
+            else:
+                if discovery is not None and discovery.get('sensors') is not None:
+                    self.board_record = self._get_board_record(sensors=discovery['sensors'])
+                    self._sensor_etags = discovery.get('sensor_etags')
+
+                # the sensors are checked (and their ETags taken) with an incremental scan. if
+                # that fails, the cached links may be stale, so the server is discovered afresh.
+                if not self._rescan_sensors() and discovery is not None:
+                    self._sensor_etags = None
+                    self._redfish_links = find_links(
+                        self.redfish_ip, self.redfish_port, **self._redfish_request_kwargs
+                    )
+                    self.board_record = self._get_board_record()
+
+        self._cache_discovery(root_etag)
+
+    @property
+    def snapshot_key(self):
+        """ The key for the device's state in the startup snapshot.
+        """
+        return 'redfish:{}:{}:{}'.format(self.server_rack, self.redfish_ip, self.redfish_port)
+
+    def get_snapshot(self):
+        """ Get the state of the device to keep in the startup snapshot.
+
+        Returns:
+            dict: the board id, board record, links and sensor ETags of the device,
+                or None if it has not been scanned.
+        """
+        if self.board_record is None:
+            return None
+
+        return {
+            'board_id': format(self.board_id, '08x'),
+            'board_record': self.board_record,
+            'links': self._redfish_links,
+            'sensor_etags': self._sensor_etags
+        }
+
+    def _restore_snapshot(self, state):
+        """ Restore the RedfishDevice state from its startup snapshot. The state is
+        not used if the hostnames or IP addresses of the board have been re-configured
+        since the snapshot was taken.
+
+        Note that this should only be called from the `__init__` method as it is
+        an alternative way to complete device initialization.
+
+        Args:
+            state (dict): the state of the device from the startup snapshot, or
+                None if the device is not in the snapshot.
+        """
+        if state is None:
+            return
+
+        board_record = state.get('board_record')
+        if board_record is None or \
+                board_record.get('hostnames') != self.hostnames or \
+                board_record.get('ip_addresses') != self.ip_addresses:
+            logger.debug('Startup snapshot for {} does not match configuration - ignoring.'.format(self.redfish_ip))
+            return
+
+        self.board_id = int(state['board_id'], 16)
+        self.board_record = board_record
+        self._redfish_links = state['links']
+        self._sensor_etags = state.get('sensor_etags')
+        self.restored = True
+        logger.debug('Successfully restored device state from startup snapshot.')
+
+    def revalidate(self):
+        """ Revalidate the device state restored from the startup snapshot. The
+        sensors are re-probed if the Thermal or Power resources have changed; if
+        they can not be checked with the restored links, the server is discovered
+        afresh.
+        """
+        if not self._rescan_sensors():
+            self._sensor_etags = None
+            self._redfish_links = find_links(self.redfish_ip, self.redfish_port, **self._redfish_request_kwargs)
+            board_record = self._get_board_record()
+            if board_record is not None:
+                self.board_record = board_record
+        super(RedfishDevice, self).revalidate()
+
+    def _get_cached_discovery(self):
+        """ Get the links and sensors cached for the Redfish server, if the server's
+        root resource is unchanged since they were cached.
+
+        Returns:
+            tuple: the cached discovery for the server (None if there is none, or it
+                is stale), and the current ETag of the server's root resource (None
+                if it is not known).
+        """
+        if self.discovery_cache is None:
+            return None, None
+
+        key = RedfishDiscoveryCache.get_key(self.redfish_ip, self.redfish_port)
+        discovery = self.discovery_cache.get(key)
+        cached_etag = discovery.get('root_etag') if discovery is not None else None
+
+        try:
+            root_etag = get_root_etag(
+                self.redfish_ip, self.redfish_port, self.timeout_sec, client=self.client, etag=cached_etag
+            )
+        except Exception as e:
+            logger.warning('Unable to check root resource for Redfish server ({}): {}'.format(self.redfish_ip, e))
+            return None, None
+
+        if discovery is None or root_etag is None or root_etag != cached_etag:
+            return None, root_etag
+        return discovery, root_etag
+
+    def _cache_discovery(self, root_etag):
+        """ Cache the links and sensors discovered on the Redfish server.
+
+        Args:
+            root_etag (str): the ETag of the server's root resource when the links
+                were discovered.
+        """
+        if self.discovery_cache is None:
+            return
+
+        sensors = None
+        if self.board_record is not None:
+            sensors = self.board_record['devices'][len(self._board_devices):]
+
+        self.discovery_cache.set(
+            key=RedfishDiscoveryCache.get_key(self.redfish_ip, self.redfish_port),
+            root_etag=root_etag,
+            links=self._redfish_links,
+            sensors=sensors,
+            sensor_etags=self._sensor_etags
+        )
 
     def duplicate_config(self, other):
         """ Check to see whether an redfish config has the same values as this redfish
@@ -124,8 +319,13 @@ class RedfishDevice(LANDevice):
             # self.session_token == other.get('session_token')
             # TODO - for session capability, session tokens may be required.
 
-    def _get_board_record(self):
-        """ Get available sensors via Redfish and
+    def _get_board_record(self, sensors=None):
+        """ Get available sensors via Redfish and build the board record from them.
+
+        Args:
+            sensors (list[dict]): the sensor device records for the board, if they
+                are already known (e.g. from the discovery cache). if None, the
+                sensors are found via Redfish.
 
         Returns:
             dict: Dictionary containing board's devices.
@@ -135,19 +335,18 @@ class RedfishDevice(LANDevice):
         board_record['hostnames'] = self.hostnames
         board_record['ip_addresses'] = self.ip_addresses
 
-        board_record['devices'] = [{'device_id': '0100', 'device_type': 'power', 'device_info': 'power'},
-                                   {'device_id': '0200', 'device_type': 'system', 'device_info': 'system'},
-                                   {'device_id': '0300', 'device_type': 'led', 'device_info': 'led'}]
+        board_record['devices'] = [dict(device) for device in self._board_devices]
 
-        links_list = [self._redfish_links['thermal'], self._redfish_links['power']]
+        if sensors is None:
+            links_list = [self._redfish_links['thermal'], self._redfish_links['power']]
 
-        try:
-            sensors = vapor_redfish.find_sensors(links=links_list, **self._redfish_request_kwargs)
-            board_record['devices'].extend(sensors)
-        except ValueError:
-            logger.exception('Invalid string in configuration for Redfish: %s', self.redfish_ip)
-            board_record = None
+            try:
+                sensors = vapor_redfish.find_sensors(links=links_list, **self._redfish_request_kwargs)
+            except ValueError:
+                logger.exception('Invalid string in configuration for Redfish: %s', self.redfish_ip)
+                return None
 
+        board_record['devices'].extend(sensors)
         return board_record
 
     @classmethod
@@ -184,6 +383,11 @@ class RedfishDevice(LANDevice):
         thread_count = devicebus_config.get('device_initializer_threads', 1)
         scan_on_init = devicebus_config.get('scan_on_init', True)
 
+        # the links and sensors discovered on each server are cached to file, if configured
+        discovery_cache = None
+        if devicebus_config.get('discovery_cache_file'):
+            discovery_cache = RedfishDiscoveryCache(devicebus_config['discovery_cache_file'])
+
         # create a thread pool which will be used for the lifetime of device registration
         thread_pool = ThreadPool(thread_count)
 
@@ -202,73 +406,122 @@ class RedfishDevice(LANDevice):
                 'No valid device config found for Redfish configuration. Requires either the '
                 '"from_config" field or the "config" field.'
             )
+        # the servers are initialized in the thread pool, where a missing config value would
+        # only be reported as a failure to initialize, so the configs are checked up front
+        for rack in device_config.get('racks', []):
+            for server in rack['servers']:
+                cls._check_server_config(server)
+
         # now, for each redfish server, we create a device instance
         if 'racks' in device_config:
             for rack in device_config['racks']:
                 rack_id = rack['rack_id']
                 for server in rack['servers']:
-                    # pass through scan on init value for all redfish devices
+                    # pass through scan on init value and discovery cache for all redfish devices
                     server['scan_on_init'] = scan_on_init
+                    server['discovery_cache'] = discovery_cache
 
                     # check to see if there are any duplicate redfish servers already defined.
                     # this may be the case with the periodic registering of remote
                     # devices.
+                    duplicates = False
                     if device_cache:
-                        duplicates = False
                         for dev in device_cache.values():
                             if isinstance(dev, RedfishDevice):
                                 if dev.duplicate_config(server):
                                     duplicates = True
                                     break
 
-                        if not duplicates:
-                            RedfishDevice._process_server(
-                                server, app_config, rack_id,
-                                device_config.get('board_id_range', const.REDFISH_BOARD_RANGE),
-                                device_init_failure, mutate_lock, device_cache, single_board_devices
-                            )
-
-                            # FIXME (etd) -
-                            #   a GIL issue appears to be causing the threaded _process_server resolution to hang. this
-                            #   can likely be fixed by figuring out what the GIL is deadlocking on (probably an import
-                            #   dependency?) and updating OpenDCRE's caching component to import in the main thread.
-                            #   Until then, its easier and faster to just disable threading and do device registration
-                            #   serially.
-
-                            # thread_pool.add_task(
-                            #     RedfishDevice._process_server, server, app_config, rack_id,
-                            #     device_config.get('board_id_range', const.REDFISH_BOARD_RANGE),
-                            #     device_init_failure, mutate_lock, device_cache, single_board_devices
-                            # )
-
-                    else:
-                        RedfishDevice._process_server(
-                            server, app_config, rack_id,
+                    if not duplicates:
+                        # the board offset is taken here, rather than in the registrar thread, so
+                        # that board ids follow the configuration order of the servers
+                        server['board_offset'] = app_config['REDFISH_BOARD_OFFSET'].next()
+                        thread_pool.add_task(
+                            RedfishDevice._process_server, server, app_config, rack_id,
                             device_config.get('board_id_range', const.REDFISH_BOARD_RANGE),
                             device_init_failure, mutate_lock, device_cache, single_board_devices
                         )
 
-                        # FIXME (etd) -
-                        #   a GIL issue appears to be causing the threaded _process_server resolution to hang. this
-                        #   can likely be fixed by figuring out what the GIL is deadlocking on (probably an import
-                        #   dependency?) and updating OpenDCRE's caching component to import in the main thread.
-                        #   Until then, its easier and faster to just disable threading and do device registration
-                        #   serially.
-
-                        # thread_pool.add_task(
-                        #     RedfishDevice._process_server, server, app_config, rack_id,
-                        #     device_config.get('board_id_range', const.REDFISH_BOARD_RANGE),
-                        #     device_init_failure, mutate_lock, device_cache, single_board_devices
-                        # )
-
         # wait for all devices to be initialized
         thread_pool.wait_for_task_completion()
 
+        if discovery_cache is not None:
+            discovery_cache.save()
+
         # check for device initialization failures
         if device_init_failure:
             logger.error('Failed to initialize Redfish devices: {}'.format(device_init_failure))
             raise OpenDCREException('Failed to initialize Redfish devices.')
 
+    @classmethod
+    def get_registrations(cls, devicebus_config, app_config):
+        """ Get the registration for each configured Redfish device, for registering
+        the devices in the background (see opendcre_southbound.registration).
+
+        Args:
+            devicebus_config (dict): a dictionary containing the devicebus configurations
+                for Redfish. within this dict is a list or reference to the actual configs
+                for the Redfish devices themselves.
+            app_config (dict): Flask application config, where application-wide
+                configurations and constants are stored.
+
+        Returns:
+            list[tuple]: a (name, factory) tuple for each configured server. the factory
+                initializes and returns the RedfishDevice for the server.
+        """
+        device_config = cls.get_device_config(devicebus_config)
+        if not device_config:
+            raise ValueError('Unable to get configuration for device - unable to register.')
+
+        scan_on_init = devicebus_config.get('scan_on_init', True)
+        board_range = device_config.get('board_id_range', const.REDFISH_BOARD_RANGE)
+
+        discovery_cache = None
+        if devicebus_config.get('discovery_cache_file'):
+            discovery_cache = RedfishDiscoveryCache(devicebus_config['discovery_cache_file'])
+
+        def _create(server):
+            device = cls(app_cfg=app_config, counter=app_config['COUNTER'], **server)
+            # devices are registered independently, so the discovery cache is saved as
+            # each one is initialized. it is only written if the discovery has changed.
+            if discovery_cache is not None:
+                discovery_cache.save()
+            return device
+
+        registrations = []
+        for rack in device_config.get('racks', []):
+            for server in rack['servers']:
+                cls._check_server_config(server)
+                server = dict(
+                    server, scan_on_init=scan_on_init, discovery_cache=discovery_cache,
+                    server_rack=rack['rack_id'], board_id_range=board_range
+                )
+
+                # the board offset is taken up front, so that the board id does not change
+                # if initializing the device is retried
+                server['board_offset'] = app_config['REDFISH_BOARD_OFFSET'].next()
+
+                name = 'redfish:{}:{}:{}'.format(rack['rack_id'], server['redfish_ip'], server['redfish_port'])
+                registrations.append((name, functools.partial(_create, server)))
+
+        return registrations
+
+    @classmethod
+    def _check_server_config(cls, server):
+        """ Check that a Redfish server record has the values required to initialize
+        a device for it.
+
+        Args:
+            server (dict): the record for the redfish server, containing its configurations.
+
+        Raises:
+            KeyError: a required value is missing from the record.
+        """
+        for key in cls._required_server_config:
+            if key not in server:
+                logger.error('Redfish server config is missing "{}": {}'.format(key, server))
+                raise KeyError(key)
+
     @staticmethod
     def _process_server(server, app_config, rack_id, board_range, device_init_failure, mutate_lock, devices, single_board_devices):
         """ A private method to handle the construction of the redfish device from
@@ -289,7 +542,6 @@ class RedfishDevice(LANDevice):
                 device registration.
         """
         server['server_rack'] = rack_id
-        server['board_offset'] = app_config['REDFISH_BOARD_OFFSET'].next()
         server['board_id_range'] = board_range
 
         try:
@@ -372,6 +624,34 @@ class RedfishDevice(LANDevice):
             }
         )
 
+    def _rescan_sensors(self):
+        """ Re-probe the sensors for the board record, using the known links, if the
+        Thermal or Power resources have changed since they were last checked. The
+        resources' ETags are used to check for changes.
+
+        Returns:
+            bool: True if the board record is up to date; False if the sensors could
+                not be checked (e.g. the known links are no longer valid).
+        """
+        links = [self._redfish_links['thermal'], self._redfish_links['power']]
+        previous = self._sensor_etags or [None] * len(links)
+
+        try:
+            etags = [
+                get_etag(link, etag=etag, **self._redfish_request_kwargs) for link, etag in zip(links, previous)
+            ]
+            if None in etags or etags != self._sensor_etags:
+                board_record = self._get_board_record()
+                if board_record is None:
+                    return False
+                self.board_record = board_record
+        except Exception as e:
+            logger.warning('Unable to check sensors for Redfish server ({}): {}'.format(self.redfish_ip, e))
+            return False
+
+        self._sensor_etags = etags
+        return True
+
     def _scan_all(self, command):
         """ Get the scan information from a 'broadcast' (e.g. scan all) command.
 
@@ -386,7 +666,15 @@ class RedfishDevice(LANDevice):
         # get the command data out from the incoming command
         force = command.data.get('force', False)
 
+        # an incremental scan re-uses the known links, and only re-probes the sensors
+        # if the Thermal or Power resources have changed
+        if command.data.get('incremental', False) and self.board_record is not None:
+            force = not self._rescan_sensors()
+
         if force:
+            self.client.reset()
+            self.resource_cache.clear()
+            self._sensor_etags = None
             self._redfish_links = find_links(self.redfish_ip, self.redfish_port, **self._redfish_request_kwargs)
             self.board_record = self._get_board_record()
 
@@ -442,6 +730,7 @@ class RedfishDevice(LANDevice):
                     device_type=device_type,
                     device_name=device_name,
                     links=links_list,
+                    resource_cache=self.resource_cache,
                     **self._redfish_request_kwargs
                 )
             elif device_type_string.lower() in ['voltage', 'power_supply']:
@@ -450,6 +739,7 @@ class RedfishDevice(LANDevice):
                     device_type=device_type,
                     device_name=device_name,
                     links=links_list,
+                    resource_cache=self.resource_cache,
                     **self._redfish_request_kwargs
                 )
 
@@ -681,6 +971,7 @@ class RedfishDevice(LANDevice):
                     device_type='Fans',
                     device_name=device_name,
                     links=links_list,
+                    resource_cache=self.resource_cache,
                     **self._redfish_request_kwargs
                 )
 
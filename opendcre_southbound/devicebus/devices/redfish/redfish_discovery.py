@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+""" Redfish Discovery Cache for OpenDCRE Redfish Bridge
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import copy
+import errno
+import json
+import logging
+import threading
+
+from opendcre_southbound.utils import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class RedfishDiscoveryCache(object):
+    """ Cache of the links and sensors discovered on Redfish servers, persisted to
+    a file so that it is kept across restarts.
+
+    Discovering a Redfish server's links and sensors walks several resources on
+    the server (the root, the Managers, Systems and Chassis collections and their
+    members, and the Thermal and Power resources). Each cache entry records the
+    ETag of the server's root resource when the links were discovered, so that on
+    the next initialization a single conditional GET of the root tells whether the
+    cached links can be reused.
+
+    Entries are keyed by the address of the server (ip:port). Entries are updated
+    in memory and only written to the cache file on `save`, so that the file is
+    written once for a whole registration pass, rather than once per server.
+    """
+    def __init__(self, path):
+        """ Create a new RedfishDiscoveryCache, loading any entries from the
+        cache file.
+
+        Args:
+            path (str): the path to the discovery cache file.
+        """
+        self.path = path
+
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self._entries = entries
+        except (OSError, IOError) as e:
+            if e.errno != errno.ENOENT:
+                logger.warning('Unable to load Redfish discovery cache from file {}: {}'.format(self.path, e))
+        except ValueError as e:
+            logger.warning('Unable to load Redfish discovery cache from file {}: {}'.format(self.path, e))
+
+    @staticmethod
+    def get_key(ip_address, port):
+        """ Get the cache key for a Redfish server.
+
+        Args:
+            ip_address (str): the ip address of the Redfish server.
+            port (str | int): the port of the Redfish server.
+
+        Returns:
+            str: the cache key for the server.
+        """
+        return '{}:{}'.format(ip_address, port)
+
+    def get(self, key):
+        """ Get the cached discovery for a Redfish server. The caller should check
+        that the 'root_etag' of the entry matches the current ETag of the server's
+        root resource before using it.
+
+        Args:
+            key (str): the cache key for the server.
+
+        Returns:
+            dict: a copy of the cache entry, containing the 'root_etag', 'links',
+                'sensors' and 'sensor_etags' of the server. None if nothing is
+                cached for the server.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return copy.deepcopy(entry) if entry is not None else None
+
+    def set(self, key, root_etag, links, sensors=None, sensor_etags=None):
+        """ Cache the discovery for a Redfish server. Nothing is cached if the
+        server does not tag its root resource, since the links could then never
+        be validated.
+
+        Args:
+            key (str): the cache key for the server.
+            root_etag (str): the ETag of the server's root resource when the links
+                were discovered.
+            links (dict): the links discovered on the server.
+            sensors (list[dict]): the sensor device records discovered from the
+                server's Thermal and Power resources.
+            sensor_etags (list[str]): the ETags of the Thermal and Power resources
+                when the sensors were discovered.
+        """
+        entry = {
+            'root_etag': root_etag,
+            'links': links,
+            'sensors': sensors,
+            'sensor_etags': sensor_etags
+        }
+
+        with self._lock:
+            if root_etag is None:
+                if self._entries.pop(key, None) is not None:
+                    self._dirty = True
+            elif self._entries.get(key) != entry:
+                self._entries[key] = copy.deepcopy(entry)
+                self._dirty = True
+
+    def save(self):
+        """ Persist the cache to the cache file, if it has changed since it was
+        loaded or last saved. The file is written atomically, so a concurrent
+        reader never sees a partially written cache.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+
+            try:
+                write_json_atomic(self.path, self._entries, prefix='.redfish-discovery-')
+            except (OSError, IOError) as e:
+                logger.error('Unable to write to Redfish discovery cache file: {}'.format(self.path))
+                logger.exception(e)
+                return
+
+            self._dirty = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -30,13 +30,14 @@ import logging
 from redfish_connection import get_data
 from redfish_connection import post_action
 from redfish_connection import patch_data
+from redfish_connection import index_by_name
 from opendcre_southbound.errors import OpenDCREException
 
 
 logger = logging.getLogger(__name__)
 
 
-def find_sensors(links, timeout, username, password):
+def find_sensors(links, timeout, username, password, client=None):
     """ Get sensors information on the remote system for initialization or
     forced scans.
 
@@ -46,6 +47,7 @@ def find_sensors(links, timeout, username, password):
             connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
 
     Returns:
         dict: Identifying sensors information from the remote system.
@@ -58,13 +60,15 @@ def find_sensors(links, timeout, username, password):
             link=links[0],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
         sensors['power'] = get_data(
             link=links[1],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
     except ValueError as e:
         unfound = ', '.join({'thermal', 'power'}.difference(sensors.keys()))
@@ -107,7 +111,7 @@ def find_sensors(links, timeout, username, password):
         raise OpenDCREException('Cannot retrieve sensor data: {}'.format(e.message))
 
 
-def get_power(links, timeout, username, password):
+def get_power(links, timeout, username, password, client=None):
     """ Get power information from the remote system.
 
     Args:
@@ -116,6 +120,7 @@ def get_power(links, timeout, username, password):
             connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
 
     Returns:
         dict: Power information from the remote system.
@@ -128,13 +133,15 @@ def get_power(links, timeout, username, password):
             link=links[1],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
         power_data['systems'] = get_data(
             link=links[0],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
     except ValueError as e:
         unfound = ', '.join({'power', 'systems'}.difference(power_data.keys()))
@@ -156,7 +163,7 @@ def get_power(links, timeout, username, password):
         raise OpenDCREException('Cannot retrieve power data.'.format(e.message))
 
 
-def set_power(power_action, links, timeout, username, password):
+def set_power(power_action, links, timeout, username, password, client=None):
     """ Set power state on the remote system.
 
     Args:
@@ -167,6 +174,7 @@ def set_power(power_action, links, timeout, username, password):
             connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
 
     Returns:
         dict: Power information from the remote system.
@@ -189,13 +197,15 @@ def set_power(power_action, links, timeout, username, password):
                 payload=_payload,
                 timeout=timeout,
                 username=username,
-                password=password
+                password=password,
+                client=client
             )
             response = get_power(
                 links=links,
                 timeout=timeout,
                 username=username,
-                password=password
+                password=password,
+                client=client
             )
             return response
         except ValueError as e:
@@ -206,7 +216,7 @@ def set_power(power_action, links, timeout, username, password):
         raise ValueError('No payload data for POST action. Power cannot be set.')
 
 
-def get_asset(links, timeout, username, password):
+def get_asset(links, timeout, username, password, client=None):
     """ Get asset information from the remote system.
 
     Args:
@@ -215,6 +225,7 @@ def get_asset(links, timeout, username, password):
             connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
 
     Returns:
         dict: Asset information from the remote system.
@@ -227,19 +238,22 @@ def get_asset(links, timeout, username, password):
             link=links[0],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
         asset_data['systems'] = get_data(
             link=links[1],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
         asset_data['bmc'] = get_data(
             link=links[2],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
     except ValueError as e:
         expected_keys = ['chassis', 'systems', 'bmc']
@@ -270,7 +284,7 @@ def get_asset(links, timeout, username, password):
         raise OpenDCREException('Asset data cannot be retrieved: {}'.format(e.message))
 
 
-def get_led(links, timeout, username, password):
+def get_led(links, timeout, username, password, client=None):
     """ Retrieve remote system LED status.
 
     Args:
@@ -279,6 +293,7 @@ def get_led(links, timeout, username, password):
             connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
 
     Returns:
         dict: LED Status as reported by remote system.
@@ -290,7 +305,8 @@ def get_led(links, timeout, username, password):
             link=links[0],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
     except ValueError as e:
         logger.error('No data retrieved for LED status on GET of chassis schema: {}'.format(e.message))
@@ -305,7 +321,7 @@ def get_led(links, timeout, username, password):
         raise OpenDCREException('Incomplete or no data from chassis schema. {} not found.'.format(e.message))
 
 
-def set_led(led_state, links, timeout, username, password):
+def set_led(led_state, links, timeout, username, password, client=None):
     """ Turn the remote system LED on or off.
 
     Args:
@@ -315,6 +331,7 @@ def set_led(led_state, links, timeout, username, password):
             a connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
 
     Returns:
         dict: LED State as set.
@@ -328,15 +345,17 @@ def set_led(led_state, links, timeout, username, password):
             timeout=timeout,
             username=username,
             password=password,
+            client=client
         )
-        response = get_led(links=links, timeout=timeout, username=username, password=password)
+        response = get_led(links=links, timeout=timeout, username=username, password=password, client=client)
         return response
     except ValueError as e:
         logger.error('LED state not set on PATCH or response not returned on GET: {}'.format(e.message))
         raise OpenDCREException('LED state cannot be set. POST error or GET error: {}'.format(e.message))
 
 
-def get_thermal_sensor(device_type, device_name, links, timeout, username, password):
+def get_thermal_sensor(device_type, device_name, links, timeout, username, password, client=None,
+                       resource_cache=None):
     """ Get thermal sensor information from remote host.
 
     Args:
@@ -349,6 +368,9 @@ def get_thermal_sensor(device_type, device_name, links, timeout, username, passw
             connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
+        resource_cache (RedfishResourceCache): cache to get the thermal schema
+            from, if any.
 
     Returns:
         dict: Thermal sensor information from the remote system.
@@ -356,27 +378,30 @@ def get_thermal_sensor(device_type, device_name, links, timeout, username, passw
     response = dict()
 
     try:
-        thermal_sensors = get_data(
-            link=links[0],
-            timeout=timeout,
-            username=username,
-            password=password
-        )
+        if resource_cache is not None:
+            thermal_sensors = resource_cache.get_index(link=links[0], timeout=timeout)
+        else:
+            thermal_sensors = index_by_name(get_data(
+                link=links[0],
+                timeout=timeout,
+                username=username,
+                password=password,
+                client=client
+            ))
     except ValueError as e:
         logger.error('No data retrieved on GET of thermal schema: {}'.format(e.message))
         raise OpenDCREException('Cannot retrieve data from thermal schema: {}'.format(e.message))
 
     try:
-        thermal_sensors = thermal_sensors[device_type]
-        for device in thermal_sensors:
-            if device['Name'] == device_name:
-                device_health = device['Status']['Health'].lower()
-                response['health'] = 'ok' if device_health == 'ok' else device_health
-                response['states'] = [] if response['health'] == 'ok' else [device['Status']['State'].lower()]
-                if device_type == 'Fans':
-                    response['speed_rpm'] = float(device['Reading'])
-                elif device_type == 'Temperatures':
-                    response['temperature_c'] = float(device['ReadingCelsius'])
+        device = thermal_sensors[device_type].get(device_name)
+        if device is not None:
+            device_health = device['Status']['Health'].lower()
+            response['health'] = 'ok' if device_health == 'ok' else device_health
+            response['states'] = [] if response['health'] == 'ok' else [device['Status']['State'].lower()]
+            if device_type == 'Fans':
+                response['speed_rpm'] = float(device['Reading'])
+            elif device_type == 'Temperatures':
+                response['temperature_c'] = float(device['ReadingCelsius'])
         if response:
             return response
         else:
@@ -387,7 +412,8 @@ def get_thermal_sensor(device_type, device_name, links, timeout, username, passw
         raise OpenDCREException('Incomplete data from thermal schema. Sensor information not found: {}'.format(e.message))
 
 
-def get_power_sensor(device_type, device_name, links, timeout, username, password):
+def get_power_sensor(device_type, device_name, links, timeout, username, password, client=None,
+                     resource_cache=None):
     """ Get power sensor information from remote host.
 
     Args:
@@ -399,6 +425,9 @@ def get_power_sensor(device_type, device_name, links, timeout, username, passwor
             connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
+        resource_cache (RedfishResourceCache): cache to get the power schema
+            from, if any.
 
     Returns:
         dict: Power sensor information from  the remote system.
@@ -406,25 +435,28 @@ def get_power_sensor(device_type, device_name, links, timeout, username, passwor
     response = dict()
 
     try:
-        power_sensors = get_data(
-            link=links[0],
-            timeout=timeout,
-            username=username,
-            password=password
-        )
+        if resource_cache is not None:
+            power_sensors = resource_cache.get_index(link=links[0], timeout=timeout)
+        else:
+            power_sensors = index_by_name(get_data(
+                link=links[0],
+                timeout=timeout,
+                username=username,
+                password=password,
+                client=client
+            ))
     except ValueError as e:
         logger.error('No data retrieved on GET of power schema: {}'.format(e.message))
         raise OpenDCREException('Cannot retrieve data from power schema: {}'.format(e.message))
 
     try:
-        power_sensors = power_sensors[device_type]
-        for device in power_sensors:
-            if device['Name'] == device_name:
-                response['health'] = 'ok' if device['Status']['Health'].lower() == 'ok' \
-                    else device['Status']['Health'].lower()
-                response['states'] = [] if response['health'] == 'ok' else [device['Status']['State'].lower()]
-                if device_type == 'Voltages':
-                    response['voltage'] = float(device['ReadingVolts'])
+        device = power_sensors[device_type].get(device_name)
+        if device is not None:
+            response['health'] = 'ok' if device['Status']['Health'].lower() == 'ok' \
+                else device['Status']['Health'].lower()
+            response['states'] = [] if response['health'] == 'ok' else [device['Status']['State'].lower()]
+            if device_type == 'Voltages':
+                response['voltage'] = float(device['ReadingVolts'])
         if response:
             return response
         else:
@@ -435,7 +467,7 @@ def get_power_sensor(device_type, device_name, links, timeout, username, passwor
         raise OpenDCREException('Incomplete data from power schema. Sensor information not found: {}'.format(e.message))
 
 
-def get_boot(links, timeout, username, password):
+def get_boot(links, timeout, username, password, client=None):
     """ Get boot target from remote host.
 
     Args:
@@ -444,6 +476,7 @@ def get_boot(links, timeout, username, password):
             a connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
 
     Returns:
         dict: Boot target information from the remote system.
@@ -455,7 +488,8 @@ def get_boot(links, timeout, username, password):
             link=links[0],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
     except ValueError as e:
         logger.error('No data retrieved on GET of systems schema: {}'.format(e.message))
@@ -471,7 +505,7 @@ def get_boot(links, timeout, username, password):
         raise KeyError('Incomplete or no data from systems schema. {} not found.'.format(e.message))
 
 
-def set_boot(target, links, timeout, username, password):
+def set_boot(target, links, timeout, username, password, client=None):
     """ Get boot target from remote host.
 
     Args:
@@ -481,6 +515,7 @@ def set_boot(target, links, timeout, username, password):
             a connection before timing out on the request
         username (str): the username for basic HTTP authentication
         password (str): the password for basic HTTP authentication
+        client (RedfishClient): the client to make requests with, if any.
 
     Returns:
         dict: Boot target information from the remote system.
@@ -493,7 +528,8 @@ def set_boot(target, links, timeout, username, password):
             link=links[0],
             timeout=timeout,
             username=username,
-            password=password
+            password=password,
+            client=client
         )
     except ValueError as e:
         logger.error('No data retrieved on GET of systems schema: {}'.format(e.message))
@@ -515,13 +551,15 @@ def set_boot(target, links, timeout, username, password):
                         payload=_payload,
                         timeout=timeout,
                         username=username,
-                        password=password
+                        password=password,
+                        client=client
                     )
                     new_boot = get_boot(
                         links=links,
                         timeout=timeout,
                         username=username,
-                        password=password
+                        password=password,
+                        client=client
                     )
                 except ValueError as e:
                     logger.error('LED state not set on PATCH or response not returned on GET: {}'.format(e.message))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Devicebus Health Tracking
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from opendcre_southbound.errors import DeviceUnavailable
+
+logger = logging.getLogger(__name__)
+
+# the states of a device's circuit
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _percentile(ordered, percent):
+    """ Get a percentile of a sorted, non-empty list of values (nearest rank).
+    """
+    index = int(round(percent / 100.0 * len(ordered) + 0.5)) - 1
+    return ordered[max(0, min(len(ordered) - 1, index))]
+
+
+class DeviceHealth(object):
+    """ Tracks the health of a single LAN-based device (e.g. a BMC or Redfish
+    server), from the outcome and latency of each exchange with the device.
+
+    The latencies of recent successful exchanges give the device an adaptive
+    timeout - a multiple of their 99th percentile, bounded by the configured
+    timeout - so that a device which usually responds quickly is not waited on
+    for the full configured timeout once it stops responding.
+
+    The health also acts as a circuit breaker. Once the device fails a number of
+    exchanges in a row, the circuit opens, and commands to the device fail fast
+    (with DeviceUnavailable) rather than waiting on the device. After the reset
+    timeout, the circuit is half-open, and a single command is let through as a
+    probe. If the probe succeeds, the circuit closes again; if it fails, the
+    circuit opens again, and the reset timeout doubles (up to a maximum).
+    """
+    def __init__(self, name=None, failure_threshold=5, reset_timeout=30, max_reset_timeout=300, adaptive_timeout=True,
+                 min_timeout=0.5, timeout_multiplier=4, window=100, min_samples=20):
+        """ Create a new DeviceHealth.
+
+        Args:
+            name (str): the name of the device, for logging.
+            failure_threshold (int): the number of failed exchanges in a row which
+                open the circuit. if 0, the circuit is never opened.
+            reset_timeout (int | float): the time, in seconds, the circuit stays open
+                before a probe is let through.
+            max_reset_timeout (int | float): the maximum time, in seconds, the circuit
+                stays open, as the reset timeout doubles with each failed probe.
+            adaptive_timeout (bool): whether to derive timeouts from the latency
+                of the device. if False, the configured timeout is always used.
+            min_timeout (int | float): the minimum adaptive timeout, in seconds.
+            timeout_multiplier (int | float): the multiple of the 99th percentile
+                latency used as the adaptive timeout.
+            window (int): the number of recent latencies kept.
+            min_samples (int): the number of latencies needed before timeouts are
+                adapted.
+        """
+        self.name = name
+        self.failure_threshold = max(0, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.max_reset_timeout = max(self.reset_timeout, float(max_reset_timeout))
+        self.adaptive_timeout = adaptive_timeout
+        self.min_timeout = float(min_timeout)
+        self.timeout_multiplier = float(timeout_multiplier)
+        self.min_samples = max(1, int(min_samples))
+
+        self.state = CLOSED
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+        self._latencies = deque(maxlen=max(1, int(window)))
+        self._p99 = None
+        self._open_timeout = self.reset_timeout
+        self._opened = None
+        self._probing = False
+        self._last_failure = None
+        self._lock = threading.Lock()
+
+    def record_success(self, latency):
+        """ Record a successful exchange with the device.
+
+        Args:
+            latency (float): the time, in seconds, the device took to respond.
+        """
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self._latencies.append(latency)
+            self._p99 = None
+
+            if self.state != CLOSED:
+                logger.info('{} responded - closing circuit.'.format(self.name or 'Device'))
+                self.state = CLOSED
+                self._open_timeout = self.reset_timeout
+                self._opened = None
+
+    def record_failure(self, error=None):
+        """ Record a failed exchange with the device (e.g. a timeout, or a failure
+        to connect).
+
+        Args:
+            error: the error the exchange failed with, kept for the status.
+        """
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self._last_failure = str(error) if error is not None else None
+
+            if self.state == HALF_OPEN:
+                # the probe failed, so wait longer before the next one
+                self._open_timeout = min(self.max_reset_timeout, self._open_timeout * 2)
+                self._open()
+            elif self.state == CLOSED and self.failure_threshold and \
+                    self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def acquire(self):
+        """ Check that a command may be issued to the device. This is called before
+        each command, and `release` must be called with the result once the
+        command completes.
+
+        Returns:
+            bool: True if the command is the probe of a half-open circuit; False
+                otherwise.
+
+        Raises:
+            DeviceUnavailable: the circuit is open, or half-open with its probe in
+                progress, so the command should not be issued.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+
+            if self.state == OPEN:
+                retry_in = self._opened + self._open_timeout - time.time()
+                if retry_in > 0:
+                    raise DeviceUnavailable(
+                        'Device is unavailable after {} failure(s) in a row - retry in {:.1f}s.'.format(
+                            self.consecutive_failures, retry_in)
+                    )
+                self.state = HALF_OPEN
+
+            if self._probing:
+                raise DeviceUnavailable('Device is unavailable - waiting on a probe of the device.')
+            self._probing = True
+            return True
+
+    def release(self, probe):
+        """ Note that a command allowed by `acquire` has completed.
+
+        Args:
+            probe (bool): the result of `acquire` for the command.
+        """
+        if probe:
+            with self._lock:
+                # if the probe did not reach the device, the circuit stays half-open
+                # and the next command is let through as the probe
+                self._probing = False
+
+    def get_timeout(self, timeout):
+        """ Get the timeout to use for an exchange with the device.
+
+        Args:
+            timeout (int | float): the configured timeout, in seconds.
+
+        Returns:
+            float: the adaptive timeout, which is never more than the configured
+                timeout. the configured timeout is used until enough latencies
+                are known, and while the device is failing, so that a device which
+                has become slow is not cut off by a timeout learned when it was fast.
+        """
+        if not self.adaptive_timeout or timeout is None:
+            return timeout
+
+        with self._lock:
+            if self.state != CLOSED or self.consecutive_failures or len(self._latencies) < self.min_samples:
+                return timeout
+            p99 = self._get_p99()
+
+        return min(timeout, max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def status(self):
+        """ Get the health of the device.
+
+        Returns:
+            dict: the state of the circuit, the counts of successful and failed
+                exchanges, and the latency percentiles of recent exchanges.
+        """
+        with self._lock:
+            status = {
+                'state': self.state,
+                'successes': self.successes,
+                'failures': self.failures,
+                'consecutive_failures': self.consecutive_failures
+            }
+
+            if self._latencies:
+                ordered = sorted(self._latencies)
+                status['latency'] = {
+                    'samples': len(ordered),
+                    'p50': round(_percentile(ordered, 50), 4),
+                    'p90': round(_percentile(ordered, 90), 4),
+                    'p99': round(_percentile(ordered, 99), 4)
+                }
+
+            if self._last_failure is not None:
+                status['last_failure'] = self._last_failure
+
+            if self.state == OPEN:
+                status['retry_in'] = round(max(0, self._opened + self._open_timeout - time.time()), 1)
+
+            return status
+
+    def _open(self):
+        """ Open the circuit. This should be called with the lock held.
+        """
+        if self.state != OPEN:
+            logger.warning('{} failed {} time(s) in a row - opening circuit for {}s.'.format(
+                self.name or 'Device', self.consecutive_failures, self._open_timeout))
+        self.state = OPEN
+        self._opened = time.time()
+        self._probing = False
+
+    def _get_p99(self):
+        """ Get the 99th percentile of the recent latencies, computed once for each
+        new latency. This should be called with the lock held.
+        """
+        if self._p99 is None:
+            self._p99 = _percentile(sorted(self._latencies), 99)
+        return self._p99
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Devicebus Response Cache
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from opendcre_southbound.devicebus.constants import CommandId
+
+# the time, in seconds, for which the response to each cacheable command is cached.
+# None means the cache timeout is used. the version, asset and host info of a board
+# rarely change. power, LED and boot target status may be changed outside of OpenDCRE
+# (e.g. with the power button), and power status carries live power readings, so
+# those are not cached unless configured.
+DEFAULT_TTLS = {
+    CommandId.VERSION: None,
+    CommandId.ASSET: None,
+    CommandId.HOST_INFO: None,
+    CommandId.POWER: 0,
+    CommandId.LED: 0,
+    CommandId.BOOT_TARGET: 0
+}
+
+
+def get_command_key(cmd_id):
+    """ Get the configuration key for a command id, e.g. 'host_info' for HOST_INFO.
+
+    Args:
+        cmd_id (int): the command id.
+
+    Returns:
+        str: the configuration key for the command.
+    """
+    return CommandId.get_command_name(cmd_id).lower().replace(' ', '_')
+
+
+class ResponseCache(object):
+    """ A TTL cache, with LRU eviction, for the responses to idempotent devicebus
+    commands.
+
+    Entries are grouped by scope - the devicebus interface a command targets -
+    so that all entries for it can be invalidated when a command which changes
+    the state of its board(s) is handled. Each scope also has a generation, which
+    is bumped on invalidation, so that a response fetched before an invalidation
+    is not cached after it.
+    """
+    def __init__(self, timeout=600, threshold=500, ttls=None):
+        """ Create a new ResponseCache.
+
+        Args:
+            timeout (int | float): the default time, in seconds, responses are cached.
+            threshold (int): the maximum number of responses to cache. once
+                reached, the least recently used response is evicted.
+            ttls (dict): the time, in seconds, responses are cached for each
+                command, keyed by command configuration key (e.g. 'power',
+                'host_info'), overriding the defaults. a command with a TTL of
+                0 is not cached.
+        """
+        self.timeout = timeout
+        self.threshold = max(1, int(threshold))
+
+        self._ttls = {}
+        ttls = ttls or {}
+        for cmd_id, ttl in DEFAULT_TTLS.iteritems():
+            ttl = ttls.get(get_command_key(cmd_id), ttl)
+            self._ttls[cmd_id] = timeout if ttl is None else ttl
+
+        self._entries = OrderedDict()
+        self._scopes = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get_ttl(self, cmd_id):
+        """ Get the time, in seconds, for which responses to a command are cached.
+
+        Args:
+            cmd_id (int): the command id.
+
+        Returns:
+            int | float: the TTL for the command. 0 if it is not cached.
+        """
+        return self._ttls.get(cmd_id) or 0
+
+    def get(self, scope, key):
+        """ Get a cached response.
+
+        Args:
+            scope (tuple): the scope of the response.
+            key (tuple): the key for the command within the scope.
+
+        Returns:
+            Response: the cached response, or None if there is no (unexpired)
+                response cached for the command.
+        """
+        with self._lock:
+            entry = self._entries.pop((scope, key), None)
+            if entry is None:
+                return None
+
+            response, expires = entry
+            if expires <= time.time():
+                self._scopes[scope].discard(key)
+                return None
+
+            # re-insert to mark this as the most recently used entry
+            self._entries[(scope, key)] = entry
+            return response
+
+    def generation(self, scope):
+        """ Get the current generation of a scope. This should be taken before a
+        response is fetched, and passed on to `set` when caching it.
+
+        Args:
+            scope (tuple): the scope.
+
+        Returns:
+            int: the generation of the scope.
+        """
+        with self._lock:
+            return self._generations.get(scope, 0)
+
+    def set(self, scope, key, response, ttl, generation):
+        """ Cache a response.
+
+        The response is not cached if the scope has been invalidated since the
+        given generation was taken.
+
+        Args:
+            scope (tuple): the scope of the response.
+            key (tuple): the key for the command within the scope.
+            response (Response): the response to cache.
+            ttl (int | float): the time, in seconds, to cache the response for.
+            generation (int): the generation of the scope when the response
+                was fetched.
+        """
+        with self._lock:
+            if self._generations.get(scope, 0) != generation:
+                return
+
+            self._entries.pop((scope, key), None)
+            self._entries[(scope, key)] = (response, time.time() + ttl)
+            self._scopes.setdefault(scope, set()).add(key)
+
+            while len(self._entries) > self.threshold:
+                (old_scope, old_key), _ = self._entries.popitem(last=False)
+                self._scopes[old_scope].discard(old_key)
+
+    def invalidate(self, scope):
+        """ Drop all cached responses for a scope.
+
+        Args:
+            scope (tuple): the scope to invalidate.
+        """
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            for key in self._scopes.pop(scope, ()):
+                self._entries.pop((scope, key), None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
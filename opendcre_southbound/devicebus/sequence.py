@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Command Sequence Numbers
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from itertools import count
+
+from opendcre_southbound.errors import OpenDCREException
+
+
+class SequenceAllocator(object):
+    """ Thread-safe allocator of command sequence numbers.
+
+    Sequence numbers are consecutive values which wrap from 0xfe back to 0x00 (so
+    they fit in the single byte sequence field of a devicebus packet). The values
+    come from an itertools.count, whose next() is atomic, so the allocator can be
+    shared between threads without locking.
+
+    The allocator is an iterator, so it can be used anywhere the sequence number
+    generator was used - next(allocator) gives the next sequence number.
+    """
+    modulus = 0xff
+
+    def __init__(self, start=0x00, step=0x01):
+        """ Create a new SequenceAllocator.
+
+        Args:
+            start (int): the value at which to start the sequence.
+            step (int): the amount to increment the sequence by.
+        """
+        self._counter = count(start, step)
+
+    def __iter__(self):
+        return self
+
+    def next(self, in_flight=None):
+        """ Allocate the next sequence number.
+
+        Args:
+            in_flight (set | dict): the sequence numbers currently in flight on a
+                bus (e.g. requests whose responses are still outstanding). these
+                are skipped, so a sequence number is never reused while a response
+                for it may still arrive.
+
+        Returns:
+            int: the next sequence number.
+
+        Raises:
+            OpenDCREException: every sequence number is in flight.
+        """
+        for _ in xrange(self.modulus):
+            sequence = next(self._counter) % self.modulus
+            if not in_flight or sequence not in in_flight:
+                return sequence
+
+        raise OpenDCREException('Unable to allocate sequence number - all sequence numbers are in flight.')
+
+    __next__ = next
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Single-Flight Call Coalescing
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import sys
+import threading
+
+
+class _Call(object):
+    """ A call which is in flight, and which will hold its result once complete.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+class SingleFlight(object):
+    """ Coalesces concurrent calls with the same key into a single call.
+
+    The first caller for a key makes the call. Any caller which asks for the same
+    key while that call is in flight waits for it and shares its result (or its
+    exception), rather than making a call of its own. Once the call completes, the
+    next caller for the key makes a new call - results are not cached.
+    """
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """ Call the given function, unless a call for the same key is already in
+        flight, in which case wait for that call and return its result.
+
+        Args:
+            key: the (hashable) key identifying the call.
+            fn (callable): the function to call.
+            *args: the positional arguments to call the function with.
+            **kwargs: the keyword arguments to call the function with.
+
+        Returns:
+            the result of the call.
+
+        Raises:
+            the exception raised by the call, if any.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except Exception:
+                call.exc_info = sys.exc_info()
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.exc_info is not None:
+            raise call.exc_info[0], call.exc_info[1], call.exc_info[2]
+        return call.result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
@@ -213,3 +213,19 @@ class IPMIAuthType(object):
     @property
     def body(self):
         return self._body
+
+    @staticmethod
+    def next_sequence_number(seq):
+        """ Get the session sequence number following the given one. The sequence
+        number is a 4-byte, little-endian value which wraps around to 0x00000001.
+
+        Args:
+            seq (list[int]): the session sequence number bytes.
+
+        Returns:
+            list[int]: the incremented session sequence number bytes.
+        """
+        value = (seq[0] | seq[1] << 8 | seq[2] << 16 | seq[3] << 24) + 1
+        if value > 0xffffffff:
+            value = 0x00000001
+        return [(value >> shift) & 0xff for shift in (0, 8, 16, 24)]
@@ -179,7 +179,7 @@ class AuthMD5(auth_base.IPMIAuthType):
             _data = self.data if self.data is not None else []
             for byte in [self.source_address, self.source_lun, self.command] + _data:
                 chk = (chk + byte) % 256
-            chk = 0x100 - chk
+            chk = (0x100 - chk) % 256
             self.data_checksum = chk
 
         # build the list of bytes in the packet body - this will be used during response
@@ -197,7 +197,7 @@ class AuthMD5(auth_base.IPMIAuthType):
         # sequence number is 0x00000000, since that tends to be the placeholder value
         seq = request.session_sequence_number
         if seq.count(0x00) != 4:
-            seq = [seq[0] + 1] + seq[1:]
+            seq = self.next_sequence_number(seq)
         self.session_sequence_number = seq
 
         # use the same session id in the response
@@ -613,7 +613,7 @@ class AuthRMCP(auth_base.IPMIAuthType):
                 _data = self.data if self.data is not None else []
                 for byte in [self.source_address, self.source_lun, self.command] + _data:
                     chk = (chk + byte) % 256
-                chk = 0x100 - chk
+                chk = (0x100 - chk) % 256
                 self.data_checksum = chk
 
             # Note: will also need to check/generate the integrity piece for this response,
@@ -641,7 +641,7 @@ class AuthRMCP(auth_base.IPMIAuthType):
         # sequence number is 0x00000000, since that tends to be the placeholder value
         seq = request.session_sequence_number
         if seq.count(0x00) != 4:
-            seq = [seq[0] + 1] + seq[1:]
+            seq = self.next_sequence_number(seq)
         self.session_sequence_number = seq
 
         if request.payload_type == 0x00:
@@ -47,7 +47,7 @@ THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
 DAMAGE.
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, make_response, request
 from redfish_auth import RfAuthentication
 import os
 import json
@@ -93,7 +93,11 @@ def basic_server(mockup_path, root_path, host_name, port_number, tokens):
         path = os.path.normpath('/'.join(args))
         if path in database:
             index = json.dumps(database[path])
-            return index
+            # tag the resource, so that clients may make conditional requests for it
+            # with If-None-Match (answered with 304 Not Modified if it is unchanged)
+            resp = make_response(index)
+            resp.add_etag()
+            return resp.make_conditional(request)
         else:
             return resource_not_found()
 
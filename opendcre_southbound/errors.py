@@ -81,4 +81,11 @@ class CommandNotSupported(OpenDCREException):
     """
     pass
 
+
+class DeviceUnavailable(OpenDCREException):
+    """ Device has failed repeatedly, so commands to it fail fast rather than
+    waiting on the device (see devicebus.health.DeviceHealth).
+    """
+    pass
+
 # endregion
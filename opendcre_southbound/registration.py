@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Background Device Registration
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# the states of a device registration
+PENDING = 'pending'
+REGISTERING = 'registering'
+REGISTERED = 'registered'
+RETRYING = 'retrying'
+
+
+def publish_device(app_config, device, lock):
+    """ Publish a registered single-board devicebus interface (e.g. an IPMI or
+    Redfish device) to the app, adding it to the app's device cache and lookup
+    tables and to the routing table, so that requests are routed to it. The
+    app's scan cache is invalidated, so that the device is included in the
+    scan results (and so polled for telemetry) once they are next scanned.
+
+    Args:
+        app_config (dict): the Flask application config, containing the 'DEVICES',
+            'SINGLE_BOARD_DEVICES', 'DEVICE_ROUTER' and 'SCAN_CACHE_STORE' of the app.
+        device (LANDevice): the device to publish.
+        lock (Lock): threading lock used when mutating the app's device cache.
+    """
+    devices = app_config['DEVICES']
+    single_board_devices = app_config['SINGLE_BOARD_DEVICES']
+    router = app_config.get('DEVICE_ROUTER')
+
+    device.response_cache = app_config.get('RESPONSE_CACHE')
+
+    with lock:
+        devices[device.device_uuid] = device
+        keys = [device.board_id]
+
+        # next, add hostname and ip address keying for friendly (non-board-id lookup)
+        for key in (device.hostnames or []) + (device.ip_addresses or []):
+            if key not in single_board_devices:
+                keys.append(key)
+            else:
+                logger.info('Duplicate hostname/IP address ({}) found for {} - skipping.'.format(key, device))
+
+        for key in keys:
+            single_board_devices[key] = device
+            if router is not None:
+                router.add_single_board_device(key, device)
+
+    scan_cache = app_config.get('SCAN_CACHE_STORE')
+    if scan_cache is not None:
+        scan_cache.invalidate()
+
+
+class RegistrationJob(object):
+    """ Background job which registers devicebus interfaces (IPMI and Redfish
+    devices), so that the app can serve requests while they are still being
+    initialized.
+
+    Each device is registered by a factory, which initializes the device (and so
+    may talk to it over the network). Factories are run concurrently in a bounded
+    pool of worker threads. Each device is published to the app as soon as it is
+    initialized. A device which fails to initialize is retried with an exponential
+    backoff, for as long as the job runs.
+    """
+    def __init__(self, app_config, max_workers=1, backoff=5, max_backoff=300):
+        """ Create a new RegistrationJob.
+
+        Args:
+            app_config (dict): the Flask application config, which devices are
+                published to (see `publish_device`).
+            max_workers (int): the maximum number of devices to initialize
+                concurrently.
+            backoff (int | float): the time, in seconds, to wait before the first
+                retry of a failed device. the wait doubles with each retry.
+            max_backoff (int | float): the maximum time, in seconds, to wait
+                between retries of a failed device.
+        """
+        self.app_config = app_config
+        self.max_workers = max_workers
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        # set once every device has been attempted at least once, and once every
+        # device has been registered, respectively
+        self.attempted = threading.Event()
+        self.complete = threading.Event()
+
+        self._registrations = OrderedDict()
+        self._queue = []
+        self._counter = 0
+        self._running = 0
+        self._started = None
+        self._finished = None
+        self._stopped = False
+        self._threads = []
+        self._cond = threading.Condition()
+        self._publish_lock = threading.Lock()
+
+    def add(self, devicebus, name, factory):
+        """ Add a device to register.
+
+        Args:
+            devicebus (str): the devicebus interface type of the device (e.g. 'ipmi').
+            name (str): a name which uniquely identifies the device.
+            factory (callable): initializes and returns the device.
+        """
+        with self._cond:
+            self._registrations[name] = {
+                'device': name,
+                'devicebus': devicebus,
+                'status': PENDING,
+                'attempts': 0,
+                'factory': factory
+            }
+            self._schedule(name, 0)
+
+    def start(self):
+        """ Start registering in background (daemon) worker threads.
+        """
+        with self._cond:
+            if self._started is not None:
+                return
+            self._started = time.time()
+
+            if not self._registrations:
+                self.attempted.set()
+                self.complete.set()
+                return
+
+            for i in xrange(max(1, min(self.max_workers, len(self._registrations)))):
+                t = threading.Thread(target=self._run, name='registration-{}'.format(i))
+                t.daemon = True
+                t.start()
+                self._threads.append(t)
+
+        logger.info('Started registration of {} device(s) with {} worker(s).'.format(
+            len(self._registrations), len(self._threads))
+        )
+
+    def stop(self, timeout=None):
+        """ Stop registering, waiting up to `timeout` seconds for each worker thread
+        to finish the registration it is working on.
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+
+    def _schedule(self, name, delay):
+        """ Queue a device to be registered after `delay` seconds. This should be
+        called with the lock held.
+        """
+        due = time.time() + delay
+        self._counter += 1
+        heapq.heappush(self._queue, (due, self._counter, name))
+        self._registrations[name]['next_attempt'] = due
+        self._cond.notify()
+
+    def _next(self):
+        """ Wait for the next device which is due to be registered.
+
+        Returns:
+            dict: the registration of the device, or None once the job is stopped or
+                there are no more devices to register.
+        """
+        with self._cond:
+            while not self._stopped:
+                if self._queue:
+                    due, _, name = self._queue[0]
+                    wait = due - time.time()
+                    if wait <= 0:
+                        heapq.heappop(self._queue)
+                        registration = self._registrations[name]
+                        registration['status'] = REGISTERING
+                        self._running += 1
+                        return registration
+                    self._cond.wait(wait)
+
+                elif self._running:
+                    # a registration which is in progress may fail and be re-queued
+                    self._cond.wait()
+
+                else:
+                    return None
+        return None
+
+    def _run(self):
+        """ Register devices as they are due, until there are none left to register.
+        """
+        while True:
+            registration = self._next()
+            if registration is None:
+                return
+
+            device, error = None, None
+            try:
+                device = registration['factory']()
+                publish_device(self.app_config, device, self._publish_lock)
+            except Exception as e:
+                logger.warning('Failed to register {}: {}'.format(registration['device'], e))
+                error = e
+
+            with self._cond:
+                self._running -= 1
+                registration['attempts'] += 1
+
+                if error is None:
+                    registration['status'] = REGISTERED
+                    registration['board_id'] = format(device.board_id, '08x')
+                    registration.pop('error', None)
+                    registration.pop('next_attempt', None)
+                    logger.info('Registered {} after {} attempt(s).'.format(
+                        registration['device'], registration['attempts'])
+                    )
+                else:
+                    registration['status'] = RETRYING
+                    registration['error'] = str(error)
+                    delay = min(self.max_backoff, self.backoff * 2 ** (registration['attempts'] - 1))
+                    self._schedule(registration['device'], delay)
+
+                registrations = self._registrations.values()
+                if all(r['attempts'] for r in registrations):
+                    self.attempted.set()
+                if all(r['status'] == REGISTERED for r in registrations) and not self.complete.is_set():
+                    self._finished = time.time()
+                    self.complete.set()
+
+                self._cond.notify_all()
+
+    def status(self):
+        """ Get the progress of the registration, and the status of each device.
+
+        Returns:
+            dict: the overall status of the registration ('running' or 'complete'),
+                the number of devices in each state, and the status of each device.
+        """
+        now = time.time()
+        with self._cond:
+            devices = []
+            for registration in self._registrations.itervalues():
+                record = dict((k, v) for k, v in registration.iteritems() if k not in ('factory', 'next_attempt'))
+                if registration['status'] == RETRYING:
+                    record['retry_in'] = round(max(0, registration['next_attempt'] - now), 1)
+                devices.append(record)
+
+            counts = dict.fromkeys([PENDING, REGISTERING, REGISTERED, RETRYING], 0)
+            for record in devices:
+                counts[record['status']] += 1
+
+            elapsed = 0
+            if self._started is not None:
+                elapsed = round((self._finished or now) - self._started, 1)
+
+            return {
+                'status': 'complete' if self.complete.is_set() else 'running',
+                'elapsed': elapsed,
+                'total': len(devices),
+                'counts': counts,
+                'devices': devices
+            }
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Startup Snapshot
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import copy
+import errno
+import json
+import logging
+import threading
+import time
+
+from utils import fan_out, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+# the version of the snapshot file format. a snapshot with a different version is
+# ignored, so this should be bumped whenever the state kept for a device changes.
+SNAPSHOT_VERSION = 1
+
+
+class StartupSnapshot(object):
+    """ Snapshot of the state of LAN-based devicebus interfaces (IPMI and Redfish),
+    persisted to a file so that the devices can be restored on startup without
+    talking to them.
+
+    The snapshot file is loaded once, when the snapshot is created. Each device's
+    state (its board id, board record, and whatever else it needs to handle
+    commands - see LANDevice.get_snapshot) is keyed by the device's snapshot key.
+    Devices restored from the snapshot are revalidated in the background once the
+    app is up (see SnapshotRevalidator), after which the snapshot is saved again.
+    """
+    def __init__(self, path):
+        """ Create a new StartupSnapshot, loading the device states from the
+        snapshot file.
+
+        Args:
+            path (str): the path to the snapshot file.
+        """
+        self.path = path
+
+        self._devices = {}
+        self._lock = threading.Lock()
+
+        try:
+            with open(self.path, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, IOError) as e:
+            if e.errno != errno.ENOENT:
+                logger.warning('Unable to load startup snapshot from file {}: {}'.format(self.path, e))
+            return
+        except ValueError as e:
+            logger.warning('Unable to load startup snapshot from file {}: {}'.format(self.path, e))
+            return
+
+        if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+            logger.info('Ignoring startup snapshot with unsupported version: {}'.format(
+                snapshot.get('version') if isinstance(snapshot, dict) else None)
+            )
+            return
+
+        self._devices = snapshot.get('devices', {})
+        logger.info('Loaded startup snapshot of {} device(s) from {}'.format(len(self._devices), self.path))
+
+    def get(self, key):
+        """ Get the state of a device from the snapshot.
+
+        Args:
+            key (str): the snapshot key of the device.
+
+        Returns:
+            dict: a copy of the state of the device, or None if the device is not
+                in the snapshot.
+        """
+        with self._lock:
+            state = self._devices.get(key)
+            return copy.deepcopy(state) if state is not None else None
+
+    def save(self, devices):
+        """ Snapshot the state of the given devices and persist it to the snapshot
+        file. Devices without a snapshot key (e.g. PLC) are not included. The file
+        is written atomically, so a concurrent reader never sees a partially
+        written snapshot.
+
+        Args:
+            devices (list[DevicebusInterface]): the devicebus interfaces to snapshot.
+        """
+        states = {}
+        for device in devices:
+            key = getattr(device, 'snapshot_key', None)
+            if key is None:
+                continue
+            state = device.get_snapshot()
+            if state is not None:
+                states[key] = state
+
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'created': time.time(),
+            'devices': states
+        }
+
+        with self._lock:
+            try:
+                write_json_atomic(self.path, snapshot, prefix='.snapshot-')
+            except (OSError, IOError, TypeError, ValueError) as e:
+                logger.error('Unable to write to startup snapshot file: {}'.format(self.path))
+                logger.exception(e)
+                return
+
+            self._devices = states
+        logger.debug('Saved startup snapshot of {} device(s) to {}'.format(len(states), self.path))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._devices)
+
+
+class SnapshotRevalidator(object):
+    """ Background revalidation of the devices restored from a startup snapshot.
+
+    Once the app is up, each device which was restored from the snapshot is
+    revalidated against the device itself (see LANDevice.revalidate), concurrently
+    in a bounded pool of worker threads. The snapshot is then saved with the state
+    of all of the app's devices, so that the next startup is restored from it.
+    """
+    def __init__(self, app, snapshot, max_workers=16, timeout=None, wait_for=None):
+        """ Create a new SnapshotRevalidator.
+
+        Args:
+            app (Flask): the Flask application whose devices are revalidated.
+            snapshot (StartupSnapshot): the snapshot the devices were restored from.
+            max_workers (int): the maximum number of devices to revalidate
+                concurrently.
+            timeout (int | float): the time, in seconds, each device is given to
+                revalidate. if None, revalidation is not timed out.
+            wait_for (threading.Event): an event to wait for before revalidating
+                (e.g. the background registration of the devices having attempted
+                every device). if None, revalidation starts immediately.
+        """
+        self.app = app
+        self.snapshot = snapshot
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.wait_for = wait_for
+
+        self._thread = None
+        self.done = threading.Event()
+
+    def start(self):
+        """ Start revalidating in a background (daemon) thread.
+        """
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self.revalidate, name='snapshot-revalidator')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def revalidate(self):
+        """ Revalidate the devices restored from the snapshot, and save the snapshot.
+
+        Returns:
+            int: the number of devices revalidated.
+        """
+        try:
+            if self.wait_for is not None:
+                self.wait_for.wait()
+
+            devices = self.app.config['DEVICES'].values()
+            restored = [device for device in devices if getattr(device, 'restored', False)]
+
+            revalidated = 0
+            if restored:
+                logger.info('Revalidating {} device(s) restored from the startup snapshot.'.format(len(restored)))
+                for device, _, exc_info in fan_out(
+                        lambda d: d.revalidate(), restored, max(1, self.max_workers), self.timeout):
+                    if exc_info is not None:
+                        logger.warning('Failed to revalidate {}: {}'.format(device, exc_info[1]))
+                    else:
+                        revalidated += 1
+
+            self.snapshot.save(devices)
+            return revalidated
+
+        except Exception as e:
+            logger.error('Failed to revalidate the startup snapshot.')
+            logger.exception(e)
+            return 0
+
+        finally:
+            self.done.set()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Telemetry Polling
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import logging
+import threading
+import time
+
+from flask import current_app
+
+import constants as const
+from utils import (
+    check_valid_board,
+    check_valid_board_and_device,
+    fan_out,
+    get_device_instance,
+    get_device_type_code,
+    get_scan_cache
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryStore(object):
+    """ Thread-safe store of the latest reading for each device, along with the
+    time at which the reading was taken.
+
+    Readings are keyed by (board_id, device_id, device_type) - see TelemetryStore.key.
+    """
+    def __init__(self):
+        self._readings = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(board_id, device_id, device_type):
+        """ Get the key for a device's readings in the store.
+
+        Args:
+            board_id (int | str): the id of the board the device is on, as
+                returned by check_valid_board_and_device.
+            device_id (int | str): the id of the device, as returned by
+                check_valid_board_and_device.
+            device_type (str): the type of the device.
+
+        Returns:
+            tuple: the key for the device.
+        """
+        return board_id, device_id, device_type.lower()
+
+    def put(self, key, reading, timestamp=None):
+        """ Store the reading for a device.
+
+        A reading is not stored if a newer reading for the device is already
+        held, so a slow read finishing late does not replace a fresher value.
+
+        Args:
+            key (tuple): the key for the device (see TelemetryStore.key).
+            reading (dict): the reading for the device.
+            timestamp (float): the time at which the reading was taken. if not
+                specified, the current time is used.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._lock:
+            current = self._readings.get(key)
+            if current is None or current[1] <= timestamp:
+                self._readings[key] = (reading, timestamp)
+
+    def get(self, key, max_age=None):
+        """ Get the latest reading for a device.
+
+        Args:
+            key (tuple): the key for the device (see TelemetryStore.key).
+            max_age (int | float): the maximum age, in seconds, of the reading.
+                if the latest reading is older than this, no reading is returned.
+                if None, the latest reading is returned regardless of its age.
+
+        Returns:
+            tuple: (reading, timestamp) for the device, or None if there is no
+                reading (fresh enough) for the device.
+        """
+        with self._lock:
+            entry = self._readings.get(key)
+
+        if entry is None:
+            return None
+        if max_age is not None and time.time() - entry[1] > max_age:
+            return None
+        return entry
+
+    def __len__(self):
+        with self._lock:
+            return len(self._readings)
+
+
+class TelemetryPoller(object):
+    """ Background poller which periodically reads all readable devices and keeps
+    the latest reading for each in a TelemetryStore.
+
+    Each devicebus interface type ('plc', 'ipmi', 'redfish') is polled on its own
+    interval; types without an interval are not polled. The boards and devices to
+    poll are taken from the cached scan results, so nothing is polled until a scan
+    has been cached. On each poll, the devices are grouped by the devicebus interface
+    instance which handles them, and the groups are read concurrently, each as a
+    single batch.
+    """
+    def __init__(self, app, store, intervals, max_workers=16, timeout=None):
+        """ Create a new TelemetryPoller.
+
+        Args:
+            app (Flask): the Flask application whose devices are polled.
+            store (TelemetryStore): the store to keep the readings in.
+            intervals (dict): the polling interval, in seconds, for each devicebus
+                interface type. types with no (or a zero) interval are not polled.
+            max_workers (int): the maximum number of devicebus interfaces to read
+                concurrently.
+            timeout (int | float): the time, in seconds, each devicebus interface
+                is given to complete its reads. if None, reads are not timed out.
+        """
+        self.app = app
+        self.store = store
+        self.intervals = dict(
+            (interface.lower(), float(interval)) for interface, interval in intervals.iteritems() if interval
+        )
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """ Start polling in a background (daemon) thread.
+        """
+        if not self.intervals or self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='telemetry-poller')
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info('Started telemetry poller with intervals: {}'.format(self.intervals))
+
+    def stop(self, timeout=None):
+        """ Stop polling, waiting up to `timeout` seconds for the background thread
+        to finish.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        """ Poll each devicebus interface type whenever its interval has elapsed,
+        until the poller is stopped.
+        """
+        next_poll = dict.fromkeys(self.intervals, 0)
+
+        while not self._stop.is_set():
+            now = time.time()
+            due = [interface for interface, at in next_poll.iteritems() if at <= now]
+
+            if due:
+                try:
+                    with self.app.app_context():
+                        self.poll(due)
+                except Exception as e:
+                    logger.error('Failed to poll devices for telemetry.')
+                    logger.exception(e)
+
+                # the next poll is scheduled from the end of this one, so a slow
+                # poll is not immediately followed by another
+                now = time.time()
+                for interface in due:
+                    next_poll[interface] = now + self.intervals[interface]
+
+            self._stop.wait(max(0, min(next_poll.values()) - time.time()))
+
+    def poll(self, interfaces):
+        """ Read all readable devices on the boards belonging to the given devicebus
+        interface types, and store their readings.
+
+        This must be called within the app context.
+
+        Args:
+            interfaces (list[str]): the devicebus interface types to poll.
+
+        Returns:
+            int: the number of readings stored.
+        """
+        scan_results = get_scan_cache()
+        if not scan_results:
+            logger.debug('No cached scan results - skipping telemetry poll.')
+            return 0
+
+        factory = current_app.config['CMD_FACTORY']
+        groups = {}
+
+        for rack in scan_results.get('racks', []):
+            for board in rack.get('boards', []):
+                try:
+                    device = get_device_instance(check_valid_board(board['board_id']))
+                except Exception as e:
+                    logger.debug('Not polling board {}: {}'.format(board.get('board_id'), e))
+                    continue
+
+                if device._instance_name not in interfaces:
+                    continue
+
+                for dev in board.get('devices', []):
+                    device_type = dev['device_type'].lower()
+                    if device_type not in const.READABLE_DEVICE_TYPES:
+                        continue
+
+                    board_num, device_num = check_valid_board_and_device(board['board_id'], dev['device_id'])
+                    cmd = factory.get_read_command({
+                        'board_id': board_num,
+                        'device_id': device_num,
+                        'device_type': get_device_type_code(device_type),
+                        'device_type_string': device_type
+                    })
+                    key = self.store.key(board_num, device_num, device_type)
+                    groups.setdefault(device.device_uuid, (device, []))[1].append((key, cmd))
+
+        def _read_group(group):
+            device, reads = group
+            timestamp = time.time()
+            responses = device.handle_batch([cmd for _, cmd in reads])
+
+            stored = 0
+            for (key, _), response in zip(reads, responses):
+                if isinstance(response, Exception):
+                    logger.debug('Failed to poll device {}: {}'.format(key, response))
+                else:
+                    self.store.put(key, response.data, timestamp)
+                    stored += 1
+            return stored
+
+        stored = 0
+        for (device, _), result, exc_info in fan_out(_read_group, groups.values(), self.max_workers, self.timeout):
+            if exc_info is not None:
+                logger.warning('Failed to poll devicebus interface {}: {}'.format(device, exc_info[1]))
+            else:
+                stored += result
+        return stored
@@ -31,7 +31,7 @@ import unittest
 from opendcre_southbound.devicebus.devices.ipmi.ipmi_device import IPMIDevice
 
 from opendcre_southbound.devicebus.command_factory import CommandFactory
-from opendcre_southbound.errors import CommandNotSupported
+from opendcre_southbound.errors import CommandNotSupported, OpenDCREException
 
 
 class SupportedDeviceCommandsTestCase(unittest.TestCase):
@@ -76,6 +76,7 @@ class SupportedDeviceCommandsTestCase(unittest.TestCase):
         cls._fan = command_fac.get_fan_command({})
         cls._host_info = command_fac.get_host_info_command({})
         cls._retry = command_fac.get_retry_command({})
+        cls._read_all = command_fac.get_read_all_command({})
 
     def test_000_ipmi(self):
         """ Test the IPMI device for VERSION command support.
@@ -156,3 +157,10 @@ class SupportedDeviceCommandsTestCase(unittest.TestCase):
         """
         with self.assertRaises(CommandNotSupported):
             self.ipmi.handle(self._retry)
+
+    def test_014_ipmi(self):
+        """ Test the IPMI device for READ_ALL command support.
+        """
+        # the board record could not be retrieved for the device, so the read fails
+        with self.assertRaises(OpenDCREException):
+            self.ipmi.handle(self._read_all)
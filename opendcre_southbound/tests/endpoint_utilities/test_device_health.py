@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Device Health Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import time
+import unittest
+
+from opendcre_southbound.devicebus.command import Command
+from opendcre_southbound.devicebus.constants import CommandId
+from opendcre_southbound.devicebus.devices.lan_device import LANDevice
+from opendcre_southbound.devicebus.health import CLOSED, HALF_OPEN, OPEN, DeviceHealth
+from opendcre_southbound.errors import DeviceUnavailable
+
+
+class MockLANDevice(LANDevice):
+    """ LAN device whose commands succeed or fail as the device is up or down,
+    recording the outcome to the device's health.
+    """
+    _instance_name = 'mock'
+
+    def __init__(self, health):
+        super(MockLANDevice, self).__init__()
+        self.health = health
+        self.up = True
+        self.calls = 0
+        self._command_map = {
+            CommandId.READ: self._read,
+            CommandId.SCAN: self._scan
+        }
+
+    def _read(self, command):
+        self.calls += 1
+        if not self.up:
+            self.health.record_failure('timeout')
+            raise ValueError('No response from device.')
+        self.health.record_success(0.01)
+        return {'reading': 1}
+
+    def _scan(self, command):
+        return {'boards': []}
+
+
+class DeviceHealthTestCase(unittest.TestCase):
+    """ Test tracking device health, and the circuit breaker, with DeviceHealth.
+    """
+    def test_001_opens_after_threshold(self):
+        """ Test that the circuit opens after the failure threshold is reached, and
+        that a success resets the count of failures in a row.
+        """
+        health = DeviceHealth(failure_threshold=3)
+
+        health.record_failure()
+        health.record_failure()
+        health.record_success(0.01)
+        health.record_failure()
+        health.record_failure()
+        self.assertEqual(health.state, CLOSED)
+        self.assertFalse(health.acquire())
+
+        health.record_failure('timeout')
+        self.assertEqual(health.state, OPEN)
+        self.assertRaises(DeviceUnavailable, health.acquire)
+
+        status = health.status()
+        self.assertEqual(status['state'], OPEN)
+        self.assertEqual(status['failures'], 5)
+        self.assertEqual(status['consecutive_failures'], 3)
+        self.assertEqual(status['last_failure'], 'timeout')
+        self.assertGreater(status['retry_in'], 0)
+
+    def test_002_half_open_probe(self):
+        """ Test that a single probe is let through once the reset timeout has
+        passed, and that a successful probe closes the circuit.
+        """
+        health = DeviceHealth(failure_threshold=1, reset_timeout=0.1)
+        health.record_failure()
+        self.assertRaises(DeviceUnavailable, health.acquire)
+
+        time.sleep(0.15)
+        self.assertTrue(health.acquire())
+        self.assertEqual(health.state, HALF_OPEN)
+
+        # only one probe at a time
+        self.assertRaises(DeviceUnavailable, health.acquire)
+
+        health.record_success(0.01)
+        health.release(True)
+        self.assertEqual(health.state, CLOSED)
+        self.assertFalse(health.acquire())
+
+    def test_003_failed_probe_backoff(self):
+        """ Test that a failed probe opens the circuit again, for twice as long.
+        """
+        health = DeviceHealth(failure_threshold=1, reset_timeout=0.1, max_reset_timeout=0.15)
+        health.record_failure()
+
+        time.sleep(0.15)
+        self.assertTrue(health.acquire())
+        health.record_failure()
+        health.release(True)
+        self.assertEqual(health.state, OPEN)
+
+        # the reset timeout doubled, but is capped by the max reset timeout
+        time.sleep(0.1)
+        self.assertRaises(DeviceUnavailable, health.acquire)
+        time.sleep(0.1)
+        self.assertTrue(health.acquire())
+
+    def test_004_probe_without_outcome(self):
+        """ Test that a probe which does not reach the device leaves the circuit
+        half-open, so the next command is let through as the probe.
+        """
+        health = DeviceHealth(failure_threshold=1, reset_timeout=0)
+        health.record_failure()
+
+        self.assertTrue(health.acquire())
+        health.release(True)
+        self.assertEqual(health.state, HALF_OPEN)
+        self.assertTrue(health.acquire())
+
+    def test_005_threshold_disabled(self):
+        """ Test that the circuit never opens with a failure threshold of 0.
+        """
+        health = DeviceHealth(failure_threshold=0)
+        for _ in range(20):
+            health.record_failure()
+        self.assertEqual(health.state, CLOSED)
+        self.assertFalse(health.acquire())
+
+    def test_006_adaptive_timeout(self):
+        """ Test that the adaptive timeout is derived from the latency percentiles once
+        there are enough samples, within the minimum and the configured timeout.
+        """
+        health = DeviceHealth(min_timeout=0.5, timeout_multiplier=4, min_samples=10)
+
+        for _ in range(9):
+            health.record_success(0.2)
+        self.assertEqual(health.get_timeout(5), 5)
+
+        health.record_success(0.2)
+        self.assertAlmostEqual(health.get_timeout(5), 0.8)
+        self.assertAlmostEqual(health.get_timeout(0.6), 0.6)
+
+        status = health.status()
+        self.assertEqual(status['latency']['samples'], 10)
+        self.assertAlmostEqual(status['latency']['p99'], 0.2)
+
+        # not below the minimum
+        for _ in range(100):
+            health.record_success(0.01)
+        self.assertAlmostEqual(health.get_timeout(5), 0.5)
+
+        # the configured timeout is used while the device is failing
+        health.record_failure()
+        self.assertEqual(health.get_timeout(5), 5)
+
+    def test_007_adaptive_timeout_disabled(self):
+        """ Test that the configured timeout is used when adaptive timeouts are disabled.
+        """
+        health = DeviceHealth(adaptive_timeout=False, min_samples=1)
+        health.record_success(0.01)
+        self.assertEqual(health.get_timeout(5), 5)
+
+    def test_008_handle_fails_fast(self):
+        """ Test that commands to a device whose circuit is open fail without calling
+        the command handler, except for scans, and that a successful probe lets
+        commands through again.
+        """
+        device = MockLANDevice(DeviceHealth(failure_threshold=2, reset_timeout=0.1))
+        read = Command(CommandId.READ, {'device_id': 1}, 1)
+
+        device.up = False
+        self.assertRaises(ValueError, device.handle, read)
+        self.assertRaises(ValueError, device.handle, read)
+        self.assertEqual(device.calls, 2)
+
+        self.assertRaises(DeviceUnavailable, device.handle, read)
+        self.assertEqual(device.calls, 2)
+        self.assertEqual(device.handle(Command(CommandId.SCAN, {}, 2)), {'boards': []})
+
+        time.sleep(0.15)
+        device.up = True
+        self.assertEqual(device.handle(read), {'reading': 1})
+        self.assertEqual(device.health.state, CLOSED)
+        self.assertEqual(device.handle(read), {'reading': 1})
+        self.assertEqual(device.calls, 4)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Device Router Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import threading
+import unittest
+import uuid
+
+from opendcre_southbound.utils import DeviceRouter
+
+
+class MockDevice(object):
+    """ Object used to mock a devicebus interface.
+    """
+    def __init__(self, board_id_range=None):
+        self.device_uuid = uuid.uuid4()
+        self.board_id_range = board_id_range
+
+
+class OtherMockDevice(MockDevice):
+    """ Object used to mock a devicebus interface of a different type.
+    """
+    pass
+
+
+class DeviceRouterTestCase(unittest.TestCase):
+    """ Test looking up devicebus interfaces with the DeviceRouter.
+    """
+    def test_001_single_board_device(self):
+        """ Test looking up single-board devices by board id, hostname and IP address.
+        """
+        router = DeviceRouter()
+        device = MockDevice()
+        router.add_single_board_device(0x40000001, device)
+        router.add_single_board_device('test-00', device)
+        router.add_single_board_device('192.168.0.100', device)
+
+        self.assertIs(router.get_device(0x40000001), device)
+        self.assertIs(router.get_device('test-00'), device)
+        self.assertIs(router.get_device('192.168.0.100'), device)
+        self.assertIsNone(router.get_device(0x40000002))
+        self.assertIsNone(router.get_device('test-01'))
+
+    def test_002_range_device(self):
+        """ Test looking up range devices by board id.
+        """
+        router = DeviceRouter()
+        first = MockDevice((0x00000000, 0x000000ff))
+        second = MockDevice((0x00000200, 0x000002ff))
+        router.add_range_device(second)
+        router.add_range_device(first)
+
+        self.assertIs(router.get_device(0x00000000), first)
+        self.assertIs(router.get_device(0x000000ff), first)
+        self.assertIs(router.get_device(0x00000200), second)
+        self.assertIs(router.get_device(0x000002ff), second)
+        self.assertIsNone(router.get_device(0x00000100))
+        self.assertIsNone(router.get_device(0x00000300))
+        self.assertIsNone(router.get_device(-1))
+        self.assertIsNone(router.get_device('00000000'))
+
+    def test_003_overlapping_ranges(self):
+        """ Test that board ids in overlapping ranges are routed to the device which
+        was added first.
+        """
+        router = DeviceRouter()
+        first = MockDevice((0x00000100, 0x000001ff))
+        second = MockDevice((0x00000000, 0x00000fff))
+        third = MockDevice((0x00000150, 0x00000150))
+        router.add_range_device(first)
+        router.add_range_device(second)
+        router.add_range_device(third)
+
+        self.assertIs(router.get_device(0x00000000), second)
+        self.assertIs(router.get_device(0x00000100), first)
+        self.assertIs(router.get_device(0x00000150), first)
+        self.assertIs(router.get_device(0x000001ff), first)
+        self.assertIs(router.get_device(0x00000200), second)
+        self.assertIs(router.get_device(0x00000fff), second)
+
+    def test_004_single_board_before_range(self):
+        """ Test that single-board devices take precedence over range devices.
+        """
+        router = DeviceRouter()
+        range_device = MockDevice((0x00000000, 0x0000ffff))
+        single = MockDevice()
+        router.add_range_device(range_device)
+        router.add_single_board_device(0x00000010, single)
+
+        self.assertIs(router.get_device(0x00000010), single)
+        self.assertIs(router.get_device(0x00000011), range_device)
+
+    def test_005_interfaces(self):
+        """ Test getting the devices of the same type as a given device, and that
+        these are updated when devices are added.
+        """
+        router = DeviceRouter()
+        first = MockDevice()
+        second = MockDevice()
+        other = OtherMockDevice()
+        router.add_single_board_device(1, first)
+        router.add_single_board_device(2, other)
+
+        self.assertEqual(router.get_interfaces(other), {other.device_uuid: other})
+        self.assertEqual(router.get_interface_ids(other), [str(other.device_uuid)])
+
+        router.add_single_board_device(3, second)
+        self.assertEqual(router.get_interfaces(second), {
+            first.device_uuid: first,
+            second.device_uuid: second,
+            other.device_uuid: other
+        })
+        self.assertEqual(
+            sorted(router.get_interface_ids(second)),
+            sorted(str(x.device_uuid) for x in (first, second, other))
+        )
+
+    def test_006_from_app_config(self):
+        """ Test building a router from the devices registered with the app.
+        """
+        single = MockDevice()
+        range_device = MockDevice((0x00000000, 0x000000ff))
+        router = DeviceRouter.from_app_config({
+            'DEVICES': {single.device_uuid: single, range_device.device_uuid: range_device},
+            'SINGLE_BOARD_DEVICES': {0x40000000: single, 'test-00': single},
+            'RANGE_DEVICES': [range_device]
+        })
+
+        self.assertIs(router.get_device(0x40000000), single)
+        self.assertIs(router.get_device('test-00'), single)
+        self.assertIs(router.get_device(0x00000010), range_device)
+        self.assertEqual(len(router.get_interfaces(single)), 2)
+
+    def test_007_concurrent_add_and_lookup(self):
+        """ Test looking up the devices of a type while devices are being added, as
+        happens when devices are registered in the background.
+        """
+        router = DeviceRouter()
+        devices = [MockDevice() for _ in range(5000)]
+        errors = []
+
+        def add():
+            for board_id, device in enumerate(devices):
+                router.add_single_board_device(board_id, device)
+
+        adder = threading.Thread(target=add)
+        adder.start()
+        while adder.is_alive():
+            try:
+                router.get_interface_ids(devices[0])
+            except Exception as e:
+                errors.append(e)
+        adder.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(router.get_interfaces(devices[0])), len(devices))
+        self.assertEqual(
+            sorted(router.get_interface_ids(devices[0])),
+            sorted(str(x.device_uuid) for x in devices)
+        )
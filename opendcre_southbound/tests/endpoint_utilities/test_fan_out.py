@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Concurrent Fan-Out Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import threading
+import time
+import unittest
+
+from opendcre_southbound.errors import OpenDCREException
+from opendcre_southbound.utils import fan_out
+
+
+class FanOutTestCase(unittest.TestCase):
+    """ Test applying a function to a collection of items concurrently with fan_out.
+    """
+    def test_001_results(self):
+        """ Test that a result is yielded for each item.
+        """
+        results = list(fan_out(lambda x: x * 2, range(10), max_workers=4))
+        self.assertEqual(sorted((item, result) for item, result, _ in results), [(i, i * 2) for i in range(10)])
+        self.assertTrue(all(exc_info is None for _, _, exc_info in results))
+
+    def test_002_concurrent(self):
+        """ Test that items are processed concurrently, up to the worker limit.
+        """
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def fn(x):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+
+        start = time.time()
+        self.assertEqual(len(list(fan_out(fn, range(8), max_workers=4))), 8)
+        self.assertLess(time.time() - start, 0.7)
+        self.assertEqual(active[1], 4)
+
+    def test_003_completion_order(self):
+        """ Test that results are yielded as the items complete.
+        """
+        results = fan_out(lambda x: time.sleep(x), [0.3, 0.0], max_workers=2)
+        self.assertEqual([item for item, _, _ in results], [0.0, 0.3])
+
+    def test_004_failure(self):
+        """ Test that a failed item is reported, without failing the other items.
+        """
+        def fn(x):
+            if x == 1:
+                raise ValueError('bad item')
+            return x
+
+        results = {item: (result, exc_info) for item, result, exc_info in fan_out(fn, range(3), max_workers=2)}
+        self.assertEqual(results[0], (0, None))
+        self.assertEqual(results[2], (2, None))
+        self.assertIsNone(results[1][0])
+        self.assertIsInstance(results[1][1][1], ValueError)
+
+    def test_005_timeout(self):
+        """ Test that an item which does not complete in time is reported as failed,
+        and that the remaining items are still processed.
+        """
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def fn(x):
+            if x == 0:
+                release.wait(5)
+            return x
+
+        start = time.time()
+        results = list(fan_out(fn, range(4), max_workers=1, timeout=0.2))
+        self.assertLess(time.time() - start, 2)
+
+        results = {item: (result, exc_info) for item, result, exc_info in results}
+        self.assertEqual(len(results), 4)
+        self.assertIsInstance(results[0][1][1], OpenDCREException)
+        for i in range(1, 4):
+            self.assertEqual(results[i], (i, None))
+
+    def test_006_no_items(self):
+        """ Test fanning out over no items.
+        """
+        self.assertEqual(list(fan_out(lambda x: x, [], max_workers=4)), [])
+
+    def test_007_abandoned_worker(self):
+        """ Test that the worker for an item which timed out takes on no further
+        items once it finishes, so that no more than max_workers threads work
+        through the remaining items.
+        """
+        release = threading.Event()
+        self.addCleanup(release.set)
+        lock = threading.Lock()
+        threads = {}
+        active = [0, 0]
+
+        def fn(x):
+            with lock:
+                threads[x] = threading.current_thread()
+                active[0] += 1
+                active[1] = max(active)
+            try:
+                if x == 0:
+                    release.wait(5)
+                else:
+                    time.sleep(0.05)
+            finally:
+                with lock:
+                    active[0] -= 1
+            return x
+
+        for item, result, exc_info in fan_out(fn, range(8), max_workers=1, timeout=0.2):
+            if item == 0:
+                self.assertIsInstance(exc_info[1], OpenDCREException)
+                # let the abandoned worker finish while items remain
+                release.set()
+            else:
+                self.assertEqual(result, item)
+
+        self.assertEqual(len(threads), 8)
+        self.assertNotIn(threads[0], [threads[i] for i in range(1, 8)])
+        self.assertLessEqual(active[1], 2)
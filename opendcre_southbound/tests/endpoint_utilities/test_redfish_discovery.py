@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Redfish Discovery Cache Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from opendcre_southbound.devicebus.devices.redfish.redfish_discovery import RedfishDiscoveryCache
+from opendcre_southbound.utils import ThreadPool
+
+LINKS = {
+    'bmc': 'http://10.0.0.1:5040/redfish/v1/Managers/BMC',
+    'thermal': 'http://10.0.0.1:5040/redfish/v1/Chassis/1U/Thermal',
+    'power': 'http://10.0.0.1:5040/redfish/v1/Chassis/1U/Power'
+}
+SENSORS = [{'device_id': '0000', 'device_type': 'temperature', 'device_info': 'CPU1 Temp'}]
+
+
+class RedfishDiscoveryTestCase(unittest.TestCase):
+    """ Test the file-backed RedfishDiscoveryCache, and the serial ThreadPool used
+    for Redfish registration when threads may not be used.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'opendcre', 'redfish_discovery.json')
+        self.key = RedfishDiscoveryCache.get_key('10.0.0.1', 5040)
+
+    def test_001_no_cache_file(self):
+        """ Test getting from the cache when no cache file exists.
+        """
+        cache = RedfishDiscoveryCache(self.path)
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual(len(cache), 0)
+
+    def test_002_persisted(self):
+        """ Test that cached discoveries are persisted on save, and loaded by a new cache.
+        """
+        cache = RedfishDiscoveryCache(self.path)
+        cache.set(self.key, '"root"', LINKS, SENSORS, ['"thermal"', '"power"'])
+        self.assertFalse(os.path.exists(self.path))
+
+        cache.save()
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['redfish_discovery.json'])
+
+        entry = RedfishDiscoveryCache(self.path).get('10.0.0.1:5040')
+        self.assertEqual(entry, {
+            'root_etag': '"root"',
+            'links': LINKS,
+            'sensors': SENSORS,
+            'sensor_etags': ['"thermal"', '"power"']
+        })
+
+        # entries are copies, so modifying one does not modify the cache
+        entry['links']['bmc'] = None
+        self.assertEqual(cache.get(self.key)['links'], LINKS)
+
+    def test_003_unchanged_not_saved(self):
+        """ Test that the cache file is only written when the cache has changed.
+        """
+        cache = RedfishDiscoveryCache(self.path)
+        cache.set(self.key, '"root"', LINKS)
+        cache.save()
+
+        os.remove(self.path)
+        cache.set(self.key, '"root"', LINKS)
+        cache.save()
+        self.assertFalse(os.path.exists(self.path))
+
+        cache.set(self.key, '"root-2"', LINKS)
+        cache.save()
+        with open(self.path, 'r') as f:
+            self.assertEqual(json.load(f)[self.key]['root_etag'], '"root-2"')
+
+    def test_004_untagged_root(self):
+        """ Test that nothing is cached for a server which does not tag its root resource.
+        """
+        cache = RedfishDiscoveryCache(self.path)
+        cache.set(self.key, '"root"', LINKS)
+        cache.set(self.key, None, LINKS)
+        self.assertIsNone(cache.get(self.key))
+
+    def test_005_invalid_cache_file(self):
+        """ Test that an invalid cache file is ignored.
+        """
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{"10.0.0.1:5040": ')
+
+        cache = RedfishDiscoveryCache(self.path)
+        self.assertIsNone(cache.get(self.key))
+
+    def test_006_serial_thread_pool(self):
+        """ Test that a thread pool with no threads runs tasks as they are added,
+        and that a failed task does not stop the remaining tasks.
+        """
+        results = []
+
+        def task(value):
+            if value is None:
+                raise ValueError('failed')
+            results.append(value)
+
+        pool = ThreadPool(0)
+        pool.add_task(task, 1)
+        self.assertEqual(results, [1])
+        pool.add_task(task, None)
+        pool.add_task(task, 2)
+        pool.wait_for_task_completion()
+        self.assertEqual(results, [1, 2])
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Background Registration Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import uuid
+from itertools import count
+
+from flask import Flask
+
+from opendcre_southbound.blueprints import core
+from opendcre_southbound.blueprints.main_blueprint import PREFIX
+from opendcre_southbound.devicebus.command_factory import CommandFactory
+from opendcre_southbound.devicebus.devices.lan_device import LANDevice
+from opendcre_southbound.registration import REGISTERED, RETRYING, RegistrationJob
+from opendcre_southbound.utils import DeviceRouter, ScanCache
+
+
+class MockResponse(object):
+    """ Object used to mock the response to a command.
+    """
+    def __init__(self, data):
+        self.data = data
+
+
+class MockLANDevice(LANDevice):
+    """ LAN device which is registered by a registration job.
+    """
+    _instance_name = 'mock'
+
+    def __init__(self, board_id, hostname):
+        super(MockLANDevice, self).__init__()
+        self.device_uuid = uuid.uuid4()
+        self.board_id = board_id
+        self.hostnames = [hostname]
+        self.ip_addresses = []
+
+    def handle(self, command):
+        # the only command the mock device handles is a scan
+        return MockResponse({'racks': [{
+            'rack_id': 'rack_1',
+            'boards': [{
+                'board_id': '{0:08x}'.format(self.board_id),
+                'devices': [{'device_id': '0001', 'device_type': 'temperature'}]
+            }]
+        }]})
+
+
+class Factory(object):
+    """ Device factory which fails a given number of times before initializing
+    the device.
+    """
+    def __init__(self, board_id, hostname, failures=0):
+        self.board_id = board_id
+        self.hostname = hostname
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ValueError('Unable to connect to {}.'.format(self.hostname))
+        return MockLANDevice(self.board_id, self.hostname)
+
+
+class RegistrationTestCase(unittest.TestCase):
+    """ Test registering devices in the background with the RegistrationJob.
+    """
+    def setUp(self):
+        self.app_config = {
+            'DEVICES': {},
+            'SINGLE_BOARD_DEVICES': {},
+            'DEVICE_ROUTER': DeviceRouter(),
+            'RESPONSE_CACHE': None
+        }
+
+    def test_001_publish(self):
+        """ Test that registered devices are published to the device cache and the
+        routing table.
+        """
+        job = RegistrationJob(self.app_config, max_workers=2)
+        job.add('mock', 'mock:1', Factory(0x50000000, 'host-1'))
+        job.add('mock', 'mock:2', Factory(0x50000001, 'host-2'))
+        job.start()
+        self.assertTrue(job.complete.wait(5))
+
+        self.assertEqual(len(self.app_config['DEVICES']), 2)
+        for board_id, hostname in [(0x50000000, 'host-1'), (0x50000001, 'host-2')]:
+            device = self.app_config['SINGLE_BOARD_DEVICES'][board_id]
+            self.assertIs(self.app_config['SINGLE_BOARD_DEVICES'][hostname], device)
+            self.assertIs(self.app_config['DEVICE_ROUTER'].get_device(board_id), device)
+
+        status = job.status()
+        self.assertEqual(status['status'], 'complete')
+        self.assertEqual(status['total'], 2)
+        self.assertEqual(status['counts'][REGISTERED], 2)
+        self.assertEqual([d['board_id'] for d in status['devices']], ['50000000', '50000001'])
+        self.assertEqual([d['attempts'] for d in status['devices']], [1, 1])
+
+    def test_002_retry(self):
+        """ Test that a device which fails to initialize is retried until it is
+        registered, without holding up the other devices.
+        """
+        failing = Factory(0x50000000, 'host-1', failures=2)
+        job = RegistrationJob(self.app_config, max_workers=1, backoff=0.05, max_backoff=0.1)
+        job.add('mock', 'mock:1', failing)
+        job.add('mock', 'mock:2', Factory(0x50000001, 'host-2'))
+        job.start()
+
+        self.assertTrue(job.attempted.wait(5))
+        self.assertIn(0x50000001, self.app_config['SINGLE_BOARD_DEVICES'])
+
+        self.assertTrue(job.complete.wait(5))
+        self.assertEqual(failing.calls, 3)
+        self.assertIn(0x50000000, self.app_config['SINGLE_BOARD_DEVICES'])
+
+        status = job.status()
+        self.assertEqual(status['counts'][REGISTERED], 2)
+        self.assertEqual(status['devices'][0]['attempts'], 3)
+        self.assertNotIn('error', status['devices'][0])
+
+    def test_003_retrying_status(self):
+        """ Test the status of a device which is waiting to be retried.
+        """
+        job = RegistrationJob(self.app_config, backoff=60)
+        job.add('mock', 'mock:1', Factory(0x50000000, 'host-1', failures=1))
+        job.start()
+        self.assertTrue(job.attempted.wait(5))
+
+        status = job.status()
+        self.assertEqual(status['status'], 'running')
+        self.assertEqual(status['counts'][RETRYING], 1)
+        self.assertEqual(status['devices'][0]['status'], RETRYING)
+        self.assertEqual(status['devices'][0]['error'], 'Unable to connect to host-1.')
+        self.assertTrue(0 < status['devices'][0]['retry_in'] <= 60)
+        self.assertFalse(job.complete.is_set())
+        self.assertEqual(self.app_config['DEVICES'], {})
+
+        job.stop(5)
+
+    def test_004_duplicate_hostname(self):
+        """ Test that a hostname already routed to a device is not re-routed to a
+        device registered later.
+        """
+        job = RegistrationJob(self.app_config)
+        job.add('mock', 'mock:1', Factory(0x50000000, 'host-1'))
+        job.add('mock', 'mock:2', Factory(0x50000001, 'host-1'))
+        job.start()
+        self.assertTrue(job.complete.wait(5))
+
+        self.assertEqual(self.app_config['SINGLE_BOARD_DEVICES']['host-1'].board_id, 0x50000000)
+        self.assertEqual(self.app_config['SINGLE_BOARD_DEVICES'][0x50000001].board_id, 0x50000001)
+
+    def test_005_empty(self):
+        """ Test that a job with no devices to register is complete once started.
+        """
+        job = RegistrationJob(self.app_config)
+        job.start()
+        self.assertTrue(job.attempted.is_set())
+        self.assertTrue(job.complete.is_set())
+        self.assertEqual(job.status()['status'], 'complete')
+
+    def test_006_scan_after_publish(self):
+        """ Test that a device published after the scan results have been cached is
+        included in the next scan.
+        """
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'cache.json')
+
+        app = Flask(__name__)
+        app.config.update(self.app_config)
+        app.config['SCAN_CACHE'] = path
+        app.config['SCAN_CACHE_STORE'] = ScanCache(path, check_interval=0)
+        app.config['CMD_FACTORY'] = CommandFactory(count())
+        app.register_blueprint(core)
+        client = app.test_client()
+
+        def scanned_boards():
+            response = client.get(PREFIX + '/scan')
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            return sorted(board['board_id'] for rack in data['racks'] for board in rack['boards'])
+
+        job = RegistrationJob(app.config, backoff=60)
+        job.add('mock', 'mock:1', Factory(0x50000000, 'host-1'))
+        job.add('mock', 'mock:2', Factory(0x50000001, 'host-2', failures=1))
+        job.start()
+        self.assertTrue(job.attempted.wait(5))
+        self.assertEqual(scanned_boards(), ['50000000'])
+
+        # the scan results are cached, and are only refreshed once they are stale
+        self.assertEqual(scanned_boards(), ['50000000'])
+        self.assertFalse(app.config['SCAN_CACHE_STORE'].stale)
+
+        job.stop(5)
+        job = RegistrationJob(app.config)
+        job.add('mock', 'mock:2', Factory(0x50000001, 'host-2'))
+        job.start()
+        self.assertTrue(job.complete.wait(5))
+        self.assertTrue(app.config['SCAN_CACHE_STORE'].stale)
+        self.assertEqual(scanned_boards(), ['50000000', '50000001'])
+        self.assertFalse(app.config['SCAN_CACHE_STORE'].stale)
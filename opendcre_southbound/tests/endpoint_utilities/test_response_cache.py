@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Response Cache Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import time
+import unittest
+
+from opendcre_southbound.devicebus.command import Command
+from opendcre_southbound.devicebus.constants import CommandId
+from opendcre_southbound.devicebus.devices.base import DevicebusInterface
+from opendcre_southbound.devicebus.response_cache import ResponseCache
+
+
+class MockDevicebus(DevicebusInterface):
+    """ Devicebus interface which counts the calls made to its command handlers.
+    """
+    _instance_name = 'mock'
+
+    def __init__(self):
+        super(MockDevicebus, self).__init__()
+        self.calls = 0
+        self._command_map = dict.fromkeys(
+            [CommandId.ASSET, CommandId.POWER, CommandId.READ, CommandId.FAN], self._handle
+        )
+
+    def _handle(self, command):
+        self.calls += 1
+        return command.make_response({'call': self.calls})
+
+
+def _command(cmd_id, **data):
+    data.setdefault('board_id', 1)
+    return Command(cmd_id, data, 1)
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    """ Test caching devicebus command responses with the ResponseCache.
+    """
+    def test_001_ttls(self):
+        """ Test the default and overridden time-to-live for each command.
+        """
+        cache = ResponseCache(timeout=100, threshold=10, ttls={'power': 5, 'host_info': 30, 'asset': 0})
+        self.assertEqual(cache.get_ttl(CommandId.VERSION), 100)
+        self.assertEqual(cache.get_ttl(CommandId.ASSET), 0)
+        self.assertEqual(cache.get_ttl(CommandId.HOST_INFO), 30)
+        self.assertEqual(cache.get_ttl(CommandId.POWER), 5)
+        self.assertEqual(cache.get_ttl(CommandId.LED), 0)
+        self.assertEqual(cache.get_ttl(CommandId.READ), 0)
+
+    def test_002_expiry(self):
+        """ Test that an expired response is not returned.
+        """
+        cache = ResponseCache()
+        cache.set('a', 1, 'response', 0.1, cache.generation('a'))
+        self.assertEqual(cache.get('a', 1), 'response')
+        time.sleep(0.15)
+        self.assertIsNone(cache.get('a', 1))
+        self.assertEqual(len(cache), 0)
+
+    def test_003_lru_eviction(self):
+        """ Test that the least recently used responses are evicted once the
+        threshold is reached.
+        """
+        cache = ResponseCache(threshold=2)
+        cache.set('a', 1, 'one', 60, 0)
+        cache.set('a', 2, 'two', 60, 0)
+        self.assertEqual(cache.get('a', 1), 'one')
+
+        cache.set('b', 3, 'three', 60, 0)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a', 1), 'one')
+        self.assertIsNone(cache.get('a', 2))
+        self.assertEqual(cache.get('b', 3), 'three')
+
+    def test_004_invalidate(self):
+        """ Test that invalidating a scope drops its responses only, and that a
+        response fetched before the invalidation is not cached.
+        """
+        cache = ResponseCache()
+        cache.set('a', 1, 'one', 60, 0)
+        cache.set('b', 1, 'one', 60, 0)
+
+        generation = cache.generation('a')
+        cache.invalidate('a')
+        self.assertIsNone(cache.get('a', 1))
+        self.assertEqual(cache.get('b', 1), 'one')
+
+        cache.set('a', 1, 'stale', 60, generation)
+        self.assertIsNone(cache.get('a', 1))
+
+        cache.set('a', 1, 'fresh', 60, cache.generation('a'))
+        self.assertEqual(cache.get('a', 1), 'fresh')
+
+    def test_005_handle_cached(self):
+        """ Test that a devicebus interface answers cacheable commands from the
+        cache, and that a state-changing command invalidates the cache.
+        """
+        device = MockDevicebus()
+        device.response_cache = ResponseCache(threshold=10, ttls={'power': 5})
+
+        self.assertEqual(device.handle(_command(CommandId.ASSET)).data, {'call': 1})
+        self.assertEqual(device.handle(_command(CommandId.ASSET)).data, {'call': 1})
+        self.assertEqual(device.handle(_command(CommandId.POWER, power_action='status')).data, {'call': 2})
+        self.assertEqual(device.handle(_command(CommandId.POWER, power_action='status')).data, {'call': 2})
+        self.assertEqual(device.handle(_command(CommandId.ASSET, board_id=2)).data, {'call': 3})
+
+        # sensor reads are not cached
+        self.assertEqual(device.handle(_command(CommandId.READ, device_id=1)).data, {'call': 4})
+        self.assertEqual(device.handle(_command(CommandId.READ, device_id=1)).data, {'call': 5})
+
+        self.assertEqual(device.handle(_command(CommandId.POWER, power_action='on')).data, {'call': 6})
+        self.assertEqual(device.handle(_command(CommandId.POWER, power_action='status')).data, {'call': 7})
+        self.assertEqual(device.handle(_command(CommandId.ASSET)).data, {'call': 8})
+
+        device.handle(_command(CommandId.FAN, fan_speed=1000))
+        self.assertEqual(device.handle(_command(CommandId.ASSET)).data, {'call': 10})
+
+    def test_006_handle_uncached(self):
+        """ Test that a devicebus interface without a response cache does not cache.
+        """
+        device = MockDevicebus()
+        self.assertEqual(device.handle(_command(CommandId.ASSET)).data, {'call': 1})
+        self.assertEqual(device.handle(_command(CommandId.ASSET)).data, {'call': 2})
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Scan Cache Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+from opendcre_southbound.utils import ScanCache, write_json_atomic
+
+
+class ScanCacheTestCase(unittest.TestCase):
+    """ Test the in-memory, file-backed ScanCache.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'opendcre', 'cache.json')
+
+    def test_001_no_cache_file(self):
+        """ Test getting the cache when no cache file exists.
+        """
+        cache = ScanCache(self.path)
+        self.assertEqual(cache.get(), {})
+
+    def test_002_set(self):
+        """ Test that setting the cache persists it to the cache file and serves it
+        from memory.
+        """
+        cache = ScanCache(self.path)
+        data = {'racks': [{'rack_id': 'rack_1', 'boards': []}]}
+        cache.set(data)
+
+        self.assertIs(cache.get(), data)
+        with open(self.path, 'r') as f:
+            self.assertEqual(json.load(f), data)
+
+        # no temporary files should be left behind
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['cache.json'])
+
+    def test_003_version(self):
+        """ Test that the cache version is bumped each time the cache is set, and that
+        previously fetched snapshots are left unchanged.
+        """
+        cache = ScanCache(self.path)
+        cache.set({'racks': []})
+        first = cache.get()
+        version = cache.version
+
+        cache.set({'racks': [{'rack_id': 'rack_1', 'boards': []}]})
+        self.assertEqual(cache.version, version + 1)
+        self.assertEqual(first, {'racks': []})
+        self.assertEqual(len(cache.get()['racks']), 1)
+
+    def test_004_reload_on_file_change(self):
+        """ Test that the cache is reloaded when the cache file is replaced by another
+        writer, and not reloaded when it is unchanged.
+        """
+        cache = ScanCache(self.path, check_interval=0)
+        cache.set({'racks': []})
+        version = cache.version
+
+        cache.get()
+        self.assertEqual(cache.version, version)
+
+        ScanCache(self.path).set({'racks': [{'rack_id': 'rack_2', 'boards': []}]})
+        self.assertEqual(cache.get()['racks'][0]['rack_id'], 'rack_2')
+        self.assertEqual(cache.version, version + 1)
+
+    def test_005_file_removed(self):
+        """ Test that the cache is emptied when the cache file is removed.
+        """
+        cache = ScanCache(self.path, check_interval=0)
+        cache.set({'racks': []})
+        os.remove(self.path)
+        self.assertEqual(cache.get(), {})
+
+    def test_006_check_interval(self):
+        """ Test that the cache file is not checked for changes more often than the
+        check interval.
+        """
+        cache = ScanCache(self.path, check_interval=60)
+        cache.set({'racks': []})
+
+        ScanCache(self.path).set({'racks': [{'rack_id': 'rack_2', 'boards': []}]})
+        self.assertEqual(cache.get(), {'racks': []})
+
+    def test_007_payload(self):
+        """ Test that the rendered payload is only regenerated when the cache changes.
+        """
+        cache = ScanCache(self.path)
+        self.assertIsNone(cache.get_payload())
+
+        cache.set({'racks': []})
+        payload = cache.get_payload()
+        self.assertEqual(json.loads(payload.body), {'racks': []})
+        self.assertIs(cache.get_payload(), payload)
+
+        cache.set({'racks': [{'rack_id': 'rack_1', 'boards': []}]})
+        new_payload = cache.get_payload()
+        self.assertIsNot(new_payload, payload)
+        self.assertNotEqual(new_payload.etag, payload.etag)
+
+    def test_008_payload_render(self):
+        """ Test rendering the payload with a render function, and compressing it.
+        """
+        cache = ScanCache(self.path)
+        cache.set({'racks': [], 'internal': True})
+
+        payload = cache.get_payload(render=lambda data: {'racks': data['racks']})
+        self.assertEqual(json.loads(payload.body), {'racks': []})
+
+        with gzip.GzipFile(fileobj=StringIO(payload.gzip_body)) as f:
+            self.assertEqual(f.read(), payload.body)
+        self.assertNotEqual(payload.gzip_etag, payload.etag)
+
+    def test_009_invalidate(self):
+        """ Test that an invalidated cache is stale until it is set with the results
+        of a scan started after it was invalidated.
+        """
+        cache = ScanCache(self.path)
+        self.assertFalse(cache.stale)
+
+        cache.set({'racks': []})
+        self.assertFalse(cache.stale)
+
+        # a scan started before the cache was invalidated does not make it fresh
+        generation = cache.generation
+        cache.invalidate()
+        self.assertTrue(cache.stale)
+        cache.set({'racks': []}, generation=generation)
+        self.assertTrue(cache.stale)
+        self.assertEqual(cache.get(), {'racks': []})
+
+        cache.set({'racks': [{'rack_id': 'rack_1', 'boards': []}]}, generation=cache.generation)
+        self.assertFalse(cache.stale)
+
+    def test_010_write_json_atomic_failure(self):
+        """ Test that a failed atomic write leaves the existing file in place, and no
+        temporary file behind.
+        """
+        write_json_atomic(self.path, {'racks': []}, prefix='.test-')
+        with self.assertRaises(TypeError):
+            write_json_atomic(self.path, {'racks': object()}, prefix='.test-')
+
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['cache.json'])
+        with open(self.path, 'r') as f:
+            self.assertEqual(json.load(f), {'racks': []})
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Scan Results Merge Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import unittest
+
+from opendcre_southbound.utils import diff_scan_results, ScanResults
+
+
+def board(board_id, *device_ids, **kwargs):
+    """ Build a board record for the tests.
+    """
+    record = {
+        'board_id': board_id,
+        'devices': [{'device_id': x, 'device_type': 'temperature'} for x in device_ids]
+    }
+    record.update(kwargs)
+    return record
+
+
+class ScanResultsTestCase(unittest.TestCase):
+    """ Test merging scan results with ScanResults.
+    """
+    def test_001_merge_racks(self):
+        """ Test merging results for different racks, and for the same rack.
+        """
+        results = ScanResults()
+        results.merge({'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0001')]}]})
+        results.merge({'racks': [{'rack_id': 'rack_2', 'boards': [board('40000000', '0001')]}]})
+        results.merge({'racks': [{'rack_id': 'rack_1', 'boards': [board('00000002', '0001')]}]})
+
+        merged = results.to_dict()
+        self.assertEqual([r['rack_id'] for r in merged['racks']], ['rack_1', 'rack_2'])
+        self.assertEqual([b['board_id'] for b in merged['racks'][0]['boards']], ['00000001', '00000002'])
+        self.assertEqual([b['board_id'] for b in merged['racks'][1]['boards']], ['40000000'])
+
+    def test_002_dedupe_boards(self):
+        """ Test that a board present in several results appears once, with its
+        devices and list fields de-duplicated.
+        """
+        results = ScanResults()
+        results.merge({'racks': [{'rack_id': 'rack_1', 'boards': [
+            board('00000001', '0001', '0002', hostnames=['host-1'])
+        ]}]})
+        results.merge({'racks': [{'rack_id': 'rack_1', 'boards': [
+            board('00000001', '0002', '0003', hostnames=['host-1', 'host-2'])
+        ]}]})
+
+        boards = results.to_dict()['racks'][0]['boards']
+        self.assertEqual(len(boards), 1)
+        self.assertEqual([d['device_id'] for d in boards[0]['devices']], ['0001', '0002', '0003'])
+        self.assertEqual(boards[0]['hostnames'], ['host-1', 'host-2'])
+
+    def test_003_rack_fields(self):
+        """ Test that rack-level list fields are merged without duplicates.
+        """
+        results = ScanResults()
+        results.merge({'racks': [{'rack_id': 'rack_1', 'hostnames': ['a'], 'boards': []}]})
+        results.merge({'racks': [{'rack_id': 'rack_1', 'hostnames': ['a', 'b'], 'boards': []}]})
+
+        rack = results.to_dict()['racks'][0]
+        self.assertEqual(rack['hostnames'], ['a', 'b'])
+        self.assertEqual(rack['boards'], [])
+
+    def test_004_inputs_not_modified(self):
+        """ Test that merging does not modify the given results.
+        """
+        first = {'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0001')]}]}
+        second = {'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0002')]}]}
+
+        results = ScanResults(first)
+        results.merge(second)
+
+        self.assertEqual(len(first['racks'][0]['boards'][0]['devices']), 1)
+        self.assertEqual(len(second['racks'][0]['boards'][0]['devices']), 1)
+        self.assertEqual(len(results.to_dict()['racks'][0]['boards'][0]['devices']), 2)
+
+    def test_005_replace_source(self):
+        """ Test replacing the results for a source with new results.
+        """
+        results = ScanResults()
+        results.merge({'racks': [{'rack_id': 'rack_1', 'boards': [board('40000000', '0001')]}]}, source='bmc-1')
+        results.merge({'racks': [{'rack_id': 'rack_1', 'boards': [board('40000001', '0001')]}]}, source='bmc-2')
+        results.merge({'racks': [{'rack_id': 'rack_2', 'boards': [board('40000002', '0001')]}]}, source='bmc-3')
+
+        # bmc-1 now reports a changed board, and bmc-3 reports no boards
+        results.replace('bmc-1', {'racks': [{'rack_id': 'rack_1', 'boards': [board('40000000', '0002')]}]})
+        results.replace('bmc-3', {'racks': []})
+
+        merged = results.to_dict()
+        self.assertEqual([r['rack_id'] for r in merged['racks']], ['rack_1'])
+        boards = {b['board_id']: b for b in merged['racks'][0]['boards']}
+        self.assertEqual(sorted(boards), ['40000000', '40000001'])
+        self.assertEqual([d['device_id'] for d in boards['40000000']['devices']], ['0002'])
+        self.assertEqual([d['device_id'] for d in boards['40000001']['devices']], ['0001'])
+
+    def test_006_replace_shared_board(self):
+        """ Test that replacing a source's results keeps boards which another source
+        also contributed to.
+        """
+        results = ScanResults()
+        results.merge({'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0001')]}]}, source='a')
+        results.merge({'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0002')]}]}, source='b')
+        results.replace('a', {'racks': []})
+
+        boards = results.to_dict()['racks'][0]['boards']
+        self.assertEqual([b['board_id'] for b in boards], ['00000001'])
+
+    def test_007_empty(self):
+        """ Test merging empty results.
+        """
+        results = ScanResults()
+        results.merge(None)
+        results.merge({})
+        results.merge({'racks': []})
+        self.assertEqual(results.to_dict(), {'racks': []})
+
+    def test_008_diff_unchanged(self):
+        """ Test diffing scan results which have not changed, ignoring cache annotations.
+        """
+        old = {'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0001', device_interface=['x'])]}]}
+        new = {'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0001')]}]}
+        self.assertEqual(diff_scan_results(old, new), {'added': [], 'removed': [], 'changed': []})
+
+    def test_009_diff_boards(self):
+        """ Test diffing scan results where boards were added and removed.
+        """
+        old = {'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0001'), board('00000002', '0001')]}]}
+        new = {'racks': [
+            {'rack_id': 'rack_1', 'boards': [board('00000001', '0001')]},
+            {'rack_id': 'rack_2', 'boards': [board('00000002', '0001')]}
+        ]}
+        self.assertEqual(diff_scan_results(old, new), {
+            'added': [{'rack_id': 'rack_2', 'board_id': '00000002'}],
+            'removed': [{'rack_id': 'rack_1', 'board_id': '00000002'}],
+            'changed': []
+        })
+
+    def test_010_diff_devices(self):
+        """ Test diffing scan results where the devices on a board changed.
+        """
+        old = {'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0001', '0002', '0003')]}]}
+        new = {'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0001', '0002', '0004')]}]}
+        new['racks'][0]['boards'][0]['devices'][1]['device_type'] = 'fan_speed'
+
+        self.assertEqual(diff_scan_results(old, new), {
+            'added': [],
+            'removed': [],
+            'changed': [{
+                'rack_id': 'rack_1',
+                'board_id': '00000001',
+                'devices': {'added': ['0004'], 'removed': ['0003'], 'changed': ['0002']}
+            }]
+        })
+
+    def test_011_diff_no_previous(self):
+        """ Test diffing scan results against no previous results.
+        """
+        new = {'racks': [{'rack_id': 'rack_1', 'boards': [board('00000001', '0001')]}]}
+        self.assertEqual(diff_scan_results({}, new), {
+            'added': [{'rack_id': 'rack_1', 'board_id': '00000001'}],
+            'removed': [],
+            'changed': []
+        })
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Sequence Allocator Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import threading
+import unittest
+from collections import Counter
+
+from opendcre_southbound.devicebus.command_factory import CommandFactory
+from opendcre_southbound.devicebus.sequence import SequenceAllocator
+from opendcre_southbound.errors import OpenDCREException
+
+
+class SequenceAllocatorTestCase(unittest.TestCase):
+    """ Test allocating command sequence numbers with the SequenceAllocator.
+    """
+    def test_001_wraparound(self):
+        """ Test that sequence numbers are consecutive, and wrap from 0xfe to 0x00.
+        """
+        allocator = SequenceAllocator(start=0x01)
+        values = [next(allocator) for _ in xrange(0x200)]
+
+        self.assertEqual(values[:3], [0x01, 0x02, 0x03])
+        self.assertEqual(values[0xfc:0x100], [0xfd, 0xfe, 0x00, 0x01])
+        self.assertLess(max(values), 0xff)
+
+    def test_002_in_flight_skipped(self):
+        """ Test that sequence numbers which are in flight are not allocated.
+        """
+        allocator = SequenceAllocator()
+        self.assertEqual(allocator.next(in_flight={0, 1, 3}), 2)
+        self.assertEqual(allocator.next(in_flight={0, 1, 3}), 4)
+        self.assertEqual(allocator.next(in_flight={}), 5)
+
+    def test_003_all_in_flight(self):
+        """ Test that allocating fails when every sequence number is in flight.
+        """
+        allocator = SequenceAllocator()
+        with self.assertRaises(OpenDCREException):
+            allocator.next(in_flight=set(xrange(0xff)))
+
+    def test_004_concurrent(self):
+        """ Test that concurrent allocations, from the allocator directly and from
+        a command factory sharing it, neither fail nor repeat values.
+        """
+        allocator = SequenceAllocator()
+        factory = CommandFactory(allocator)
+        values = []
+        errors = []
+
+        def allocate(fn):
+            try:
+                values.extend(fn() for _ in xrange(2000))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=allocate, args=(lambda: next(allocator),)) for _ in xrange(4)]
+        threads += [
+            threading.Thread(target=allocate, args=(lambda: factory.get_read_command({}).sequence,)) for _ in xrange(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Counter(values), Counter(i % 0xff for i in xrange(16000)))
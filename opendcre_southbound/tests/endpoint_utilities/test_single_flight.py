@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Single-Flight Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import threading
+import time
+import unittest
+
+from opendcre_southbound.devicebus.command import Command
+from opendcre_southbound.devicebus.constants import CommandId
+from opendcre_southbound.devicebus.devices.base import DevicebusInterface
+from opendcre_southbound.devicebus.single_flight import SingleFlight
+
+
+class MockDevicebus(DevicebusInterface):
+    """ Devicebus interface whose command handlers block until released, and
+    count the calls made to them.
+    """
+    _instance_name = 'mock'
+
+    def __init__(self):
+        super(MockDevicebus, self).__init__()
+        self.calls = []
+        self.release = threading.Event()
+        self._command_map = dict.fromkeys(
+            [CommandId.READ, CommandId.POWER, CommandId.LED, CommandId.FAN], self._handle
+        )
+
+    def _handle(self, command):
+        self.calls.append(command)
+        self.release.wait(5)
+        return command.make_response({'sequence': command.sequence})
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    """ Test coalescing concurrent calls with SingleFlight.
+    """
+    def run_concurrently(self, fns, settle=0.2):
+        """ Run each of the given functions in its own thread, returning their
+        results (or exceptions) in order.
+        """
+        results = [None] * len(fns)
+
+        def run(index):
+            try:
+                results[index] = fns[index]()
+            except Exception as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(fns))]
+        for t in threads:
+            t.start()
+            time.sleep(0.01)
+        time.sleep(settle)
+        return threads, results
+
+    def test_001_concurrent_calls_coalesced(self):
+        """ Test that concurrent calls for the same key share a single call, and
+        that calls for other keys are made separately.
+        """
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fn(value):
+            calls.append(value)
+            release.wait(5)
+            return value * 2
+
+        threads, results = self.run_concurrently(
+            [lambda: flight.do('a', fn, 1)] * 3 + [lambda: flight.do('b', fn, 2)]
+        )
+        self.assertEqual(len(flight), 2)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(results, [2, 2, 2, 4])
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(len(flight), 0)
+
+        # once complete, the next call for a key is made again
+        self.assertEqual(flight.do('a', fn, 3), 6)
+
+    def test_002_exception_shared(self):
+        """ Test that an exception raised by the call is raised for every caller.
+        """
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait(5)
+            raise ValueError('failed')
+
+        threads, results = self.run_concurrently([lambda: flight.do('a', fn)] * 2)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(len(flight), 0)
+
+    def test_003_handle_coalesces_reads(self):
+        """ Test that a devicebus interface coalesces concurrent duplicate reads,
+        but not reads for different devices.
+        """
+        device = MockDevicebus()
+
+        def read(device_id):
+            return device.handle(Command(CommandId.READ, {'board_id': 1, 'device_id': device_id}, device_id))
+
+        threads, results = self.run_concurrently([lambda: read(1), lambda: read(1), lambda: read(2)])
+        device.release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(len(device.calls), 2)
+        self.assertEqual([r.data for r in results], [{'sequence': 1}, {'sequence': 1}, {'sequence': 2}])
+
+    def test_004_single_flight_key(self):
+        """ Test which commands are coalesced.
+        """
+        def key(cmd_id, data):
+            return DevicebusInterface._get_single_flight_key(Command(cmd_id, data, 1))
+
+        self.assertIsNotNone(key(CommandId.READ, {'board_id': 1, 'device_id': 1}))
+        self.assertIsNotNone(key(CommandId.VERSION, {'board_id': 1}))
+        self.assertIsNotNone(key(CommandId.ASSET, {'board_id': 1, 'device_id': 1}))
+        self.assertIsNotNone(key(CommandId.HOST_INFO, {'board_id': 1, 'device_id': 1}))
+        self.assertIsNotNone(key(CommandId.POWER, {'power_action': 'status'}))
+        self.assertIsNotNone(key(CommandId.BOOT_TARGET, {'boot_target': 'status'}))
+        self.assertIsNotNone(key(CommandId.LED, {'led_state': None, 'led_color': None}))
+
+        self.assertIsNone(key(CommandId.POWER, {'power_action': 'on'}))
+        self.assertIsNone(key(CommandId.BOOT_TARGET, {'boot_target': 'pxe'}))
+        self.assertIsNone(key(CommandId.LED, {'led_state': 'on'}))
+        self.assertIsNone(key(CommandId.FAN, {'fan_speed': None}))
+        self.assertIsNone(key(CommandId.WRITE, {'board_id': 1}))
+        self.assertIsNone(key(CommandId.READ, {'board_id': 1, 'devices': []}))
+
+        self.assertEqual(
+            key(CommandId.READ, {'board_id': 1, 'device_id': 1}),
+            key(CommandId.READ, {'device_id': 1, 'board_id': 1})
+        )
+        self.assertNotEqual(
+            key(CommandId.READ, {'board_id': 1, 'device_id': 1}),
+            key(CommandId.READ, {'board_id': 1, 'device_id': 2})
+        )
+
+    def test_005_writes_not_coalesced(self):
+        """ Test that concurrent, identical power control commands are not coalesced.
+        """
+        device = MockDevicebus()
+
+        def power_on():
+            return device.handle(Command(CommandId.POWER, {'board_id': 1, 'power_action': 'on'}, 1))
+
+        threads, results = self.run_concurrently([power_on, power_on])
+        device.release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(len(device.calls), 2)
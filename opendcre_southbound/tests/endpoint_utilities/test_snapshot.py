@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Startup Snapshot Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from opendcre_southbound.devicebus.devices.lan_device import LANDevice
+from opendcre_southbound.devicebus.devices.base import DevicebusInterface
+from opendcre_southbound.snapshot import SNAPSHOT_VERSION, SnapshotRevalidator, StartupSnapshot
+
+
+class MockLANDevice(LANDevice):
+    """ LAN device which is restored from, and snapshot to, a startup snapshot.
+    """
+    _instance_name = 'mock'
+
+    def __init__(self, name, snapshot=None):
+        super(MockLANDevice, self).__init__()
+        self.name = name
+        self.board_record = None
+        self.revalidations = 0
+
+        state = snapshot.get(self.snapshot_key) if snapshot is not None else None
+        if state is not None:
+            self.board_record = state['board_record']
+            self.restored = True
+
+    @property
+    def snapshot_key(self):
+        return 'mock:{}'.format(self.name)
+
+    def get_snapshot(self):
+        if self.board_record is None:
+            return None
+        return {'board_record': self.board_record}
+
+    def revalidate(self):
+        self.revalidations += 1
+        if self.name == 'broken':
+            raise ValueError('unable to revalidate')
+        self.board_record = {'board_id': self.name, 'revalidated': True}
+        super(MockLANDevice, self).revalidate()
+
+
+class MockApp(object):
+    """ Stand-in for the Flask application, holding the registered devices.
+    """
+    def __init__(self, devices):
+        self.config = {'DEVICES': dict((i, d) for i, d in enumerate(devices))}
+
+
+class StartupSnapshotTestCase(unittest.TestCase):
+    """ Test restoring LAN device state from the StartupSnapshot, and revalidating
+    it in the background.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'opendcre', 'snapshot.json')
+
+    def test_001_no_snapshot_file(self):
+        """ Test loading the snapshot when no snapshot file exists.
+        """
+        snapshot = StartupSnapshot(self.path)
+        self.assertEqual(len(snapshot), 0)
+        self.assertIsNone(snapshot.get('mock:a'))
+
+    def test_002_save(self):
+        """ Test that the state of devices with a snapshot key is saved, and loaded
+        by a new snapshot.
+        """
+        a = MockLANDevice('a')
+        a.board_record = {'board_id': 'a'}
+        unscanned = MockLANDevice('b')
+        StartupSnapshot(self.path).save([a, unscanned, DevicebusInterface()])
+
+        with open(self.path, 'r') as f:
+            self.assertEqual(json.load(f)['version'], SNAPSHOT_VERSION)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['snapshot.json'])
+
+        snapshot = StartupSnapshot(self.path)
+        self.assertEqual(len(snapshot), 1)
+        self.assertEqual(snapshot.get('mock:a'), {'board_record': {'board_id': 'a'}})
+
+        restored = MockLANDevice('a', snapshot)
+        self.assertTrue(restored.restored)
+        self.assertEqual(restored.board_record, {'board_id': 'a'})
+        self.assertFalse(MockLANDevice('b', snapshot).restored)
+
+    def test_003_version_mismatch(self):
+        """ Test that a snapshot with a different version is ignored.
+        """
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            json.dump({'version': SNAPSHOT_VERSION + 1, 'devices': {'mock:a': {'board_record': {}}}}, f)
+
+        self.assertIsNone(StartupSnapshot(self.path).get('mock:a'))
+
+    def test_004_invalid_snapshot_file(self):
+        """ Test that an invalid snapshot file is ignored.
+        """
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{"version": ')
+
+        self.assertEqual(len(StartupSnapshot(self.path)), 0)
+
+    def test_005_revalidate(self):
+        """ Test that only the restored devices are revalidated, that a device which
+        fails to revalidate keeps its restored state, and that the snapshot is saved
+        with the state of all devices.
+        """
+        seed = [MockLANDevice(name) for name in ('a', 'broken')]
+        for device in seed:
+            device.board_record = {'board_id': device.name}
+        StartupSnapshot(self.path).save(seed)
+
+        snapshot = StartupSnapshot(self.path)
+        a, broken, c = MockLANDevice('a', snapshot), MockLANDevice('broken', snapshot), MockLANDevice('c', snapshot)
+        c.board_record = {'board_id': 'c'}
+
+        revalidator = SnapshotRevalidator(MockApp([a, broken, c]), snapshot, max_workers=2)
+        revalidator.start()
+        self.assertTrue(revalidator.done.wait(5))
+
+        self.assertEqual((a.revalidations, broken.revalidations, c.revalidations), (1, 1, 0))
+        self.assertFalse(a.restored)
+        self.assertTrue(broken.restored)
+
+        saved = StartupSnapshot(self.path)
+        self.assertEqual(saved.get('mock:a'), {'board_record': {'board_id': 'a', 'revalidated': True}})
+        self.assertEqual(saved.get('mock:broken'), {'board_record': {'board_id': 'broken'}})
+        self.assertEqual(saved.get('mock:c'), {'board_record': {'board_id': 'c'}})
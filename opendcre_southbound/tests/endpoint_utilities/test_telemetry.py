@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Telemetry Poller Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import uuid
+from itertools import count
+
+from flask import Flask
+
+from opendcre_southbound.devicebus.command_factory import CommandFactory
+from opendcre_southbound.errors import OpenDCREException
+from opendcre_southbound.telemetry import TelemetryPoller, TelemetryStore
+from opendcre_southbound.utils import DeviceRouter, ScanCache
+
+
+class MockResponse(object):
+    """ Object used to mock the response to a command.
+    """
+    def __init__(self, data):
+        self.data = data
+
+
+class MockDevice(object):
+    """ Object used to mock a devicebus interface which answers read commands.
+    """
+    def __init__(self, instance_name, fail_device=None):
+        self._instance_name = instance_name
+        self.device_uuid = uuid.uuid4()
+        self.fail_device = fail_device
+        self.batches = []
+
+    def handle_batch(self, commands):
+        self.batches.append(commands)
+        results = []
+        for command in commands:
+            if command.data['device_id'] == self.fail_device:
+                results.append(OpenDCREException('read failed'))
+            else:
+                results.append(MockResponse({'temperature_c': command.data['device_id']}))
+        return results
+
+
+def _board(board_id, *devices):
+    return {
+        'board_id': board_id,
+        'devices': [{'device_id': device_id, 'device_type': device_type} for device_id, device_type in devices]
+    }
+
+
+class TelemetryTestCase(unittest.TestCase):
+    """ Test the TelemetryStore and the TelemetryPoller.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+        self.ipmi = MockDevice('ipmi', fail_device=0x0002)
+        self.redfish = MockDevice('redfish')
+
+        router = DeviceRouter()
+        router.add_single_board_device(0x40000001, self.ipmi)
+        router.add_single_board_device(0x70000001, self.redfish)
+
+        path = os.path.join(self.tmpdir, 'cache.json')
+        self.app = Flask(__name__)
+        self.app.config['SCAN_CACHE'] = path
+        self.app.config['SCAN_CACHE_STORE'] = ScanCache(path, check_interval=0)
+        self.app.config['DEVICE_ROUTER'] = router
+        self.app.config['CMD_FACTORY'] = CommandFactory(count())
+
+        self.store = TelemetryStore()
+
+    def write_scan(self):
+        self.app.config['SCAN_CACHE_STORE'].set({'racks': [{
+            'rack_id': 'rack_1',
+            'boards': [
+                _board('40000001', ('0001', 'temperature'), ('0002', 'temperature'), ('0100', 'power')),
+                _board('70000001', ('0001', 'temperature'), ('0002', 'fan_speed')),
+                _board('80000001', ('0001', 'temperature'))
+            ]
+        }]})
+
+    def test_001_store_max_age(self):
+        """ Test getting readings from the store with and without a max age.
+        """
+        key = TelemetryStore.key(1, 1, 'Temperature')
+        self.assertEqual(key, (1, 1, 'temperature'))
+        self.assertIsNone(self.store.get(key))
+
+        now = time.time()
+        self.store.put(key, {'temperature_c': 20}, now - 10)
+        self.assertEqual(self.store.get(key), ({'temperature_c': 20}, now - 10))
+        self.assertEqual(self.store.get(key, 15), ({'temperature_c': 20}, now - 10))
+        self.assertIsNone(self.store.get(key, 5))
+
+    def test_002_store_keeps_newest(self):
+        """ Test that an older reading does not replace a newer one in the store.
+        """
+        key = TelemetryStore.key(1, 1, 'temperature')
+        now = time.time()
+        self.store.put(key, {'temperature_c': 21}, now)
+        self.store.put(key, {'temperature_c': 20}, now - 1)
+        self.assertEqual(self.store.get(key)[0], {'temperature_c': 21})
+
+        self.store.put(key, {'temperature_c': 22})
+        self.assertEqual(self.store.get(key)[0], {'temperature_c': 22})
+        self.assertEqual(len(self.store), 1)
+
+    def test_003_poll_no_scan(self):
+        """ Test that nothing is polled before a scan has been cached.
+        """
+        poller = TelemetryPoller(self.app, self.store, {'ipmi': 1})
+        with self.app.app_context():
+            self.assertEqual(poller.poll(['ipmi']), 0)
+        self.assertEqual(self.ipmi.batches, [])
+
+    def test_004_poll_by_interface(self):
+        """ Test that only the readable devices for the given devicebus interface
+        types are polled, in a single batch per interface, and that failed reads
+        are not stored.
+        """
+        self.write_scan()
+        poller = TelemetryPoller(self.app, self.store, {'ipmi': 1, 'redfish': 1})
+
+        with self.app.app_context():
+            self.assertEqual(poller.poll(['ipmi']), 1)
+
+        self.assertEqual(len(self.ipmi.batches), 1)
+        self.assertEqual([c.data['device_id'] for c in self.ipmi.batches[0]], [0x0001, 0x0002])
+        self.assertEqual(self.redfish.batches, [])
+
+        self.assertEqual(self.store.get((0x40000001, 0x0001, 'temperature'))[0], {'temperature_c': 0x0001})
+        self.assertIsNone(self.store.get((0x40000001, 0x0002, 'temperature')))
+
+        with self.app.app_context():
+            self.assertEqual(poller.poll(['ipmi', 'redfish']), 3)
+
+        self.assertEqual(len(self.ipmi.batches), 2)
+        self.assertEqual(len(self.redfish.batches), 1)
+        self.assertEqual(self.store.get((0x70000001, 0x0002, 'fan_speed'))[0], {'temperature_c': 0x0002})
+
+    def test_005_background_polling(self):
+        """ Test that the poller reads devices in the background on its interval,
+        and that interfaces without an interval are not polled.
+        """
+        self.write_scan()
+        poller = TelemetryPoller(self.app, self.store, {'IPMI': 0.05, 'redfish': 0})
+        self.assertEqual(poller.intervals, {'ipmi': 0.05})
+
+        poller.start()
+        self.addCleanup(poller.stop, 5)
+
+        deadline = time.time() + 5
+        while len(self.ipmi.batches) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        poller.stop(5)
+
+        self.assertGreaterEqual(len(self.ipmi.batches), 3)
+        self.assertEqual(self.redfish.batches, [])
+        self.assertIsNotNone(self.store.get((0x40000001, 0x0001, 'temperature'), 1))
+
+    def test_006_not_started_without_intervals(self):
+        """ Test that a poller with no intervals configured is not started.
+        """
+        poller = TelemetryPoller(self.app, self.store, {})
+        poller.start()
+        self.assertIsNone(poller._thread)
+        poller.stop()
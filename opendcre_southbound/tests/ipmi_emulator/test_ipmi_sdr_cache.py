@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound IPMI SDR Cache Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import unittest
+
+from opendcre_southbound.devicebus.devices.ipmi import vapor_ipmi
+from opendcre_southbound.devicebus.devices.ipmi.vapor_ipmi_common import IpmiSdrCache, IpmiSessionPool
+from opendcre_southbound.errors import OpenDCREException
+
+
+class IPMISdrCacheTestCase(unittest.TestCase):
+    """ Test reading sensors by number with the IpmiSdrCache against the IPMI emulator.
+    """
+    def make_kwargs(self, **kwargs):
+        pool = IpmiSessionPool(username='ADMIN', password='ADMIN', ip_address='ipmi-emulator', port=623)
+        self.addCleanup(pool.close)
+        self.sdr_cache = IpmiSdrCache(ip_address='ipmi-emulator', **kwargs)
+        return {
+            'username': 'ADMIN',
+            'password': 'ADMIN',
+            'ip_address': 'ipmi-emulator',
+            'port': 623,
+            'session_pool': pool,
+            'sdr_cache': self.sdr_cache
+        }
+
+    def test_001_sdr_cached(self):
+        """ Test that the SDR is read once, and reused for sensor readings.
+        """
+        kwargs = self.make_kwargs()
+
+        sensors = vapor_ipmi.sensors(**kwargs)
+        self.assertIn(0x42, [s['sensor_number'] for s in sensors])
+        self.assertEqual(self.sdr_cache.load_count, 1)
+
+        for _ in range(3):
+            reading = vapor_ipmi.read_sensor_by_number(sensor_number=0x42, **kwargs)
+            self.assertIsInstance(reading['sensor_reading'], float)
+            self.assertIn('health', reading)
+            self.assertIn('states', reading)
+
+        self.assertEqual(self.sdr_cache.load_count, 1)
+
+    def test_002_sdr_unchanged(self):
+        """ Test that the SDR is not read again when it is revalidated and the
+        repository timestamps have not changed.
+        """
+        kwargs = self.make_kwargs(check_interval=0)
+
+        vapor_ipmi.read_sensor_by_number(sensor_number=0x42, **kwargs)
+        vapor_ipmi.read_sensor_by_number(sensor_number=0x42, **kwargs)
+        self.assertEqual(self.sdr_cache.load_count, 1)
+
+    def test_003_sdr_changed(self):
+        """ Test that the SDR is read again when the repository timestamps differ
+        from those of the cached SDR.
+        """
+        kwargs = self.make_kwargs(check_interval=0)
+
+        vapor_ipmi.read_sensor_by_number(sensor_number=0x42, **kwargs)
+        self.sdr_cache._timestamp = 'stale'
+
+        reading = vapor_ipmi.read_sensor_by_number(sensor_number=0x42, **kwargs)
+        self.assertIsInstance(reading['sensor_reading'], float)
+        self.assertEqual(self.sdr_cache.load_count, 2)
+
+    def test_004_unknown_sensor_number(self):
+        """ Test reading a sensor number which is not in the SDR.
+        """
+        kwargs = self.make_kwargs()
+
+        with self.assertRaises(OpenDCREException):
+            vapor_ipmi.read_sensor_by_number(sensor_number=0xfe, **kwargs)
+        self.assertEqual(self.sdr_cache.load_count, 1)
+
+    def test_005_read_without_cache(self):
+        """ Test reading a sensor by number without an SDR cache.
+        """
+        kwargs = self.make_kwargs()
+        del kwargs['sdr_cache']
+
+        reading = vapor_ipmi.read_sensor_by_number(sensor_number=0x42, **kwargs)
+        self.assertIsInstance(reading['sensor_reading'], float)
+
+    def test_006_sensor_bound_to_command(self):
+        """ Test that the SDR entry for a sensor is bound to the command it is read
+        with, without changing the cached entry shared by other commands.
+        """
+        pool = self.make_kwargs()['session_pool']
+        # pyghmi shares a session between commands with the same credentials, so a
+        # distinct user (which the emulator accepts) is used for the second command
+        other_pool = IpmiSessionPool(username='OTHER', password='ADMIN', ip_address='ipmi-emulator', port=623)
+        self.addCleanup(other_pool.close)
+
+        first = pool.acquire()
+        second = other_pool.acquire()
+        try:
+            self.assertIsNot(first, second)
+            cached = self.sdr_cache.get_sdr(first).sensors[0x42]
+            cached_cmd = cached.ipmicmd
+
+            sensor_first = self.sdr_cache.get_sensor(first, 0x42)
+            sensor_second = self.sdr_cache.get_sensor(second, 0x42)
+            self.assertIsNot(sensor_first, cached)
+            self.assertIsNot(sensor_second, sensor_first)
+            self.assertIsNot(first.ipmi_session, second.ipmi_session)
+            self.assertIs(sensor_first.ipmicmd.ipmi_session, first.ipmi_session)
+            self.assertIs(sensor_second.ipmicmd.ipmi_session, second.ipmi_session)
+            self.assertIs(cached.ipmicmd, cached_cmd)
+        finally:
+            pool.release(first)
+            other_pool.release(second)
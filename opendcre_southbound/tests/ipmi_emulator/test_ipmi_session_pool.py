@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound IPMI Session Pool Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import threading
+import time
+import unittest
+
+from opendcre_southbound.devicebus.devices.ipmi import vapor_ipmi
+from opendcre_southbound.devicebus.health import DeviceHealth
+from opendcre_southbound.devicebus.devices.ipmi.vapor_ipmi_common import IpmiCommand, IpmiSessionPool
+
+
+class IPMISessionPoolTestCase(unittest.TestCase):
+    """ Test reusing BMC sessions with the IpmiSessionPool against the IPMI emulator.
+    """
+    def make_pool(self, **kwargs):
+        pool = IpmiSessionPool(username='ADMIN', password='ADMIN', ip_address='ipmi-emulator', port=623, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_001_session_reused(self):
+        """ Test that a session is reused between commands borrowed from the pool.
+        """
+        pool = self.make_pool()
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            first = ipmicmd
+            self.assertIn('powerstate', ipmicmd.get_power())
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            self.assertIs(ipmicmd, first)
+            self.assertIn('powerstate', ipmicmd.get_power())
+
+        self.assertEqual(pool.connect_count, 1)
+
+    def test_002_vapor_ipmi_pooled(self):
+        """ Test that issuing several vapor_ipmi commands through the pool, including
+        the multi-part power command, uses a single session.
+        """
+        pool = self.make_pool()
+        kwargs = {'username': 'ADMIN', 'password': 'ADMIN', 'ip_address': 'ipmi-emulator', 'session_pool': pool}
+
+        self.assertIn('power_status', vapor_ipmi.power(cmd='status', reading_method='dcmi', **kwargs))
+        self.assertIn('target', vapor_ipmi.get_boot(**kwargs))
+        self.assertIn('led_state', vapor_ipmi.get_identify(**kwargs))
+        self.assertIn('board_info', vapor_ipmi.get_inventory(**kwargs))
+
+        self.assertEqual(pool.connect_count, 1)
+
+    def test_003_broken_session_reconnect(self):
+        """ Test that a session which is broken while borrowed is dropped from the pool,
+        and that a new session is opened for the next command.
+        """
+        pool = self.make_pool()
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            ipmicmd.ipmi_session.logout()
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            self.assertIn('powerstate', ipmicmd.get_power())
+
+        self.assertEqual(pool.connect_count, 2)
+
+    def test_004_idle_eviction(self):
+        """ Test that a session which has been idle for longer than the idle timeout is
+        logged out, and a new session is opened for the next command.
+        """
+        pool = self.make_pool(idle_timeout=0.1)
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            first = ipmicmd
+
+        time.sleep(0.2)
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            self.assertIsNot(ipmicmd, first)
+            self.assertIn('powerstate', ipmicmd.get_power())
+
+        self.assertFalse(first.ipmi_session.logged)
+        self.assertEqual(pool.connect_count, 2)
+
+    def test_005_keepalive(self):
+        """ Test that an idle session is checked with a keepalive and reused.
+        """
+        pool = self.make_pool(keepalive_interval=0)
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            first = ipmicmd
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            self.assertIs(ipmicmd, first)
+            self.assertIn('powerstate', ipmicmd.get_power())
+
+        self.assertEqual(pool.connect_count, 1)
+
+    def test_006_max_sessions(self):
+        """ Test that borrowing from a pool with all of its sessions in use blocks
+        until a session is given back.
+        """
+        pool = self.make_pool(max_sessions=1)
+        borrowed = []
+
+        def borrow():
+            with IpmiCommand(session_pool=pool) as cmd:
+                borrowed.append(cmd)
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            t = threading.Thread(target=borrow)
+            t.start()
+            time.sleep(0.2)
+            self.assertEqual(borrowed, [])
+
+        t.join(5)
+        self.assertEqual(borrowed, [ipmicmd])
+        self.assertEqual(pool.connect_count, 1)
+
+    def test_007_health_per_exchange(self):
+        """ Test that the latency of each exchange with the BMC is recorded to its
+        health, rather than the time a command is borrowed for.
+        """
+        health = DeviceHealth()
+        # a different user, so that the session is not shared with the other tests
+        pool = IpmiSessionPool(username='HEALTH', password='ADMIN', ip_address='ipmi-emulator', port=623, health=health)
+        self.addCleanup(pool.close)
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            self.assertIn('powerstate', ipmicmd.get_power())
+            time.sleep(0.5)
+            self.assertIn('powerstate', ipmicmd.get_power())
+
+        status = health.status()
+        self.assertGreaterEqual(status['successes'], 2)
+        self.assertEqual(status['latency']['samples'], status['successes'])
+        self.assertLess(status['latency']['p99'], 0.5)
+        self.assertEqual(status['failures'], 0)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound IPMI Transport Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import threading
+import unittest
+
+from pyghmi.exceptions import IpmiException
+
+from opendcre_southbound.devicebus.devices.ipmi import vapor_ipmi
+from opendcre_southbound.devicebus.devices.ipmi.vapor_ipmi_common import IpmiCommand
+from opendcre_southbound.devicebus.devices.ipmi.vapor_ipmi_transport import IpmiTransport, IpmiTransportPool
+
+
+class IPMITransportTestCase(unittest.TestCase):
+    """ Test issuing commands over the multiplexed IpmiTransport against the IPMI emulator.
+    """
+    def make_transport(self, **kwargs):
+        transport = IpmiTransport(**kwargs)
+        self.addCleanup(transport.close)
+        return transport
+
+    def test_001_vapor_ipmi(self):
+        """ Test that vapor_ipmi commands issued through a transport pool, including
+        the multi-part power command, use a single session.
+        """
+        pool = IpmiTransportPool(
+            self.make_transport(), username='ADMIN', password='ADMIN', ip_address='ipmi-emulator', port=623
+        )
+        kwargs = {'username': 'ADMIN', 'password': 'ADMIN', 'ip_address': 'ipmi-emulator', 'session_pool': pool}
+
+        self.assertIn('power_status', vapor_ipmi.power(cmd='status', reading_method='dcmi', **kwargs))
+        self.assertIn('target', vapor_ipmi.get_boot(**kwargs))
+        self.assertIn('led_state', vapor_ipmi.get_identify(**kwargs))
+        self.assertIn('board_info', vapor_ipmi.get_inventory(**kwargs))
+
+        with IpmiCommand(session_pool=pool) as ipmicmd:
+            self.assertIn('powerstate', ipmicmd.get_power())
+
+        self.assertEqual(pool.connect_count, 1)
+
+    def test_002_concurrent_requests(self):
+        """ Test that many requests submitted at once to several sessions all complete.
+        """
+        transport = self.make_transport(max_in_flight=4)
+        sessions = [
+            transport.session('ipmi-emulator', 'user{}'.format(i), 'ADMIN', port=623) for i in range(10)
+        ]
+
+        requests = [session.submit(0x00, 0x01) for session in sessions for _ in range(20)]
+        for request in requests:
+            response = request.result(10)
+            self.assertNotIn('error', response)
+            self.assertEqual(len(response['data']), 3)
+
+        for session in sessions:
+            self.assertEqual(session.login_count, 1)
+            self.assertEqual(session._in_flight, {})
+
+    def test_003_callback(self):
+        """ Test that a callback added to a request is called with the completed request.
+        """
+        session = self.make_transport().session('ipmi-emulator', 'ADMIN', 'ADMIN', port=623)
+        completed = []
+        called = threading.Event()
+
+        def callback(request):
+            completed.append(request)
+            called.set()
+
+        request = session.submit(0x00, 0x01)
+        request.add_done_callback(callback)
+        self.assertTrue(called.wait(5))
+        self.assertTrue(request.done())
+
+        # a callback added to a completed request is called right away
+        request.add_done_callback(completed.append)
+        self.assertEqual(completed, [request, request])
+
+    def test_004_relogin(self):
+        """ Test that a session which is logged out is re-established on next use.
+        """
+        session = self.make_transport().session('ipmi-emulator', 'ADMIN', 'ADMIN', port=623)
+
+        self.assertNotIn('error', session.raw_command(netfn=0x00, command=0x01))
+        session.logout()
+        self.assertNotIn('error', session.raw_command(netfn=0x00, command=0x01))
+
+        self.assertEqual(session.login_count, 2)
+
+    def test_005_bad_password(self):
+        """ Test that a request on a session which can not be established fails.
+        """
+        session = self.make_transport().session('ipmi-emulator', 'ADMIN', 'WRONG', port=623)
+
+        with self.assertRaises(IpmiException):
+            session.raw_command(netfn=0x00, command=0x01)
+        self.assertFalse(session.logged)
+
+    def test_006_unreachable(self):
+        """ Test that a request to a BMC which does not respond fails once out of retries.
+        """
+        session = self.make_transport(timeout=0.1, retries=1).session('ipmi-emulator', 'ADMIN', 'ADMIN', port=624)
+
+        with self.assertRaises(IpmiException):
+            session.submit(0x00, 0x01).result(5)
+        self.assertEqual(session.login_count, 0)
+
+    def test_007_max_logins(self):
+        """ Test that sessions waiting for others to be established are established
+        in turn.
+        """
+        transport = self.make_transport(max_logins=1)
+        sessions = [transport.session('ipmi-emulator', 'user{}'.format(i), 'ADMIN', port=623) for i in range(5)]
+
+        requests = [session.submit(0x00, 0x01) for session in sessions]
+        for request in requests:
+            self.assertNotIn('error', request.result(10))
+
+        for session in sessions:
+            self.assertEqual(session.login_count, 1)
+        self.assertEqual(transport._logins, set())
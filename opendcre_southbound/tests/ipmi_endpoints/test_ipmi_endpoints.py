@@ -4062,3 +4062,108 @@ class IPMIEndpointsTestCase(unittest.TestCase):
         hostnames = response['hostnames']
         self.assertIsInstance(hostnames, list)
         self.assertEqual(len(hostnames), 3)
+
+    def test_188_read_all(self):
+        """ Test reading all sensor devices on an IPMI board in a single pass.
+        """
+        r = http.get(PREFIX + '/read_all/rack_1/40000000')
+        self.assertTrue(http.request_ok(r.status_code))
+
+        response = r.json()
+        self.assertIsInstance(response, dict)
+        self.assertIn('readings', response)
+
+        readings = response['readings']
+        self.assertEqual(len(readings), 13)
+        for reading in readings:
+            self.assertEqual(reading['rack_id'], 'rack_1')
+            self.assertEqual(reading['board_id'], '40000000')
+            self.assertIn(reading['device_type'], ['voltage', 'fan_speed', 'temperature', 'power_supply'])
+            self.assertNotIn('error', reading)
+            self.assertIn('health', reading['reading'])
+            self.assertIn('states', reading['reading'])
+
+        fan = [x for x in readings if x['device_id'] == '0042'][0]
+        self.assertEqual(fan['device_type'], 'fan_speed')
+        self.assertIsInstance(fan['reading']['speed_rpm'], float)
+
+    def test_189_read_all_bad_board(self):
+        """ Test reading all sensor devices on a board which does not exist.
+        """
+        with self.assertRaises(VaporHTTPError):
+            http.get(PREFIX + '/read_all/rack_1/4000000f')
+
+    def test_190_scan_all_etag(self):
+        """ Test that the scan all response is tagged, and that a request with a
+        matching If-None-Match header gets a 304 response.
+        """
+        r = http.get(PREFIX + '/scan')
+        self.assertTrue(http.request_ok(r.status_code))
+        etag = r.headers['ETag']
+
+        r = http.get(PREFIX + '/scan')
+        self.assertEqual(r.headers['ETag'], etag)
+
+        with self.assertRaises(VaporHTTPError) as ctx:
+            http.get(PREFIX + '/scan', headers={'If-None-Match': etag})
+        self.assertEqual(ctx.exception.status, 304)
+
+        r = http.get(PREFIX + '/scan', headers={'If-None-Match': '"not-the-etag"'})
+        self.assertTrue(http.request_ok(r.status_code))
+        self.assertIn('racks', r.json())
+
+    def test_191_scan_all_gzip(self):
+        """ Test that the scan all response is gzip compressed only for clients which
+        accept gzip encoding.
+        """
+        r = http.get(PREFIX + '/scan', headers={'Accept-Encoding': 'gzip'})
+        self.assertTrue(http.request_ok(r.status_code))
+        self.assertEqual(r.headers['Content-Encoding'], 'gzip')
+        gzip_response = r.json()
+
+        r = http.get(PREFIX + '/scan', headers={'Accept-Encoding': 'identity'})
+        self.assertTrue(http.request_ok(r.status_code))
+        self.assertNotIn('Content-Encoding', r.headers)
+        self.assertEqual(r.json(), gzip_response)
+
+    def test_192_incremental_scan(self):
+        """ Test the incremental scan endpoint. Nothing has changed on the BMCs since
+        the previous scan, so no changes should be reported, and the scan cache (and
+        so the scan all ETag) should be unchanged.
+        """
+        http.get(PREFIX + '/scan/force')
+        etag = http.get(PREFIX + '/scan').headers['ETag']
+
+        r = http.get(PREFIX + '/scan/incremental')
+        self.assertTrue(http.request_ok(r.status_code))
+
+        response = r.json()
+        self.assertEqual(response['changes'], {'added': [], 'removed': [], 'changed': []})
+        self.assertEqual(len(response['racks']), 1)
+        self.assertIn('40000000', [b['board_id'] for b in response['racks'][0]['boards']])
+
+        self.assertEqual(http.get(PREFIX + '/scan').headers['ETag'], etag)
+
+    def test_193_read_max_age(self):
+        """ Test reading an IPMI device with a max_age. The first read stores the
+        reading, so a read allowing an older reading should be answered from the
+        store, with its age given. A read with a max_age of 0 should read the device.
+        """
+        r = http.get(PREFIX + '/read/fan_speed/rack_1/40000000/0042')
+        self.assertTrue(http.request_ok(r.status_code))
+        self.assertNotIn('Age', r.headers)
+        reading = r.json()
+
+        r = http.get(PREFIX + '/read/fan_speed/rack_1/40000000/0042?max_age=300')
+        self.assertTrue(http.request_ok(r.status_code))
+        self.assertEqual(r.json(), reading)
+        self.assertIn('Age', r.headers)
+        self.assertLessEqual(int(r.headers['Age']), 300)
+
+        r = http.get(PREFIX + '/read/fan_speed/rack_1/40000000/0042?max_age=0')
+        self.assertTrue(http.request_ok(r.status_code))
+        self.assertNotIn('Age', r.headers)
+
+        with self.assertRaises(VaporHTTPError) as ctx:
+            http.get(PREFIX + '/read/fan_speed/rack_1/40000000/0042?max_age=recent')
+        self.assertEqual(ctx.exception.status, 500)
@@ -28,11 +28,13 @@ along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 import unittest
 import os
 import copy
+import json
 from itertools import count
 
 import opendcre_southbound as sb
 
 from opendcre_southbound.devicebus.devices.ipmi import IPMIDevice
+from opendcre_southbound.snapshot import StartupSnapshot
 
 
 class MockApp(object):
@@ -225,3 +227,59 @@ class IPMIScanCacheRegistrationTestCase(unittest.TestCase):
             self.assertIn('device_id', device)
             self.assertIn('device_info', device)
             self.assertIn('device_type', device)
+
+    def test_004_startup_snapshot_registration(self):
+        """ Test initializing an IPMI device using the startup snapshot.
+
+        In this case, a scan cache and a startup snapshot exist, and the device we are
+        initializing is in the snapshot. We expect the device to be restored from the
+        snapshot without talking to the BMC (no scan, FRU or DCMI requests).
+        """
+        # add the data for the scan cache
+        with open(self.scan_cache, 'w') as f:
+            f.write(self.cache_data)
+
+        # take the board record from the scan cache, and snapshot it with a different board id
+        board = json.loads(self.cache_data)['racks'][0]['boards'][0]
+        board['board_id'] = '40000010'
+        snapshot_file = '/tmp/opendcre/snapshot.json'
+        self.addCleanup(os.remove, snapshot_file)
+        with open(snapshot_file, 'w') as f:
+            json.dump({
+                'version': 1,
+                'devices': {
+                    'ipmi:rack_1:ipmi-emulator-1:623': {
+                        'board_id': '40000010',
+                        'board_record': board,
+                        'fru_info': {'board_info': {'manufacturer': 'Vapor IO'}},
+                        'dcmi_supported': True
+                    }
+                }
+            }, f)
+
+        # override the IPMIDevice methods which talk to the BMC, so we know that they are not reached.
+        IPMIDevice._get_board_record = raise_err
+        IPMIDevice._get_fru_info = raise_err
+        IPMIDevice._get_dcmi_power_capabilities = raise_err
+
+        # initialize a mock app and counter for device init
+        app = MockApp()
+        app.config['STARTUP_SNAPSHOT'] = StartupSnapshot(snapshot_file)
+        counter = count()
+
+        dev = IPMIDevice(app.config, counter, **self.device_kwargs)
+
+        # the device state comes from the snapshot, rather than the scan cache
+        self.assertTrue(dev.restored)
+        self.assertEqual(dev.board_id, 0x40000010)
+        self.assertEqual(dev.board_record['board_id'], '40000010')
+        self.assertEqual(len(dev.board_record['devices']), 16)
+        self.assertEqual(dev.fru_info, {'board_info': {'manufacturer': 'Vapor IO'}})
+        self.assertTrue(dev.dcmi_supported)
+        self.assertEqual(dev.get_snapshot()['board_id'], '40000010')
+
+        # a device on a different rack is not in the snapshot
+        kwargs = copy.deepcopy(self.device_kwargs)
+        kwargs['bmc_rack'] = 'rack_99'
+        with self.assertRaises(VaporTestException):
+            IPMIDevice(app.config, counter, **kwargs)
@@ -410,3 +410,49 @@ class DevicebusTestCase(unittest.TestCase):
         self.assertEqual(dbp.board_id, 0xFA00B3E9)
         self.assertEqual(dbp.device_id, 0xF011)
         self.assertEqual(dbp.data, [0x1B, 0xAA, 0xF0])
+
+    def test_025_valid_devicebus_packet_to_bytes(self):
+        """ Test serializing a packet to a bytearray
+        """
+        dbp = DeviceBusPacket(
+            sequence=0x03,
+            device_type=0x40,
+            board_id=0x12345678,
+            device_id=0xAA05,
+            data=[0x1, 0x2, 0x3]
+        )
+
+        packet = dbp.to_bytes()
+        expected_packet = [0x01, 0x0C, 0x03, 0x40, 0x12, 0x34, 0x56, 0x78, 0xAA, 0x05, 0x1, 0x2, 0x3, 0xf4, 0x04]
+        self.assertIsInstance(packet, bytearray)
+        self.assertEqual(list(packet), expected_packet)
+
+    def test_026_valid_devicebus_packet_deserialize_bytes(self):
+        """ Test deserializing a packet from a bytearray, memoryview and str
+        """
+        packet = bytearray([0x01, 0x0C, 0x03, 0x40, 0x12, 0x34, 0x56, 0x78, 0xAA, 0x05, 0x1, 0x2, 0x3, 0xf4, 0x04])
+
+        for packet_bytes in (packet, memoryview(packet), str(packet)):
+            dbp = DeviceBusPacket()
+            dbp.deserialize(packet_bytes)
+
+            self.assertEqual(dbp.sequence, 0x03)
+            self.assertEqual(dbp.device_type, 0x40)
+            self.assertEqual(dbp.board_id, 0x12345678)
+            self.assertEqual(dbp.device_id, 0xAA05)
+            self.assertEqual(dbp.data, [0x1, 0x2, 0x3])
+
+    def test_027_devicebus_packet_serialize_hex_string_ids(self):
+        """ Test serializing a packet where the board and device ids are hex strings
+        """
+        dbp = DeviceBusPacket(
+            sequence=0x03,
+            device_type=0x40,
+            board_id='12345678',
+            device_id='AA05',
+            data=[0x1, 0x2, 0x3]
+        )
+
+        packet = dbp.serialize()
+        expected_packet = [0x01, 0x0C, 0x03, 0x40, 0x12, 0x34, 0x56, 0x78, 0xAA, 0x05, 0x1, 0x2, 0x3, 0xf4, 0x04]
+        self.assertEqual(packet, expected_packet)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Devicebus buffered packet reader tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import unittest
+
+from opendcre_southbound.devicebus.devices.plc.plc_bus import (
+    DeviceBusReader,
+    DeviceBusPacket,
+    DumpResponse
+)
+from opendcre_southbound.errors import BusTimeoutException
+
+
+class _StreamBus(object):
+    """ Stand-in for a DeviceBus which serves reads from an in-memory byte stream.
+    """
+    def __init__(self, data):
+        self.data = bytearray(data)
+        self.reads = 0
+
+    def in_waiting(self):
+        return len(self.data)
+
+    def read(self, length=0):
+        self.reads += 1
+        chunk = str(self.data[:length])
+        del self.data[:length]
+        return chunk
+
+    def read_packet(self):
+        return self.reader.read_packet()
+
+
+def _packet(board_id, device_id, sequence=0x01, data=None):
+    return DeviceBusPacket(
+        sequence=sequence,
+        device_type=0xFF,
+        board_id=board_id,
+        device_id=device_id,
+        data=data or [0x1, 0x2]
+    ).serialize()
+
+
+class DevicebusReaderTestCase(unittest.TestCase):
+    """ Test framing packets off of the devicebus with the DeviceBusReader.
+    """
+    def test_001_read_single_packet(self):
+        """ Test framing a single packet.
+        """
+        packet = _packet(0x01000001, 0x0102)
+        reader = DeviceBusReader(_StreamBus(packet))
+        self.assertEqual(list(reader.read_packet()), packet)
+
+    def test_002_read_packet_burst(self):
+        """ Test framing a burst of packets which are all available at once.
+        """
+        packets = [_packet(0x01000000 + i, 0x0100 + i, data=[0x41] * i) for i in range(1, 10)]
+        bus = _StreamBus(sum(packets, []))
+        reader = DeviceBusReader(bus)
+
+        for packet in packets:
+            self.assertEqual(list(reader.read_packet()), packet)
+
+        # all packets were waiting, so they should have been read in one go
+        self.assertEqual(bus.reads, 1)
+
+    def test_003_read_packet_leading_noise(self):
+        """ Test that leading noise before a packet header is dropped.
+        """
+        packet = _packet(0x01000001, 0x0102)
+        reader = DeviceBusReader(_StreamBus([0x00, 0xff, 0x04] + packet))
+        self.assertEqual(list(reader.read_packet()), packet)
+
+    def test_004_read_packet_timeout(self):
+        """ Test that an incomplete packet results in a bus timeout.
+        """
+        packet = _packet(0x01000001, 0x0102)
+        reader = DeviceBusReader(_StreamBus(packet[:-3]))
+        with self.assertRaises(BusTimeoutException):
+            reader.read_packet()
+
+    def test_005_read_packet_empty(self):
+        """ Test that reading from a bus with nothing on it results in a bus timeout.
+        """
+        reader = DeviceBusReader(_StreamBus([]))
+        with self.assertRaises(BusTimeoutException):
+            reader.read_packet()
+
+    def test_006_clear(self):
+        """ Test that clearing the reader discards buffered packets.
+        """
+        packets = [_packet(0x01000001, 0x0102), _packet(0x01000002, 0x0102)]
+        reader = DeviceBusReader(_StreamBus(sum(packets, [])))
+        self.assertEqual(list(reader.read_packet()), packets[0])
+
+        reader.clear()
+        with self.assertRaises(BusTimeoutException):
+            reader.read_packet()
+
+    def test_007_packet_from_serial_reader(self):
+        """ Test building response packets from a burst on the bus, dropping
+        packets that do not match the expected sequence.
+        """
+        packets = [
+            _packet(0x01000001, 0x0102, sequence=0x03, data=[0x01]),
+            _packet(0x01000002, 0x0203, sequence=0x04, data=[0x02]),
+            _packet(0x01000003, 0x0304, sequence=0x04, data=[0x03])
+        ]
+        bus = _StreamBus(sum(packets, []))
+        bus.reader = DeviceBusReader(bus)
+
+        response = DumpResponse(serial_reader=bus, expected_sequence=0x04)
+        self.assertEqual(response.board_id, 0x01000002)
+        self.assertEqual(response.device_id, 0x0203)
+
+        response = DumpResponse(serial_reader=bus, expected_sequence=0x04)
+        self.assertEqual(response.board_id, 0x01000003)
+        self.assertEqual(response.device_id, 0x0304)
+
+        with self.assertRaises(BusTimeoutException):
+            DumpResponse(serial_reader=bus, expected_sequence=0x04)
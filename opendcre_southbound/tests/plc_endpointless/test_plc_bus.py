@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound DeviceBus connection tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import serial
+import unittest
+
+from opendcre_southbound.devicebus.devices.plc.plc_bus import DeviceBus
+from opendcre_southbound.devicebus.devices.plc.plc_device import PLCDevice
+from opendcre_southbound.devicebus.sequence import SequenceAllocator
+from opendcre_southbound.errors import BusCommunicationError
+from opendcre_southbound.constants import DEVICEBUS_EMULATOR_V1
+
+
+class _FakeSerial(object):
+    """ Stand-in for a serial.Serial connection. Reads are served from an in-memory
+    byte stream, and errors can be queued up to be raised by the next reads/writes.
+    """
+    # set to make opening a new connection fail
+    fail_open = False
+
+    def __init__(self, port, baudrate, timeout=None):
+        if _FakeSerial.fail_open:
+            raise serial.SerialException('could not open port {}'.format(port))
+        self.port = port
+        self.data = bytearray()
+        self.written = bytearray()
+        self.errors = []
+        self.closed = False
+
+    def _check_error(self):
+        if self.errors:
+            raise self.errors.pop(0)
+
+    def read(self, length=1):
+        self._check_error()
+        chunk = str(self.data[:length])
+        del self.data[:length]
+        return chunk
+
+    def write(self, data):
+        self._check_error()
+        self.written.extend(data)
+        return len(data)
+
+    def inWaiting(self):
+        return len(self.data)
+
+    def flushInput(self):
+        del self.data[:]
+
+    def flushOutput(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def make_plc_device():
+    """ Create a PLCDevice for the fake serial device.
+    """
+    return PLCDevice(
+        counter=SequenceAllocator(),
+        lockfile='/tmp/opendcre-test-plc-bus',
+        device_name='/dev/fake',
+        hardware_type='emulator',
+        board_id_range=[0x00000000, 0x0000000F],
+        board_id_range_max=[0x00000000, 0x0000000F]
+    )
+
+
+class FakeSerialTestCase(unittest.TestCase):
+    """ Base test case which replaces serial.Serial with a fake serial connection
+    (serial_cls) for its tests.
+    """
+    serial_cls = _FakeSerial
+
+    def setUp(self):
+        self._serial = serial.Serial
+        serial.Serial = self.serial_cls
+        _FakeSerial.fail_open = False
+
+    def tearDown(self):
+        serial.Serial = self._serial
+        _FakeSerial.fail_open = False
+
+
+class DeviceBusConnectionTestCase(FakeSerialTestCase):
+    """ Test opening, and re-opening, the serial connection of the DeviceBus.
+    """
+    def _make_bus(self):
+        return DeviceBus(hardware_type=DEVICEBUS_EMULATOR_V1, device_name='/dev/fake', timeout=0.1)
+
+    def test_001_open_counts(self):
+        """ Test that the connection is opened once when the bus is created, and
+        that opening an open bus does not open it again.
+        """
+        bus = self._make_bus()
+        self.assertTrue(bus.is_open)
+        self.assertEqual(bus.open_count, 1)
+        self.assertEqual(bus.reopen_count, 0)
+
+        bus.open()
+        self.assertEqual(bus.open_count, 1)
+
+        bus.close()
+        self.assertFalse(bus.is_open)
+        bus.open()
+        self.assertEqual(bus.open_count, 2)
+        self.assertEqual(bus.reopen_count, 0)
+
+    def test_002_read_error_reopens(self):
+        """ Test that a serial error on read re-opens the connection and surfaces
+        the error, and that the bus can be read from afterwards.
+        """
+        bus = self._make_bus()
+        first = bus.serial_device
+        first.errors.append(serial.SerialException('device reports readiness to read but returned no data'))
+
+        self.assertRaises(serial.SerialException, bus.read, 1)
+        self.assertTrue(first.closed)
+        self.assertIsNot(bus.serial_device, first)
+        self.assertEqual(bus.open_count, 2)
+        self.assertEqual(bus.reopen_count, 1)
+
+        bus.serial_device.data.extend([0x72, 0x02])
+        self.assertEqual(bus.read(2), '\x72\x02')
+
+    def test_003_write_error_retried(self):
+        """ Test that a serial error on write re-opens the connection and writes
+        the data again.
+        """
+        bus = self._make_bus()
+        bus.serial_device.errors.append(OSError(5, 'Input/output error'))
+
+        self.assertEqual(bus.write(bytearray([0x72, 0x02])), 2)
+        self.assertEqual(bus.serial_device.written, bytearray([0x72, 0x02]))
+        self.assertEqual(bus.open_count, 2)
+        self.assertEqual(bus.reopen_count, 1)
+
+    def test_004_reopen_failure(self):
+        """ Test that reads and writes raise a BusCommunicationError once the
+        connection could not be re-opened, rather than returning nothing.
+        """
+        bus = self._make_bus()
+        bus.serial_device.errors.append(serial.SerialException('device disconnected'))
+        _FakeSerial.fail_open = True
+
+        self.assertRaises(serial.SerialException, bus.read, 1)
+        self.assertFalse(bus.is_open)
+        self.assertEqual(bus.reopen_count, 0)
+
+        self.assertRaises(BusCommunicationError, bus.read, 1)
+        self.assertRaises(BusCommunicationError, bus.write, bytearray([0x72]))
+        self.assertRaises(BusCommunicationError, bus.read_packet)
+
+    def test_005_device_reconnects(self):
+        """ Test that the PLC device re-opens its bus once the serial device is
+        available again, and reports the connection counts.
+        """
+        device = make_plc_device()
+        self.assertEqual(device.bus_stats, {'open_count': 0, 'reopen_count': 0})
+
+        bus = device._get_bus()
+        self.assertEqual(device.bus_stats, {'open_count': 1, 'reopen_count': 0})
+
+        # the serial device goes away, and can not be re-opened
+        bus.serial_device.errors.append(serial.SerialException('device disconnected'))
+        _FakeSerial.fail_open = True
+        self.assertRaises(serial.SerialException, bus.read, 1)
+        self.assertRaises(serial.SerialException, device._get_bus)
+        self.assertFalse(bus.is_open)
+
+        # once the serial device is back, the next command re-opens the bus
+        _FakeSerial.fail_open = False
+        self.assertIs(device._get_bus(), bus)
+        self.assertTrue(bus.is_open)
+        self.assertEqual(device.bus_stats, {'open_count': 2, 'reopen_count': 1})
+
+        # and an open bus is handed out as-is
+        device._get_bus()
+        self.assertEqual(device.bus_stats, {'open_count': 2, 'reopen_count': 1})
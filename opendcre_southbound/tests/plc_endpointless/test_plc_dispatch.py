@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound PLC batched read dispatch tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from opendcre_southbound.devicebus.devices.plc.plc_bus import (
+    DeviceReadCommand,
+    DeviceReadResponse,
+    PKT_META_BYTES
+)
+from opendcre_southbound.devicebus.devices.plc.plc_scheduler import PendingRead
+from opendcre_southbound.errors import OpenDCREException
+
+from plc_endpointless.test_plc_bus import FakeSerialTestCase, _FakeSerial, make_plc_device
+
+
+class _RespondingSerial(_FakeSerial):
+    """ Fake serial connection which answers the read commands written to it.
+
+    The responder is given the read commands from each write, and returns the
+    response bytes to make available for reading.
+    """
+    responder = None
+
+    def __init__(self, *args, **kwargs):
+        super(_RespondingSerial, self).__init__(*args, **kwargs)
+        self.requests = []
+
+    def write(self, data):
+        written = super(_RespondingSerial, self).write(data)
+        data = bytearray(data)
+        requests = []
+        while data:
+            length = data[1] + PKT_META_BYTES
+            requests.append(DeviceReadCommand(data_bytes=data[:length]))
+            del data[:length]
+        self.requests.append(requests)
+        if self.responder is not None:
+            self.data.extend(self.responder(requests))
+        return written
+
+
+def _response(request, sequence=None):
+    """ Get the response bytes for a read command - the reading is the board id.
+    """
+    return DeviceReadResponse(
+        board_id=request.board_id,
+        device_id=request.device_id,
+        device_type=request.device_type,
+        sequence=request.sequence if sequence is None else sequence,
+        device_reading=[ord(c) for c in str(request.board_id)]
+    ).serialize()
+
+
+def _reading(pending):
+    return int(''.join(chr(x) for x in pending.result().data))
+
+
+class PLCDispatchTestCase(FakeSerialTestCase):
+    """ Test issuing a batch of reads to the bus with PLCDevice._dispatch_reads.
+    """
+    serial_cls = _RespondingSerial
+
+    def setUp(self):
+        super(PLCDispatchTestCase, self).setUp()
+        self.device = make_plc_device()
+        self.serial = self.device._get_bus().serial_device
+
+    def _batch(self, count):
+        return [
+            PendingRead(DeviceReadCommand(board_id=board, device_id=0x01, device_type=0x01, sequence=board))
+            for board in range(1, count + 1)
+        ]
+
+    def test_001_out_of_order_responses(self):
+        """ Test that responses arriving out of order are matched to their reads by
+        sequence number, with the batch written to the bus at once.
+        """
+        self.serial.responder = lambda requests: sum([_response(r) for r in reversed(requests)], [])
+        batch = self._batch(4)
+        self.device._dispatch_reads(batch)
+
+        self.assertEqual(len(self.serial.requests), 1)
+        self.assertEqual(len(self.serial.requests[0]), 4)
+        self.assertEqual([_reading(p) for p in batch], [1, 2, 3, 4])
+
+    def test_002_duplicate_sequence(self):
+        """ Test that reads in a batch with the same sequence number are given
+        distinct sequence numbers.
+        """
+        self.serial.responder = lambda requests: sum([_response(r) for r in requests], [])
+        batch = self._batch(3)
+        batch[2].request.sequence = batch[0].request.sequence
+        self.device._dispatch_reads(batch)
+
+        self.assertEqual(len(set(r.sequence for r in self.serial.requests[0])), 3)
+        self.assertEqual([_reading(p) for p in batch], [1, 2, 3])
+
+    def test_003_unknown_sequence(self):
+        """ Test that a stray response with a sequence number not in the batch (e.g.
+        a late response to an earlier read) is dropped.
+        """
+        def respond(requests):
+            stray = _response(requests[0], sequence=0x7F)
+            return stray + sum([_response(r) for r in requests], [])
+
+        self.serial.responder = respond
+        batch = self._batch(3)
+        self.device._dispatch_reads(batch)
+        self.assertEqual([_reading(p) for p in batch], [1, 2, 3])
+
+    def test_004_timeout_in_batch(self):
+        """ Test that reads still unanswered when the bus times out fail, while the
+        reads answered before it complete.
+        """
+        self.serial.responder = lambda requests: _response(requests[2]) + _response(requests[0])
+        batch = self._batch(4)
+        self.device._dispatch_reads(batch)
+
+        self.assertTrue(all(p.done for p in batch))
+        self.assertEqual(_reading(batch[0]), 1)
+        self.assertEqual(_reading(batch[2]), 3)
+        for pending in (batch[1], batch[3]):
+            with self.assertRaises(OpenDCREException) as ctx:
+                pending.result()
+            self.assertIn('No response from bus', str(ctx.exception))
+
+    def test_005_corrupt_response(self):
+        """ Test that a corrupt response causes the unanswered reads to be re-issued
+        one at a time, with sequence numbers not used in the batch.
+        """
+        def respond(requests):
+            if len(requests) == 1:
+                return _response(requests[0])
+            corrupt = _response(requests[1])
+            corrupt[-3] ^= 0xFF
+            return _response(requests[0]) + corrupt + _response(requests[2])
+
+        self.serial.responder = respond
+        batch = self._batch(3)
+        batch_sequences = set(p.request.sequence for p in batch)
+        self.device._dispatch_reads(batch)
+
+        self.assertEqual([_reading(p) for p in batch], [1, 2, 3])
+
+        # the first read was answered before the corrupt response, so only the
+        # other two were re-issued, each on its own
+        reissued = self.serial.requests[1:]
+        self.assertEqual([len(r) for r in reissued], [1, 1])
+        self.assertEqual(sorted(r[0].board_id for r in reissued), [2, 3])
+        sequences = [r[0].sequence for r in reissued]
+        self.assertEqual(len(set(sequences)), 2)
+        self.assertFalse(batch_sequences.intersection(sequences))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound PLC Read Scheduler Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import threading
+import time
+import unittest
+
+from opendcre_southbound.devicebus.devices.plc.plc_scheduler import PLCReadScheduler
+from opendcre_southbound.errors import OpenDCREException
+
+
+class PLCSchedulerTestCase(unittest.TestCase):
+    """ Test batching reads with the PLCReadScheduler.
+    """
+    def test_001_single_read(self):
+        """ Test a single read being dispatched on its own.
+        """
+        batches = []
+
+        def dispatch(batch):
+            batches.append([p.request for p in batch])
+            for p in batch:
+                p.set_response(p.request * 2)
+
+        scheduler = PLCReadScheduler(dispatch)
+        self.assertEqual(scheduler.read(21), 42)
+        self.assertEqual(batches, [[21]])
+
+    def test_002_concurrent_reads_batched(self):
+        """ Test that reads submitted while the bus is busy are dispatched together.
+        """
+        batches = []
+        busy = threading.Event()
+        release = threading.Event()
+
+        def dispatch(batch):
+            batches.append(sorted(p.request for p in batch))
+            if len(batches) == 1:
+                busy.set()
+                release.wait(5)
+            for p in batch:
+                p.set_response(p.request * 2)
+
+        scheduler = PLCReadScheduler(dispatch, max_batch=4)
+        results = {}
+
+        def read(value):
+            results[value] = scheduler.read(value)
+
+        first = threading.Thread(target=read, args=(0,))
+        first.start()
+        busy.wait(5)
+
+        # with the first read holding the bus, queue up a few more
+        threads = [threading.Thread(target=read, args=(i,)) for i in range(1, 7)]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)
+        release.set()
+
+        first.join(5)
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(results, {i: i * 2 for i in range(7)})
+        self.assertEqual(batches[0], [0])
+        self.assertEqual(sorted(sum(batches[1:], [])), range(1, 7))
+        self.assertEqual(len(batches[1]), 4)
+
+    def test_003_dispatch_exception(self):
+        """ Test that an exception raised by the dispatch is raised for the read.
+        """
+        def dispatch(batch):
+            raise ValueError('bad dispatch')
+
+        scheduler = PLCReadScheduler(dispatch)
+        with self.assertRaises(ValueError):
+            scheduler.read(1)
+
+        # the scheduler should still be usable after a failed dispatch
+        with self.assertRaises(ValueError):
+            scheduler.read(2)
+
+    def test_004_read_not_completed(self):
+        """ Test that a read the dispatch does not complete fails.
+        """
+        def dispatch(batch):
+            pass
+
+        scheduler = PLCReadScheduler(dispatch)
+        with self.assertRaises(OpenDCREException):
+            scheduler.read(1)
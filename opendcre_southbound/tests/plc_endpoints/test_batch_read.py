@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound PLC Batch Read Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import json
+import unittest
+
+from opendcre_southbound.tests.test_config import PREFIX
+from vapor_common import http
+from vapor_common.errors import VaporHTTPError
+
+
+class BatchReadTestCase(unittest.TestCase):
+    """ Test reading multiple devices in a single request.
+    """
+    def test_001_batch_read(self):
+        """ Read several devices on a board, specified in the different supported forms.
+        """
+        r = http.post(PREFIX + '/read', data=json.dumps({
+            'devices': [
+                ['thermistor', 'rack_1', '00000000', '01FF'],
+                ['thermistor', '00000000', '03FF'],
+                {'device_type': 'thermistor', 'rack_id': 'rack_1', 'board_id': '00000000', 'device_id': '08FF'}
+            ]
+        }))
+        self.assertTrue(http.request_ok(r.status_code))
+
+        readings = r.json()['readings']
+        self.assertEqual(len(readings), 3)
+        self.assertEqual([x['device_id'] for x in readings], ['01FF', '03FF', '08FF'])
+        for reading in readings:
+            self.assertNotIn('error', reading)
+            self.assertIn('temperature_c', reading['reading'])
+
+    def test_002_batch_read_errors(self):
+        """ Read several devices where some of the devices can not be read. Each
+        failure should be reported on its own, without failing the other reads.
+        """
+        r = http.post(PREFIX + '/read', data=json.dumps({
+            'devices': [
+                ['thermistor', 'rack_1', '00000000', '01FF'],
+                ['thermistor', 'rack_1', 'zz', '01FF'],
+                ['thermistor', 'rack_1', '00000000', '03FF']
+            ]
+        }))
+        self.assertTrue(http.request_ok(r.status_code))
+
+        readings = r.json()['readings']
+        self.assertEqual(len(readings), 3)
+        self.assertIn('temperature_c', readings[0]['reading'])
+        self.assertIn('error', readings[1])
+        self.assertNotIn('reading', readings[1])
+        self.assertIn('temperature_c', readings[2]['reading'])
+
+    def test_003_batch_read_invalid_body(self):
+        """ Issue batch reads with invalid request bodies.
+        """
+        with self.assertRaises(VaporHTTPError) as ctx:
+            http.post(PREFIX + '/read', data='not json')
+        self.assertEqual(ctx.exception.status, 500)
+
+        with self.assertRaises(VaporHTTPError) as ctx:
+            http.post(PREFIX + '/read', data=json.dumps({'boards': []}))
+        self.assertEqual(ctx.exception.status, 500)
+
+        with self.assertRaises(VaporHTTPError) as ctx:
+            http.post(PREFIX + '/read', data=json.dumps({'devices': [['thermistor', '00000000']]}))
+        self.assertEqual(ctx.exception.status, 500)
+
+    def test_004_batch_read_empty(self):
+        """ Issue a batch read with no devices.
+        """
+        r = http.post(PREFIX + '/read', data=json.dumps({'devices': []}))
+        self.assertTrue(http.request_ok(r.status_code))
+        self.assertEqual(r.json(), {'readings': []})
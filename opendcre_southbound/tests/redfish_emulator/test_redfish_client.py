@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+""" OpenDCRE Southbound Redfish Client Tests
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import time
+import unittest
+
+from requests import sessions
+
+from opendcre_southbound.devicebus.devices.redfish import redfish_connection, vapor_redfish
+from opendcre_southbound.devicebus.devices.redfish.redfish_connection import RedfishClient, RedfishResourceCache
+from opendcre_southbound.errors import OpenDCREException
+
+
+class RedfishClientTestCase(unittest.TestCase):
+    """ Test making requests to the Redfish emulator with the RedfishClient.
+    """
+    base_link = 'http://redfish-emulator:5040'
+
+    def make_client(self, **kwargs):
+        client = RedfishClient(username='root', password='redfish', **kwargs)
+        self.addCleanup(client.close)
+
+        # track the links requested by the client
+        self.requested = []
+        client.session.hooks['response'].append(lambda r, *args, **kw: self.requested.append(r.url))
+        return client
+
+    def test_001_get_data(self):
+        """ Test getting data with the client.
+        """
+        client = self.make_client()
+        link = self.base_link + '/redfish/v1/Chassis/1U'
+
+        data = redfish_connection.get_data(link=link, timeout=5, username='root', password='redfish', client=client)
+        self.assertEqual(data, redfish_connection.get_data(link=link, timeout=5, username='root', password='redfish'))
+        self.assertEqual(self.requested, [link])
+
+    def test_002_root_path_cached(self):
+        """ Test that the root path is only retrieved once by the client.
+        """
+        client = self.make_client()
+
+        for _ in range(3):
+            link = redfish_connection._build_link('redfish-emulator', 5040, path='root', timeout=5, client=client)
+            self.assertEqual(link, self.base_link + '/redfish/v1')
+        self.assertEqual(self.requested, [self.base_link + '/redfish'])
+
+        # once reset, the root path is retrieved again
+        client.reset()
+        redfish_connection._build_link('redfish-emulator', 5040, path='root', timeout=5, client=client)
+        self.assertEqual(self.requested, [self.base_link + '/redfish'] * 2)
+
+    def test_003_find_links(self):
+        """ Test finding the Redfish links with the client.
+        """
+        client = self.make_client()
+
+        links = redfish_connection.find_links('redfish-emulator', 5040, 5, 'root', 'redfish', client=client)
+        self.assertEqual(links, redfish_connection.find_links('redfish-emulator', 5040, 5, 'root', 'redfish'))
+
+    def test_004_timeouts(self):
+        """ Test the connect and read timeouts used for requests.
+        """
+        self.assertEqual(self.make_client(timeout=5)._timeout(None), (5, 5))
+        self.assertEqual(self.make_client(timeout=5, connect_timeout=1)._timeout(None), (1, 5))
+        self.assertEqual(self.make_client(timeout=5, connect_timeout=1)._timeout(3), (1, 3))
+
+    def test_005_connection_error(self):
+        """ Test that a request which can not connect fails once its retries are used up.
+        """
+        client = self.make_client(max_retries=1, backoff_factor=0)
+
+        with self.assertRaises(OpenDCREException):
+            redfish_connection.get_data(link='http://redfish-emulator:5041/redfish', timeout=1, client=client)
+
+    def test_006_no_netrc_lookup(self):
+        """ Test that requests made without credentials do not look for credentials
+        in a netrc file, which imports netrc, and so deadlocks registration threads
+        while the import lock is held.
+        """
+        client = self.make_client()
+
+        def get_netrc_auth(url, raise_errors=False):
+            raise AssertionError('netrc looked up for {}'.format(url))
+
+        get_netrc_auth_orig = sessions.get_netrc_auth
+        sessions.get_netrc_auth = get_netrc_auth
+        try:
+            self.assertEqual(client.get(self.base_link + '/redfish', auth=False).status_code, 200)
+        finally:
+            sessions.get_netrc_auth = get_netrc_auth_orig
+
+
+class RedfishResourceCacheTestCase(unittest.TestCase):
+    """ Test caching Redfish resources with the RedfishResourceCache.
+    """
+    thermal_link = 'http://redfish-emulator:5040/redfish/v1/Chassis/1U/Thermal'
+
+    def make_cache(self, **kwargs):
+        client = RedfishClient(username='root', password='redfish')
+        self.addCleanup(client.close)
+
+        # track the status of the responses to the client
+        self.statuses = []
+        client.session.hooks['response'].append(lambda r, *args, **kw: self.statuses.append(r.status_code))
+        return RedfishResourceCache(client, **kwargs)
+
+    def test_001_index(self):
+        """ Test that the members of the resource's collections are indexed by name.
+        """
+        cache = self.make_cache()
+
+        index = cache.get_index(self.thermal_link)
+        self.assertEqual(sorted(index['Fans'].keys()), ['BaseBoard System Fan', 'BaseBoard System Fan Backup'])
+        self.assertEqual(index['Fans']['BaseBoard System Fan']['Reading'], 2100)
+        self.assertIn('CPU1 Temp', index['Temperatures'])
+
+    def test_002_fetch_shared(self):
+        """ Test that reads within the TTL share a single fetch of the resource.
+        """
+        cache = self.make_cache(ttl=60)
+        kwargs = {'links': [self.thermal_link], 'timeout': 5, 'username': 'root', 'password': 'redfish'}
+
+        for _ in range(3):
+            fan = vapor_redfish.get_thermal_sensor('Fans', 'BaseBoard System Fan', resource_cache=cache, **kwargs)
+            self.assertEqual(fan, vapor_redfish.get_thermal_sensor('Fans', 'BaseBoard System Fan', **kwargs))
+            temp = vapor_redfish.get_thermal_sensor('Temperatures', 'CPU1 Temp', resource_cache=cache, **kwargs)
+            self.assertEqual(temp['temperature_c'], 41.0)
+
+        self.assertEqual(cache.fetch_count, 1)
+        self.assertEqual(self.statuses, [200])
+
+    def test_003_conditional_fetch(self):
+        """ Test that once the TTL has passed, the resource is requested again with
+        its ETag, and the unchanged resource is not sent again.
+        """
+        cache = self.make_cache(ttl=0.1)
+
+        index = cache.get_index(self.thermal_link)
+        time.sleep(0.2)
+        self.assertIs(cache.get_index(self.thermal_link), index)
+
+        self.assertEqual(cache.fetch_count, 2)
+        self.assertEqual(self.statuses, [200, 304])
+
+    def test_004_clear(self):
+        """ Test that a cleared cache fetches the resource again.
+        """
+        cache = self.make_cache(ttl=60)
+
+        cache.get_index(self.thermal_link)
+        cache.clear()
+        cache.get_index(self.thermal_link)
+
+        self.assertEqual(cache.fetch_count, 2)
+        self.assertEqual(self.statuses, [200, 200])
+
+    def test_005_bad_link(self):
+        """ Test getting a resource which does not exist.
+        """
+        cache = self.make_cache()
+
+        with self.assertRaises(ValueError):
+            cache.get_index('http://redfish-emulator:5040/redfish/v1/Chassis/2U/Thermal')
+
+    def test_006_index_repeated_name(self):
+        """ Test that the first member is indexed where a name is repeated within a
+        collection, as it would be found by searching the collection in order.
+        """
+        index = redfish_connection.index_by_name({
+            'Name': 'Thermal',
+            'Fans': [
+                {'Name': 'Fan 1', 'Reading': 2100},
+                {'Name': 'Fan 2', 'Reading': 2200},
+                {'Name': 'Fan 1', 'Reading': 0},
+                {'Reading': 1000}
+            ]
+        })
+        self.assertEqual(sorted(index.keys()), ['Fans'])
+        self.assertEqual(index['Fans']['Fan 1']['Reading'], 2100)
+        self.assertEqual(index['Fans']['Fan 2']['Reading'], 2200)
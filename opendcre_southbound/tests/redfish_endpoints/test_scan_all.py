@@ -134,4 +134,23 @@ class RedfishScanAllTestCase(unittest.TestCase):
             self.assertIn('device_id', device)
 
             dev_type = device['device_type']
-            self.assertIn(dev_type.lower(), device_types)
\ No newline at end of file
+            self.assertIn(dev_type.lower(), device_types)
+
+    def test_03_incremental_scan(self):
+        """ Test the OpenDCRE incremental scan endpoint. Nothing has changed on the
+        Redfish emulator since the previous scan, so no changes should be reported.
+        """
+        http.get(PREFIX + '/scan/force')
+
+        for _ in range(2):
+            r = http.get(PREFIX + '/scan/incremental')
+            self.assertTrue(http.request_ok(r.status_code))
+
+            response = r.json()
+            self.assertEqual(response['changes'], {'added': [], 'removed': [], 'changed': []})
+            self.assertEqual(len(response['racks']), 1)
+
+            boards = response['racks'][0]['boards']
+            self.assertEqual(len(boards), 1)
+            self.assertEqual(boards[0]['board_id'], '70000000')
+            self.assertEqual(len(boards[0]['devices']), 11)
@@ -30,7 +30,19 @@ import unittest
 import sys, logging
 from vapor_common.test_utils import run_suite
 
+from endpoint_utilities.test_device_router import DeviceRouterTestCase
 from endpoint_utilities.test_endpoint_utils import EndpointUtilitiesTestCase
+from endpoint_utilities.test_fan_out import FanOutTestCase
+from endpoint_utilities.test_redfish_discovery import RedfishDiscoveryTestCase
+from endpoint_utilities.test_registration import RegistrationTestCase
+from endpoint_utilities.test_device_health import DeviceHealthTestCase
+from endpoint_utilities.test_response_cache import ResponseCacheTestCase
+from endpoint_utilities.test_scan_cache import ScanCacheTestCase
+from endpoint_utilities.test_scan_results import ScanResultsTestCase
+from endpoint_utilities.test_sequence import SequenceAllocatorTestCase
+from endpoint_utilities.test_single_flight import SingleFlightTestCase
+from endpoint_utilities.test_snapshot import StartupSnapshotTestCase
+from endpoint_utilities.test_telemetry import TelemetryTestCase
 
 
 def get_suite():
@@ -38,6 +50,18 @@ def get_suite():
     """
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(EndpointUtilitiesTestCase))
+    suite.addTest(unittest.makeSuite(ScanCacheTestCase))
+    suite.addTest(unittest.makeSuite(DeviceRouterTestCase))
+    suite.addTest(unittest.makeSuite(FanOutTestCase))
+    suite.addTest(unittest.makeSuite(ScanResultsTestCase))
+    suite.addTest(unittest.makeSuite(TelemetryTestCase))
+    suite.addTest(unittest.makeSuite(SingleFlightTestCase))
+    suite.addTest(unittest.makeSuite(ResponseCacheTestCase))
+    suite.addTest(unittest.makeSuite(SequenceAllocatorTestCase))
+    suite.addTest(unittest.makeSuite(RedfishDiscoveryTestCase))
+    suite.addTest(unittest.makeSuite(StartupSnapshotTestCase))
+    suite.addTest(unittest.makeSuite(RegistrationTestCase))
+    suite.addTest(unittest.makeSuite(DeviceHealthTestCase))
     return suite
 
 if __name__ == '__main__':
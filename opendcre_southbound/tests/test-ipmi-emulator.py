@@ -30,6 +30,9 @@ import sys, logging
 from vapor_common.test_utils import run_suite
 
 from ipmi_emulator.test_ipmi_emulator import IPMIEmulatorTestCase
+from ipmi_emulator.test_ipmi_session_pool import IPMISessionPoolTestCase
+from ipmi_emulator.test_ipmi_sdr_cache import IPMISdrCacheTestCase
+from ipmi_emulator.test_ipmi_transport import IPMITransportTestCase
 
 
 def get_suite():
@@ -37,6 +40,9 @@ def get_suite():
     """
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(IPMIEmulatorTestCase))
+    suite.addTest(unittest.makeSuite(IPMISessionPoolTestCase))
+    suite.addTest(unittest.makeSuite(IPMISdrCacheTestCase))
+    suite.addTest(unittest.makeSuite(IPMITransportTestCase))
     return suite
 
 
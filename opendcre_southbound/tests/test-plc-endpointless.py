@@ -25,6 +25,10 @@ from vapor_common.test_utils import run_suite
 
 from plc_endpointless.test_devicebus import DevicebusTestCase
 from plc_endpointless.test_devicebus_byte_proto import ByteProtocolTestCase
+from plc_endpointless.test_devicebus_reader import DevicebusReaderTestCase
+from plc_endpointless.test_plc_scheduler import PLCSchedulerTestCase
+from plc_endpointless.test_plc_bus import DeviceBusConnectionTestCase
+from plc_endpointless.test_plc_dispatch import PLCDispatchTestCase
 from plc_endpointless.test_chassis_location import ChassisLocationTestCase
 
 
@@ -34,6 +38,10 @@ def get_suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(DevicebusTestCase))
     suite.addTest(unittest.makeSuite(ByteProtocolTestCase))
+    suite.addTest(unittest.makeSuite(DevicebusReaderTestCase))
+    suite.addTest(unittest.makeSuite(PLCSchedulerTestCase))
+    suite.addTest(unittest.makeSuite(DeviceBusConnectionTestCase))
+    suite.addTest(unittest.makeSuite(PLCDispatchTestCase))
     suite.addTest(unittest.makeSuite(ChassisLocationTestCase))
     return suite
 
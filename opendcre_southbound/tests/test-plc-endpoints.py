@@ -39,6 +39,7 @@ from plc_endpoints.test_vapor_battery import VaporBatteryTestCase
 from plc_endpoints.test_chamber_led import ChamberLedTestCase
 from plc_endpoints.test_chamber_fan import ChamberFanSpeedTestCase
 from plc_endpoints.test_host_info import HostInfoTestCase
+from plc_endpoints.test_batch_read import BatchReadTestCase
 
 
 def get_suite():
@@ -61,6 +62,7 @@ def get_suite():
     suite.addTest(unittest.makeSuite(ChamberLedTestCase))
     suite.addTest(unittest.makeSuite(ChamberFanSpeedTestCase))
     suite.addTest(unittest.makeSuite(HostInfoTestCase))
+    suite.addTest(unittest.makeSuite(BatchReadTestCase))
     return suite
 
 
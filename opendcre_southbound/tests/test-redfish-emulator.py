@@ -27,11 +27,14 @@ import sys, logging
 from vapor_common.test_utils import run_suite
 
 from redfish_emulator.test_redfish_emulator import RedfishTestCase
+from redfish_emulator.test_redfish_client import RedfishClientTestCase, RedfishResourceCacheTestCase
 
 
 def get_suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(RedfishTestCase))
+    suite.addTest(unittest.makeSuite(RedfishClientTestCase))
+    suite.addTest(unittest.makeSuite(RedfishResourceCacheTestCase))
     return suite
 
 if __name__ == '__main__':
@@ -25,12 +25,20 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
 """
+import bisect
 import errno
+import gzip
+import hashlib
 import json
 import logging
 import os
+import sys
+import tempfile
 import threading
-from Queue import Queue
+import time
+from collections import OrderedDict
+from cStringIO import StringIO
+from Queue import Empty, Queue
 
 from flask import current_app
 
@@ -270,24 +278,255 @@ def check_valid_board(board_id=None):
 # Cache Utilities
 # -------------------------------------
 
+def write_json_atomic(path, data, prefix):
+    """ Write the given data to a JSON file atomically, so a concurrent reader
+    never sees a partially written file. The data is written to a temporary file
+    in the same directory, which then replaces the file. The directory is created
+    if it does not exist.
+
+    Args:
+        path (str): the path of the file to write.
+        data: the JSON-serializable data to write.
+        prefix (str): the prefix of the name of the temporary file.
+
+    Raises:
+        OSError | IOError: the file could not be written.
+        TypeError | ValueError: the data could not be serialized to JSON.
+    """
+    _dir, _ = os.path.split(path)
+    if _dir:
+        try:
+            os.makedirs(_dir)
+        except OSError as e:
+            if e.errno != errno.EEXIST or not os.path.isdir(_dir):
+                raise
+
+    fd, tmp_path = tempfile.mkstemp(dir=_dir or '.', prefix=prefix)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        # mkstemp creates the file readable by the owner only
+        os.chmod(tmp_path, 0o644)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+class ScanPayload(object):
+    """ A pre-rendered JSON payload for a scan cache snapshot, with its strong ETag.
+
+    The gzip-compressed variant of the payload is only generated the first time it
+    is requested.
+    """
+    def __init__(self, data, indent=None):
+        """ Create a new ScanPayload.
+
+        Args:
+            data (dict): the data to render.
+            indent (int): the indent level of the rendered JSON. if None, the JSON
+                is rendered compactly.
+        """
+        self.body = json.dumps(data, indent=indent)
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.gzip_etag = self.etag + '-gzip'
+        self._gzip_body = None
+
+    @property
+    def gzip_body(self):
+        """ The payload, compressed with gzip.
+        """
+        if self._gzip_body is None:
+            buf = StringIO()
+            # the mtime is fixed so that the compressed payload is the same each time
+            # it is generated for the same body
+            with gzip.GzipFile(fileobj=buf, mode='wb', mtime=0) as f:
+                f.write(self.body)
+            self._gzip_body = buf.getvalue()
+        return self._gzip_body
+
+
+class ScanCache(object):
+    """ Process-resident scan cache, backed by the scan cache file.
+
+    The cache is held in memory as an immutable snapshot -- readers are given the
+    current snapshot and must not modify it. Updates are made by building a new
+    dictionary (e.g. a modified deep copy of the snapshot) and setting it, which
+    swaps the snapshot and bumps the cache version.
+
+    The cache file is written atomically (to a temporary file which is then renamed
+    over the cache file), so a concurrent reader will never see a partially written
+    cache. The file is only re-read when its mtime, inode or size changes, which is
+    checked at most once every check_interval seconds.
+
+    The cache may be invalidated (e.g. when a devicebus interface is registered after
+    the scan was cached), which marks it stale. A stale cache is still returned by
+    get(), but should be replaced by a new scan. Each invalidation bumps the cache's
+    generation, so that a scan which was already running when the cache was
+    invalidated does not mark the cache fresh once it is written.
+    """
+    def __init__(self, path, check_interval=1):
+        """ Create a new ScanCache.
+
+        Args:
+            path (str): the path to the scan cache file.
+            check_interval (int | float): the minimum time, in seconds, between
+                checks of the cache file for changes made outside of this cache.
+        """
+        self.path = path
+        self.check_interval = check_interval
+
+        self.version = 0
+        self.generation = 0
+        self._fresh_generation = 0
+        self._data = {}
+        self._payload = None
+        self._payload_version = None
+        self._file_signature = None
+        self._last_check = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        """ Get the signature of the cache file, used to detect changes to the file.
+
+        Returns:
+            tuple | None: the (mtime, inode, size) of the file, or None if the file
+                does not exist.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime, st.st_ino, st.st_size
+
+    def _reload(self):
+        """ Reload the snapshot from the cache file if the file has changed since it
+        was last loaded or written. This should be called with the lock held.
+        """
+        now = time.time()
+        if self._last_check is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        signature = self._stat()
+        if signature == self._file_signature:
+            return
+
+        data = {}
+        if signature is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, IOError, ValueError) as e:
+                logger.warning('Unable to load scan cache from file {}: {}'.format(self.path, e))
+                data = {}
+
+        self._data = data
+        self._file_signature = signature
+        self.version += 1
+
+    def get(self):
+        """ Get the current scan cache snapshot.
+
+        Returns:
+            dict: the scan cache. if no cache exists, an empty dictionary is returned.
+                the returned dictionary is shared and must not be modified.
+        """
+        with self._lock:
+            self._reload()
+            return self._data
+
+    @property
+    def stale(self):
+        """ Whether the cache has been invalidated since its data was scanned.
+        """
+        return self._fresh_generation != self.generation
+
+    def invalidate(self):
+        """ Mark the scan cache as stale, so that it is replaced by the next scan.
+        """
+        with self._lock:
+            self.generation += 1
+
+    def set(self, data, generation=None):
+        """ Replace the scan cache with the given data and persist it to the cache file.
+
+        Args:
+            data (dict): the new scan cache. this becomes the cache snapshot, so it
+                must not be modified once set.
+            generation (int): the generation of the cache when the scan for the data
+                was started. if the cache has been invalidated since, it remains
+                stale. if None, the data is taken to be current.
+        """
+        with self._lock:
+            try:
+                write_json_atomic(self.path, data, prefix='.scan-cache-')
+            except (OSError, IOError) as e:
+                logger.error('Unable to write to cache file: {}'.format(self.path))
+                logger.exception(e)
+                raise
+
+            self._data = data
+            self._file_signature = self._stat()
+            self._last_check = time.time()
+            self._fresh_generation = self.generation if generation is None else generation
+            self.version += 1
+
+    def get_payload(self, render=None, indent=None):
+        """ Get the current scan cache snapshot as a pre-rendered JSON payload.
+
+        The payload is only re-rendered when the cache changes, so repeated requests
+        for an unchanged cache do not re-serialize it.
+
+        Args:
+            render (callable): a function which takes the scan cache snapshot and
+                returns the data to render (e.g. the snapshot with internal fields
+                filtered out). if None, the snapshot is rendered as-is.
+            indent (int): the indent level of the rendered JSON.
+
+        Returns:
+            ScanPayload: the rendered payload. if no cache exists, None is returned.
+        """
+        with self._lock:
+            self._reload()
+            if not self._data:
+                return None
+
+            if self._payload is None or self._payload_version != self.version:
+                data = render(self._data) if render is not None else self._data
+                self._payload = ScanPayload(data, indent=indent)
+                self._payload_version = self.version
+            return self._payload
+
+
+def _get_scan_cache_store():
+    """ Get the ScanCache for the app, creating it if it does not yet exist.
+
+    Returns:
+        ScanCache: the scan cache for the configured scan cache file.
+    """
+    store = current_app.config.get('SCAN_CACHE_STORE')
+    if store is None or store.path != current_app.config['SCAN_CACHE']:
+        store = ScanCache(current_app.config['SCAN_CACHE'])
+        current_app.config['SCAN_CACHE_STORE'] = store
+    return store
+
 
 def get_scan_cache():
     """ Convenience method to get the scan cache, as a dictionary.
 
+    The returned dictionary is the cache snapshot shared by all callers, so it
+    must not be modified. To update the cache, modify a copy of it and write
+    that with write_scan_cache.
+
     Returns:
         dict: the scan cache. if no cache exists, an empty dictionary
             is returned.
     """
-    cache_file = current_app.config['SCAN_CACHE']
-    try:
-        with open(cache_file, 'r') as f:
-            cache = json.load(f)
-    except (OSError, IOError):
-        return {}
-    return cache
+    return _get_scan_cache_store().get()
 
 
-def write_scan_cache(data):
+def write_scan_cache(data, generation=None):
     """ Write the given data to the scan cache.
 
     This method replaces the current scan cache with the given data. This
@@ -296,36 +535,519 @@ def write_scan_cache(data):
 
     Args:
         data (dict): the data to write to the cache file.
+        generation (int): the generation of the scan cache when the scan for the
+            data was started (see get_scan_cache_generation).
     """
-    cache_file = current_app.config['SCAN_CACHE']
-    _dir, _ = os.path.split(cache_file)
-    try:
-        os.makedirs(_dir)
-    except OSError as e:
-        if e.errno == errno.EEXIST and os.path.isdir(_dir):
-            pass
+    _get_scan_cache_store().set(data, generation=generation)
+
+
+def get_scan_cache_generation():
+    """ Get the generation of the scan cache, which changes each time the cache is
+    invalidated. This should be taken before scanning, and passed on to
+    write_scan_cache with the scan results.
+
+    Returns:
+        int: the scan cache generation.
+    """
+    return _get_scan_cache_store().generation
+
+
+def is_scan_cache_stale():
+    """ Check whether the scan cache has been invalidated (e.g. because a devicebus
+    interface was registered) since it was written.
+
+    Returns:
+        bool: True if the scan cache should be replaced by a new scan.
+    """
+    return _get_scan_cache_store().stale
+
+
+def get_scan_payload(render=None):
+    """ Convenience method to get the scan cache as a pre-rendered JSON payload.
+
+    The payload is rendered the same way as jsonify would render the scan cache.
+
+    Args:
+        render (callable): a function which takes the scan cache and returns the
+            data to render.
+
+    Returns:
+        ScanPayload: the rendered scan cache. if no cache exists, None is returned.
+    """
+    indent = 2 if current_app.config.get('JSONIFY_PRETTYPRINT_REGULAR') else None
+    return _get_scan_cache_store().get_payload(render=render, indent=indent)
+
+
+# -------------------------------------
+# Scan Utilities
+# -------------------------------------
+
+def _extend_unique(target, key, values):
+    """ Extend the list at target[key] with the given values, skipping any value
+    which is already in the list.
+
+    Args:
+        target (dict): the dictionary holding the list to extend.
+        key (str): the key of the list in the target dictionary.
+        values (list): the values to add to the list.
+    """
+    existing = target.setdefault(key, [])
+    for value in values:
+        if value not in existing:
+            existing.append(value)
+
+
+def _copy_record(record, exclude):
+    """ Copy a scan result record, along with any lists in it, leaving out the
+    given nested field (which is merged separately).
+
+    Args:
+        record (dict): the rack or board record to copy.
+        exclude (str): the name of the field to leave out of the copy.
+
+    Returns:
+        dict: the copied record.
+    """
+    return {k: list(v) if isinstance(v, list) else v for k, v in record.iteritems() if k != exclude}
+
+
+class ScanResults(object):
+    """ Accumulator which merges scan results for racks, boards, and devices.
+
+    Racks are indexed by rack_id, boards by (rack_id, board_id), and devices by
+    device_id within their board, so merging takes linear time in the size of the
+    results being merged. A rack, board, or device which is present in more than
+    one set of results appears once in the merged results -- for boards and racks,
+    the list fields (e.g. 'devices', 'hostnames') of later records are merged into
+    the first record without adding duplicates, and for any other fields (and for
+    duplicate devices) the first value merged is kept. Racks and
+    boards are kept in the order in which they were first merged.
+
+    Each set of results may be merged on behalf of a source (e.g. the devicebus
+    interface which produced it), so that a new set of results for that source
+    can later replace its previous results without rebuilding the whole merge.
+
+    Merged records are copies, so the merged results are not affected by later
+    changes to the given results (and vice versa).
+    """
+    def __init__(self, scan_results=None):
+        """ Create a new ScanResults.
+
+        Args:
+            scan_results (dict): initial scan results to merge in, if any.
+        """
+        self._racks = OrderedDict()
+        self._boards = {}
+        self._device_ids = {}
+
+        # the sources which contributed to each rack (by rack_id) and board (by
+        # (rack_id, board_id)), and the boards contributed by each source
+        self._rack_sources = {}
+        self._board_sources = {}
+        self._source_boards = {}
+
+        if scan_results:
+            self.merge(scan_results)
+
+    def merge(self, scan_results, source=None):
+        """ Merge a set of scan results in.
+
+        Args:
+            scan_results (dict): the scan results to merge.
+            source: an identifier for the source of the scan results, if any.
+        """
+        if not scan_results:
+            return
+
+        for rack in scan_results.get('racks') or []:
+            rack_id = rack['rack_id']
+            record = self._racks.get(rack_id)
+
+            if record is None:
+                record = _copy_record(rack, exclude='boards')
+                self._racks[rack_id] = record
+                self._boards[rack_id] = OrderedDict()
+            else:
+                for key, value in rack.iteritems():
+                    if key in ('rack_id', 'boards'):
+                        continue
+                    if isinstance(value, list):
+                        _extend_unique(record, key, value)
+                    elif key not in record:
+                        record[key] = value
+
+            if source is not None:
+                self._rack_sources.setdefault(rack_id, set()).add(source)
+
+            for board in rack.get('boards') or []:
+                self._merge_board(rack_id, board, source)
+
+    def _merge_board(self, rack_id, board, source):
+        """ Merge a single board record into the given rack.
+
+        Args:
+            rack_id (str): the id of the rack the board belongs to.
+            board (dict): the board record to merge.
+            source: an identifier for the source of the board record, if any.
+        """
+        key = (rack_id, board['board_id'])
+        record = self._boards[rack_id].get(board['board_id'])
+
+        if record is None:
+            record = _copy_record(board, exclude='devices')
+            self._boards[rack_id][board['board_id']] = record
+            self._device_ids[key] = set()
         else:
-            raise
-    try:
-        with open(cache_file, 'w+') as f:
-            json.dump(data, f)
-    except (OSError, IOError) as e:
-        logger.error('Unable to write to cache file: {}'.format(cache_file))
-        logger.exception(e)
-        raise
+            for field, value in board.iteritems():
+                if field == 'devices':
+                    continue
+                if isinstance(value, list):
+                    _extend_unique(record, field, value)
+                elif field not in record:
+                    record[field] = value
+
+        if 'devices' in board:
+            device_ids = self._device_ids[key]
+            devices = record.setdefault('devices', [])
+            for device in board['devices'] or []:
+                if device['device_id'] not in device_ids:
+                    device_ids.add(device['device_id'])
+                    devices.append(device)
+
+        if source is not None:
+            self._board_sources.setdefault(key, set()).add(source)
+            self._source_boards.setdefault(source, set()).add(key)
+
+    def replace(self, source, scan_results):
+        """ Replace the results previously merged for a source with a new set of
+        scan results for it.
+
+        Boards which were contributed only by the given source are dropped, and
+        then the new results are merged in. Boards which other sources also
+        contributed to are kept.
+
+        Args:
+            source: an identifier for the source of the scan results.
+            scan_results (dict): the new scan results for the source.
+        """
+        for key in self._source_boards.pop(source, set()):
+            sources = self._board_sources.get(key, set())
+            sources.discard(source)
+            if not sources:
+                rack_id, board_id = key
+                self._boards[rack_id].pop(board_id, None)
+                self._device_ids.pop(key, None)
+                self._board_sources.pop(key, None)
+
+        for rack_id, sources in self._rack_sources.items():
+            if source in sources:
+                sources.discard(source)
+                if not sources and not self._boards[rack_id]:
+                    del self._racks[rack_id]
+                    del self._boards[rack_id]
+                    del self._rack_sources[rack_id]
+
+        self.merge(scan_results, source=source)
+
+    def to_dict(self):
+        """ Get the merged scan results.
+
+        Returns:
+            dict: the merged scan results. the returned dictionary is newly built,
+                but its rack, board, and device records are shared with the
+                ScanResults, so they should not be modified.
+        """
+        racks = []
+        for rack_id, record in self._racks.iteritems():
+            rack = dict(record)
+            rack['boards'] = self._boards[rack_id].values()
+            racks.append(rack)
+        return {'racks': racks}
+
+
+def _index_boards(scan_results):
+    """ Index the boards in a set of scan results by (rack_id, board_id).
+
+    Args:
+        scan_results (dict): the scan results to index.
+
+    Returns:
+        OrderedDict: the boards, keyed by (rack_id, board_id).
+    """
+    boards = OrderedDict()
+    for rack in (scan_results or {}).get('racks') or []:
+        for board in rack.get('boards') or []:
+            boards[(rack['rack_id'], board['board_id'])] = board
+    return boards
+
+
+def diff_scan_results(old, new):
+    """ Get the differences in topology between two sets of scan results.
+
+    Boards are matched by rack_id and board_id, and devices within a board by
+    device_id. Internal cache annotations (the 'device_interface' board field)
+    are not compared.
+
+    Args:
+        old (dict): the previous scan results.
+        new (dict): the current scan results.
+
+    Returns:
+        dict: the boards which were 'added', 'removed', and 'changed'. Each board
+            is given by its 'rack_id' and 'board_id'. Changed boards also list the
+            ids of the devices which were 'added', 'removed', and 'changed' on them.
+    """
+    old_boards = _index_boards(old)
+    new_boards = _index_boards(new)
+
+    added = [{'rack_id': r, 'board_id': b} for r, b in new_boards if (r, b) not in old_boards]
+    removed = [{'rack_id': r, 'board_id': b} for r, b in old_boards if (r, b) not in new_boards]
+    changed = []
+
+    for key, new_board in new_boards.iteritems():
+        old_board = old_boards.get(key)
+        if old_board is None:
+            continue
+
+        old_devices = OrderedDict((d['device_id'], d) for d in old_board.get('devices') or [])
+        new_devices = OrderedDict((d['device_id'], d) for d in new_board.get('devices') or [])
+
+        devices = {
+            'added': [d for d in new_devices if d not in old_devices],
+            'removed': [d for d in old_devices if d not in new_devices],
+            'changed': [d for d in new_devices if d in old_devices and new_devices[d] != old_devices[d]]
+        }
+
+        fields_changed = any(
+            old_board.get(field) != new_board.get(field)
+            for field in set(old_board.keys() + new_board.keys())
+            if field not in ('devices', 'device_interface')
+        )
+
+        if fields_changed or any(devices.values()):
+            changed.append({'rack_id': key[0], 'board_id': key[1], 'devices': devices})
+
+    return {'added': added, 'removed': removed, 'changed': changed}
 
 
 # -------------------------------------
 # Device Interface Utilities
 # -------------------------------------
 
+class DeviceRouter(object):
+    """ Routing table used to map a board to the devicebus interface which handles it.
+
+    Single-board devices are keyed by board id, as well as by any hostnames and IP
+    addresses configured for them, in a hash map. Range devices are kept in a sorted
+    interval index, which is searched by bisection. Lookups are constant time for
+    single-board devices, and logarithmic in the number of range devices otherwise.
+
+    Where device board id ranges overlap, the board ids in the overlap are routed to
+    the device which was added first.
+
+    The table is updated incrementally as devices are added. Updates replace the
+    underlying index (rather than modifying it in place), so lookups do not need
+    to take the lock.
+    """
+    def __init__(self):
+        self._devices = {}
+        self._single_board_devices = {}
+
+        # the interval index, held as a tuple so that it can be swapped atomically. the
+        # first item is the sorted list of segment start ids, and the second is the
+        # corresponding list of (start, end, device) segments. segments do not overlap.
+        self._ranges = ([], [])
+
+        # devices keyed by device class, and the string ids of those devices, which are
+        # generated on first lookup for a class and reset whenever a device is added.
+        # the generation is bumped whenever a device is added, so that a lookup which
+        # raced with an add does not cache its (now stale) result.
+        self._interfaces = {}
+        self._interface_ids = {}
+        self._generation = 0
+
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_app_config(cls, app_config):
+        """ Build a routing table for the devices registered in the app config.
+
+        Args:
+            app_config (dict): the Flask application config, containing the
+                'DEVICES', 'SINGLE_BOARD_DEVICES' and 'RANGE_DEVICES' registered
+                with the app.
+
+        Returns:
+            DeviceRouter: the routing table for the registered devices.
+        """
+        router = cls()
+        for device in app_config['DEVICES'].itervalues():
+            router.add_device(device)
+        for key, device in app_config['SINGLE_BOARD_DEVICES'].iteritems():
+            router.add_single_board_device(key, device)
+        for device in app_config['RANGE_DEVICES']:
+            router.add_range_device(device)
+        return router
+
+    def add_device(self, device):
+        """ Add a devicebus interface to the routing table.
+
+        Args:
+            device (DevicebusInterface): the devicebus interface to add.
+        """
+        with self._lock:
+            self._add_device(device)
+
+    def _add_device(self, device):
+        """ Add a devicebus interface to the routing table. The lock must be held
+        by the caller.
+
+        Args:
+            device (DevicebusInterface): the devicebus interface to add.
+        """
+        self._devices[device.device_uuid] = device
+        self._interfaces = {}
+        self._interface_ids = {}
+        self._generation += 1
+
+    def add_single_board_device(self, key, device):
+        """ Route the given key to a single-board device.
+
+        Args:
+            key (int | str): the board id, hostname or IP address which the device
+                is looked up by.
+            device (DevicebusInterface): the devicebus interface for the board.
+        """
+        with self._lock:
+            if device.device_uuid not in self._devices:
+                self._add_device(device)
+            self._single_board_devices[key] = device
+
+    def add_range_device(self, device, board_id_range=None):
+        """ Route a range of board ids to a range device.
+
+        Args:
+            device (DevicebusInterface): the devicebus interface for the range.
+            board_id_range (tuple): the (min, max) board ids, inclusive, to route
+                to the device. if not specified, the device's board_id_range is used.
+        """
+        if device.device_uuid not in self._devices:
+            self.add_device(device)
+
+        low, high = board_id_range if board_id_range is not None else device.board_id_range
+
+        with self._lock:
+            starts, segments = self._ranges
+
+            # only the segments which may overlap the new range need to be looked at
+            first = max(0, bisect.bisect_right(starts, low) - 1)
+            last = bisect.bisect_right(starts, high)
+
+            merged = []
+            position = low
+            for segment in segments[first:last]:
+                # fill in any part of the new range which is not already covered by a
+                # segment -- board ids which are already routed keep their route.
+                start, end, _ = segment
+                if position <= high and start > position:
+                    merged.append((position, min(high, start - 1), device))
+                if end >= position:
+                    position = end + 1
+                merged.append(segment)
+
+            if position <= high:
+                merged.append((position, high, device))
+
+            segments = segments[:first] + merged + segments[last:]
+            self._ranges = ([x[0] for x in segments], segments)
+
+    def get_device(self, board_id):
+        """ Get the devicebus interface for a board.
+
+        Args:
+            board_id (int | str): the board id, hostname or IP address of the board.
+
+        Returns:
+            DevicebusInterface: the devicebus interface for the board. if none is
+                found, None is returned.
+        """
+        device = self._single_board_devices.get(board_id)
+        if device is not None:
+            return device
+
+        if isinstance(board_id, (int, long)):
+            starts, segments = self._ranges
+            idx = bisect.bisect_right(starts, board_id) - 1
+            if idx >= 0 and board_id <= segments[idx][1]:
+                return segments[idx][2]
+        return None
+
+    def get_interfaces(self, device):
+        """ Get all devicebus interfaces of the same type as the given device.
+
+        Args:
+            device (DevicebusInterface): the devicebus interface to match.
+
+        Returns:
+            dict: the matching devicebus interfaces, keyed by device uuid. this is
+                shared, so it must not be modified.
+        """
+        device_class = device.__class__
+        interfaces = self._interfaces.get(device_class)
+        if interfaces is None:
+            with self._lock:
+                generation = self._generation
+                devices = self._devices.items()
+
+            interfaces = {uid: dev for uid, dev in devices if isinstance(dev, device_class)}
+
+            with self._lock:
+                if self._generation == generation:
+                    self._interfaces[device_class] = interfaces
+        return interfaces
+
+    def get_interface_ids(self, device):
+        """ Get the ids of all devicebus interfaces of the same type as the given device.
+
+        Args:
+            device (DevicebusInterface): the devicebus interface to match.
+
+        Returns:
+            list[str]: the string representations of the matching devicebus interface
+                uuids. this is shared, so it must not be modified.
+        """
+        device_class = device.__class__
+        interface_ids = self._interface_ids.get(device_class)
+        if interface_ids is None:
+            generation = self._generation
+            interface_ids = map(str, self.get_interfaces(device).keys())
+
+            with self._lock:
+                if self._generation == generation:
+                    self._interface_ids[device_class] = interface_ids
+        return interface_ids
+
+
+def get_device_router():
+    """ Get the DeviceRouter for the app, building it from the registered devices
+    if it does not yet exist.
+
+    Returns:
+        DeviceRouter: the routing table for the app's devicebus interfaces.
+    """
+    router = current_app.config.get('DEVICE_ROUTER')
+    if router is None:
+        router = DeviceRouter.from_app_config(current_app.config)
+        current_app.config['DEVICE_ROUTER'] = router
+    return router
+
+
 def get_device_instance(board_id):
     """ Get a device instance for a given board ID.
 
-    This function first checks with all single-board devices for a matching instance,
-    and if located, returns the device (which presumably can then be used to handle a
-    command); if not found, then the range-devices are checked, and if the board_id
-    falls within the given range, we return that device. If nothing is found, an
+    The device is looked up in the app's DeviceRouter, which first checks for a
+    matching single-board device, and if not found, checks whether the board_id
+    falls within the range of one of the range-devices. If nothing is found, an
     OpenDCRE exception is raised.
 
     The board_id passed in here need not be just a board_id. Since we can do lookups
@@ -344,22 +1066,15 @@ def get_device_instance(board_id):
     if board_id is None:
         raise OpenDCREException('Board ID must be specified in retrieving devicebus instance.')
 
-    device = current_app.config['SINGLE_BOARD_DEVICES'].get(board_id, None)
+    device = get_device_router().get_device(board_id)
     if device is not None:
         return device
-    else:
-        logger.debug('current_app.config[RANGE_DEVICES] {}'.format(current_app.config['RANGE_DEVICES']))
-
-        for range_device in current_app.config['RANGE_DEVICES']:
-            # Does this work for multiple range devices? It just returns the first one. (Code review)
-            if range_device.board_id_range[0] <= board_id <= range_device.board_id_range[1]:
-                return range_device
 
-        raise OpenDCREException(
-            'Board ID ({}) not associated with any registered devicebus handler.'.format(
-                hex(board_id) if isinstance(board_id, int) else board_id
-            )
+    raise OpenDCREException(
+        'Board ID ({}) not associated with any registered devicebus handler.'.format(
+            hex(board_id) if isinstance(board_id, int) else board_id
         )
+    )
 
 
 # -------------------------------------
@@ -392,19 +1107,34 @@ def get_device_instance(board_id):
 # Please refrain from modifying / moving / removing this unless you really
 # know what you are doing and what side effects you should expect by making
 # those modifications.
+#
+# the same applies to threaded registration of Redfish devices, which talk to
+# the servers with requests. codecs are cached by the name they are looked up
+# by, so requests' 'utf8' lookup is cached separately from pyghmi's 'utf-8', and
+# urllib3 imports atexit the first time a connection pool is created, so a pool
+# is created (and closed) here. the netrc lookup, which requests imports on every
+# unauthenticated request, is skipped by the RedfishClient instead, since an
+# import statement blocks on the import lock even if the module is loaded.
 # -----------------------------------------------------------------------------
 def cache_registration_dependencies():
-    """ Convenience method to cache pyghmi dependencies which may not already
-    be present in OpenDCRE Southbound.
+    """ Convenience method to cache pyghmi and requests dependencies which may
+    not already be present in OpenDCRE Southbound.
 
-    This should be called prior to registering devices, specifically for IPMI,
-    so that dependency import is not done in the thread, which causes a deadlock
-    in Python 2
+    This should be called prior to registering devices, specifically for IPMI
+    and Redfish, so that dependency import is not done in the thread, which
+    causes a deadlock in Python 2
     """
     pyghmi_codecs = ['idna', 'utf-8', 'iso-8859-1', 'utf-16le']
     for codec in pyghmi_codecs:
         unicode('x', 'utf_8').encode(codec).decode(codec)
 
+    requests_codecs = ['utf8']
+    for codec in requests_codecs:
+        unicode('x', 'utf_8').encode(codec).decode(codec)
+
+    from requests.packages import urllib3
+    urllib3.PoolManager().connection_from_url('http://localhost').close()
+
 
 class Worker(threading.Thread):
     """ Worker thread executing tasks assigned in a tasks queue.
@@ -429,8 +1159,12 @@ class Worker(threading.Thread):
 
 class ThreadPool(object):
     """ Manages a task queue which is given to a pool of worker threads.
+
+    A pool with a thread count of 0 has no workers - each task is run in the
+    calling thread as it is added.
     """
     def __init__(self, thread_count):
+        self.thread_count = thread_count
         self.tasks = Queue(thread_count)
         for _ in xrange(thread_count):
             Worker(self.tasks)
@@ -443,7 +1177,15 @@ class ThreadPool(object):
             *args: arguments to the method
             **kwargs: keyword arguments to the method
         """
-        self.tasks.put((fn, args, kwargs))
+        if self.thread_count > 0:
+            self.tasks.put((fn, args, kwargs))
+            return
+
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            logger.error('Failed to complete task:')
+            logger.exception(e)
 
     def map(self, fn, args_list):
         """ Add a list of tasks to the queue.
@@ -459,3 +1201,95 @@ class ThreadPool(object):
         """ Wait until all of the tasks in the queue have completed.
         """
         self.tasks.join()
+
+
+def fan_out(fn, items, max_workers, timeout=None):
+    """ Apply a function to each of the given items concurrently, in a bounded pool
+    of worker threads, and yield the result for each item as it completes.
+
+    Each item is given `timeout` seconds, from when its worker starts on it, to
+    complete. An item which does not complete in time is reported as failed. Its
+    worker is abandoned (it is left to finish the item in the background, its
+    result is discarded, and it takes on no further items), and a new worker is
+    started in its place if items remain. So at most max_workers threads work
+    through the items at once, plus one thread for each timed out item which has
+    not yet finished.
+
+    Args:
+        fn (callable): the function to apply to each item.
+        items (list): the items to apply the function to.
+        max_workers (int): the maximum number of worker threads to run at once
+            (not counting abandoned workers).
+        timeout (int | float): the time, in seconds, each item is given to complete.
+            if None, items are not timed out.
+
+    Yields:
+        tuple: (item, result, exc_info) for each item, in order of completion. if
+            the function raised (or timed out), result is None and exc_info is the
+            exception info for the failure (as from sys.exc_info()); otherwise,
+            exc_info is None.
+    """
+    items = list(items)
+    tasks = Queue()
+    for index in xrange(len(items)):
+        tasks.put(index)
+    completed = Queue()
+
+    def work(abandoned):
+        while not abandoned.is_set():
+            try:
+                index = tasks.get_nowait()
+            except Empty:
+                return
+            completed.put((index, (time.time(), abandoned), None, None))
+            try:
+                result = fn(items[index])
+            except Exception:
+                completed.put((index, None, None, sys.exc_info()))
+            else:
+                completed.put((index, None, result, None))
+
+    def start_worker():
+        t = threading.Thread(target=work, args=(threading.Event(),))
+        t.daemon = True
+        t.start()
+
+    for _ in xrange(min(max(1, int(max_workers)), len(items))):
+        start_worker()
+
+    pending = set(xrange(len(items)))
+    running = {}
+
+    while pending:
+        wait = None
+        if timeout is not None and running:
+            wait = max(0, min(started for started, _ in running.values()) + timeout - time.time())
+
+        try:
+            index, worker, result, exc_info = completed.get(timeout=wait)
+        except Empty:
+            now = time.time()
+            for index, (started, abandoned) in running.items():
+                if now - started >= timeout:
+                    del running[index]
+                    pending.discard(index)
+                    # the worker stops once it finishes the item, so it is replaced
+                    abandoned.set()
+                    if not tasks.empty():
+                        start_worker()
+                    e = OpenDCREException('Timed out after {} seconds.'.format(timeout))
+                    yield items[index], None, (OpenDCREException, e, None)
+            continue
+
+        if index not in pending:
+            # the item has already been timed out
+            continue
+
+        if worker is not None:
+            # the worker has started on the item - track its start time, and the
+            # event used to abandon the worker if the item times out
+            running[index] = worker
+        else:
+            running.pop(index, None)
+            pending.discard(index)
+            yield items[index], result, exc_info
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+""" Micro-benchmark for board to devicebus interface lookup.
+
+    Compares DeviceRouter lookups against the linear single-board / range-device
+    search it replaced (reproduced below), for increasing numbers of boards. Half
+    of the boards are single-board devices (e.g. IPMI BMCs, keyed by board id and
+    hostname), and half are range devices (e.g. PLC buses, one board id range each).
+
+    To Run:  From the repository root,
+                PYTHONPATH=.:./opendcre_southbound python tools/device_router_benchmark.py [iterations]
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import itertools
+import random
+import sys
+import timeit
+import uuid
+
+from opendcre_southbound.utils import DeviceRouter
+
+
+class BenchDevice(object):
+    """ Minimal stand-in for a devicebus interface.
+    """
+    def __init__(self, board_id_range=None):
+        self.device_uuid = uuid.uuid4()
+        self.board_id_range = board_id_range
+
+
+def linear_lookup(single_board_devices, range_devices, board_id):
+    """ Linear board lookup (previous implementation).
+    """
+    device = single_board_devices.get(board_id, None)
+    if device is not None:
+        return device
+    for range_device in range_devices:
+        if range_device.board_id_range[0] <= board_id <= range_device.board_id_range[1]:
+            return range_device
+    return None
+
+
+def bench(label, fn, iterations):
+    """ Time the given function and print the per-call cost.
+    """
+    elapsed = min(timeit.repeat(fn, number=iterations, repeat=3))
+    print '  {:<32} {:>8.2f} us/op'.format(label, elapsed / iterations * 1e6)
+    return elapsed
+
+
+def main(iterations):
+    for board_count in (100, 1000, 10000):
+        single_board_devices = {}
+        range_devices = []
+        router = DeviceRouter()
+
+        for i in xrange(board_count / 2):
+            device = BenchDevice()
+            single_board_devices[0x40000000 + i] = device
+            single_board_devices['host-{}'.format(i)] = device
+            router.add_single_board_device(0x40000000 + i, device)
+            router.add_single_board_device('host-{}'.format(i), device)
+
+            device = BenchDevice((i * 0x100, i * 0x100 + 0xff))
+            range_devices.append(device)
+            router.add_range_device(device)
+
+        rng = random.Random(board_count)
+        board_ids = [rng.randrange(board_count / 2) * 0x100 + 0x10 for _ in xrange(100)]
+        lookups = itertools.cycle(board_ids)
+
+        for board_id in board_ids:
+            assert router.get_device(board_id) is linear_lookup(single_board_devices, range_devices, board_id)
+
+        print '{} boards:'.format(board_count)
+        bench('single-board (router)', lambda: router.get_device('host-1'), iterations)
+        old = bench('range (linear)', lambda: linear_lookup(
+            single_board_devices, range_devices, next(lookups)), iterations)
+        new = bench('range (router)', lambda: router.get_device(next(lookups)), iterations)
+        print '  {:<32} {:>8.1f}x'.format('speedup', old / new)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+""" Benchmark for issuing IPMI commands to many BMCs concurrently.
+
+    Compares the multiplexed IpmiTransport (one I/O thread for all BMCs) against
+    pyghmi with a thread per BMC (as IPMI device registration and request handling
+    use it). Each simulated BMC gets its own session, logs in, and issues a number
+    of Get Chassis Status commands.
+
+    BMCs are simulated with sessions to one or more IPMI emulators. The emulator
+    accepts any username, so a distinct username is used for each simulated BMC to
+    give each its own session (pyghmi shares a session between Commands with the
+    same BMC address and credentials). Run several emulators on different ports,
+    e.g. `python ipmi_emulator.py -p 6231`, to keep a single emulator from being
+    the bottleneck.
+
+    To Run:  From the repository root,
+                PYTHONPATH=.:./opendcre_southbound python tools/ipmi_transport_benchmark.py \
+                    --bmcs ipmi-emulator:623 --sessions 100 500 1000 --requests 5
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import argparse
+import threading
+import time
+
+from pyghmi.ipmi import command
+
+from opendcre_southbound.devicebus.devices.ipmi.vapor_ipmi_transport import IpmiTransport
+
+
+def get_targets(bmcs, sessions):
+    """ Get the (host, port, username) of each simulated BMC, spread over the BMCs.
+    """
+    addresses = []
+    for bmc in bmcs:
+        host, _, port = bmc.partition(':')
+        addresses.append((host, int(port or 623)))
+    return [addresses[i % len(addresses)] + ('user{}'.format(i),) for i in xrange(sessions)]
+
+
+def bench_pyghmi(targets, requests, password, timeout):
+    """ Issue the commands with pyghmi, from a thread per BMC. BMCs which have not
+    completed within the timeout are counted as errors.
+    """
+    errors = []
+    completed = []
+    succeeded = [0]
+    lock = threading.Lock()
+
+    def run(host, port, username):
+        try:
+            ipmicmd = command.Command(bmc=host, userid=username, password=password, port=port)
+            try:
+                for _ in xrange(requests):
+                    response = ipmicmd.raw_command(netfn=0x00, command=0x01)
+                    if 'error' in response:
+                        raise ValueError(response['error'])
+                    with lock:
+                        succeeded[0] += 1
+            finally:
+                ipmicmd.ipmi_session.logout()
+        except Exception as e:
+            with lock:
+                errors.append(e)
+        finally:
+            with lock:
+                completed.append(username)
+
+    threads = []
+    start = time.time()
+    for target in targets:
+        t = threading.Thread(target=run, args=target)
+        t.daemon = True
+        t.start()
+        threads.append(t)
+
+    deadline = start + timeout
+    for t in threads:
+        t.join(max(0, deadline - time.time()))
+    elapsed = time.time() - start
+
+    with lock:
+        errors = errors + [RuntimeError('did not complete within {}s'.format(timeout))] * (
+            len(targets) - len(completed))
+        return elapsed, len(threads), succeeded[0], errors
+
+
+def bench_transport(targets, requests, password, max_in_flight):
+    """ Issue the commands over the multiplexed transport, from a single thread.
+    """
+    transport = IpmiTransport(max_in_flight=max_in_flight)
+    try:
+        sessions = [transport.session(host, username, password, port=port) for host, port, username in targets]
+
+        start = time.time()
+        pending = [session.submit(0x00, 0x01) for session in sessions for _ in xrange(requests)]
+
+        errors = []
+        succeeded = 0
+        for request in pending:
+            try:
+                response = request.result()
+                if 'error' in response:
+                    raise ValueError(response['error'])
+                succeeded += 1
+            except Exception as e:
+                errors.append(e)
+        elapsed = time.time() - start
+
+        for session in sessions:
+            session.logout()
+        return elapsed, 1, succeeded, errors
+    finally:
+        transport.close()
+
+
+def report(label, result):
+    elapsed, threads, succeeded, errors = result
+    print '  {:<12} {:>8.2f} s {:>10.1f} cmd/s {:>6} thread(s) {:>6} error(s)'.format(
+        label, elapsed, succeeded / elapsed, threads, len(errors))
+    if errors:
+        print '    first error: {!r}'.format(errors[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IPMI transport benchmark')
+    parser.add_argument('--bmcs', nargs='+', default=['ipmi-emulator:623'], help='BMC host:port to target')
+    parser.add_argument('--sessions', nargs='+', type=int, default=[10, 100, 500], help='simulated BMC counts')
+    parser.add_argument('--requests', type=int, default=5, help='commands issued per simulated BMC')
+    parser.add_argument('--password', default='ADMIN', help='BMC password')
+    parser.add_argument('--timeout', type=int, default=120, help='seconds to wait for pyghmi to complete')
+    parser.add_argument('--max-in-flight', type=int, default=1, help='max commands in flight per BMC')
+    args = parser.parse_args()
+
+    for sessions in args.sessions:
+        targets = get_targets(args.bmcs, sessions)
+        print '{} BMC session(s), {} command(s) each:'.format(sessions, args.requests)
+        # the transport is run first, so that any pyghmi threads which have not
+        # completed within the timeout do not load the BMCs while it runs
+        report('transport', bench_transport(targets, args.requests, args.password, args.max_in_flight))
+        report('pyghmi', bench_pyghmi(targets, args.requests, args.password, args.timeout))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+""" Micro-benchmark for the PLC devicebus packet codec.
+
+    Compares the struct/bytearray based DeviceBusPacket serialize/deserialize
+    against the list-based implementation it replaced (reproduced below), for a
+    handful of representative packet sizes.
+
+    To Run:  From the repository root,
+                PYTHONPATH=.:./opendcre_southbound python tools/plc_codec_benchmark.py [iterations]
+
+    \\//
+     \/apor IO
+
+-------------------------------
+Copyright (C) 2015-17  Vapor IO
+
+This file is part of OpenDCRE.
+
+OpenDCRE is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 2 of the License, or
+(at your option) any later version.
+
+OpenDCRE is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with OpenDCRE.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import sys
+import timeit
+
+from opendcre_southbound.devicebus.devices.plc.plc_bus import DeviceBusPacket
+from opendcre_southbound.utils import (
+    board_id_to_bytes,
+    device_id_to_bytes,
+    board_id_join_bytes,
+    device_id_join_bytes
+)
+
+
+def list_generate_checksum(sequence, device_type, board_id, device_id, data):
+    """ List-based checksum generation (previous implementation).
+    """
+    board_id_bytes = board_id_to_bytes(board_id)
+    device_id_bytes = device_id_to_bytes(device_id)
+
+    checksum = sequence + device_type + sum(board_id_bytes) + sum(device_id_bytes)
+    for x in data:
+        checksum = checksum + x
+    return ((~checksum) + 1) & 0xFF
+
+
+def list_serialize(packet):
+    """ List-based packet serialization (previous implementation).
+    """
+    length = 9 + len(packet.data)
+    board_id_bytes = board_id_to_bytes(packet.board_id)
+    device_id_bytes = device_id_to_bytes(packet.device_id)
+    checksum = list_generate_checksum(packet.sequence, packet.device_type, board_id_bytes, device_id_bytes,
+                                      packet.data)
+    serialized = [0x01, length, packet.sequence, packet.device_type, board_id_bytes[0], board_id_bytes[1],
+                  board_id_bytes[2], board_id_bytes[3], device_id_bytes[0], device_id_bytes[1]]
+    append = serialized.append
+    for x in packet.data:
+        append(x)
+    append(checksum)
+    append(0x04)
+    return serialized
+
+
+def list_deserialize(packet, packet_bytes):
+    """ List-based packet deserialization (previous implementation).
+    """
+    packet.sequence = packet_bytes[2]
+    packet.device_type = packet_bytes[3]
+    packet.board_id = board_id_join_bytes(packet_bytes[4:8])
+    packet.device_id = device_id_join_bytes(packet_bytes[8:10])
+    packet.data = [x for x in packet_bytes[10:len(packet_bytes) - 2]]
+    check = list_generate_checksum(packet.sequence, packet.device_type, packet.board_id, packet.device_id,
+                                   packet.data)
+    if check != packet_bytes[len(packet_bytes) - 2]:
+        raise ValueError('Invalid checksum in incoming packet.')
+
+
+def bench(label, fn, iterations):
+    """ Time the given function and print the per-call cost.
+    """
+    elapsed = min(timeit.repeat(fn, number=iterations, repeat=3))
+    print '  {:<32} {:>8.2f} us/op'.format(label, elapsed / iterations * 1e6)
+    return elapsed
+
+
+def main(iterations):
+    for data_length in (1, 8, 32):
+        packet = DeviceBusPacket(
+            sequence=0x2a,
+            device_type=0x10,
+            board_id=0x01000002,
+            device_id=0x0203,
+            data=[0x41 + (i % 26) for i in range(data_length)]
+        )
+        raw_list = packet.serialize()
+        raw_bytes = packet.to_bytes()
+        raw_str = str(raw_bytes)
+        target = DeviceBusPacket()
+
+        assert list_serialize(packet) == raw_list
+
+        print 'packet with {} data byte(s):'.format(data_length)
+        old = bench('serialize (list)', lambda: list_serialize(packet), iterations)
+        bench('serialize (struct, list out)', packet.serialize, iterations)
+        new = bench('serialize (struct, bytearray)', packet.to_bytes, iterations)
+        print '  {:<32} {:>8.1f}x'.format('speedup', old / new)
+
+        old = bench('deserialize (list)', lambda: list_deserialize(target, raw_list), iterations)
+        bench('deserialize (struct, list in)', lambda: target.deserialize(raw_list), iterations)
+        bench('deserialize (struct, str in)', lambda: target.deserialize(raw_str), iterations)
+        new = bench('deserialize (struct, bytearray)', lambda: target.deserialize(raw_bytes), iterations)
+        print '  {:<32} {:>8.1f}x'.format('speedup', old / new)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)